@@ -3,6 +3,9 @@ __version__ = '0.4.1'
 import json
 import os
 import warnings
+
+from ._lazy import lazy_module_attributes as _lazy_module_attributes
+
 warnings.simplefilter('default', DeprecationWarning)
 warnings.simplefilter('ignore', ImportWarning)
 
@@ -18,49 +21,41 @@ __DEBUG_MODE = False
 
 
 def _determine_backends():
+    """
+    Determines the available backends. If a ``.delira`` config file exists
+    next to the package, the backends are read from it (which allows to
+    disable installed backends). Otherwise all possible backends are
+    searched without actually importing them
+
+    """
 
     _config_file = __file__.replace("__init__.py", ".delira")
-    # look for config file to determine backend
-    # if file exists: load config into environment variables
 
-    if not os.path.isfile(_config_file):
+    if os.path.isfile(_config_file):
+        # set values from config file to variable
+        with open(_config_file) as f:
+            _backends = json.load(f)["backend"]
+
+    else:
         _backends = {}
-        # try to import all possible backends to determine valid backends
 
-        import importlib
+        import importlib.util
         for curr_backend in __POSSIBLE_BACKENDS:
-            try:
-                assert len(curr_backend) == 2
-                assert all([isinstance(_tmp, str) for _tmp in curr_backend]), \
-                    "All entries in current backend must be strings"
-
-                # check if backend can be imported
-                bcknd = importlib.util.find_spec(curr_backend[0])
+            assert len(curr_backend) == 2
+            assert all([isinstance(_tmp, str) for _tmp in curr_backend]), \
+                "All entries in current backend must be strings"
 
-                if bcknd is not None:
-                    _backends[curr_backend[1]] = True
-                else:
-                    _backends[curr_backend[1]] = False
-                del bcknd
+            # check if backend can be imported (without importing it)
+            try:
+                _backends[curr_backend[1]] = importlib.util.find_spec(
+                    curr_backend[0]) is not None
 
             except ValueError:
                 _backends[curr_backend[1]] = False
 
-        with open(_config_file, "w") as f:
-            json.dump({"version": __version__, "backend": _backends},
-                      f, sort_keys=True, indent=4)
-
-        del _backends
-
-    # set values from config file to variable
-    with open(_config_file) as f:
-        _config_dict = json.load(f)
-    for key, val in _config_dict.pop("backend").items():
+    for key, val in _backends.items():
         if val:
             __BACKENDS.append(key.upper())
-    del _config_dict
-
-    del _config_file
 
 
 def get_backends():
@@ -121,3 +116,12 @@ def set_debug_mode(mode: bool):
     """
     global __DEBUG_MODE
     __DEBUG_MODE = mode
+
+
+# subpackages are imported on first access (e.g. ``delira.training``) to keep
+# ``import delira`` lightweight
+_SUBPACKAGES = ["data_loading", "io", "logging", "models", "training",
+                "utils"]
+
+__getattr__, __dir__ = _lazy_module_attributes(
+    __name__, {_name: ("." + _name, None) for _name in _SUBPACKAGES})
@@ -0,0 +1,64 @@
+import importlib
+import sys
+
+
+def lazy_module_attributes(module_name, attributes, eager=None):
+    """
+    Creates the module-level ``__getattr__`` and ``__dir__`` functions
+    (see PEP 562), which import the given attributes on first access instead
+    of importing them together with the module. This avoids importing heavy
+    dependencies (like the backends) until they are actually needed.
+
+    Since module-level ``__getattr__`` functions are only supported since
+    Python 3.7, the attributes are imported immediately on older versions.
+
+    Parameters
+    ----------
+    module_name : str
+        the name of the module to create the functions for (usually
+        ``__name__``)
+    attributes : dict
+        mapping from the attribute's name to a tuple containing the name of
+        the module defining it (relative to the module's package) and the
+        attribute's name inside this module; if the attribute's name is None,
+        the module itself is returned
+    eager : bool or None
+        whether to import all attributes immediately; if None: only on
+        Python versions without support for module-level ``__getattr__``
+
+    Returns
+    -------
+    function
+        the module's ``__getattr__`` function
+    function
+        the module's ``__dir__`` function
+
+    """
+
+    def __getattr__(name):
+        try:
+            submodule, attr = attributes[name]
+        except KeyError:
+            raise AttributeError("module %r has no attribute %r"
+                                 % (module_name, name))
+
+        module = sys.modules[module_name]
+        value = importlib.import_module(submodule, module.__package__)
+        if attr is not None:
+            value = getattr(value, attr)
+
+        # cache the value, so that __getattr__ is only called once per name
+        setattr(module, name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[module_name])) | set(attributes))
+
+    if eager is None:
+        eager = sys.version_info < (3, 7)
+
+    if eager:
+        for name in attributes:
+            __getattr__(name)
+
+    return __getattr__, __dir__
@@ -0,0 +1,18 @@
+from delira._lazy import lazy_module_attributes
+
+# the benchmarks are imported on first access to avoid importing the data
+# loading and training packages together with this package
+_LAZY_ATTRIBUTES = {
+    "create_synthetic_data": (".synthetic", "create_synthetic_data"),
+    "load_synthetic_sample": (".synthetic", "load_synthetic_sample"),
+    "benchmark_sampler": (".suite", "benchmark_sampler"),
+    "benchmark_data_manager": (".suite", "benchmark_data_manager"),
+    "benchmark_predictor": (".suite", "benchmark_predictor"),
+    "benchmark_trainer": (".suite", "benchmark_trainer"),
+    "benchmark_gan_step": (".suite", "benchmark_gan_step"),
+    "default_configurations": (".suite", "default_configurations"),
+    "run_benchmarks": (".suite", "run_benchmarks"),
+    "compare_results": (".suite", "compare_results"),
+}
+
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_ATTRIBUTES)
@@ -0,0 +1,70 @@
+import argparse
+import json
+import logging
+import tempfile
+
+from .suite import compare_results, run_benchmarks
+
+
+def main(args=None):
+    """
+    Runs the benchmark suite from the command line and writes the results as
+    JSON file, which can be compared to the results of another commit
+
+    Parameters
+    ----------
+    args : list of str or None
+        the command line arguments; if None: ``sys.argv`` will be parsed
+
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m delira.benchmarks",
+        description="Benchmarks delira's data loading and training "
+                    "throughput")
+    parser.add_argument("--output", default="benchmark_results.json",
+                        help="the file to write the results to")
+    parser.add_argument("--data-dir", default=None,
+                        help="the directory to write the synthetic data to "
+                             "(defaults to a temporary directory)")
+    parser.add_argument("--filter", default=None,
+                        help="shell-style pattern selecting the benchmarks "
+                             "by name (e.g. 'data_manager/*')")
+    parser.add_argument("--quick", action="store_true",
+                        help="run a reduced set of small configurations")
+    parser.add_argument("--compare", default=None,
+                        help="results of a previous run to compare with")
+    args = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.INFO)
+
+    data_dir = args.data_dir
+    if data_dir is None:
+        data_dir = tempfile.mkdtemp(prefix="delira_benchmarks_")
+
+    results = run_benchmarks(data_dir, quick=args.quick, pattern=args.filter)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+
+    for result in results["results"]:
+        stats = result["stats"]
+        print("%-45s %12s samples/s  p50 %8s ms" % (
+            result["name"], _format(stats.get("samples_per_sec")),
+            _format(stats.get("latency", {}).get("p50_ms"))))
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        print("\nChange of samples/s compared to %s:" % args.compare)
+        for name, old, new, change in compare_results(baseline, results):
+            print("%-45s %12s -> %12s  (%+.1f%%)" % (
+                name, _format(old), _format(new), 100 * (change or 0)))
+
+
+def _format(value):
+    return "-" if value is None else "%.2f" % value
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,678 @@
+import datetime
+import fnmatch
+import inspect
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+import numpy as np
+
+from delira import get_backends, __version__
+from ..data_loading import AbstractDataset, BaseCacheDataset, \
+    BaseDataManager, BaseLazyDataset
+from ..data_loading import sampler as _sampler
+from .synthetic import create_synthetic_data, load_synthetic_sample
+
+logger = logging.getLogger(__name__)
+
+SAMPLERS = {
+    "sequential": _sampler.SequentialSampler,
+    "random": _sampler.RandomSampler,
+    "prevalence_random": _sampler.PrevalenceRandomSampler,
+    "weighted_prevalence": _sampler.WeightedPrevalenceRandomSampler,
+}
+
+DATASETS = {
+    "cache": BaseCacheDataset,
+    "lazy": BaseLazyDataset,
+}
+
+SHAPES = {
+    2: (64, 64),
+    3: (32, 32, 32),
+}
+
+
+class _MemoryMonitor(object):
+    """
+    Tracks the peak resident memory of the current process and all of its
+    children (e.g. the augmentation processes)
+
+    """
+
+    def __init__(self):
+        import psutil
+        self._process = psutil.Process()
+        self._psutil = psutil
+        self.peak = 0
+        self.update()
+
+    def update(self):
+        """
+        Samples the current memory usage and updates the peak
+
+        """
+        rss = self._process.memory_info().rss
+        for child in self._process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except self._psutil.Error:
+                # child terminated in the meantime
+                pass
+
+        self.peak = max(self.peak, rss)
+
+    @contextmanager
+    def sampling(self, interval=0.05):
+        """
+        Samples the memory usage periodically in a background thread while
+        the context is active (e.g. during code, which doesn't allow to
+        call :meth:`update` itself)
+
+        Parameters
+        ----------
+        interval : float
+            the time between two samples (in seconds)
+
+        """
+        stopped = threading.Event()
+
+        def _sample():
+            while not stopped.wait(interval):
+                self.update()
+
+        thread = threading.Thread(target=_sample, daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stopped.set()
+            thread.join()
+            self.update()
+
+    @property
+    def peak_mb(self):
+        return self.peak / 2 ** 20
+
+
+def _latency_stats(latencies):
+    """
+    Computes the statistics of the measured latencies
+
+    Parameters
+    ----------
+    latencies : list of float
+        the latencies in seconds
+
+    Returns
+    -------
+    dict
+        mean, median, 90th and 99th percentile and maximum in milliseconds
+
+    """
+    latencies = np.asarray(latencies) * 1000
+    if not latencies.size:
+        return {}
+
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {"mean_ms": float(latencies.mean()), "p50_ms": float(p50),
+            "p90_ms": float(p90), "p99_ms": float(p99),
+            "max_ms": float(latencies.max())}
+
+
+def _time_batches(iterator, num_batches, batch_size, memory=None):
+    """
+    Measures the latency of each batch, the time to the first batch and the
+    throughput of an iterator
+
+    Parameters
+    ----------
+    iterator : iterator
+        the iterator to measure (should be created directly before calling
+        this function to capture its startup time)
+    num_batches : int or None
+        the maximum number of batches to draw; if None: the iterator will be
+        exhausted
+    batch_size : int
+        the number of samples per batch
+    memory : :class:`_MemoryMonitor` or None
+        monitor to update after each batch
+
+    Returns
+    -------
+    dict
+        the measured statistics
+
+    """
+    latencies = []
+    start = time.perf_counter()
+    last = start
+
+    while num_batches is None or len(latencies) < num_batches:
+        try:
+            next(iterator)
+        except StopIteration:
+            break
+
+        now = time.perf_counter()
+        latencies.append(now - last)
+        last = now
+
+        if memory is not None:
+            memory.update()
+
+    total = last - start
+    num_samples = len(latencies) * batch_size
+
+    # the first batch contains the startup (e.g. of the worker processes)
+    return {"startup_s": latencies[0] if latencies else None,
+            "num_batches": len(latencies),
+            "samples_per_sec": num_samples / total if total > 0 else None,
+            "latency": _latency_stats(latencies[1:])}
+
+
+class _LabelDataset(AbstractDataset):
+    """
+    In-memory dataset containing only labels (to benchmark samplers)
+
+    """
+
+    def __init__(self, num_samples, num_classes=2, seed=0):
+        super().__init__(None, None)
+        self.data = [{"label": label} for label in
+                     np.random.RandomState(seed).randint(num_classes,
+                                                         size=num_samples)]
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+
+def benchmark_sampler(sampler="random", num_samples=100000, batch_size=64,
+                      num_batches=1000):
+    """
+    Measures how fast a sampler generates batches of indices
+
+    Parameters
+    ----------
+    sampler : str
+        the sampler's name (see ``SAMPLERS``)
+    num_samples : int
+        the number of samples in the dataset
+    batch_size : int
+        the number of indices per batch
+    num_batches : int
+        the number of batches to sample
+
+    Returns
+    -------
+    dict
+        the measured statistics
+
+    """
+    dataset = _LabelDataset(num_samples)
+
+    start = time.perf_counter()
+    sampler_obj = SAMPLERS[sampler].from_dataset(dataset)
+    setup_time = time.perf_counter() - start
+
+    def _sample():
+        while True:
+            yield sampler_obj(batch_size)
+
+    result = _time_batches(_sample(), num_batches, batch_size)
+    result["setup_s"] = setup_time
+    return result
+
+
+def benchmark_data_manager(data_dir, dataset="lazy", ndim=2,
+                           num_samples=256, n_process_augmentation=1,
+                           sampler="random", batch_size=16, num_batches=32,
+                           start_method=None):
+    """
+    Measures the loading throughput, batch latency, startup time and peak
+    memory of a :class:`BaseDataManager` loading a synthetic dataset from
+    disk
+
+    Parameters
+    ----------
+    data_dir : str
+        the directory to write the synthetic data to
+    dataset : str
+        'cache' or 'lazy'
+    ndim : int
+        the number of spatial dimensions (2 or 3)
+    num_samples : int
+        the number of samples in the dataset
+    n_process_augmentation : int
+        the number of augmentation processes
+    sampler : str
+        the sampler's name (see ``SAMPLERS``)
+    batch_size : int
+        the batch size
+    num_batches : int
+        the number of batches to load
+    start_method : str or None
+        the start method of the augmentation processes
+
+    Returns
+    -------
+    dict
+        the measured statistics
+
+    """
+    paths = create_synthetic_data(
+        os.path.join(data_dir, "synthetic_%dd_%d" % (ndim, num_samples)),
+        num_samples, SHAPES[ndim])
+
+    memory = _MemoryMonitor()
+
+    start = time.perf_counter()
+    dset = DATASETS[dataset](paths, load_synthetic_sample)
+    manager = BaseDataManager(dset, batch_size, n_process_augmentation,
+                              transforms=None, sampler_cls=SAMPLERS[sampler],
+                              start_method=start_method)
+    dataset_time = time.perf_counter() - start
+
+    batchgen = manager.get_batchgen()
+    try:
+        result = _time_batches(batchgen, num_batches, batch_size, memory)
+    finally:
+        batchgen._finish()
+
+    result["dataset_setup_s"] = dataset_time
+    result["peak_rss_mb"] = memory.peak_mb
+    return result
+
+
+def _build_torch_network(ndim):
+    """
+    Creates a small convolutional classification network
+
+    Parameters
+    ----------
+    ndim : int
+        the number of spatial dimensions
+
+    Returns
+    -------
+    :class:`AbstractPyTorchNetwork`
+        the network
+
+    """
+    import torch
+    from ..models.classification import ClassificationNetworkBasePyTorch
+
+    conv_cls = torch.nn.Conv2d if ndim == 2 else torch.nn.Conv3d
+    pool_cls = torch.nn.AdaptiveAvgPool2d if ndim == 2 \
+        else torch.nn.AdaptiveAvgPool3d
+
+    class BenchmarkNetwork(ClassificationNetworkBasePyTorch):
+        def forward(self, x):
+            return {"pred": self.module(x)}
+
+        @staticmethod
+        def _build_model(in_channels, n_outputs, **kwargs):
+            return torch.nn.Sequential(
+                conv_cls(in_channels, 16, 3, padding=1), torch.nn.ReLU(),
+                conv_cls(16, 16, 3, padding=1), torch.nn.ReLU(),
+                pool_cls(1), torch.nn.Flatten(),
+                torch.nn.Linear(16, n_outputs))
+
+        @staticmethod
+        def prepare_batch(batch_dict, input_device, output_device):
+            return {"data": torch.from_numpy(batch_dict["data"]).to(
+                input_device, torch.float),
+                "label": torch.from_numpy(batch_dict["label"]).to(
+                output_device, torch.float)}
+
+    return BenchmarkNetwork(1, 1)
+
+
+def benchmark_predictor(data_dir, ndim=2, num_samples=128, batch_size=16):
+    """
+    Measures the throughput and batch latency of a :class:`Predictor`
+    predicting a synthetic dataset with a small PyTorch network
+
+    Parameters
+    ----------
+    data_dir : str
+        the directory to write the synthetic data to
+    ndim : int
+        the number of spatial dimensions
+    num_samples : int
+        the number of samples in the dataset
+    batch_size : int
+        the batch size
+
+    Returns
+    -------
+    dict
+        the measured statistics
+
+    """
+    import torch
+    from ..training import Predictor
+    from ..training.train_utils import convert_torch_tensor_to_npy
+
+    paths = create_synthetic_data(
+        os.path.join(data_dir, "synthetic_%dd_%d" % (ndim, num_samples)),
+        num_samples, SHAPES[ndim])
+
+    network = _build_torch_network(ndim).eval()
+    device = torch.device("cpu")
+    predictor = Predictor(
+        network, key_mapping={"x": "data"},
+        convert_batch_to_npy_fn=convert_torch_tensor_to_npy,
+        prepare_batch_fn=partial(network.prepare_batch, input_device=device,
+                                 output_device=device))
+
+    manager = BaseDataManager(
+        BaseCacheDataset(paths, load_synthetic_sample), batch_size, 1,
+        transforms=None)
+
+    # the whole dataset is predicted, since the predictor only stops its
+    # augmentation processes after the last batch
+    memory = _MemoryMonitor()
+    with torch.no_grad():
+        result = _time_batches(
+            predictor.predict_data_mgr(manager, batch_size), None,
+            batch_size, memory)
+
+    result["peak_rss_mb"] = memory.peak_mb
+    return result
+
+
+def benchmark_trainer(data_dir, ndim=2, num_samples=128, batch_size=16,
+                      n_process_augmentation=1, num_epochs=1):
+    """
+    Measures the training throughput of the
+    :class:`PyTorchNetworkTrainer` on a synthetic dataset with a small
+    network
+
+    Parameters
+    ----------
+    data_dir : str
+        the directory to write the synthetic data and checkpoints to
+    ndim : int
+        the number of spatial dimensions
+    num_samples : int
+        the number of samples in the dataset
+    batch_size : int
+        the batch size
+    n_process_augmentation : int
+        the number of augmentation processes
+    num_epochs : int
+        the number of epochs to train
+
+    Returns
+    -------
+    dict
+        the measured statistics
+
+    """
+    import tempfile
+    import torch
+    from ..training import PyTorchNetworkTrainer
+
+    paths = create_synthetic_data(
+        os.path.join(data_dir, "synthetic_%dd_%d" % (ndim, num_samples)),
+        num_samples, SHAPES[ndim])
+
+    manager = BaseDataManager(
+        BaseCacheDataset(paths, load_synthetic_sample), batch_size,
+        n_process_augmentation, transforms=None)
+
+    memory = _MemoryMonitor()
+
+    start = time.perf_counter()
+    trainer = PyTorchNetworkTrainer(
+        _build_torch_network(ndim),
+        tempfile.mkdtemp(dir=data_dir),
+        losses={"CE": torch.nn.BCEWithLogitsLoss()},
+        optimizer_cls=torch.optim.Adam, optimizer_params={"lr": 1e-3},
+        key_mapping={"x": "data"}, save_freq=num_epochs + 1)
+    setup_time = time.perf_counter() - start
+
+    with memory.sampling():
+        start = time.perf_counter()
+        trainer.train(num_epochs, manager, None, verbose=False)
+        total = time.perf_counter() - start
+
+    return {"startup_s": setup_time,
+            "samples_per_sec": num_epochs * manager.n_samples / total,
+            "epoch_s": total / num_epochs,
+            "peak_rss_mb": memory.peak_mb}
+
+
+def benchmark_gan_step(fused_step=False, n_critic=1, n_gen=1,
+                       batch_size=16, noise_length=100, num_steps=20):
+    """
+    Measures the training step throughput of the
+    :class:`GenerativeAdversarialNetworkBasePyTorch` on random images
+    (without data loading)
+
+    Parameters
+    ----------
+    fused_step : bool
+        whether to train with the fused closure
+    n_critic : int
+        number of discriminator updates per cycle (fused closure only)
+    n_gen : int
+        number of generator updates per cycle (fused closure only)
+    batch_size : int
+        the batch size
+    noise_length : int
+        the length of the generator's noise vector
+    num_steps : int
+        the number of timed training steps (after one warmup step)
+
+    Returns
+    -------
+    dict
+        the measured statistics
+
+    """
+    import torch
+    from ..models.gan import GenerativeAdversarialNetworkBasePyTorch
+    from ..training.train_utils import create_optims_gan_default_pytorch
+    from ..utils.context_managers import DefaultOptimWrapperTorch
+
+    model = GenerativeAdversarialNetworkBasePyTorch(
+        1, noise_length, fused_step=fused_step, n_critic=n_critic,
+        n_gen=n_gen)
+    optimizers = {key: DefaultOptimWrapperTorch(optim)
+                  for key, optim in create_optims_gan_default_pytorch(
+                      model, torch.optim.Adam).items()}
+    losses = {"BCE": torch.nn.BCELoss()}
+    batch = torch.rand(batch_size, 1, 64, 64)
+
+    def _steps():
+        while True:
+            model.closure(model, {"data": batch}, optimizers, losses)
+            yield None
+
+    iterator = _steps()
+    # warmup
+    next(iterator)
+
+    result = _time_batches(iterator, num_steps, batch_size)
+    result["steps_per_sec"] = result["samples_per_sec"] / batch_size
+    return result
+
+
+def default_configurations(quick=False):
+    """
+    Returns the default benchmark configurations
+
+    Parameters
+    ----------
+    quick : bool
+        whether to return a reduced set of small configurations (e.g. for
+        smoke tests)
+
+    Returns
+    -------
+    list of tuple
+        the name, the benchmark function and its keyword arguments for each
+        configuration
+
+    """
+    scale = 4 if quick else 1
+    configurations = []
+
+    for sampler in SAMPLERS:
+        configurations.append((
+            "sampler/%s" % sampler, benchmark_sampler,
+            {"sampler": sampler, "num_samples": 100000 // scale,
+             "num_batches": 1000 // scale}))
+
+    for ndim in (2, 3):
+        for dataset in DATASETS:
+            for n_process in ((1,) if quick else (1, 2, 4)):
+                for sampler in (("random",) if quick
+                                else ("sequential", "random")):
+                    configurations.append((
+                        "data_manager/%dd/%s/%dproc/%s" % (
+                            ndim, dataset, n_process, sampler),
+                        benchmark_data_manager,
+                        {"ndim": ndim, "dataset": dataset,
+                         "n_process_augmentation": n_process,
+                         "sampler": sampler,
+                         "num_samples": 256 // scale,
+                         "num_batches": 32 // scale}))
+
+    if "TORCH" in get_backends():
+        for ndim in (2, 3):
+            configurations.append((
+                "predictor/torch/%dd" % ndim, benchmark_predictor,
+                {"ndim": ndim, "num_samples": 128 // scale}))
+            configurations.append((
+                "trainer/torch/%dd" % ndim, benchmark_trainer,
+                {"ndim": ndim, "num_samples": 128 // scale}))
+
+        configurations.append((
+            "gan/torch/default", benchmark_gan_step,
+            {"num_steps": 20 // scale}))
+        for n_critic, n_gen in ((1, 1), (5, 1)):
+            configurations.append((
+                "gan/torch/fused/%dcritic_%dgen" % (n_critic, n_gen),
+                benchmark_gan_step,
+                {"fused_step": True, "n_critic": n_critic, "n_gen": n_gen,
+                 "num_steps": 20 // scale}))
+
+    return configurations
+
+
+def _git_revision():
+    """
+    Returns the current git commit of delira's source (if available)
+
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(data_dir, configurations=None, quick=False,
+                   pattern=None):
+    """
+    Runs the benchmarks and collects their results
+
+    Parameters
+    ----------
+    data_dir : str
+        the directory to write the synthetic data to
+    configurations : list or None
+        the configurations to run (see :func:`default_configurations`); if
+        None: the default configurations will be used
+    quick : bool
+        whether to run the reduced default configurations
+    pattern : str or None
+        shell-style pattern to select the configurations to run by name
+
+    Returns
+    -------
+    dict
+        the environment's metadata ('metadata') and the results of all
+        configurations ('results'); each result contains the name, the
+        configuration and the measured statistics
+
+    """
+    if configurations is None:
+        configurations = default_configurations(quick)
+
+    results = []
+    for name, fn, kwargs in configurations:
+        if pattern is not None and not fnmatch.fnmatch(name, pattern):
+            continue
+
+        logger.info("Running benchmark %s" % name)
+        call_kwargs = dict(kwargs)
+        if "data_dir" in inspect.signature(fn).parameters:
+            call_kwargs["data_dir"] = data_dir
+
+        try:
+            stats = fn(**call_kwargs)
+            error = None
+        except Exception as e:
+            logger.exception("Benchmark %s failed" % name)
+            stats, error = {}, repr(e)
+
+        results.append({"name": name, "config": kwargs, "stats": stats,
+                        "error": error})
+
+    return {"metadata": {"delira_version": __version__,
+                         "git_revision": _git_revision(),
+                         "python_version": platform.python_version(),
+                         "platform": platform.platform(),
+                         "cpu_count": os.cpu_count(),
+                         "backends": get_backends(),
+                         "argv": sys.argv,
+                         "timestamp": datetime.datetime.now().isoformat()},
+            "results": results}
+
+
+def compare_results(baseline, current, key="samples_per_sec"):
+    """
+    Compares a statistic of two benchmark runs
+
+    Parameters
+    ----------
+    baseline : dict
+        the results of the baseline run (see :func:`run_benchmarks`)
+    current : dict
+        the results of the current run
+    key : str
+        the statistic to compare
+
+    Returns
+    -------
+    list of tuple
+        the name, the baseline value, the current value and the relative
+        change for each benchmark contained in both runs
+
+    """
+    baseline_stats = {result["name"]: result["stats"].get(key)
+                      for result in baseline["results"]}
+
+    comparison = []
+    for result in current["results"]:
+        old = baseline_stats.get(result["name"])
+        new = result["stats"].get(key)
+        if old is None or new is None:
+            continue
+
+        comparison.append((result["name"], old, new,
+                           (new - old) / old if old else None))
+
+    return comparison
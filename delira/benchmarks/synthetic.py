@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+
+
+def create_synthetic_data(root, num_samples, shape, num_classes=2, seed=0):
+    """
+    Writes a synthetic dataset to disk. Each sample is saved as
+    uncompressed ``.npz`` file containing a random float32 image of the given
+    shape (with a leading channel dimension) and a random label
+
+    Parameters
+    ----------
+    root : str
+        the directory to write the samples to (existing samples are reused)
+    num_samples : int
+        the number of samples
+    shape : tuple
+        the spatial shape of each image (2D or 3D)
+    num_classes : int
+        the number of classes to draw the labels from
+    seed : int
+        the seed to generate the data
+
+    Returns
+    -------
+    list of str
+        the paths of all samples
+
+    """
+    os.makedirs(root, exist_ok=True)
+    rng = np.random.RandomState(seed)
+
+    paths = []
+    for idx in range(num_samples):
+        path = os.path.join(root, "sample_%06d.npz" % idx)
+        paths.append(path)
+
+        if os.path.isfile(path):
+            continue
+
+        np.savez(path,
+                 data=rng.rand(1, *shape).astype(np.float32),
+                 label=np.array([rng.randint(num_classes)]))
+
+    return paths
+
+
+def load_synthetic_sample(path):
+    """
+    Loads a single sample written by :func:`create_synthetic_data`
+
+    Parameters
+    ----------
+    path : str
+        the sample's path
+
+    Returns
+    -------
+    dict
+        the sample containing the keys 'data' and 'label'
+
+    """
+    with np.load(path) as sample:
+        return {"data": sample["data"], "label": sample["label"]}
@@ -1,17 +1,32 @@
 
 from delira import get_backends
-from .data_loader import BaseDataLoader
-from .data_manager import BaseDataManager
-from .dataset import AbstractDataset, BaseCacheDataset, BaseLazyDataset, \
-    ConcatDataset, BaseExtendCacheDataset
-from .load_utils import default_load_fn_2d, LoadSample, LoadSampleLabel
-from .sampler import LambdaSampler, \
-    WeightedRandomSampler, \
-    PrevalenceRandomSampler, \
-    RandomSampler, \
-    StoppingPrevalenceSequentialSampler, \
-    SequentialSampler
+from delira._lazy import lazy_module_attributes
 from .sampler import __all__ as __all_sampling
 
+# the actual classes are imported on first access to avoid importing their
+# (heavy) dependencies together with the package
+_LAZY_ATTRIBUTES = {
+    "BaseDataLoader": (".data_loader", "BaseDataLoader"),
+    "BaseDataManager": (".data_manager", "BaseDataManager"),
+    "AbstractDataset": (".dataset", "AbstractDataset"),
+    "BaseCacheDataset": (".dataset", "BaseCacheDataset"),
+    "BaseLazyDataset": (".dataset", "BaseLazyDataset"),
+    "ConcatDataset": (".dataset", "ConcatDataset"),
+    "BaseExtendCacheDataset": (".dataset", "BaseExtendCacheDataset"),
+    "BasePatchDataset": (".dataset", "BasePatchDataset"),
+    "ForegroundCropDataset": (".dataset", "ForegroundCropDataset"),
+    "default_load_fn_2d": (".load_utils", "default_load_fn_2d"),
+    "LoadSample": (".load_utils", "LoadSample"),
+    "LoadSampleLabel": (".load_utils", "LoadSampleLabel"),
+    "load_npy_mmap": (".load_utils", "load_npy_mmap"),
+    "load_npy_sample": (".load_utils", "load_npy_sample"),
+    "DatasetStatistics": (".statistics", "DatasetStatistics"),
+}
+_LAZY_ATTRIBUTES.update({_name: (".sampler", _name)
+                         for _name in __all_sampling})
+
 if "TORCH" in get_backends():
-    from .dataset import TorchvisionClassificationDataset
+    _LAZY_ATTRIBUTES["TorchvisionClassificationDataset"] = (
+        ".dataset", "TorchvisionClassificationDataset")
+
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_ATTRIBUTES)
@@ -3,6 +3,7 @@ import numpy as np
 from batchgenerators.dataloading.data_loader import SlimDataLoaderBase
 from queue import Empty
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -55,8 +56,20 @@ class BaseDataLoader(SlimDataLoaderBase):
 
         self.num_batches = num_batches
         self._seed = seed
+        self._worker_pid = None
         np.random.seed(seed)
 
+    def worker_init(self):
+        """
+        Initializes the dataloader inside the current process by opening the
+        dataset's resources (see :meth:`AbstractDataset.open`). Is called
+        once per process before loading the first batch
+
+        """
+        self._worker_pid = os.getpid()
+        if hasattr(self._data, "open"):
+            self._data.open()
+
     def generate_train_batch(self):
         """
         Generate Indices which behavior based on self.sampling gets data based
@@ -73,12 +86,21 @@ class BaseDataLoader(SlimDataLoaderBase):
             If the maximum number of batches has been generated
         """
 
+        # resources opened by another process must not be reused
+        if self._worker_pid != os.getpid():
+            self.worker_init()
+
         idxs = None
         sampler_queue = self.sampler_queues[self.thread_id]
         while idxs is None:
             try:
                 idxs = sampler_queue.get(timeout=0.2)
 
+                # datasets supporting batched access load all samples at
+                # once, unless a subclass customizes the loading of samples
+                if self._use_batched_access():
+                    return self._data.get_batch(idxs)
+
                 result = [self._get_sample(_idx) for _idx in idxs]
 
                 result_dict = {}
@@ -99,6 +121,21 @@ class BaseDataLoader(SlimDataLoaderBase):
             except Empty:
                 pass
 
+    def _use_batched_access(self):
+        """
+        Whether to load batches by the dataset's ``get_batch`` (see
+        :attr:`AbstractDataset.supports_batched_access`). Batched access is
+        not used, if :meth:`_get_sample` is overwritten by a subclass
+
+        Returns
+        -------
+        bool
+            whether to use batched access
+
+        """
+        return getattr(self._data, "supports_batched_access", False) \
+            and type(self)._get_sample is BaseDataLoader._get_sample
+
     def _get_sample(self, index):
         """
         Helper functions which returns an element of the dataset
@@ -1,23 +1,140 @@
+import copy
 import inspect
 import logging
+import multiprocessing
+import pickle
+import threading
 
 from batchgenerators.dataloading import MultiThreadedAugmenter, \
     SingleThreadedAugmenter, SlimDataLoaderBase
 from batchgenerators.transforms import AbstractTransform
 
-from multiprocessing import Queue
-from queue import Full
+from queue import Full, Queue as ThreadQueue
 
 from delira import get_current_debug_mode
 from .data_loader import BaseDataLoader
 from .dataset import AbstractDataset, BaseCacheDataset, BaseLazyDataset
 from .load_utils import default_load_fn_2d
-from .sampler import SequentialSampler, AbstractSampler
+from .sampler import SequentialSampler, AbstractSampler, ShardedSampler
+from .worker import thread_limited_environ, worker_loop
 from ..utils.decorators import make_deprecated
 
 logger = logging.getLogger(__name__)
 
 
+class _BootstrappedAugmenter(MultiThreadedAugmenter):
+    """
+    ``MultiThreadedAugmenter`` starting its processes with a given start
+    method (e.g. ``spawn`` or ``forkserver``) via a lightweight entry point
+    (see :func:`delira.data_loading.worker.worker_loop`). The processes
+    don't inherit the main process' memory (and therefore the complete
+    training stack including the backends) and receive the dataloader
+    pickled only once
+
+    """
+
+    def __init__(self, data_loader, transform, num_processes,
+                 start_method="spawn", num_threads=1, **kwargs):
+        """
+
+        Parameters
+        ----------
+        data_loader : :class:`BaseDataLoader`
+            the dataloader providing the actual data
+        transform : Callable or None
+            the transforms to use
+        num_processes : int
+            the number of processes to use for augmentation
+        start_method : str
+            the multiprocessing start method
+        num_threads : int or None
+            the maximum number of threads of the numerical libraries per
+            process; if None: the threads are not limited
+        **kwargs :
+            additional keyword arguments passed to the
+            ``MultiThreadedAugmenter``
+
+        """
+        super().__init__(data_loader, transform, num_processes, **kwargs)
+        self._ctx = multiprocessing.get_context(start_method)
+        self._num_threads = num_threads
+
+        # the fork server should only preload the lightweight entry point
+        # instead of the main module
+        if start_method == "forkserver":
+            self._ctx.set_forkserver_preload([worker_loop.__module__])
+        # synchronization primitives must be created by the same context as
+        # the processes
+        self.abort_event = self._ctx.Event()
+
+    def _pickle_data_loader(self):
+        """
+        Pickles the dataloader without its sampler queues, which can only be
+        passed to processes during their creation
+
+        Returns
+        -------
+        bytes
+            the pickled dataloader
+        list or None
+            the dataloader's sampler queues
+
+        """
+        sampler_queues = getattr(self.generator, "sampler_queues", None)
+        if sampler_queues is not None:
+            self.generator.sampler_queues = None
+
+        try:
+            payload = pickle.dumps(self.generator,
+                                   protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            if sampler_queues is not None:
+                self.generator.sampler_queues = sampler_queues
+
+        return payload, sampler_queues
+
+    def _start(self):
+        if len(self._processes) != 0:
+            logger.debug("Augmenter workers are already running")
+            return
+
+        self.abort_event.clear()
+        self._queue_loop = 0
+        self._end_ctr = 0
+
+        if hasattr(self.generator, "was_initialized"):
+            self.generator.was_initialized = False
+
+        payload, sampler_queues = self._pickle_data_loader()
+
+        # processes inherit the environment during their creation
+        with thread_limited_environ(self._num_threads):
+            for idx in range(self.num_processes):
+                self._queues.append(
+                    self._ctx.Queue(self.num_cached_per_queue))
+                process = self._ctx.Process(
+                    target=worker_loop,
+                    args=(self._queues[idx], payload, sampler_queues,
+                          self.transform, idx, self.seeds[idx],
+                          self.abort_event, self._num_threads))
+                process.daemon = True
+                process.start()
+                self._processes.append(process)
+
+        if getattr(self, "pin_memory", False):
+            import torch
+            from batchgenerators.dataloading.multi_threaded_augmenter \
+                import pin_memory_loop
+            self.pin_memory_queue = ThreadQueue(2)
+            self.pin_memory_thread = threading.Thread(
+                target=pin_memory_loop,
+                args=(self._queues, self.pin_memory_queue,
+                      self.pin_memory_abort_event,
+                      torch.cuda.current_device()))
+            self.pin_memory_thread.daemon = True
+            self.pin_memory_thread.start()
+
+
 class Augmenter(object):
     """
     Class wrapping ``MultiThreadedAugmentor`` and ``SingleThreadedAugmenter``
@@ -28,7 +145,8 @@ class Augmenter(object):
 
     def __init__(self, data_loader: BaseDataLoader, transforms,
                  n_process_augmentation, sampler, sampler_queues: list,
-                 num_cached_per_queue=2, seeds=None, **kwargs):
+                 num_cached_per_queue=2, seeds=None, start_method=None,
+                 **kwargs):
         """
 
         Parameters
@@ -51,6 +169,13 @@ class Augmenter(object):
             debug mode)
         seeds : int or list
             the seeds for each process (only necessary if not in debug mode)
+        start_method : str or None
+            the multiprocessing start method for the augmentation processes
+            (only necessary if not in debug mode). If None: the processes are
+            forked by the ``MultiThreadedAugmenter``; otherwise they are
+            started with the given method (e.g. 'spawn' or 'forkserver') via
+            a lightweight entry point, which avoids inheriting or
+            re-importing the complete training stack
         **kwargs :
             additional keyword arguments
         """
@@ -76,7 +201,13 @@ class Augmenter(object):
                 for idx in range(len(seeds)):
                     seeds[idx] = seeds[idx] + idx
 
-            augmenter = MultiThreadedAugmenter(
+            if start_method is None:
+                augmenter_cls = MultiThreadedAugmenter
+            else:
+                augmenter_cls = _BootstrappedAugmenter
+                kwargs["start_method"] = start_method
+
+            augmenter = augmenter_cls(
                 data_loader, transforms,
                 num_processes=n_process_augmentation,
                 num_cached_per_queue=num_cached_per_queue,
@@ -99,6 +230,20 @@ class Augmenter(object):
         """
         return self
 
+    @property
+    def sampler(self):
+        """
+        Property to access the sampler, which determines the indices of the
+        next batches
+
+        Returns
+        -------
+        :class:`AbstractSampler`
+            the sampler
+
+        """
+        return self._sampler
+
     def _next_queue(self):
         idx = self._queue_id
         self._queue_id = (self._queue_id + 1) % len(self._sampler_queues)
@@ -278,7 +423,8 @@ class BaseDataManager(object):
                  transforms, sampler_cls=SequentialSampler,
                  sampler_kwargs=None,
                  data_loader_cls=None, dataset_cls=None,
-                 load_fn=default_load_fn_2d, from_disc=True, **kwargs):
+                 load_fn=default_load_fn_2d, from_disc=True,
+                 start_method=None, **kwargs):
         """
 
         Parameters
@@ -304,6 +450,10 @@ class BaseDataManager(object):
             function to load simple sample
         from_disc : bool
             whether or not to load data from disc just the time it is needed
+        start_method : str or None
+            the multiprocessing start method for the augmentation processes
+            (e.g. 'spawn' or 'forkserver'); if None: the processes are forked
+            (see :class:`Augmenter` for details)
         **kwargs :
             other keyword arguments (needed for dataloading and passed to
             dataset_cls)
@@ -331,9 +481,11 @@ class BaseDataManager(object):
         self._data_loader_cls = None
         self._dataset = None
         self._sampler = None
+        self._start_method = None
 
         # set actual values to properties
         self.batch_size = batch_size
+        self.start_method = start_method
 
         self.n_process_augmentation = n_process_augmentation
         self.transforms = transforms
@@ -395,9 +547,10 @@ class BaseDataManager(object):
         assert self.n_batches > 0
 
         sampler_queues = []
+        ctx = multiprocessing.get_context(self.start_method)
 
         for idx in range(self.n_process_augmentation):
-            sampler_queues.append(Queue())
+            sampler_queues.append(ctx.Queue())
 
         data_loader = self.data_loader_cls(
             self.dataset,
@@ -412,7 +565,8 @@ class BaseDataManager(object):
                          sampler=self.sampler,
                          sampler_queues=sampler_queues,
                          num_cached_per_queue=2,
-                         seeds=self.n_process_augmentation * [seed])
+                         seeds=self.n_process_augmentation * [seed],
+                         start_method=self.start_method)
 
     def get_subset(self, indices):
         """
@@ -430,20 +584,87 @@ class BaseDataManager(object):
 
         """
 
-        subset_kwargs = {
-            "batch_size": self.batch_size,
-            "n_process_augmentation": self.n_process_augmentation,
-            "transforms": self.transforms,
-            "sampler_cls": self.sampler.__class__,
-            "data_loader_cls": self.data_loader_cls,
-            "dataset_cls": None,
-            "load_fn": None,
-            "from_disc": True
-        }
+        return self._manager_from_subset(self.dataset.get_subset(indices))
+
+    def _manager_from_subset(self, dataset):
+        """
+        Creates a manager with the same configuration as the current manager
+        for a subset of its dataset (a sharded manager is sharded the same
+        way)
+
+        Parameters
+        ----------
+        dataset : :class:`AbstractDataset`
+            the subset
+
+        Returns
+        -------
+        :class:`BaseDataManager`
+            manager containing the subset
+
+        """
+        sampler = self.sampler
+        shard_kwargs = None
+        if isinstance(sampler, ShardedSampler):
+            shard_kwargs = sampler.shard_kwargs
+            sampler = sampler.sampler
+
+        manager = self.__class__(
+            dataset,
+            batch_size=self.batch_size,
+            n_process_augmentation=self.n_process_augmentation,
+            transforms=self.transforms,
+            sampler_cls=sampler.__class__,
+            data_loader_cls=self.data_loader_cls,
+            dataset_cls=None,
+            load_fn=None,
+            from_disc=True,
+            start_method=self.start_method)
+
+        if shard_kwargs is not None:
+            manager = manager.shard(**shard_kwargs)
+        return manager
+
+    def shard(self, num_replicas, rank, seed=0, drop_last=False, pad=True):
+        """
+        Returns a copy of the current datamanager, which samples only the
+        shard of the indices belonging to the given rank (e.g. for
+        data-parallel training or evaluation across multiple processes or
+        nodes)
 
-        return self.__class__(
-            self.dataset.get_subset(indices),
-            **subset_kwargs)
+        Parameters
+        ----------
+        num_replicas : int
+            the number of ranks the indices are distributed across
+        rank : int
+            the current rank
+        seed : int
+            the base seed for generating the index stream; must be the same
+            for all ranks
+        drop_last : bool
+            whether to drop or to pad the last indices to obtain the same
+            number of indices for all ranks
+        pad : bool
+            whether to pad the indices (only used if ``drop_last`` is False);
+            if False: each index is sampled exactly once (e.g. for
+            evaluation), but the number of indices may differ between ranks
+
+        Returns
+        -------
+        :class:`BaseDataManager`
+            manager sampling the shard of the given rank
+
+        See Also
+        --------
+        :class:`delira.data_loading.sampler.ShardedSampler`
+
+        """
+        sharded = copy.copy(self)
+        sharded.sampler = ShardedSampler(copy.deepcopy(self.sampler),
+                                         num_replicas=num_replicas,
+                                         rank=rank, seed=seed,
+                                         drop_last=drop_last, pad=pad)
+        return sharded
 
     def update_state_from_dict(self, new_state: dict):
         """
@@ -462,6 +683,7 @@ class BaseDataManager(object):
                 * ``sampler``
                 * ``sampling_kwargs``
                 * ``transforms``
+                * ``start_method``
 
             If a key is not specified, the old value of the corresponding
             attribute will be used
@@ -488,6 +710,7 @@ class BaseDataManager(object):
                 self.dataset,
                 **new_state.pop("sampling_kwargs", {}))
         self.transforms = new_state.pop("transforms", self.transforms)
+        self.start_method = new_state.pop("start_method", self.start_method)
 
         if new_state:
             raise KeyError("Invalid Keys in new_state given: %s"
@@ -515,21 +738,8 @@ class BaseDataManager(object):
 
         trainset, valset = self.dataset.train_test_split(*args, **kwargs)
 
-        subset_kwargs = {
-            "batch_size": self.batch_size,
-            "n_process_augmentation": self.n_process_augmentation,
-            "transforms": self.transforms,
-            "sampler_cls": self.sampler.__class__,
-            "data_loader_cls": self.data_loader_cls,
-            "dataset_cls": None,
-            "load_fn": None,
-            "from_disc": True
-        }
-
-        train_mgr = self.__class__(trainset, **subset_kwargs)
-        val_mgr = self.__class__(valset, **subset_kwargs)
-
-        return train_mgr, val_mgr
+        return (self._manager_from_subset(trainset),
+                self._manager_from_subset(valset))
 
     @property
     def batch_size(self):
@@ -591,6 +801,47 @@ class BaseDataManager(object):
 
         self._n_process_augmentation = int(new_process_number)
 
+    @property
+    def start_method(self):
+        """
+        Property to access the multiprocessing start method of the
+        augmentation processes
+
+        Returns
+        -------
+        str or None
+            the start method (None if the processes are forked by the
+            ``MultiThreadedAugmenter``)
+        """
+
+        return self._start_method
+
+    @start_method.setter
+    def start_method(self, new_start_method):
+        """
+        Setter for the multiprocessing start method of the augmentation
+        processes
+
+        Parameters
+        ----------
+        new_start_method : str or None
+            the new start method
+
+        Raises
+        ------
+        ValueError
+            the start method is not available on the current platform
+
+        """
+
+        if new_start_method is not None and new_start_method \
+                not in multiprocessing.get_all_start_methods():
+            raise ValueError("Invalid start method %s. Valid start methods "
+                             "are: %s" % (new_start_method, ", ".join(
+                                 multiprocessing.get_all_start_methods())))
+
+        self._start_method = new_start_method
+
     @property
     def transforms(self):
         """
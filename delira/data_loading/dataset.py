@@ -1,16 +1,25 @@
 import abc
+import copy
+import json
+import logging
 import os
+import shutil
 import typing
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-from skimage.transform import resize
-from sklearn.model_selection import train_test_split
 from tqdm import tqdm
 
 from delira import get_backends
-from ..utils import subdirs
+from .load_utils import load_npy_mmap, load_npy_sample
+from ..utils.path import subdirs
 from ..utils.decorators import make_deprecated
 
+logger = logging.getLogger(__name__)
+
+# version of the settings sidecar written by :class:`ForegroundCropDataset`
+CROP_CACHE_VERSION = 1
+
 
 class AbstractDataset:
     """
@@ -18,6 +27,10 @@ class AbstractDataset:
 
     """
 
+    # whether the data loader should load whole batches by ``get_batch``
+    # instead of loading each sample separately
+    supports_batched_access = False
+
     def __init__(self, data_path: str, load_fn: typing.Callable):
         """
 
@@ -79,6 +92,37 @@ class AbstractDataset:
         """
         return len(self.data)
 
+    def get_batch(self, indices):
+        """
+        Returns multiple samples at once (the entries are stacked along a new
+        first axis). Only used by the data loader if
+        ``supports_batched_access`` is set, which subclasses should do, if
+        they can load a batch more efficiently than its single samples
+
+        Parameters
+        ----------
+        indices : iterable of int
+            the indices of the samples
+
+        Returns
+        -------
+        dict
+            the batch
+
+        """
+        samples = [self[idx] for idx in indices]
+        return {key: np.asarray([sample[key] for sample in samples])
+                for key in samples[0].keys()}
+
+    def open(self):
+        """
+        Hook to open resources, which cannot be shared across processes (like
+        file handles). Called once in each process loading samples from this
+        dataset before the first sample is loaded. Does nothing by default
+
+        """
+        pass
+
     def __iter__(self):
         """
         Return an iterator for the dataset
@@ -145,6 +189,7 @@ class AbstractDataset:
                 kwargs[key] = val
 
         kwargs["old_getitem"] = self.__class__.__getitem__
+        kwargs["old_open"] = self.__class__.open
         subset_data = [self.get_sample_from_index(idx) for idx in indices]
 
         return BlankDataset(subset_data, **kwargs)
@@ -177,6 +222,8 @@ class AbstractDataset:
 
         """
 
+        from sklearn.model_selection import train_test_split
+
         train_idxs, test_idxs = train_test_split(
             np.arange(len(self)), *args, **kwargs)
 
@@ -218,7 +265,7 @@ class BlankDataset(AbstractDataset):
 
     """
 
-    def __init__(self, data, old_getitem, **kwargs):
+    def __init__(self, data, old_getitem, old_open=None, **kwargs):
         """
 
         Parameters
@@ -227,6 +274,8 @@ class BlankDataset(AbstractDataset):
             data to load
         old_getitem : function
             get item method of previous dataset
+        old_open : function or None
+            open method of previous dataset
         **kwargs :
             additional keyword arguments (are set as class attribute)
 
@@ -235,10 +284,19 @@ class BlankDataset(AbstractDataset):
 
         self.data = data
         self._old_getitem = old_getitem
+        self._old_open = old_open
 
         for key, val in kwargs.items():
             setattr(self, key, val)
 
+    def open(self):
+        """
+        opens the resources via the ``open`` method of the previous dataset
+
+        """
+        if self._old_open is not None:
+            self._old_open(self)
+
     def __getitem__(self, index):
         """
         returns single sample corresponding to ``index`` via the ``_sample_fn``
@@ -573,10 +631,550 @@ class ConcatDataset(AbstractDataset):
     def __getitem__(self, index):
         return self.get_sample_from_index(index)
 
+    def open(self):
+        for dset in self.data:
+            dset.open()
+
     def __len__(self):
         return sum([len(dset) for dset in self.data])
 
 
+class BasePatchDataset(AbstractDataset):
+    """
+    Dataset to load patches of (large) volumes in a lazy way.
+
+    Only the volume metadata (spatial shapes and spacings) is indexed on
+    construction, while the data itself is read on access. Each access reads
+    only the region covered by the requested patch, which requires the
+    volumes to be stored in a format supporting partial reads (e.g.
+    uncompressed ``.npy`` files which are memory-mapped by
+    :func:`load_npy_mmap` or chunked stores).
+
+    The indices for this dataset are tuples of ``(volume_index,
+    patch_origin)`` which are typically drawn by a
+    :class:`delira.data_loading.sampler.PatchSampler`
+
+    """
+
+    def __init__(self, data_path: typing.Union[str, list], patch_size,
+                 sample_ext: dict, load_fn=load_npy_mmap,
+                 foreground_key=None, foreground_threshold=0,
+                 max_foreground_coords=10000, spacing_fn=None, pad_value=0,
+                 return_coords=False):
+        """
+
+        Parameters
+        ----------
+        data_path : str or list
+            if data_path is a string, each directory inside the specified
+            directory is treated as a single volume.
+            if data_path is a list, each element specifies the directory of a
+            single volume
+        patch_size : iterable of int
+            the spatial size of the patches to load
+        sample_ext : dict of iterable
+            Defines the files of each volume. The dict key defines the
+            position of the patch inside the returned data dict, while the
+            list defines the files which will be stacked as channels.
+            All files of a volume must have the same spatial shape
+        load_fn : function
+            function to open a single file without reading the data. Must
+            return an object supporting numpy-like slicing and having a
+            ``shape`` attribute (e.g. a memory-mapped array);
+            default: :func:`load_npy_mmap`
+        foreground_key : str or None
+            key of ``sample_ext`` defining the foreground (e.g. the
+            segmentation). If given, the coordinates of foreground voxels are
+            indexed once to allow foreground-biased sampling
+        foreground_threshold : int or float
+            voxels with values greater than this threshold are treated as
+            foreground
+        max_foreground_coords : int
+            maximum number of foreground coordinates to keep per volume (to
+            limit the memory consumption of the index)
+        spacing_fn : function or None
+            function returning the spacing for a given volume directory; if
+            None: a spacing of 1 is assumed for all dimensions
+        pad_value : int or float
+            value to pad patches with, if they exceed the volume's borders
+        return_coords : bool
+            whether to also return the volume index and the patch origin
+            inside the data dict (e.g. for stitching predictions)
+
+        """
+        super().__init__(data_path, load_fn)
+
+        self.patch_size = np.asarray(patch_size, dtype=np.int64)
+        self._sample_ext = sample_ext
+        self._spacing_fn = spacing_fn
+        self._pad_value = pad_value
+        self._return_coords = return_coords
+        self._handles = {}
+
+        self.data = self._make_dataset(data_path)
+
+        self.shapes, self.spacings = self._index_metadata(self.data)
+
+        self.foreground_coords = None
+        if foreground_key is not None:
+            self.foreground_coords = self._index_foreground(
+                foreground_key, foreground_threshold, max_foreground_coords)
+
+    def _make_dataset(self, path: typing.Union[str, list]):
+        """
+        Helper Function to make a dataset containing the directories of all
+        volumes
+
+        Parameters
+        ----------
+        path : str or list
+            path to volume directories
+
+        Returns
+        -------
+        list
+            list of volume directories
+
+        Raises
+        ------
+        AssertionError
+            if `path` is not a list and is not a valid directory
+
+        """
+        if isinstance(path, list):
+            data = list(path)
+        else:
+            assert os.path.isdir(path), '%s is not a valid directory' % path
+            data = subdirs(path)
+        return data
+
+    def _open(self, volume_path, file_name):
+        """
+        Opens a single file (without reading it's data) and caches the
+        handle for the current process
+
+        Parameters
+        ----------
+        volume_path : str
+            the volume directory
+        file_name : str
+            the file to open
+
+        Returns
+        -------
+        Any
+            the handle returned by ``load_fn``
+
+        """
+        path = os.path.join(volume_path, file_name)
+        handle = self._handles.get(path, None)
+        if handle is None:
+            handle = self._load_fn(path)
+            self._handles[path] = handle
+        return handle
+
+    def _index_metadata(self, volume_paths):
+        """
+        Indexes the spatial shapes and spacings of all volumes
+
+        Parameters
+        ----------
+        volume_paths : list
+            the volume directories
+
+        Returns
+        -------
+        np.ndarray
+            the spatial shapes (one row per volume)
+        np.ndarray
+            the spacings (one row per volume)
+
+        """
+        first_file = next(iter(self._sample_ext.values()))[0]
+        shapes = np.array([self._open(p, first_file).shape
+                           for p in volume_paths], dtype=np.int64)
+        shapes = shapes.reshape(len(volume_paths), len(self.patch_size))
+
+        if self._spacing_fn is None:
+            spacings = np.ones(shapes.shape, dtype=np.float64)
+        else:
+            spacings = np.array([self._spacing_fn(p) for p in volume_paths],
+                                dtype=np.float64).reshape(shapes.shape)
+
+        # don't keep handles of the indexing process
+        self._handles = {}
+        return shapes, spacings
+
+    def _index_foreground(self, foreground_key, threshold, max_coords):
+        """
+        Indexes (a random subset of) the foreground coordinates of each
+        volume
+
+        Parameters
+        ----------
+        foreground_key : str
+            key of ``sample_ext`` defining the foreground
+        threshold : int or float
+            voxels with values greater than this threshold are treated as
+            foreground
+        max_coords : int
+            maximum number of coordinates per volume
+
+        Returns
+        -------
+        list
+            list containing an array of foreground coordinates per volume
+
+        """
+        fg_file = self._sample_ext[foreground_key][0]
+        coords = []
+        for volume_path in tqdm(self.data, unit='volumes',
+                                desc="Indexing foreground"):
+            fg = np.asarray(self._load_fn(os.path.join(volume_path, fg_file)))
+            _coords = np.argwhere(fg > threshold)
+            if len(_coords) > max_coords:
+                _coords = _coords[np.random.choice(len(_coords), max_coords,
+                                                   replace=False)]
+            coords.append(_coords)
+        return coords
+
+    def _read_patch(self, volume_path, file_name, volume_shape, origin):
+        """
+        Reads the region covered by a single patch from a file and pads it
+        if necessary
+
+        Parameters
+        ----------
+        volume_path : str
+            the volume directory
+        file_name : str
+            the file to read from
+        volume_shape : np.ndarray
+            the spatial shape of the volume
+        origin : np.ndarray
+            the patch origin (may be negative or exceed the volume)
+
+        Returns
+        -------
+        np.ndarray
+            the patch
+
+        """
+        handle = self._open(volume_path, file_name)
+
+        start = np.maximum(origin, 0)
+        stop = np.minimum(origin + self.patch_size, volume_shape)
+
+        region = np.asarray(handle[tuple(slice(_start, _stop) for
+                                         _start, _stop in zip(start, stop))])
+
+        if region.shape == tuple(self.patch_size):
+            return region
+
+        patch = np.full(self.patch_size, self._pad_value, dtype=region.dtype)
+        dst_start = start - origin
+        patch[tuple(slice(_start, _start + _size) for _start, _size
+                    in zip(dst_start, region.shape))] = region
+        return patch
+
+    def __getitem__(self, index):
+        """
+        load the patch specified by index
+
+        Parameters
+        ----------
+        index : tuple or int
+            tuple of ``(volume_index, patch_origin)``. If only an integer is
+            given, the patch is loaded from the center of the volume
+
+        Returns
+        -------
+        dict
+            the loaded patch
+
+        """
+        if isinstance(index, (tuple, list)):
+            volume_idx, origin = index
+        else:
+            volume_idx = index
+            origin = (self.shapes[index] - self.patch_size) // 2
+
+        volume_idx = int(volume_idx)
+        origin = np.asarray(origin, dtype=np.int64)
+        volume_path = self.get_sample_from_index(volume_idx)
+        volume_shape = self.shapes[volume_idx]
+
+        data_dict = {}
+        for key, files in self._sample_ext.items():
+            data_dict[key] = np.stack([
+                self._read_patch(volume_path, f, volume_shape, origin)
+                for f in files])
+
+        if self._return_coords:
+            data_dict["volume_index"] = np.array([volume_idx])
+            data_dict["patch_origin"] = origin
+
+        return data_dict
+
+    def get_subset(self, indices):
+        """
+        Returns a Subset of the current dataset based on given volume indices
+
+        Parameters
+        ----------
+        indices : iterable
+            valid volume indices to extract subset from current dataset
+
+        Returns
+        -------
+        :class:`BasePatchDataset`
+            the subset
+
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+
+        subset = copy.copy(self)
+        subset._handles = {}
+        subset.data = [self.data[idx] for idx in indices]
+        subset.shapes = self.shapes[indices]
+        subset.spacings = self.spacings[indices]
+        if self.foreground_coords is not None:
+            subset.foreground_coords = [self.foreground_coords[idx]
+                                        for idx in indices]
+        return subset
+
+    def __getstate__(self):
+        # handles are process-specific and pickling memory-mapped arrays
+        # would copy all of their data
+        state = vars(self).copy()
+        state["_handles"] = {}
+        return state
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+
+
+class ForegroundCropDataset(BaseLazyDataset):
+    """
+    Dataset cropping each sample of another dataset to the bounding box of
+    its foreground (plus a margin) once. The cropped samples are cached as
+    directories of uncompressed ``.npy`` files (see
+    :func:`load_npy_sample`), which are memory-mapped on access, so every
+    epoch only loads the cropped data.
+
+    The foreground is defined by an entry with a leading channel axis (e.g.
+    the segmentation); all arrays whose trailing axes match its spatial shape
+    are cropped, while all other entries are stored unchanged. The cache is
+    reused as long as the crop settings and the number of samples match the
+    ``crop.json`` sidecar inside the cache directory; after changing the
+    underlying data, the cache has to be rebuilt with ``overwrite=True``.
+
+    """
+
+    def __init__(self, dataset, cache_dir, foreground_key="seg", margin=0,
+                 threshold=0, bbox_key="bbox", mmap_mode='r', n_workers=None,
+                 overwrite=False):
+        """
+
+        Parameters
+        ----------
+        dataset : :class:`AbstractDataset`
+            the dataset to crop (only accessed while building the cache)
+        cache_dir : str
+            the directory to store the cropped samples in
+        foreground_key : str
+            the sample's entry defining the foreground (first axis is the
+            channel axis)
+        margin : int or tuple of int
+            margin added to each side of the bounding box (or per spatial
+            dimension)
+        threshold : int or float
+            values greater than this threshold are treated as foreground
+        bbox_key : str or None
+            the entry to store the bounding box in (as array of the start
+            and stop index per spatial dimension, e.g. to restore the
+            original shape of predictions); if None: the bounding box is not
+            stored
+        mmap_mode : str or None
+            the mode to memory-map the cached arrays with; if None: the
+            arrays are read into memory on access
+        n_workers : int or None
+            number of threads cropping samples concurrently; if None: the
+            samples are cropped sequentially
+        overwrite : bool
+            whether to rebuild the cache even if it is valid
+
+        """
+        self._settings = {"version": CROP_CACHE_VERSION,
+                          "foreground_key": foreground_key,
+                          "margin": np.atleast_1d(margin).tolist(),
+                          "threshold": threshold,
+                          "bbox_key": bbox_key,
+                          "num_samples": len(dataset)}
+
+        self._build_cache(dataset, cache_dir, n_workers, overwrite)
+
+        super().__init__(cache_dir, load_npy_sample, mmap_mode=mmap_mode)
+
+    def _sample_dir(self, cache_dir, index):
+        return os.path.join(cache_dir, "%06d" % index)
+
+    def _build_cache(self, dataset, cache_dir, n_workers, overwrite):
+        """
+        Crops and stores all samples, which are not cached yet
+
+        Parameters
+        ----------
+        dataset : :class:`AbstractDataset`
+            the dataset to crop
+        cache_dir : str
+            the directory to store the cropped samples in
+        n_workers : int or None
+            number of threads cropping samples concurrently
+        overwrite : bool
+            whether to rebuild the whole cache
+
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        settings_file = os.path.join(cache_dir, "crop.json")
+
+        # without matching settings (e.g. after changing them or an
+        # interrupted run) the cached samples can't be trusted
+        if os.path.isfile(settings_file):
+            with open(settings_file) as f:
+                if json.load(f) != self._settings:
+                    overwrite = True
+        else:
+            overwrite = True
+
+        if overwrite:
+            if os.path.isfile(settings_file):
+                os.remove(settings_file)
+            for file in os.listdir(cache_dir):
+                if file.isdigit():
+                    shutil.rmtree(os.path.join(cache_dir, file))
+
+        indices = [idx for idx in range(len(dataset))
+                   if not os.path.isdir(self._sample_dir(cache_dir, idx))]
+
+        def _crop(idx):
+            self._store_sample(self._crop_sample(dataset[idx]),
+                               self._sample_dir(cache_dir, idx))
+
+        if indices:
+            logger.info("Cropping %d of %d samples"
+                        % (len(indices), len(dataset)))
+
+        if n_workers is None or n_workers <= 1:
+            for idx in tqdm(indices, unit='samples', desc="Cropping samples"):
+                _crop(idx)
+        else:
+            with ThreadPoolExecutor(n_workers) as executor:
+                list(executor.map(_crop, indices))
+
+        tmp_file = settings_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self._settings, f, indent=4)
+        os.replace(tmp_file, settings_file)
+
+    def _crop_sample(self, sample: dict):
+        """
+        Crops all spatial entries of a single sample to its foreground
+
+        Parameters
+        ----------
+        sample : dict
+            the sample
+
+        Returns
+        -------
+        dict
+            the cropped sample
+
+        """
+        # imported here to avoid importing SimpleITK with this module
+        from ..utils.imageops import bounding_box_array
+
+        mask = np.asarray(sample[self._settings["foreground_key"]]) > \
+            self._settings["threshold"]
+        mask = mask.any(axis=0)
+        spatial_shape = mask.shape
+
+        bbox = bounding_box_array(mask, self._settings["margin"])
+        if bbox is None:
+            logger.warning("Sample without foreground is not cropped")
+            bbox = [(0, size - 1) for size in spatial_shape]
+
+        slices = tuple(slice(lower, upper + 1) for lower, upper in bbox)
+
+        cropped = {}
+        for key, val in sample.items():
+            if isinstance(val, np.ndarray) and \
+                    val.shape[-len(spatial_shape):] == spatial_shape:
+                val = val[(Ellipsis,) + slices]
+            cropped[key] = val
+
+        if self._settings["bbox_key"] is not None:
+            cropped[self._settings["bbox_key"]] = np.array(
+                [[_slice.start, _slice.stop] for _slice in slices],
+                dtype=np.int64)
+
+        return cropped
+
+    @staticmethod
+    def _store_sample(sample: dict, sample_dir):
+        """
+        Stores a sample as directory of ``.npy`` files (and a ``meta.json``
+        for all other entries). The directory is written to a temporary
+        location first, so only complete samples are cached
+
+        Parameters
+        ----------
+        sample : dict
+            the sample
+        sample_dir : str
+            the directory to store the sample in
+
+        """
+        tmp_dir = sample_dir + ".tmp"
+        if os.path.isdir(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+
+        meta = {}
+        for key, val in sample.items():
+            if isinstance(val, (np.ndarray, np.generic)):
+                np.save(os.path.join(tmp_dir, "%s.npy" % key),
+                        np.ascontiguousarray(val))
+            else:
+                meta[key] = val
+
+        if meta:
+            with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+                json.dump(meta, f)
+
+        os.replace(tmp_dir, sample_dir)
+
+    def _make_dataset(self, path: str):
+        """
+        Helper Function to make a dataset containing the directories of all
+        cached samples
+
+        Parameters
+        ----------
+        path : str
+            the cache directory
+
+        Returns
+        -------
+        list
+            list of sample directories
+
+        """
+        return [self._sample_dir(path, idx)
+                for idx in range(self._settings["num_samples"])]
+
+
 class Nii3DLazyDataset(BaseLazyDataset):
     """
        Dataset to load 3D medical images (e.g. from .nii files) during training
@@ -698,19 +1296,24 @@ class Nii3DCacheDatset(BaseCacheDataset):
 
 if "TORCH" in get_backends():
 
-    from torchvision.datasets import CIFAR10, CIFAR100, EMNIST, MNIST, \
-        FashionMNIST
-    import torch
-
     class TorchvisionClassificationDataset(AbstractDataset):
         """
         Wrapper for torchvision classification datasets to provide consistent
         API
 
+        Resizing the images is expensive, so the resized images can be cached
+        as one contiguous array, either in memory (all images are resized at
+        construction) or in a memory-mapped file (each image is resized on its
+        first access). Batches of samples can be accessed at once by passing
+        a sequence of indices (see :meth:`get_batch`)
+
         """
 
+        supports_batched_access = True
+
         def __init__(self, dataset, root="/tmp/", train=True, download=True,
-                     img_shape=(28, 28), one_hot=False, **kwargs):
+                     img_shape=(28, 28), one_hot=False, cache=None,
+                     cache_dir=None, cache_dtype=np.float32, **kwargs):
             """
 
             Parameters
@@ -731,13 +1334,55 @@ if "TORCH" in get_backends():
                 it won't be downloaded again)
             img_shape : tuple
                 Height and width of output images (will be interpolated)
+            one_hot : bool
+                whether to return the labels in one-hot format
+            cache : str or None
+                how to cache the resized images; must be one of
+
+                    * None: the images are resized on each access
+                    * 'memory': all images are resized at construction and
+                      kept in memory
+                    * 'memmap': the images are resized on their first access
+                      and stored in a memory-mapped file inside
+                      ``cache_dir``, which is shared by all processes (and
+                      reused by later runs)
+
+            cache_dir : str or None
+                the directory to store the memory-mapped cache in; if None:
+                ``root`` will be used
+            cache_dtype : np.dtype
+                the dtype of the cached images; ``np.uint8`` reduces the
+                cache's size by a factor of four (the resized images are
+                quantized to multiples of 1/255)
             **kwargs :
                 Additional keyword arguments passed to the torchvision dataset
                 class for initialization
 
+            Raises
+            ------
+            ValueError
+                if ``cache`` or ``cache_dtype`` are invalid or if the
+                'memmap' cache is combined with a ``transform``
+
             """
             super().__init__("", None)
 
+            if cache not in (None, "memory", "memmap"):
+                raise ValueError("Invalid cache: %s. Must be one of "
+                                 "[None, 'memory', 'memmap']" % str(cache))
+
+            cache_dtype = np.dtype(cache_dtype)
+            if cache_dtype not in (np.uint8, np.float32):
+                raise ValueError("Invalid cache_dtype: %s. Must be one of "
+                                 "['uint8', 'float32']" % cache_dtype.name)
+
+            # the transformed images are cached, but a transform can't be
+            # identified reliably (and may be random), so a cache file could
+            # be reused for different transforms
+            if cache == "memmap" and kwargs.get("transform") is not None:
+                raise ValueError("The 'memmap' cache can't be used together "
+                                 "with a transform")
+
             self.download = download
             self.train = train
             self.root = root
@@ -746,6 +1391,28 @@ if "TORCH" in get_backends():
             self.one_hot = one_hot
             self.data = self._make_dataset(dataset, **kwargs)
 
+            self.cache = cache
+            self._cache_dtype = cache_dtype
+            self._images = None
+            self._filled = None
+            self._cache_file = None
+
+            self._labels = self._make_labels()
+
+            if cache == "memory":
+                self._images = self._resize_all()
+
+            elif cache == "memmap":
+                if cache_dir is None:
+                    cache_dir = root
+                name = [dataset.lower(), "train" if train else "test"]
+                if "split" in kwargs:
+                    name.append(str(kwargs["split"]))
+                name += ["x".join(str(_size) for _size in img_shape),
+                         cache_dtype.name]
+                self._cache_file = os.path.join(cache_dir, "_".join(name))
+                self._create_memmap()
+
         def _make_dataset(self, dataset, **kwargs):
             """
             Create the actual dataset
@@ -771,6 +1438,9 @@ if "TORCH" in get_backends():
                 Dataset string does not specify a valid dataset
 
             """
+            from torchvision.datasets import CIFAR10, CIFAR100, EMNIST, \
+                MNIST, FashionMNIST
+
             if dataset.lower() == "mnist":
                 _dataset_cls = MNIST
                 self.num_classes = 10
@@ -792,87 +1462,291 @@ if "TORCH" in get_backends():
             return _dataset_cls(root=self.root, train=self.train,
                                 download=self.download, **kwargs)
 
-        def __getitem__(self, index):
+        @staticmethod
+        def _make_onehot(num_classes, labels):
             """
-            return data sample specified by index
+            Function that converts label-encoding to one-hot format.
+
+            Parameters
+            ----------
+            num_classes : int
+                number of classes present in the dataset
+            labels : np.ndarray
+                labels in label-encoding format
+
+            Returns
+            -------
+            np.ndarray
+                labels in one-hot format (with an additional last axis)
+
+            """
+            # TODO: Remove and refer to batchgenerators transform:
+            #  https://github.com/MIC-DKFZ/batchgenerators/blob/master/
+            #  batchgenerators/transforms/utility_transforms.py#L97
+            labels = np.asarray(labels)
+            return np.eye(num_classes, dtype=labels.dtype)[
+                labels.astype(np.int64)]
+
+        def _make_labels(self):
+            """
+            Converts the labels of all samples at once (if the torchvision
+            dataset provides them as ``targets``)
+
+            Returns
+            -------
+            np.ndarray or None
+                the labels of all samples (of shape ``(N, 1)`` or ``(N,
+                num_classes)`` in one-hot format)
+
+            """
+            import torch
+
+            targets = getattr(self.data, "targets", None)
+            if targets is None or getattr(self.data, "target_transform",
+                                          None) is not None:
+                return None
+
+            if isinstance(targets, torch.Tensor):
+                targets = targets.numpy()
+            labels = np.asarray(targets).reshape(-1, 1).astype(np.float32)
+
+            if self.one_hot:
+                labels = self._make_onehot(self.num_classes, labels[:, 0])
+            return labels
+
+        def _get_labels(self, indices):
+            """
+            Returns the labels of multiple samples
+
+            Parameters
+            ----------
+            indices : np.ndarray
+                the indices of the samples
+
+            Returns
+            -------
+            np.ndarray
+                the labels
+
+            """
+            import torch
+
+            if self._labels is not None:
+                return self._labels[indices]
+
+            labels = []
+            for idx in indices:
+                label = self.data[idx][1]
+                if isinstance(label, torch.Tensor):
+                    label = label.numpy()
+                labels.append(np.asarray(label).reshape(1).astype(np.float32))
+
+            labels = np.stack(labels)
+            if self.one_hot:
+                labels = self._make_onehot(self.num_classes, labels[:, 0])
+            return labels
+
+        def _load_image(self, index):
+            """
+            Returns the original image of a single sample (reads the
+            underlying array directly if no transform is applied)
 
             Parameters
             ----------
             index : int
-                index to specifiy which data sample to return
+                the sample's index
+
+            Returns
+            -------
+            np.ndarray
+                the image
+
+            """
+            import torch
+
+            raw = getattr(self.data, "data", None)
+            if getattr(self.data, "transform", None) is None and \
+                    isinstance(raw, (np.ndarray, torch.Tensor)):
+                img = raw[index]
+                if isinstance(img, torch.Tensor):
+                    img = img.numpy()
+                return np.asarray(img)
+
+            return np.array(self.data[index][0])
+
+        def _resize_images(self, images):
+            """
+            Resizes a batch of images and moves their channels to the second
+            axis
+
+            Parameters
+            ----------
+            images : list of np.ndarray
+                the original images (must have the same shape)
+
+            Returns
+            -------
+            np.ndarray
+                the resized images (as float32)
+
+            """
+            from skimage.transform import resize
+
+            images = np.stack(images)
+
+            # the images are resized together (the batch axis is neither
+            # interpolated nor smoothed)
+            images = resize(images,
+                            (len(images), *self.img_shape,
+                             *images.shape[len(self.img_shape) + 1:]),
+                            mode='reflect', anti_aliasing=True)
+            if images.ndim <= 4:
+                images = images[..., None]
+
+            return np.moveaxis(images, -1, 1).astype(np.float32)
+
+        def _to_cache_dtype(self, images):
+            if self._cache_dtype == np.uint8:
+                return np.round(images * 255).astype(np.uint8)
+            return images
+
+        def _resize_all(self, chunk_size=1024):
+            """
+            Resizes all images into one contiguous array
+
+            Parameters
+            ----------
+            chunk_size : int
+                number of images to resize at once
+
+            Returns
+            -------
+            np.ndarray
+                the resized images
+
+            """
+            images = None
+            for start in tqdm(range(0, len(self), chunk_size),
+                              unit='chunks', desc="Resizing images"):
+                indices = range(start, min(start + chunk_size, len(self)))
+                chunk = self._resize_images(
+                    [self._load_image(idx) for idx in indices])
+
+                if images is None:
+                    images = np.empty((len(self), *chunk.shape[1:]),
+                                      dtype=self._cache_dtype)
+                images[start:start + len(chunk)] = self._to_cache_dtype(chunk)
+
+            return images
+
+        def _create_memmap(self):
+            """
+            Creates the memory-mapped cache (if it does not exist yet)
+
+            """
+            if os.path.isfile(self._cache_file + ".npy") and \
+                    os.path.isfile(self._cache_file + "_filled.npy"):
+                return
+
+            os.makedirs(os.path.dirname(self._cache_file) or ".",
+                        exist_ok=True)
+            sample_shape = self._resize_images([self._load_image(0)]).shape
+
+            # the flags are created last, so only complete caches are reused
+            np.lib.format.open_memmap(
+                self._cache_file + ".npy", mode="w+",
+                dtype=self._cache_dtype, shape=(len(self), *sample_shape[1:]))
+            np.lib.format.open_memmap(
+                self._cache_file + "_filled.npy", mode="w+", dtype=bool,
+                shape=(len(self),))
+
+        def open(self):
+            """
+            Opens the memory-mapped cache inside the current process
+
+            """
+            if self.cache == "memmap":
+                self._images = np.load(self._cache_file + ".npy",
+                                       mmap_mode="r+")
+                self._filled = np.load(self._cache_file + "_filled.npy",
+                                       mmap_mode="r+")
+
+        def _get_images(self, indices):
+            """
+            Returns the resized images of multiple samples
+
+            Parameters
+            ----------
+            indices : np.ndarray
+                the indices of the samples
+
+            Returns
+            -------
+            np.ndarray
+                the resized images (as float32)
+
+            """
+            if self.cache is None:
+                return self._resize_images(
+                    [self._load_image(idx) for idx in indices])
+
+            if self._images is None:
+                self.open()
+
+            if self._filled is not None:
+                missing = np.unique(indices[~self._filled[indices]])
+                if missing.size:
+                    self._images[missing] = self._to_cache_dtype(
+                        self._resize_images(
+                            [self._load_image(idx) for idx in missing]))
+                    self._filled[missing] = True
+
+            images = self._images[indices]
+            if images.dtype == np.uint8:
+                images = np.multiply(images, 1 / 255, dtype=np.float32)
+            return images
+
+        def get_batch(self, indices):
+            """
+            Returns multiple samples at once (the entries are stacked along
+            a new first axis)
+
+            Parameters
+            ----------
+            indices : iterable of int
+                the indices of the samples
 
             Returns
             -------
             dict
-                data sample
+                the batch
 
             """
+            indices = np.asarray(indices, dtype=np.int64)
+            return {"data": self._get_images(indices),
+                    "label": self._get_labels(indices)}
+
+        def __getitem__(self, index):
+            """
+            return data sample specified by index
 
-            data = self.data[index]
-            label = data[1]
+            Parameters
+            ----------
+            index : int or iterable of int
+                index to specifiy which data sample to return (or the
+                indices of multiple samples; see :meth:`get_batch`)
 
-            if isinstance(label, torch.Tensor):
-                label = label.numpy()
-            elif isinstance(label, int):
-                label = np.array(label)
-            data_dict = {"data": np.array(data[0]),
+            Returns
+            -------
+            dict
+                data sample
 
-                         "label": label.reshape(1).astype(np.float32)}
+            """
+            if not np.isscalar(index):
+                return self.get_batch(index)
 
-            if self.one_hot:
-                # TODO: Remove and refer to batchgenerators transform:
-                #  https://github.com/MIC-DKFZ/batchgenerators/blob/master/
-                #  batchgenerators/transforms/utility_transforms.py#L97
-                def make_onehot(num_classes, labels):
-                    """
-                    Function that converts label-encoding to one-hot format.
-
-                    Parameters
-                    ----------
-                    num_classes : int
-                        number of classes present in the dataset
-
-                    labels : np.ndarray
-                        labels in label-encoding format
-
-                    Returns
-                    -------
-                    np.ndarray
-                        labels in one-hot format
-                    """
-                    if isinstance(labels, list) or isinstance(labels, int):
-                        labels = np.asarray(labels)
-                    assert isinstance(labels, np.ndarray)
-                    if len(labels.shape) > 1:
-                        one_hot = np.zeros(
-                            shape=(list(labels.shape) + [num_classes]),
-                            dtype=labels.dtype)
-                        for i, c in enumerate(np.arange(num_classes)):
-                            one_hot[..., i][labels == c] = 1
-                    else:
-                        one_hot = np.zeros(shape=([num_classes]),
-                                           dtype=labels.dtype)
-                        for i, c in enumerate(np.arange(num_classes)):
-                            if labels == c:
-                                one_hot[i] = 1
-                    return one_hot
-
-                data_dict['label'] = make_onehot(
-                    self.num_classes, data_dict['label'])
-
-            img = data_dict["data"]
-
-            img = resize(img, self.img_shape,
-                         mode='reflect', anti_aliasing=True)
-            if len(img.shape) <= 3:
-                img = img.reshape(
-                    *img.shape, 1)
-
-            img = img.transpose(
-                (len(img.shape) - 1, *range(len(img.shape) - 1)))
-
-            data_dict["data"] = img.astype(np.float32)
-            return data_dict
+            return {key: val[0]
+                    for key, val in self.get_batch([index]).items()}
 
         def __len__(self):
             """
@@ -885,3 +1759,15 @@ if "TORCH" in get_backends():
 
             """
             return len(self.data)
+
+        def __getstate__(self):
+            # memory maps are reopened by each process instead of copying
+            # their data
+            state = vars(self).copy()
+            if self.cache == "memmap":
+                state["_images"] = None
+                state["_filled"] = None
+            return state
+
+        def __setstate__(self, state):
+            vars(self).update(state)
@@ -1,14 +1,87 @@
 import collections
+import inspect
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-from skimage.io import imread
-from skimage.transform import resize
 
 from delira.utils.decorators import make_deprecated
 
 
-def norm_range(mode):
+def _prepare_norm_output(data, dtype=None, out=None):
+    """
+    Helper function to determine the array a normalization writes to
+
+    Parameters
+    ----------
+    data : np.ndarray
+        the data to normalize
+    dtype : str or np.dtype or None
+        the dtype of the normalized data; if None: the dtype of ``data`` is
+        kept for floating point data, while all other data is normalized to
+        ``float64``
+    out : np.ndarray or None
+        a preallocated array to write the result to (may be ``data`` itself
+        for in-place normalization)
+
+    Returns
+    -------
+    np.ndarray
+        the output array
+
+    Raises
+    ------
+    ValueError
+        if the shape of ``out`` does not match the shape of ``data``
+
+    """
+    if out is not None:
+        if out.shape != data.shape:
+            raise ValueError("Shape of output (%s) does not match the shape "
+                             "of the data (%s)" % (out.shape, data.shape))
+        return out
+
+    if dtype is None:
+        if np.issubdtype(data.dtype, np.floating):
+            dtype = data.dtype
+        else:
+            dtype = np.float64
+
+    return np.empty(data.shape, dtype=dtype)
+
+
+def _affine_transform(data, scale, offset, out):
+    """
+    Computes ``data * scale + offset`` without allocating temporary arrays
+    (only a single temporary is needed for non-floating point outputs)
+
+    Parameters
+    ----------
+    data : np.ndarray
+        the input data
+    scale : float
+        the factor to multiply with
+    offset : float
+        the offset to add
+    out : np.ndarray
+        the array to write the result to
+
+    Returns
+    -------
+    np.ndarray
+        the output array
+
+    """
+    if np.issubdtype(out.dtype, np.inexact):
+        np.multiply(data, scale, out=out, casting="unsafe")
+        np.add(out, offset, out=out, casting="unsafe")
+    else:
+        out[...] = data * scale + offset
+    return out
+
+
+def norm_range(mode, data_min=None, data_max=None):
     """
     Closure function for range normalization
 
@@ -17,53 +90,195 @@ def norm_range(mode):
     mode : str
         '-1,1' normalizes data to range [-1, 1], while '0,1'
         normalizes data to range [0, 1]
+    data_min : float or None
+        precomputed (e.g. dataset-level) minimum to use instead of the
+        minimum of each sample
+    data_max : float or None
+        precomputed (e.g. dataset-level) maximum to use instead of the
+        maximum of each sample
 
     Returns
     -------
     callable
         normalization function
+
+    Raises
+    ------
+    ValueError
+        if mode is not supported
+
     """
-    def norm_fn(data):
+    if mode not in ('-1,1', '0,1'):
+        raise ValueError('%s not supported.' % mode)
+
+    def norm_fn(data, dtype=None, out=None):
         """
-        Returns the input data normalized to the range
+        Returns the input data normalized to the range. The normalization and
+        the cast to ``dtype`` are fused into a single pass without
+        allocating temporary arrays
 
         Parameters
         ----------
         data : np.ndarray
             data which should be normalized
+        dtype : str or np.dtype or None
+            the dtype of the normalized data; if None: floating point data
+            keeps its dtype, all other data is converted to ``float64``
+        out : np.ndarray or None
+            a preallocated array to write the normalized data to (may be
+            ``data`` itself for in-place normalization)
 
         Returns
         -------
         np.ndarary
             normalized data
         """
-        norm = data - data.min()
-        norm = norm / norm.max()
+        _min = np.float64(data.min() if data_min is None else data_min)
+        _max = np.float64(data.max() if data_max is None else data_max)
+
+        scale = 1 / (_max - _min)
+        offset = -_min * scale
+
         if mode == '-1,1':
-            norm = norm - 0.5
-            norm = norm * 2
-        elif mode == '0,1':
-            pass
-        else:
-            raise ValueError('{mode} not supported.')
-        return norm
+            scale, offset = scale * 2, offset * 2 - 1
+
+        return _affine_transform(data, scale, offset,
+                                 _prepare_norm_output(data, dtype, out))
     return norm_fn
 
 
-def norm_zero_mean_unit_std(data):
+def norm_zero_mean_unit_std(data, mean=None, std=None, dtype=None, out=None):
     """
-    Return normalized data with mean 0, standard deviation 1
+    Return normalized data with mean 0, standard deviation 1. The
+    normalization and the cast to ``dtype`` are fused, so that only the
+    output array is allocated
 
     Parameters
     ----------
     data : np.nadarray
+        data which should be normalized
+    mean : float or None
+        precomputed (e.g. dataset-level) mean to use instead of the mean of
+        the sample
+    std : float or None
+        precomputed (e.g. dataset-level) standard deviation to use instead of
+        the standard deviation of the sample
+    dtype : str or np.dtype or None
+        the dtype of the normalized data; if None: floating point data
+        keeps its dtype, all other data is converted to ``float64``
+    out : np.ndarray or None
+        a preallocated array to write the normalized data to (may be
+        ``data`` itself for in-place normalization)
 
     Returns
     -------
     np.ndarray
         normalized data
     """
-    return (data - np.mean(data)) / np.std(data)
+    out = _prepare_norm_output(data, dtype, out)
+
+    if mean is None:
+        mean = np.mean(data, dtype=np.float64)
+
+    if not np.issubdtype(out.dtype, np.inexact):
+        if std is None:
+            std = np.std(data, dtype=np.float64)
+        return _affine_transform(data, 1 / np.float64(std), -mean / std, out)
+
+    np.subtract(data, mean, out=out, casting="unsafe")
+
+    if std is None:
+        # the centered data is already stored in out, so the variance is
+        # computed by a single dot product on it
+        centered = out.reshape(-1)
+        std = np.sqrt(np.dot(centered, centered) / max(centered.size, 1))
+
+    np.divide(out, std, out=out, casting="unsafe")
+    return out
+
+
+def _accepted_kwargs(fn, *names):
+    """
+    Checks which of the given keyword arguments are accepted by a function
+
+    Parameters
+    ----------
+    fn : callable
+        the function to check
+    *names :
+        the names of the keyword arguments
+
+    Returns
+    -------
+    set
+        the names of all accepted keyword arguments
+
+    """
+    try:
+        params = inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return set()
+
+    if any(param.kind == param.VAR_KEYWORD for param in params.values()):
+        return set(names)
+
+    return {name for name in names if name in params}
+
+
+def load_npy_mmap(path, mmap_mode='r'):
+    """
+    Memory-maps an uncompressed ``.npy`` file. Only the header is read on
+    opening, data is read from disk when the corresponding region of the
+    array is accessed
+
+    Parameters
+    ----------
+    path : str
+        path to the ``.npy`` file
+    mmap_mode : str
+        the mode to open the memory map with; see ``numpy.load``
+
+    Returns
+    -------
+    np.memmap
+        the memory-mapped array
+
+    """
+    return np.load(path, mmap_mode=mmap_mode)
+
+
+def load_npy_sample(path, mmap_mode='r'):
+    """
+    Loads a sample stored as directory of ``.npy`` files (one file per
+    entry, e.g. written by :class:`ForegroundCropDataset`). The arrays are
+    memory-mapped and all other entries are read from an optional
+    ``meta.json`` inside the directory
+
+    Parameters
+    ----------
+    path : str
+        the sample's directory
+    mmap_mode : str or None
+        the mode to open the memory maps with; if None: the arrays are read
+        into memory
+
+    Returns
+    -------
+    dict
+        the sample
+
+    """
+    sample = {}
+    meta_file = os.path.join(path, "meta.json")
+    if os.path.isfile(meta_file):
+        with open(meta_file) as f:
+            sample.update(json.load(f))
+
+    for file in sorted(os.listdir(path)):
+        if file.endswith(".npy"):
+            sample[file[:-len(".npy")]] = np.load(os.path.join(path, file),
+                                                  mmap_mode=mmap_mode)
+    return sample
 
 
 @make_deprecated("LoadSample")
@@ -127,6 +342,9 @@ def default_load_fn_2d(img_file, *label_files, img_shape, n_channels=1):
         labels
 
     """
+    from skimage.io import imread
+    from skimage.transform import resize
+
     img = imread(img_file, n_channels == 1)
     labels = [np.loadtxt(_file).reshape(1).astype(np.float32) for _file in
               label_files]
@@ -153,7 +371,7 @@ class LoadSample:
                  sample_ext: dict,
                  sample_fn: collections.abc.Callable,
                  dtype=None, normalize=(), norm_fn=norm_range('-1,1'),
-                 **kwargs):
+                 n_threads=None, **kwargs):
         """
 
         Parameters
@@ -172,6 +390,11 @@ class LoadSample:
             or provide the file name which should be normalized
         norm_fn : callable
             callable to normalize input. Default: normalize range to [-1, 1]
+        n_threads : int or None
+            number of threads to load the files of a single sample
+            concurrently (useful for multi-modal samples, since most loading
+            functions release the GIL). If None or smaller than 2, all files
+            are loaded sequentially
         kwargs :
             variable number of keyword arguments passed to load function
 
@@ -196,8 +419,185 @@ class LoadSample:
         self._dtype = dtype
         self._normalize = normalize
         self._norm_fn = norm_fn
+        self._norm_fn_kwargs = _accepted_kwargs(norm_fn, "dtype", "out",
+                                                "channel")
+        self._n_threads = n_threads
+        self._executor = None
         self._kwargs = kwargs
 
+    def _load_files(self, paths):
+        """
+        Loads the given files (concurrently if multiple threads are used)
+
+        Parameters
+        ----------
+        paths : list of str
+            the files to load
+
+        Returns
+        -------
+        iterator
+            iterator yielding the loaded files in order of ``paths``
+
+        """
+        def _load(_path):
+            return self._sample_fn(_path, **self._kwargs)
+
+        if self._n_threads is None or self._n_threads < 2 or len(paths) < 2:
+            return map(_load, paths)
+
+        # the pool is created lazily, since it can't be pickled to the
+        # augmentation processes
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self._n_threads)
+        return self._executor.map(_load, paths)
+
+    def close(self):
+        """
+        Stops the threads loading the files (they are restarted if further
+        samples are loaded)
+
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __del__(self):
+        # the attribute is missing if __init__ failed
+        if getattr(self, "_executor", None) is not None:
+            self.close()
+
+    def _fuse_norm(self, key, f):
+        """
+        Checks whether the normalization of a file can be fused into writing
+        it to the stacked output array
+
+        Parameters
+        ----------
+        key : hashable
+            the key of the file
+        f : str
+            the file name
+
+        Returns
+        -------
+        bool
+            whether the normalization can be fused
+
+        """
+        return ((key in self._normalize) or (f in self._normalize)) and \
+            "out" in self._norm_fn_kwargs
+
+    def _normalize_data(self, data, channel, **kwargs):
+        """
+        Calls the normalization function with all supported keyword
+        arguments
+
+        Parameters
+        ----------
+        data : np.ndarray
+            the data to normalize
+        channel : int
+            the channel of the data (the index of the file inside its key)
+        **kwargs :
+            additional keyword arguments (``dtype`` or ``out``)
+
+        Returns
+        -------
+        np.ndarray
+            the normalized data
+
+        """
+        if "channel" in self._norm_fn_kwargs:
+            kwargs["channel"] = channel
+        return self._norm_fn(data, **kwargs)
+
+    def _process(self, key, f, data, channel=0, cast=True):
+        """
+        Normalizes and casts a single file if necessary (only used if this
+        can't be fused into writing it to the stacked array)
+
+        Parameters
+        ----------
+        key : hashable
+            the key of the file
+        f : str
+            the file name
+        data : np.ndarray
+            the loaded data
+        channel : int
+            the channel of the data (the index of the file inside its key)
+        cast : bool
+            whether to cast the data to the key's dtype (can be skipped, if
+            the data is cast while being copied anyway)
+
+        Returns
+        -------
+        np.ndarray
+            the processed data
+
+        """
+        # _normalize data if necessary
+        if (key in self._normalize) or (f in self._normalize):
+            if "dtype" in self._norm_fn_kwargs:
+                # fuse normalization and cast
+                data = self._normalize_data(
+                    data, channel, dtype=self._dtype.get(key, None))
+            else:
+                data = self._normalize_data(data, channel)
+
+        # cast data to type
+        if cast and key in self._dtype:
+            data = data.astype(self._dtype[key], copy=False)
+        return data
+
+    def _stack(self, key, files, data_list):
+        """
+        Stacks the files of a single key by writing each of them (normalized
+        and casted) into a preallocated array
+
+        Parameters
+        ----------
+        key : hashable
+            the key of the files
+        files : list of str
+            the file names
+        data_list : list of np.ndarray
+            the loaded data
+
+        Returns
+        -------
+        np.ndarray
+            the stacked data
+
+        """
+        fused = [self._fuse_norm(key, f) for f in files]
+        # the cast is done while copying the data into the stacked array
+        data_list = [data if _fused
+                     else self._process(key, f, data, idx, cast=False)
+                     for idx, (f, data, _fused)
+                     in enumerate(zip(files, data_list, fused))]
+
+        if key in self._dtype:
+            dtype = np.dtype(self._dtype[key])
+        else:
+            dtype = np.result_type(*[
+                data.dtype if not _fused or np.issubdtype(data.dtype,
+                                                          np.floating)
+                else np.float64 for data, _fused in zip(data_list, fused)])
+
+        shape = data_list[0].shape
+        assert all(data.shape == shape for data in data_list), \
+            "All files of key %s must have the same shape" % str(key)
+
+        stacked = np.empty((len(data_list), *shape), dtype=dtype)
+        for idx, (data, _fused) in enumerate(zip(data_list, fused)):
+            if _fused:
+                self._normalize_data(data, idx, out=stacked[idx])
+            else:
+                stacked[idx] = data
+        return stacked
+
     def __call__(self, path):
         """
         Load sample from multiple files
@@ -212,28 +612,33 @@ class LoadSample:
         dict
             dict with data defines by _sample_ext
         """
+        loaded = self._load_files([os.path.join(path, f)
+                                   for item in self._sample_ext.values()
+                                   for f in item])
+
         sample_dict = {}
         for key, item in self._sample_ext.items():
-            data_list = []
-            for f in item:
-                data = self._sample_fn(os.path.join(path, f), **self._kwargs)
+            data_list = [next(loaded) for _ in item]
 
-                # _normalize data if necessary
-                if (key in self._normalize) or (f in self._normalize):
-                    data = self._norm_fn(data)
-
-                # cast data to type
-                if key in self._dtype:
-                    data = data.astype(self._dtype[key])
-
-                # append data
-                data_list.append(data)
             if len(data_list) == 1:
-                sample_dict[key] = data_list[0][np.newaxis]
+                data = self._process(key, item[0], data_list[0])
+                # the sample must not be a view of the loaded data, which may
+                # be memory-mapped or reused by ``sample_fn``
+                if np.may_share_memory(data, data_list[0]):
+                    data = data.copy()
+                sample_dict[key] = data[np.newaxis]
             else:
-                sample_dict[key] = np.stack(data_list)
+                sample_dict[key] = self._stack(key, item, data_list)
         return sample_dict
 
+    def __getstate__(self):
+        state = vars(self).copy()
+        state["_executor"] = None
+        return state
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+
 
 class LoadSampleLabel(LoadSample):
     def __init__(self,
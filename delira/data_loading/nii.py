@@ -1,7 +1,9 @@
 import json
 import logging
 import os
+import shutil
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
 import SimpleITK as sitk
 import numpy as np
@@ -11,6 +13,9 @@ from delira.utils.decorators import make_deprecated
 logger = logging.getLogger(__name__)
 
 
+NII_EXTENSIONS = (".nii.gz", ".nii")
+
+
 def load_nii(path):
     """
     Loads a single nii file
@@ -27,6 +32,365 @@ def load_nii(path):
     return sitk.GetArrayFromImage(sitk.ReadImage(path))
 
 
+def load_nii_files(paths, n_threads=None):
+    """
+    Loads multiple nii files concurrently. Since SimpleITK releases the GIL
+    while reading and decompressing, the files are loaded on a thread pool
+
+    Parameters
+    ----------
+    paths : iterable of str
+        paths to the nii files which should be loaded
+    n_threads : int or None
+        number of threads to use; if None: one thread per file (at most
+        ``os.cpu_count()``)
+
+    Returns
+    -------
+    list of np.ndarray
+        the loaded data (in the same order as ``paths``)
+
+    """
+    paths = list(paths)
+    if n_threads is None:
+        n_threads = min(len(paths), os.cpu_count() or 1)
+
+    if n_threads <= 1 or len(paths) <= 1:
+        return [load_nii(_path) for _path in paths]
+
+    with ThreadPoolExecutor(n_threads) as executor:
+        return list(executor.map(load_nii, paths))
+
+
+def read_nii_header(path):
+    """
+    Reads the metadata of a single nii file without reading (and
+    decompressing) the image data
+
+    Parameters
+    ----------
+    path : str
+        path to the nii file
+
+    Returns
+    -------
+    dict
+        dictionary containing the ``shape`` and ``spacing`` (both in the same
+        axis order as the array returned by :func:`load_nii`), the ``origin``
+        and ``direction`` (in ITK order) and the ``dtype`` of the image
+
+    """
+    reader = sitk.ImageFileReader()
+    reader.SetFileName(path)
+    reader.ReadImageInformation()
+
+    n_components = reader.GetNumberOfComponents()
+    shape = tuple(reversed(reader.GetSize()))
+    if n_components > 1:
+        shape = shape + (n_components,)
+
+    return {
+        "shape": shape,
+        "spacing": tuple(reversed(reader.GetSpacing())),
+        "origin": reader.GetOrigin(),
+        "direction": reader.GetDirection(),
+        "dtype": np.dtype(sitk.GetArrayViewFromImage(
+            sitk.Image([1] * reader.GetDimension(),
+                       reader.GetPixelID(), n_components)).dtype).name
+    }
+
+
+def _strip_nii_extension(path):
+    """
+    Removes the nii extension (``.nii`` or ``.nii.gz``) from a given path
+
+    Parameters
+    ----------
+    path : str
+        the path
+
+    Returns
+    -------
+    str
+        the path without extension
+
+    """
+    for ext in NII_EXTENSIONS:
+        if path.endswith(ext):
+            return path[:-len(ext)]
+    return path
+
+
+def convert_nii(src, dst=None, fmt="npy", chunks=None, clevel=3):
+    """
+    Converts a single (compressed) nii file to a format supporting partial
+    reads without decompressing the whole volume. The header information is
+    stored in a json-sidecar next to the converted data
+
+    Parameters
+    ----------
+    src : str
+        path to the nii file
+    dst : str or None
+        path to write the converted data to (without extension); if None:
+        the data will be written next to ``src``
+    fmt : str
+        the output format; must be one of
+
+            * ``npy``: an uncompressed numpy file which will be memory-mapped
+            * ``zarr``: a chunked zarr array which is compressed with blosc
+              (requires ``zarr`` and ``numcodecs``)
+
+    chunks : tuple or None
+        the chunk size to use (only used for ``fmt='zarr'``); if None: chunks
+        of at most 64 voxels per dimension are used
+    clevel : int
+        the blosc compression level (only used for ``fmt='zarr'``)
+
+    Returns
+    -------
+    str
+        the path of the converted data
+
+    Raises
+    ------
+    ValueError
+        if ``fmt`` is invalid
+
+    """
+    if dst is None:
+        dst = _strip_nii_extension(src)
+
+    return save_converted_nii(sitk.ReadImage(src), dst, fmt=fmt,
+                              chunks=chunks, clevel=clevel, source=src)
+
+
+def save_converted_nii(img, dst, fmt="npy", chunks=None, clevel=3,
+                       source=None):
+    """
+    Saves an image in one of the formats of :func:`convert_nii` (e.g. after
+    preprocessing it in memory)
+
+    Parameters
+    ----------
+    img : SimpleITK.Image
+        the image to save
+    dst : str
+        path to write the converted data to (without extension)
+    fmt : str
+        the output format; see :func:`convert_nii`
+    chunks : tuple or None
+        the chunk size to use (only used for ``fmt='zarr'``); if None: chunks
+        of at most 64 voxels per dimension are used
+    clevel : int
+        the blosc compression level (only used for ``fmt='zarr'``)
+    source : str or None
+        the path of the original file (stored in the header sidecar)
+
+    Returns
+    -------
+    str
+        the path of the converted data
+
+    Raises
+    ------
+    ValueError
+        if ``fmt`` is invalid
+
+    """
+    data = sitk.GetArrayViewFromImage(img)
+
+    header = {
+        "shape": data.shape,
+        "spacing": tuple(reversed(img.GetSpacing())),
+        "origin": img.GetOrigin(),
+        "direction": img.GetDirection(),
+        "dtype": data.dtype.name,
+        "source": os.path.abspath(source) if source is not None else None
+    }
+
+    if fmt not in ("npy", "zarr"):
+        raise ValueError("Invalid format: %s. Must be one of "
+                         "['npy', 'zarr']" % str(fmt))
+
+    # the header is written (atomically) before the data, so converted data
+    # is never accompanied by a missing or outdated header
+    tmp_path = dst + ".tmp.json"
+    with open(tmp_path, "w") as f:
+        json.dump(header, f, indent=4)
+    os.replace(tmp_path, dst + ".json")
+
+    if fmt == "npy":
+        out_path = dst + ".npy"
+        tmp_path = dst + ".tmp.npy"
+        np.save(tmp_path, data)
+        os.replace(tmp_path, out_path)
+
+    else:
+        import zarr
+        from numcodecs import Blosc
+
+        if chunks is None:
+            chunks = tuple(min(64, _size) for _size in data.shape)
+
+        out_path = dst + ".zarr"
+        tmp_path = out_path + ".tmp"
+        arr = zarr.open(tmp_path, mode="w", shape=data.shape, chunks=chunks,
+                        dtype=data.dtype,
+                        compressor=Blosc(cname="zstd", clevel=clevel,
+                                         shuffle=Blosc.BITSHUFFLE))
+        arr[...] = data
+
+        # directories can't replace non-empty directories
+        if os.path.isdir(out_path):
+            shutil.rmtree(out_path)
+        os.replace(tmp_path, out_path)
+
+    return out_path
+
+
+def convert_nii_dir(src_dir, dst_dir, fmt="npy", n_workers=None,
+                    overwrite=False, **kwargs):
+    """
+    Converts all nii files inside a directory (recursively) once. The
+    directory structure is mirrored to ``dst_dir``. Files which have already
+    been converted (data and header sidecar are newer than their source) are
+    skipped.
+
+    Parameters
+    ----------
+    src_dir : str
+        the directory containing the nii files
+    dst_dir : str
+        the directory to write the converted files to
+    fmt : str
+        the output format; see :func:`convert_nii`
+    n_workers : int or None
+        number of threads to convert files concurrently; if None:
+        ``os.cpu_count()`` threads are used
+    overwrite : bool
+        whether to convert already converted files again
+    **kwargs :
+        additional keyword arguments passed to :func:`convert_nii`
+
+    Returns
+    -------
+    list of str
+        the paths of all converted files
+
+    Raises
+    ------
+    ValueError
+        if multiple files would be converted to the same path (e.g.
+        ``t1.nii`` and ``t1.nii.gz`` inside the same directory)
+
+    """
+    jobs = []
+    sources = {}
+    for root, _, files in os.walk(src_dir):
+        for file in sorted(files):
+            if not file.endswith(NII_EXTENSIONS):
+                continue
+
+            src = os.path.join(root, file)
+            dst = os.path.join(dst_dir, os.path.relpath(src, src_dir))
+            dst = _strip_nii_extension(dst)
+            if dst in sources:
+                raise ValueError("%s and %s would both be converted to %s"
+                                 % (sources[dst], src, dst))
+            sources[dst] = src
+
+            src_mtime = os.path.getmtime(src)
+            up_to_date = all(
+                os.path.exists(_path) and os.path.getmtime(_path) >= src_mtime
+                for _path in ("%s.%s" % (dst, fmt), dst + ".json"))
+            if up_to_date and not overwrite:
+                continue
+
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            jobs.append((src, dst))
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    def _convert(job):
+        return convert_nii(*job, fmt=fmt, **kwargs)
+
+    if n_workers <= 1:
+        return [_convert(job) for job in jobs]
+
+    with ThreadPoolExecutor(n_workers) as executor:
+        return list(executor.map(_convert, jobs))
+
+
+def load_converted_nii(path, mmap_mode="r"):
+    """
+    Loads a nii file converted by :func:`convert_nii`. Can be used as drop-in
+    replacement of :func:`load_nii` (paths may still contain the nii
+    extension). The data is not read on opening, but on accessing the
+    corresponding regions of the returned array.
+
+    Parameters
+    ----------
+    path : str
+        the path of the converted file (with or without extension)
+    mmap_mode : str
+        the mode to memory-map ``npy`` files with
+
+    Returns
+    -------
+    np.memmap or zarr.Array
+        the lazily loaded data
+
+    Raises
+    ------
+    FileNotFoundError
+        if no converted file exists for the given path
+
+    """
+    base = _strip_nii_extension(path)
+    for ext in (".npy", ".zarr"):
+        if base.endswith(ext):
+            base = base[:-len(ext)]
+
+    if os.path.isfile(base + ".npy"):
+        return np.load(base + ".npy", mmap_mode=mmap_mode)
+
+    if os.path.isdir(base + ".zarr"):
+        import zarr
+        return zarr.open(base + ".zarr", mode="r")
+
+    raise FileNotFoundError("No converted file found for %s" % path)
+
+
+def read_converted_nii_header(path):
+    """
+    Reads the header sidecar of a nii file converted by :func:`convert_nii`
+
+    Parameters
+    ----------
+    path : str
+        the path of the converted file (with or without extension)
+
+    Returns
+    -------
+    dict
+        the header information; see :func:`read_nii_header`
+
+    """
+    base = _strip_nii_extension(path)
+    for ext in (".npy", ".zarr"):
+        if base.endswith(ext):
+            base = base[:-len(ext)]
+
+    with open(base + ".json") as f:
+        header = json.load(f)
+
+    for key in ("shape", "spacing", "origin", "direction"):
+        header[key] = tuple(header[key])
+    return header
+
+
 @make_deprecated('LoadSample')
 def load_sample_nii(files, label_load_cls):
     """
@@ -1,9 +1,11 @@
 from .abstract_sampler import AbstractSampler
 from .lambda_sampler import LambdaSampler
+from .patch_sampler import PatchSampler
 from .random_sampler import RandomSampler, PrevalenceRandomSampler, \
     StoppingPrevalenceRandomSampler
 from .sequential_sampler import SequentialSampler, \
     PrevalenceSequentialSampler, StoppingPrevalenceSequentialSampler
+from .sharded_sampler import ShardedSampler
 from .weighted_sampler import WeightedRandomSampler, \
     WeightedPrevalenceRandomSampler
 
@@ -16,5 +18,8 @@ __all__ = [
     'PrevalenceRandomSampler',
     'StoppingPrevalenceRandomSampler',
     'WeightedRandomSampler',
-    'LambdaSampler'
+    'WeightedPrevalenceRandomSampler',
+    'LambdaSampler',
+    'PatchSampler',
+    'ShardedSampler'
 ]
@@ -1,8 +1,58 @@
 from abc import abstractmethod
 
+import numpy as np
+
 from ..dataset import AbstractDataset
 
 
+def group_by_class(labels):
+    """
+    Groups the dataset indices by their class
+
+    Parameters
+    ----------
+    labels : iterable
+        list of classes each sample belongs to. List index corresponds to
+        data index and the value at a certain index indicates the
+        corresponding class
+
+    Returns
+    -------
+    list of np.ndarray
+        the indices of each class (sorted by descending number of elements)
+
+    """
+    labels = np.asarray(labels).astype(np.int64).reshape(-1)
+    _, inverse, counts = np.unique(labels, return_inverse=True,
+                                   return_counts=True)
+
+    # stable sort keeps the indices of each class in ascending order
+    order = np.argsort(inverse, kind="stable")
+    class_indices = np.split(order, np.cumsum(counts)[:-1])
+
+    return [class_indices[idx]
+            for idx in np.argsort(-counts, kind="stable")]
+
+
+def interleave(class_schedules):
+    """
+    Interleaves the schedules of all classes, so that each window of
+    ``n_classes`` consecutive entries contains one entry of each class
+
+    Parameters
+    ----------
+    class_schedules : list of np.ndarray
+        the schedule of each class (all of same length)
+
+    Returns
+    -------
+    np.ndarray
+        the interleaved schedule
+
+    """
+    return np.stack(class_schedules, axis=1).reshape(-1)
+
+
 class AbstractSampler(object):
     """
     Class to define an abstract Sampling API
@@ -12,6 +62,7 @@ class AbstractSampler(object):
     def __init__(self, indices=None):
         self._num_samples = len(indices)
         self._global_index = 0
+        self._schedule = None
 
     @classmethod
     def from_dataset(cls, dataset: AbstractDataset, **kwargs):
@@ -32,6 +83,35 @@ class AbstractSampler(object):
         indices = list(range(len(dataset)))
         return cls(indices, **kwargs)
 
+    @classmethod
+    def from_statistics(cls, statistics, **kwargs):
+        """
+        Classmethod to initialize the sampler from precomputed dataset
+        statistics (avoids loading the whole dataset to obtain the labels)
+
+        Parameters
+        ----------
+        statistics : :class:`delira.data_loading.DatasetStatistics`
+            the statistics of the dataset to sample from
+
+        Returns
+        -------
+        :class:`AbstractSampler`
+            The initialized sampler
+
+        Raises
+        ------
+        ValueError
+            if the statistics don't contain the per-sample labels
+
+        """
+        labels = statistics.labels
+        if labels is None:
+            raise ValueError("The statistics don't contain the per-sample "
+                             "labels, which are necessary to initialize "
+                             "the sampler")
+        return cls(labels, **kwargs)
+
     def _check_batchsize(self, n_indices):
         """
         Checks if the batchsize is valid (and truncates batches if necessary).
@@ -66,6 +146,85 @@ class AbstractSampler(object):
         self._global_index += n_indices
         return n_indices
 
+    def _build_schedule(self):
+        """
+        Builds the sampling schedule for a whole epoch (e.g. a permutation of
+        all indices). Samplers implementing this can return the next batch
+        by :meth:`_next_from_schedule`, which only slices the schedule
+
+        Returns
+        -------
+        np.ndarray
+            the indices to sample during the next epoch
+
+        """
+        raise NotImplementedError
+
+    def _next_from_schedule(self, n_indices):
+        """
+        Returns the next indices of the current epoch's schedule. A new
+        schedule is built at the beginning of each epoch
+
+        Parameters
+        ----------
+        n_indices : int
+            number of indices to return
+
+        Returns
+        -------
+        np.ndarray
+            the sampled indices
+
+        Raises
+        ------
+        StopIteration
+            if enough batches sampled
+
+        """
+        if self._global_index == 0 or self._schedule is None:
+            self._schedule = self._build_schedule()
+
+        start = self._global_index
+        n_indices = self._check_batchsize(n_indices)
+        return self._schedule[start:start + n_indices]
+
+    def reset(self):
+        """
+        Resets the sampler to the beginning of a new epoch (discarding the
+        remaining indices of the current epoch)
+
+        """
+        self._global_index = 0
+        self._schedule = None
+
+    def state_dict(self):
+        """
+        Returns the current sampling state (the position inside the current
+        epoch and the epoch's schedule), which allows to resume sampling in
+        the middle of an epoch
+
+        Returns
+        -------
+        dict
+            the sampling state
+
+        """
+        return {"global_index": self._global_index,
+                "schedule": self._schedule}
+
+    def load_state_dict(self, state):
+        """
+        Restores a sampling state obtained by :meth:`state_dict`
+
+        Parameters
+        ----------
+        state : dict
+            the sampling state
+
+        """
+        self._global_index = state["global_index"]
+        self._schedule = state["schedule"]
+
     @abstractmethod
     def _get_indices(self, n_indices):
         """
@@ -0,0 +1,165 @@
+import numpy as np
+
+from .abstract_sampler import AbstractSampler
+from ..dataset import AbstractDataset
+
+
+class PatchSampler(AbstractSampler):
+    """
+    Samples patch locations from a set of volumes.
+
+    Each sampled index is a tuple of ``(volume_index, patch_origin)``, which
+    can be passed to a :class:`delira.data_loading.BasePatchDataset`.
+    Per epoch, each volume is visited ``samples_per_volume`` times in random
+    order. Patch origins are either drawn uniformly from all valid
+    positions or (with probability ``foreground_prob``) centered around a
+    randomly chosen foreground coordinate
+
+    """
+
+    def __init__(self, shapes, patch_size, samples_per_volume=1,
+                 foreground_coords=None, foreground_prob=0.):
+        """
+
+        Parameters
+        ----------
+        shapes : iterable
+            the spatial shape of each volume
+        patch_size : iterable of int
+            the spatial size of the patches
+        samples_per_volume : int
+            number of patches to sample from each volume per epoch
+        foreground_coords : list or None
+            list containing an array of (indexed) foreground coordinates
+            per volume; must be given if ``foreground_prob`` is greater than
+            zero
+        foreground_prob : float
+            probability to center a patch around a foreground coordinate
+
+        """
+        shapes = np.asarray(shapes, dtype=np.int64)
+        patch_size = np.asarray(patch_size, dtype=np.int64)
+
+        assert shapes.ndim == 2 and shapes.shape[1] == len(patch_size), \
+            "Number of spatial dimensions of shapes and patch_size differ"
+        assert 0. <= foreground_prob <= 1., \
+            "foreground_prob must be in range [0, 1]"
+        if foreground_prob > 0:
+            assert foreground_coords is not None, \
+                "foreground_coords must be given for foreground_prob > 0"
+
+        super().__init__(np.repeat(np.arange(len(shapes)),
+                                   samples_per_volume))
+
+        self._shapes = shapes
+        self._patch_size = patch_size
+        self._samples_per_volume = samples_per_volume
+        self._foreground_coords = foreground_coords
+        self._foreground_prob = foreground_prob
+
+    @classmethod
+    def from_dataset(cls, dataset: AbstractDataset, **kwargs):
+        """
+        Classmethod to initialize the sampler from the indexed metadata of a
+        given dataset
+
+        Parameters
+        ----------
+        dataset : :class:`delira.data_loading.BasePatchDataset`
+            the given dataset
+        **kwargs :
+            additional keyword arguments (``samples_per_volume`` and
+            ``foreground_prob``)
+
+        Returns
+        -------
+        :class:`PatchSampler`
+            The initialized sampler
+
+        """
+        return cls(dataset.shapes, dataset.patch_size,
+                   foreground_coords=dataset.foreground_coords, **kwargs)
+
+    def _sample_origins(self, volume_indices):
+        """
+        Samples the patch origins for the given volumes
+
+        Parameters
+        ----------
+        volume_indices : np.ndarray
+            the indices of the volumes to sample the patches from
+
+        Returns
+        -------
+        np.ndarray
+            the patch origins (one row per volume index)
+
+        """
+        shapes = self._shapes[volume_indices]
+
+        # uniform sampling of all valid origins; volumes smaller than the
+        # patch size will be padded symmetrically
+        max_origin = shapes - self._patch_size
+        origins = np.where(
+            max_origin >= 0,
+            np.floor(np.random.rand(*shapes.shape) * (np.maximum(
+                max_origin, 0) + 1)).astype(np.int64),
+            max_origin // 2)
+
+        if self._foreground_prob > 0:
+            use_fg = np.random.rand(len(volume_indices)) < \
+                self._foreground_prob
+
+            for i in np.flatnonzero(use_fg):
+                coords = self._foreground_coords[volume_indices[i]]
+                if not len(coords):
+                    continue
+
+                center = coords[np.random.randint(len(coords))]
+                origin = center - self._patch_size // 2
+                origins[i] = np.clip(origin, np.minimum(max_origin[i], 0),
+                                     np.maximum(max_origin[i], 0))
+
+        return origins
+
+    def _build_schedule(self):
+        """
+        Visits each volume ``samples_per_volume`` times in random order
+
+        Returns
+        -------
+        np.ndarray
+            the volume indices to sample during the next epoch
+
+        """
+        return np.random.permutation(
+            np.repeat(np.arange(len(self._shapes)), self._samples_per_volume))
+
+    def _get_indices(self, n_indices):
+        """
+        Actual Sampling
+
+        Parameters
+        ----------
+        n_indices : int
+            number of indices to return
+
+        Returns
+        -------
+        list
+            list of sampled ``(volume_index, patch_origin)`` tuples
+
+        Raises
+        ------
+        StopIteration
+            If maximal number of samples is reached
+
+        """
+        volume_indices = self._next_from_schedule(n_indices)
+        origins = self._sample_origins(volume_indices)
+
+        return [(int(_vol_idx), tuple(int(x) for x in _origin))
+                for _vol_idx, _origin in zip(volume_indices, origins)]
+
+    def __len__(self):
+        return self._num_samples
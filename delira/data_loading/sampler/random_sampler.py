@@ -1,9 +1,6 @@
-from collections import OrderedDict
+import numpy as np
 
-from numpy import concatenate
-from numpy.random import choice, shuffle
-
-from .abstract_sampler import AbstractSampler
+from .abstract_sampler import AbstractSampler, group_by_class, interleave
 from ..dataset import AbstractDataset
 
 
@@ -12,7 +9,7 @@ class RandomSampler(AbstractSampler):
     Implements Random Sampling from whole Dataset
     """
 
-    def __init__(self, indices):
+    def __init__(self, indices, replacement=True):
         """
 
         Parameters
@@ -21,10 +18,28 @@ class RandomSampler(AbstractSampler):
             list of classes each sample belongs to. List index corresponds to
             data index and the value at a certain index indicates the
             corresponding class
+        replacement : bool
+            whether to sample with replacement; if False: each index is
+            sampled exactly once per epoch
 
         """
         super().__init__(indices)
-        self._indices = list(range(len(indices)))
+        self._replacement = replacement
+
+    def _build_schedule(self):
+        """
+        Draws all indices of an epoch at once
+
+        Returns
+        -------
+        np.ndarray
+            the indices to sample during the next epoch
+
+        """
+        if self._replacement:
+            return np.random.randint(self._num_samples,
+                                     size=self._num_samples)
+        return np.random.permutation(self._num_samples)
 
     def _get_indices(self, n_indices):
         """
@@ -37,8 +52,8 @@ class RandomSampler(AbstractSampler):
 
         Returns
         -------
-        list
-            list of sampled indices
+        np.ndarray
+            sampled indices
 
         Raises
         ------
@@ -46,15 +61,10 @@ class RandomSampler(AbstractSampler):
             If maximal number of samples is reached
 
         """
-        n_indices = self._check_batchsize(n_indices)
-
-        indices = choice(self._indices,
-                         size=n_indices)
-
-        return indices
+        return self._next_from_schedule(n_indices)
 
     def __len__(self):
-        return len(self._indices)
+        return self._num_samples
 
 
 class PrevalenceRandomSampler(AbstractSampler):
@@ -74,38 +84,21 @@ class PrevalenceRandomSampler(AbstractSampler):
             data index and the value at a certain index indicates the
              corresponding class
         shuffle_batch : bool
-            if False: indices per class will be returned in a sequential way
-            (first: indices belonging to class 1, second: indices belonging
-            to class 2 etc.) while indices for each class are sampled in a
-            random way
+            if False: the indices of the classes will be returned in an
+            interleaved way (one index of class 1, one index of class 2 etc.,
+            starting with the largest class) while indices for each class are
+            sampled in a random way
             if True: indices will be sampled in a random way per class and
             sampled indices will be shuffled
 
         """
         super().__init__(indices)
 
-        self._num_samples = 0
-        _indices = {}
-        for idx, class_idx in enumerate(indices):
-            self._num_samples += 1
-            class_idx = int(class_idx)
-            if class_idx in _indices.keys():
-                _indices[class_idx].append(idx)
-            else:
-                _indices[class_idx] = [idx]
-
-        # sort classes after descending number of elements
-        ordered_dict = OrderedDict()
-
-        for k in sorted(_indices, key=lambda k: len(_indices[k]),
-                        reverse=True):
-            ordered_dict[k] = _indices[k]
-
-        self._indices = ordered_dict
-        self._n_classes = len(_indices.keys())
+        # sorted after descending number of elements
+        self._indices = group_by_class(indices)
+        self._n_classes = len(self._indices)
 
         self._shuffle = shuffle_batch
-        self._global_index = 0
 
     @classmethod
     def from_dataset(cls, dataset: AbstractDataset, **kwargs):
@@ -127,6 +120,25 @@ class PrevalenceRandomSampler(AbstractSampler):
         labels = [dataset[idx]['label'] for idx in indices]
         return cls(labels, **kwargs)
 
+    def _build_schedule(self):
+        """
+        Draws the indices of each class for a whole epoch at once and
+        interleaves them (starting with the largest class), so that each
+        batch contains the same number of samples per class
+
+        Returns
+        -------
+        np.ndarray
+            the indices to sample during the next epoch
+
+        """
+        n_rounds = -(-self._num_samples // self._n_classes)
+
+        return interleave([
+            class_indices[np.random.randint(len(class_indices),
+                                            size=n_rounds)]
+            for class_indices in self._indices])[:self._num_samples]
+
     def _get_indices(self, n_indices):
         """
         Actual Sampling
@@ -138,8 +150,8 @@ class PrevalenceRandomSampler(AbstractSampler):
 
         Returns
         -------
-        list
-            list of sampled indices
+        np.ndarray
+            sampled indices
 
         Raises
         ------
@@ -147,28 +159,12 @@ class PrevalenceRandomSampler(AbstractSampler):
             If maximal number of samples is reached
 
         """
-        n_indices = self._check_batchsize(n_indices)
-
-        samples_per_class = int(n_indices / self._n_classes)
-
-        _samples = []
+        samples = self._next_from_schedule(n_indices)
 
-        for key, idx_list in self._indices.items():
-            _samples.append(choice(idx_list, size=samples_per_class))
-
-        # add elements until len(_samples) == n_indices
-        # works because less indices are left than n_classes
-        # and self._indices is sorted by decreasing number of elements
-        for key, idx_list in self._indices.items():
-            if len(_samples) >= n_indices:
-                break
-            _samples.append(choice(idx_list, size=1))
-
-        _samples = concatenate(_samples)
         if self._shuffle:
-            shuffle(_samples)
+            samples = np.random.permutation(samples)
 
-        return _samples
+        return samples
 
     def __len__(self):
         return self._num_samples
@@ -192,38 +188,23 @@ class StoppingPrevalenceRandomSampler(AbstractSampler):
             data index and the value at a certain index indicates the
              corresponding class
         shuffle_batch : bool
-            if False: indices per class will be returned in a sequential way
-            (first: indices belonging to class 1, second: indices belonging
-            to class 2 etc.)
+            if False: the indices of the classes will be returned in an
+            interleaved way (one index of class 1, one index of class 2 etc.,
+            starting with the largest class)
             if True: indices will be sampled in a sequential way per class and
             sampled indices will be shuffled
         """
         super().__init__(indices)
 
-        _indices = {}
-        _global_idxs = {}
-        for idx, class_idx in enumerate(indices):
-            class_idx = int(class_idx)
-            if class_idx in _indices.keys():
-                _indices[class_idx].append(idx)
-            else:
-                _indices[class_idx] = [idx]
-                _global_idxs[class_idx] = 0
-
-        # sort classes after descending number of elements
-        ordered_dict = OrderedDict()
-
-        length = float('inf')
-        for k in sorted(_indices, key=lambda k: len(_indices[k]),
-                        reverse=True):
-            ordered_dict[k] = _indices[k]
-            length = min(length, len(_indices[k]))
-
-        self._num_samples = length
+        # sorted after descending number of elements
+        self._indices = group_by_class(indices)
+        self._n_classes = len(self._indices)
 
-        self._indices = ordered_dict
-        self._n_classes = len(_indices.keys())
-        self._global_idxs = _global_idxs
+        # each class is sampled as often as the smallest class contains
+        # elements
+        self._samples_per_class = min(len(class_indices)
+                                      for class_indices in self._indices)
+        self._num_samples = self._samples_per_class * self._n_classes
 
         self._shuffle = shuffle_batch
 
@@ -247,57 +228,20 @@ class StoppingPrevalenceRandomSampler(AbstractSampler):
         labels = [dataset[idx]['label'] for idx in indices]
         return cls(labels, **kwargs)
 
-    def _check_batchsize(self, n_indices):
+    def _build_schedule(self):
         """
-        Checks if batchsize is valid for all classes
-
-        Parameters
-        ----------
-        n_indices : int
-            the number of samples to return
+        Draws the indices of each class (without replacement) for a whole
+        epoch at once and interleaves them
 
         Returns
         -------
-        dict
-            number of samples per class to return
+        np.ndarray
+            the indices to sample during the next epoch
 
         """
-        n_indices = super()._check_batchsize(n_indices)
-
-        samples_per_class = n_indices // self._n_classes
-        remaining = n_indices % self._n_classes
-
-        samples = {}
-
-        try:
-
-            # sample same number of sample for each class
-            for key, idx_list in self._indices.items():
-                if self._global_idxs[key] >= len(idx_list):
-                    raise StopIteration
-
-                # truncate if necessary
-                samples[key] = min(
-                    samples_per_class,
-                    len(self._indices[key]) - self._global_idxs[key])
-
-                self._global_idxs[key] += samples[key]
-
-            # fill up starting with largest class
-            while remaining:
-                for key, idx_list in self._indices.items():
-                    samples[key] += 1
-                    remaining -= 1
-
-        except StopIteration as e:
-            # set all global indices to 0
-            for key in self._global_idxs.keys():
-                self._global_idxs[key] = 0
-
-            raise e
-
-        finally:
-            return samples
+        return interleave([
+            np.random.permutation(class_indices)[:self._samples_per_class]
+            for class_indices in self._indices])
 
     def _get_indices(self, n_indices):
         """
@@ -314,19 +258,12 @@ class StoppingPrevalenceRandomSampler(AbstractSampler):
 
         Returns
         -------
-            list: list of sampled indices
+            np.ndarray: sampled indices
         """
-        n_indices = self._check_batchsize(n_indices)
-
-        samples = []
-
-        for key, _n_indices in n_indices.items():
-            samples.append(choice(self._indices[key], size=_n_indices))
-
-        samples = concatenate(samples)
+        samples = self._next_from_schedule(n_indices)
 
         if self._shuffle:
-            shuffle(samples)
+            samples = np.random.permutation(samples)
 
         return samples
 
@@ -1,7 +1,6 @@
-from collections import OrderedDict
-from random import shuffle
+import numpy as np
 
-from .abstract_sampler import AbstractSampler
+from .abstract_sampler import AbstractSampler, group_by_class, interleave
 from ..dataset import AbstractDataset
 
 
@@ -22,7 +21,8 @@ class SequentialSampler(AbstractSampler):
         """
         super().__init__(indices)
 
-        self._indices = list(range(len(indices)))
+    def _build_schedule(self):
+        return np.arange(self._num_samples)
 
     def _get_indices(self, n_indices):
         """
@@ -39,12 +39,10 @@ class SequentialSampler(AbstractSampler):
 
         Returns
         -------
-        list
-            list of sampled indices
+        np.ndarray
+            sampled indices
         """
-        n_indices = self._check_batchsize(n_indices)
-
-        return range(self._global_index - n_indices, self._global_index)
+        return self._next_from_schedule(n_indices)
 
     def __len__(self):
         return self._num_samples
@@ -68,38 +66,20 @@ class PrevalenceSequentialSampler(AbstractSampler):
             data index and the value at a certain index indicates the
              corresponding class
         shuffle_batch : bool
-            if False: indices per class will be returned in a sequential way
-            (first: indices belonging to class 1, second: indices belonging
-            to class 2 etc.)
+            if False: the indices of the classes will be returned in an
+            interleaved way (one index of class 1, one index of class 2 etc.,
+            starting with the largest class)
             if True: indices will be sampled in a sequential way per class and
             sampled indices will be shuffled
         """
         super().__init__(indices)
 
-        _indices = {}
-        _global_idxs = {}
-        for idx, class_idx in enumerate(indices):
-            class_idx = int(class_idx)
-            if class_idx in _indices.keys():
-                _indices[class_idx].append(idx)
-            else:
-                _indices[class_idx] = [idx]
-                _global_idxs[class_idx] = 0
-
-        # sort classes after descending number of elements
-        ordered_dict = OrderedDict()
-
-        length = 0
-        for k in sorted(_indices, key=lambda k: len(_indices[k]),
-                        reverse=True):
-            ordered_dict[k] = _indices[k]
-            length += len(_indices[k])
+        # sorted after descending number of elements
+        self._indices = group_by_class(indices)
+        self._n_classes = len(self._indices)
 
-        self._num_samples = length
-
-        self._indices = ordered_dict
-        self._n_classes = len(_indices.keys())
-        self._global_idxs = _global_idxs
+        # position inside each class (continued across epochs)
+        self._global_idxs = np.zeros(self._n_classes, dtype=np.int64)
 
         self._shuffle = shuffle_batch
 
@@ -109,6 +89,58 @@ class PrevalenceSequentialSampler(AbstractSampler):
         labels = [dataset[idx]['label'] for idx in indices]
         return cls(labels, **kwargs)
 
+    def _build_schedule(self):
+        """
+        Cycles through the indices of each class for a whole epoch and
+        interleaves them (starting with the largest class), so that each
+        batch contains the same number of samples per class
+
+        Returns
+        -------
+        np.ndarray
+            the indices to sample during the next epoch
+
+        """
+        n_rounds = -(-self._num_samples // self._n_classes)
+        steps = np.arange(n_rounds)
+
+        class_schedules = []
+        for idx, class_indices in enumerate(self._indices):
+            class_schedules.append(class_indices[
+                (self._global_idxs[idx] + steps) % len(class_indices)])
+            self._global_idxs[idx] = (self._global_idxs[idx] + n_rounds) % \
+                len(class_indices)
+
+        return interleave(class_schedules)[:self._num_samples]
+
+    def state_dict(self):
+        """
+        Returns the current sampling state (including the position inside
+        each class)
+
+        Returns
+        -------
+        dict
+            the sampling state
+
+        """
+        state = super().state_dict()
+        state["class_index"] = self._global_idxs.copy()
+        return state
+
+    def load_state_dict(self, state):
+        """
+        Restores a sampling state obtained by :meth:`state_dict`
+
+        Parameters
+        ----------
+        state : dict
+            the sampling state
+
+        """
+        super().load_state_dict(state)
+        self._global_idxs = np.asarray(state["class_index"], dtype=np.int64)
+
     def _get_indices(self, n_indices):
         """
         Actual Sampling
@@ -124,43 +156,15 @@ class PrevalenceSequentialSampler(AbstractSampler):
 
         Returns
         -------
-        list
-            list of sampled indices
+        np.ndarray
+            sampled indices
         """
-
-        n_indices = self._check_batchsize(n_indices)
-        samples_per_class = n_indices // self._n_classes
-
-        _samples = []
-
-        for key, idx_list in self._indices.items():
-            if self._global_idxs[key] >= len(idx_list):
-                self._global_idxs[key] = 0
-
-            new_global_idx = self._global_idxs[key] + samples_per_class
-
-            if new_global_idx >= len(idx_list):
-                new_global_idx = len(idx_list)
-
-            _samples += list(range(self._global_idxs[key], new_global_idx))
-            self._global_idxs[key] = new_global_idx
-
-        for key, idx_list in self._indices.items():
-            if len(_samples) >= n_indices:
-                break
-
-            if self._global_idxs[key] >= len(idx_list):
-                self._global_idxs[key] = 0
-
-            new_global_idx = self._global_idxs[key] + 1
-
-            _samples += list(range(self._global_idxs[key], new_global_idx))
-            self._global_idxs[key] = new_global_idx
+        samples = self._next_from_schedule(n_indices)
 
         if self._shuffle:
-            shuffle(_samples)
+            samples = np.random.permutation(samples)
 
-        return _samples
+        return samples
 
     def __len__(self):
         return self._num_samples
@@ -184,98 +188,38 @@ class StoppingPrevalenceSequentialSampler(AbstractSampler):
             data index and the value at a certain index indicates the
              corresponding class
         shuffle_batch : bool
-            if False: indices per class will be returned in a sequential way
-            (first: indices belonging to class 1, second: indices belonging
-            to class 2 etc.)
+            if False: the indices of the classes will be returned in an
+            interleaved way (one index of class 1, one index of class 2 etc.,
+            starting with the largest class)
             if True: indices will be sampled in a sequential way per class and
             sampled indices will be shuffled
         """
-        super().__init__()
-
-        _indices = {}
-        _global_idxs = {}
-        for idx, class_idx in enumerate(indices):
-            class_idx = int(class_idx)
-            if class_idx in _indices.keys():
-                _indices[class_idx].append(idx)
-            else:
-                _indices[class_idx] = [idx]
-                _global_idxs[class_idx] = 0
-
-        # sort classes after descending number of elements
-        ordered_dict = OrderedDict()
+        super().__init__(indices)
 
-        length = float('inf')
-        for k in sorted(_indices, key=lambda k: len(_indices[k]),
-                        reverse=True):
-            ordered_dict[k] = _indices[k]
-            length = min(length, len(_indices[k]))
+        # sorted after descending number of elements
+        self._indices = group_by_class(indices)
+        self._n_classes = len(self._indices)
 
-        self._length = length
+        # each class is sampled as often as the smallest class contains
+        # elements
+        samples_per_class = min(len(class_indices)
+                                for class_indices in self._indices)
+        self._num_samples = samples_per_class * self._n_classes
 
-        self._indices = ordered_dict
-        self._n_classes = len(_indices.keys())
-        self._global_idxs = _global_idxs
+        # the schedule is the same for each epoch
+        self._schedule = interleave([class_indices[:samples_per_class]
+                                     for class_indices in self._indices])
 
         self._shuffle = shuffle_batch
 
     @classmethod
-    def from_dataset(cls, dataset: AbstractDataset):
+    def from_dataset(cls, dataset: AbstractDataset, **kwargs):
         indices = range(len(dataset))
         labels = [dataset[idx]['label'] for idx in indices]
-        return cls(labels)
-
-    def _check_batchsize(self, n_indices):
-        """
-        Checks if batchsize is valid for all classes
-
-        Parameters
-        ----------
-        n_indices : int
-            the number of samples to return
-
-        Returns
-        -------
-        dict
-            number of samples per class to return
-
-        """
-        n_indices = super()._check_batchsize(n_indices)
-
-        samples_per_class = n_indices // self._n_classes
-        remaining = n_indices % self._n_classes
-
-        samples = {}
-
-        try:
-
-            # sample same number of sample for each class
-            for key, idx_list in self._indices.items():
-                if self._global_idxs[key] >= len(idx_list):
-                    raise StopIteration
-
-                # truncate if necessary
-                samples[key] = min(
-                    samples_per_class,
-                    len(self._indices[key]) - self._global_idxs[key])
-
-                self._global_idxs[key] += samples[key]
-
-            # fill up starting with largest class
-            while remaining:
-                for key, idx_list in self._indices.items():
-                    samples[key] += 1
-                    remaining -= 1
-
-        except StopIteration as e:
-            # set all global indices to 0
-            for key in self._global_idxs.keys():
-                self._global_idxs[key] = 0
-
-            raise e
+        return cls(labels, **kwargs)
 
-        finally:
-            return samples
+    def _build_schedule(self):
+        return self._schedule
 
     def _get_indices(self, n_indices):
         """
@@ -292,23 +236,16 @@ class StoppingPrevalenceSequentialSampler(AbstractSampler):
 
         Returns
         -------
-        list
-            list of sampled indices
+        np.ndarray
+            sampled indices
 
         """
-
-        n_indices = self._check_batchsize(n_indices)
-        samples = []
-
-        for key, val in n_indices.items():
-            start = self._global_idxs[key] - val
-            end = self._global_idxs[key]
-            samples += self._indices[start: end]
+        samples = self._next_from_schedule(n_indices)
 
         if self._shuffle:
-            shuffle(samples)
+            samples = np.random.permutation(samples)
 
         return samples
 
     def __len__(self):
-        return self._length
+        return self._num_samples
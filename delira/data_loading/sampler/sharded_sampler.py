@@ -0,0 +1,337 @@
+import numpy as np
+
+from .abstract_sampler import AbstractSampler
+from .sequential_sampler import SequentialSampler
+from ..dataset import AbstractDataset
+
+
+class ShardedSampler(AbstractSampler):
+    """
+    Wraps an arbitrary sampler and returns only the shard of its index
+    stream, which belongs to the current rank (e.g. the current process in
+    data-parallel training).
+
+    At the beginning of each epoch, the complete index stream of the wrapped
+    sampler is generated with a random seed depending on ``seed`` and the
+    current epoch. Since this seed is the same for all ranks, each rank
+    obtains the same stream and takes a contiguous block of it, which
+    results in disjoint partitions. Contiguous blocks keep the order of the
+    wrapped sampler's stream intact (e.g. the interleaved classes of the
+    prevalence samplers), so that the batches of each rank are composed
+    like the batches of the unsharded sampler. The stream is padded (by
+    repeating its first indices) or truncated, to obtain the same number of
+    indices for all ranks. For evaluation, the padding can be disabled, to
+    sample each index exactly once (the shards then differ in size by at
+    most one index)
+
+    """
+
+    def __init__(self, sampler: AbstractSampler, num_replicas=1, rank=0,
+                 seed=0, drop_last=False, pad=True):
+        """
+
+        Parameters
+        ----------
+        sampler : :class:`AbstractSampler`
+            the sampler to shard
+        num_replicas : int
+            the number of ranks the indices are distributed across
+        rank : int
+            the current rank
+        seed : int
+            the base seed for generating the index stream; must be the same
+            for all ranks
+        drop_last : bool
+            if True: the last indices are dropped to obtain the same number
+            of indices per rank; if False: the stream is padded instead
+        pad : bool
+            whether to pad the stream (only used if ``drop_last`` is False);
+            if False: each index is sampled exactly once and the number of
+            indices may differ between the ranks
+
+        Raises
+        ------
+        ValueError
+            if rank is not in range [0, num_replicas)
+
+        """
+        if not 0 <= rank < num_replicas:
+            raise ValueError("Invalid rank %d. Rank must be in range [0, %d)"
+                             % (rank, num_replicas))
+
+        self._sampler = sampler
+        self._num_replicas = num_replicas
+        self._rank = rank
+        self._seed = seed
+        self._drop_last = drop_last
+        self._pad = pad
+        self._epoch = 0
+        self._stream = None
+
+        total = len(sampler)
+        if drop_last:
+            num_samples = total // num_replicas
+        elif not pad:
+            num_samples = len(range(rank, total, num_replicas))
+        else:
+            num_samples = -(-total // num_replicas)
+
+        super().__init__(range(num_samples))
+
+    @classmethod
+    def from_dataset(cls, dataset: AbstractDataset,
+                     sampler_cls=SequentialSampler, num_replicas=1, rank=0,
+                     seed=0, drop_last=False, pad=True, **kwargs):
+        """
+        Classmethod to initialize the sampler from a given dataset
+
+        Parameters
+        ----------
+        dataset : AbstractDataset
+            the given dataset
+        sampler_cls : type
+            the class of the sampler to shard
+        num_replicas : int
+            the number of ranks the indices are distributed across
+        rank : int
+            the current rank
+        seed : int
+            the base seed for generating the index stream
+        drop_last : bool
+            whether to drop or to pad the last indices
+        pad : bool
+            whether to pad the stream (only used if ``drop_last`` is False)
+        **kwargs :
+            additional keyword arguments to initialize the wrapped sampler
+
+        Returns
+        -------
+        :class:`ShardedSampler`
+            The initialized sampler
+
+        """
+        return cls(sampler_cls.from_dataset(dataset, **kwargs),
+                   num_replicas=num_replicas, rank=rank, seed=seed,
+                   drop_last=drop_last, pad=pad)
+
+    @property
+    def sampler(self):
+        """
+        The wrapped sampler
+
+        Returns
+        -------
+        :class:`AbstractSampler`
+            the sampler generating the (unsharded) index stream
+
+        """
+        return self._sampler
+
+    @property
+    def num_replicas(self):
+        """
+        The number of ranks the indices are distributed across
+
+        Returns
+        -------
+        int
+            the number of ranks
+
+        """
+        return self._num_replicas
+
+    @property
+    def rank(self):
+        """
+        The current rank
+
+        Returns
+        -------
+        int
+            the rank, whose shard is sampled
+
+        """
+        return self._rank
+
+    @property
+    def shard_kwargs(self):
+        """
+        The keyword arguments to shard another sampler (or data manager) the
+        same way
+
+        Returns
+        -------
+        dict
+            containing ``num_replicas``, ``rank``, ``seed``, ``drop_last``
+            and ``pad``
+
+        """
+        return {"num_replicas": self._num_replicas,
+                "rank": self._rank,
+                "seed": self._seed,
+                "drop_last": self._drop_last,
+                "pad": self._pad}
+
+    def set_epoch(self, epoch):
+        """
+        Sets the epoch used to seed the next index stream. Must be called
+        with the same epoch on all ranks. If not called, the epoch is
+        incremented after each index stream
+
+        Parameters
+        ----------
+        epoch : int
+            the epoch
+
+        """
+        self._epoch = epoch
+
+    def _drain(self):
+        """
+        Generates the complete index stream of the wrapped sampler for a
+        single epoch
+
+        Returns
+        -------
+        list or np.ndarray
+            the index stream
+
+        """
+        # always start at the beginning of the wrapped sampler's epoch
+        self._sampler.reset()
+
+        batches = []
+        while True:
+            try:
+                batches.append(self._sampler(len(self._sampler)))
+            except StopIteration:
+                break
+
+        if all(isinstance(batch, np.ndarray) for batch in batches):
+            return np.concatenate(batches)
+
+        return [idx for batch in batches for idx in batch]
+
+    def _build_schedule(self):
+        """
+        Generates the index stream of the wrapped sampler with an
+        epoch-dependent seed and extracts the shard of the current rank
+
+        Returns
+        -------
+        list or np.ndarray
+            the indices to sample during the next epoch
+
+        """
+        # all ranks must obtain the same stream, without influencing the
+        # random state of the current process
+        rng_state = np.random.get_state()
+        np.random.seed((self._seed + self._epoch) % 2 ** 32)
+        try:
+            stream = self._drain()
+        finally:
+            np.random.set_state(rng_state)
+
+        self._epoch += 1
+
+        if self._drop_last or self._pad:
+            total_size = self._num_samples * self._num_replicas
+        else:
+            total_size = len(stream)
+
+        if len(stream) < total_size:
+            n_repeats = -(-total_size // max(len(stream), 1))
+            if isinstance(stream, np.ndarray):
+                stream = np.tile(stream, n_repeats)
+            else:
+                stream = stream * n_repeats
+
+        # the complete stream allows to restore the shard of any rank
+        self._stream = stream[:total_size]
+
+        return self._shard(self._stream)
+
+    def _shard(self, stream):
+        """
+        Extracts the contiguous block of the current rank from the complete
+        index stream
+
+        Parameters
+        ----------
+        stream : list or np.ndarray
+            the (padded or truncated) stream of all ranks
+
+        Returns
+        -------
+        list or np.ndarray
+            the shard of the current rank
+
+        """
+        # the first ranks obtain one more index if the stream is not
+        # divisible by the number of ranks (only without padding)
+        base, remainder = divmod(len(stream), self._num_replicas)
+        start = self._rank * base + min(self._rank, remainder)
+        return stream[start:start + self._num_samples]
+
+    def state_dict(self):
+        """
+        Returns the current sampling state. Since the state contains the
+        index stream of all ranks, the state of one rank can be used to
+        restore all ranks
+
+        Returns
+        -------
+        dict
+            the sampling state
+
+        """
+        return {"global_index": self._global_index,
+                "epoch": self._epoch,
+                "stream": self._stream,
+                "sampler": self._sampler.state_dict()}
+
+    def load_state_dict(self, state):
+        """
+        Restores a sampling state obtained by :meth:`state_dict` and extracts
+        the shard of the current rank
+
+        Parameters
+        ----------
+        state : dict
+            the sampling state
+
+        """
+        self._global_index = state["global_index"]
+        self._epoch = state["epoch"]
+        self._stream = state["stream"]
+        self._sampler.load_state_dict(state["sampler"])
+
+        if self._stream is None:
+            self._schedule = None
+        else:
+            self._schedule = self._shard(self._stream)
+
+    def _get_indices(self, n_indices):
+        """
+        Actual Sampling
+
+        Parameters
+        ----------
+        n_indices : int
+            number of indices to return
+
+        Returns
+        -------
+        list or np.ndarray
+            sampled indices
+
+        Raises
+        ------
+        StopIteration
+            If maximal number of samples is reached
+
+        """
+        return self._next_from_schedule(n_indices)
+
+    def __len__(self):
+        return self._num_samples
@@ -1,5 +1,4 @@
 import numpy as np
-from numpy.random import choice
 
 from .abstract_sampler import AbstractSampler
 from ..dataset import AbstractDataset
@@ -27,9 +26,9 @@ class WeightedRandomSampler(AbstractSampler):
         """
         super().__init__(indices)
 
-        self._indices = list(range(len(indices)))
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)
         self._weights = weights
-        self._global_index = 0
 
     @classmethod
     def from_dataset(cls, dataset: AbstractDataset, **kwargs):
@@ -62,8 +61,8 @@ class WeightedRandomSampler(AbstractSampler):
 
         Returns
         -------
-        list
-            list of sampled indices
+        np.ndarray
+            sampled indices
 
         Raises
         ------
@@ -73,14 +72,23 @@ class WeightedRandomSampler(AbstractSampler):
             if weights or cum_weights don't match the population
 
         """
-        n_indices = self._check_batchsize(n_indices)
+        return self._next_from_schedule(n_indices)
 
-        samples = choice(self._indices, size=n_indices, p=self._weights)
+    def _build_schedule(self):
+        """
+        Draws all indices of an epoch at once
+
+        Returns
+        -------
+        np.ndarray
+            the indices to sample during the next epoch
 
-        return samples
+        """
+        return np.random.choice(self._num_samples, size=self._num_samples,
+                                p=self._weights)
 
     def __len__(self):
-        return len(self._indices)
+        return self._num_samples
 
 
 class WeightedPrevalenceRandomSampler(WeightedRandomSampler):
@@ -96,14 +104,11 @@ class WeightedPrevalenceRandomSampler(WeightedRandomSampler):
             data index and the value at a certain index indicates the
              corresponding class
         """
-        weights = np.array(indices).astype(np.float)
-        classes, classes_count = np.unique(indices, return_counts=True)
-
-        # compute probabilities
-        target_prob = 1 / classes.shape[0]
+        _, inverse, classes_count = np.unique(
+            np.asarray(indices).reshape(-1), return_inverse=True,
+            return_counts=True)
 
-        # generate weight matrix
-        for i, c in enumerate(classes):
-            weights[weights == c] = (target_prob / classes_count[i])
+        # each class is sampled with the same probability
+        weights = 1. / (len(classes_count) * classes_count[inverse])
 
         super().__init__(indices, weights=weights)
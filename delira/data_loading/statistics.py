@@ -0,0 +1,894 @@
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from delira import get_current_debug_mode
+from .dataset import AbstractDataset
+from .load_utils import norm_range, norm_zero_mean_unit_std
+
+logger = logging.getLogger(__name__)
+
+# increase this whenever the file format of the statistics changes
+STATISTICS_VERSION = 1
+
+
+class _StreamingHistogram(object):
+    """
+    Histogram with a bin width of a power of two. If new values don't fit
+    into the maximum number of bins, the bin width is doubled by merging
+    neighboring bins. This makes histograms of arbitrary data ranges
+    mergeable without loss of information
+
+    """
+
+    def __init__(self, max_bins=2048, width=None, offset=0, counts=None):
+        """
+
+        Parameters
+        ----------
+        max_bins : int
+            the maximum number of bins
+        width : float or None
+            the bin width (must be a power of two); None for an empty
+            histogram
+        offset : int
+            the index of the first bin (bin ``i`` covers the values
+            ``[(offset + i) * width, (offset + i + 1) * width)``)
+        counts : iterable or None
+            the counts per bin
+
+        """
+        self.max_bins = max_bins
+        self.width = width
+        self.offset = offset
+        if counts is None:
+            counts = []
+        self.counts = np.asarray(counts, dtype=np.int64)
+
+    def _coarsen(self):
+        """
+        Doubles the bin width by merging pairs of neighboring bins
+
+        """
+        counts = self.counts
+        if self.offset % 2:
+            counts = np.concatenate([[0], counts])
+        if len(counts) % 2:
+            counts = np.concatenate([counts, [0]])
+
+        self.counts = counts.reshape(-1, 2).sum(axis=1)
+        self.offset = self.offset // 2
+        self.width *= 2
+
+    def _extend(self, first_bin, last_bin):
+        """
+        Extends the histogram to cover the given bins (coarsens the histogram
+        if necessary)
+
+        Parameters
+        ----------
+        first_bin : int
+            the index of the first bin to cover (at the current width)
+        last_bin : int
+            the index of the last bin to cover (at the current width)
+
+        Returns
+        -------
+        int
+            the number of times the histogram has been coarsened
+
+        """
+        n_coarsened = 0
+        if len(self.counts):
+            first_bin = min(first_bin, self.offset)
+            last_bin = max(last_bin, self.offset + len(self.counts) - 1)
+
+        while last_bin - first_bin + 1 > self.max_bins:
+            self._coarsen()
+            first_bin, last_bin = first_bin // 2, last_bin // 2
+            n_coarsened += 1
+
+        if not len(self.counts):
+            self.offset = first_bin
+
+        self.counts = np.concatenate([
+            np.zeros(self.offset - first_bin, dtype=np.int64), self.counts,
+            np.zeros(last_bin - self.offset - len(self.counts) + 1,
+                     dtype=np.int64)])
+        self.offset = first_bin
+        return n_coarsened
+
+    def update(self, data):
+        """
+        Adds values to the histogram
+
+        Parameters
+        ----------
+        data : np.ndarray
+            the values to add
+
+        """
+        data = np.asarray(data).reshape(-1)
+        if np.issubdtype(data.dtype, np.floating):
+            data = data[np.isfinite(data)]
+        if not data.size:
+            return
+
+        data_min, data_max = float(data.min()), float(data.max())
+
+        if self.width is None:
+            data_range = max(data_max - data_min, np.finfo(np.float32).eps)
+            self.width = 2. ** np.ceil(np.log2(data_range / self.max_bins))
+
+        self._extend(int(np.floor(data_min / self.width)),
+                     int(np.floor(data_max / self.width)))
+
+        bins = np.floor(data / self.width).astype(np.int64)
+        bins -= self.offset
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+
+    def merge(self, other):
+        """
+        Merges another histogram into this one
+
+        Parameters
+        ----------
+        other : :class:`_StreamingHistogram`
+            the other histogram
+
+        """
+        if other.width is None or not len(other.counts):
+            return
+
+        other = _StreamingHistogram(self.max_bins, other.width, other.offset,
+                                    other.counts)
+
+        if self.width is None:
+            self.width = other.width
+
+        while True:
+            while self.width < other.width:
+                self._coarsen()
+            while other.width < self.width:
+                other._coarsen()
+
+            # may coarsen this histogram again
+            if not self._extend(other.offset,
+                                other.offset + len(other.counts) - 1):
+                break
+
+        start = other.offset - self.offset
+        self.counts[start:start + len(other.counts)] += other.counts
+
+    def percentile(self, q):
+        """
+        Estimates a percentile by linear interpolation inside the bins
+
+        Parameters
+        ----------
+        q : float
+            the percentile to compute (in range [0, 100])
+
+        Returns
+        -------
+        float
+            the estimated percentile
+
+        """
+        cum_counts = np.cumsum(self.counts)
+        if not len(cum_counts) or not cum_counts[-1]:
+            return np.nan
+
+        target = q / 100. * cum_counts[-1]
+        idx = min(int(np.searchsorted(cum_counts, target)),
+                  len(cum_counts) - 1)
+        prev = cum_counts[idx - 1] if idx else 0
+        frac = (target - prev) / self.counts[idx] if self.counts[idx] else 0.
+
+        return float((self.offset + idx + frac) * self.width)
+
+    def to_dict(self):
+        return {"width": self.width, "offset": self.offset,
+                "counts": self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, state, max_bins=2048):
+        return cls(max_bins, **state)
+
+
+class _StatisticsNormalization(object):
+    """
+    Normalization function using precomputed dataset statistics; can be
+    passed as ``norm_fn`` to :class:`delira.data_loading.LoadSample`
+
+    """
+
+    def __init__(self, mode, lower, upper, clip=False):
+        """
+
+        Parameters
+        ----------
+        mode : str
+            one of ['zero_mean_unit_std', '-1,1', '0,1']
+        lower : np.ndarray
+            per-channel mean or lower bound (last entry: pooled value)
+        upper : np.ndarray
+            per-channel std or upper bound (last entry: pooled value)
+        clip : bool
+            whether to clip the normalized data to the target range
+
+        """
+        self.mode = mode
+        self.lower = lower
+        self.upper = upper
+        self.clip = clip
+
+    def __call__(self, data, dtype=None, out=None, channel=None):
+        """
+        Normalizes the data
+
+        Parameters
+        ----------
+        data : np.ndarray
+            the data to normalize
+        dtype : str or np.dtype or None
+            the dtype of the normalized data
+        out : np.ndarray or None
+            a preallocated array to write the normalized data to
+        channel : int or None
+            the channel of the data; if None, the statistics pooled over all
+            channels are used
+
+        Returns
+        -------
+        np.ndarray
+            the normalized data
+
+        """
+        idx = -1 if channel is None else channel
+        lower, upper = self.lower[idx], self.upper[idx]
+
+        if self.mode == "zero_mean_unit_std":
+            return norm_zero_mean_unit_std(data, mean=lower, std=upper,
+                                           dtype=dtype, out=out)
+
+        out = norm_range(self.mode, data_min=lower, data_max=upper)(
+            data, dtype=dtype, out=out)
+        if self.clip:
+            np.clip(out, -1 if self.mode == "-1,1" else 0, 1, out=out)
+        return out
+
+
+def _compute_partial_statistics(dataset, indices, statistics_cls,
+                                statistics_kwargs):
+    """
+    Computes the statistics of a part of the dataset (in a separate process)
+
+    Parameters
+    ----------
+    dataset : :class:`AbstractDataset`
+        the dataset
+    indices : iterable of int
+        the indices to compute the statistics for
+    statistics_cls : type
+        the class of the statistics (a subclass of
+        :class:`DatasetStatistics`)
+    statistics_kwargs : dict
+        keyword arguments to create the :class:`DatasetStatistics`
+
+    Returns
+    -------
+    :class:`DatasetStatistics`
+        the partial statistics
+
+    """
+    statistics = statistics_cls(**statistics_kwargs)
+    for idx in indices:
+        statistics.update(dataset[idx])
+    return statistics
+
+
+class DatasetStatistics(object):
+    """
+    Dataset-level statistics computed in a single (parallel) pass over a
+    dataset:
+
+        * per-channel mean and standard deviation (computed in a numerically
+          stable streaming way by Welford's algorithm and merged by Chan's
+          parallel algorithm)
+        * per-channel minimum and maximum
+        * per-channel histograms to estimate percentiles
+        * label histograms (counting samples for scalar labels and voxels for
+          dense labels) and the per-sample labels (for scalar labels)
+        * the spatial shapes and spacings of all samples
+
+    The statistics can be saved to and loaded from a (versioned) json sidecar
+    file and can be used for normalization (see :meth:`norm_fn`) and to
+    initialize samplers (see :meth:`AbstractSampler.from_statistics`)
+
+    """
+
+    def __init__(self, keys=("data",), label_key="label", spacing_key=None,
+                 max_bins=2048):
+        """
+
+        Parameters
+        ----------
+        keys : iterable of str
+            the keys of the samples to compute intensity statistics for.
+            The corresponding arrays must be channel-first
+        label_key : str or None
+            the key of the label inside the samples
+        spacing_key : str or None
+            the key of the spacing inside the samples
+        max_bins : int
+            maximum number of histogram bins per channel
+
+        """
+        self.keys = tuple(keys)
+        self.label_key = label_key
+        self.spacing_key = spacing_key
+        self.max_bins = max_bins
+
+        self.n_samples = 0
+        self._moments = {}
+        self._histograms = {}
+        self.label_counts = {}
+        self._labels = []
+        self.shapes = {key: [] for key in self.keys}
+        self.spacings = []
+
+    def _update_moments(self, key, count, mean, m2, data_min, data_max):
+        """
+        Merges moments into the moments of a given key
+
+        Parameters
+        ----------
+        key : str
+            the key to update
+        count : np.ndarray
+            number of elements per channel
+        mean : np.ndarray
+            mean per channel
+        m2 : np.ndarray
+            sum of squared differences from the mean per channel
+        data_min : np.ndarray
+            minimum per channel
+        data_max : np.ndarray
+            maximum per channel
+
+        """
+        if key not in self._moments:
+            self._moments[key] = {
+                "count": np.zeros_like(count), "mean": np.zeros_like(mean),
+                "m2": np.zeros_like(m2),
+                "min": np.full_like(data_min, np.inf),
+                "max": np.full_like(data_max, -np.inf)}
+
+        moments = self._moments[key]
+        assert len(moments["count"]) == len(count), \
+            "Number of channels of key %s changed" % key
+
+        total = moments["count"] + count
+        # avoid division by zero for empty channels
+        _total = np.maximum(total, 1)
+        delta = mean - moments["mean"]
+
+        moments["mean"] = moments["mean"] + delta * count / _total
+        moments["m2"] = moments["m2"] + m2 + \
+            delta ** 2 * moments["count"] * count / _total
+        moments["count"] = total
+        moments["min"] = np.minimum(moments["min"], data_min)
+        moments["max"] = np.maximum(moments["max"], data_max)
+
+    def _update_labels(self, label):
+        """
+        Updates the label statistics
+
+        Parameters
+        ----------
+        label : Any
+            the label of a single sample
+
+        """
+        label = np.asarray(label)
+
+        if label.size == 1:
+            label = label.item()
+            self._labels.append(label)
+            self.label_counts[label] = self.label_counts.get(label, 0) + 1
+        else:
+            self._labels.append(None)
+            values, counts = np.unique(label, return_counts=True)
+            for value, count in zip(values.tolist(), counts.tolist()):
+                self.label_counts[value] = self.label_counts.get(value, 0) + \
+                    count
+
+    def update(self, sample: dict):
+        """
+        Adds a single sample to the statistics
+
+        Parameters
+        ----------
+        sample : dict
+            the sample
+
+        """
+        for key in self.keys:
+            data = np.asarray(sample[key])
+            self.shapes[key].append(tuple(data.shape[1:]))
+
+            flat = data.reshape(data.shape[0], -1)
+            count = np.full(flat.shape[0], flat.shape[1], dtype=np.float64)
+            mean = flat.mean(axis=1, dtype=np.float64)
+            m2 = flat.var(axis=1, dtype=np.float64) * count
+
+            self._update_moments(key, count, mean, m2,
+                                 flat.min(axis=1).astype(np.float64),
+                                 flat.max(axis=1).astype(np.float64))
+
+            if key not in self._histograms:
+                self._histograms[key] = [_StreamingHistogram(self.max_bins)
+                                         for _ in range(flat.shape[0])]
+            for hist, channel in zip(self._histograms[key], flat):
+                hist.update(channel)
+
+        if self.label_key is not None and self.label_key in sample:
+            self._update_labels(sample[self.label_key])
+
+        if self.spacing_key is not None:
+            self.spacings.append(
+                tuple(np.asarray(sample[self.spacing_key]).tolist()))
+
+        self.n_samples += 1
+
+    def merge(self, other):
+        """
+        Merges the statistics of another (disjoint) part of the dataset.
+        The samples of ``other`` are treated as succeeding the samples of
+        this statistics
+
+        Parameters
+        ----------
+        other : :class:`DatasetStatistics`
+            the statistics to merge
+
+        """
+        for key, moments in other._moments.items():
+            self._update_moments(key, moments["count"], moments["mean"],
+                                 moments["m2"], moments["min"],
+                                 moments["max"])
+
+        for key, histograms in other._histograms.items():
+            if key not in self._histograms:
+                self._histograms[key] = [_StreamingHistogram(self.max_bins)
+                                         for _ in histograms]
+            for hist, other_hist in zip(self._histograms[key], histograms):
+                hist.merge(other_hist)
+
+        for label, count in other.label_counts.items():
+            self.label_counts[label] = self.label_counts.get(label, 0) + count
+
+        self._labels += other._labels
+        for key, shapes in other.shapes.items():
+            self.shapes.setdefault(key, []).extend(shapes)
+        self.spacings += other.spacings
+        self.n_samples += other.n_samples
+
+    @classmethod
+    def from_dataset(cls, dataset: AbstractDataset, n_workers=None,
+                     **kwargs):
+        """
+        Computes the statistics of a whole dataset in a single pass. The
+        dataset is split into contiguous parts, which are processed in
+        parallel (unless the debug mode is active) and merged afterwards
+
+        Parameters
+        ----------
+        dataset : :class:`AbstractDataset`
+            the dataset
+        n_workers : int or None
+            number of processes to use; if None: ``os.cpu_count()``
+        **kwargs :
+            additional keyword arguments to create the
+            :class:`DatasetStatistics`
+
+        Returns
+        -------
+        :class:`DatasetStatistics`
+            the computed statistics
+
+        """
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+
+        if get_current_debug_mode():
+            n_workers = 1
+
+        n_workers = max(min(n_workers, len(dataset)), 1)
+        chunks = np.array_split(np.arange(len(dataset)), n_workers)
+
+        if n_workers == 1:
+            return _compute_partial_statistics(dataset, chunks[0], cls,
+                                               kwargs)
+
+        statistics = cls(**kwargs)
+        with ProcessPoolExecutor(n_workers) as executor:
+            for partial in executor.map(_compute_partial_statistics,
+                                        repeat(dataset), chunks,
+                                        repeat(cls), repeat(kwargs)):
+                statistics.merge(partial)
+
+        return statistics
+
+    @property
+    def labels(self):
+        """
+        Property returning the per-sample labels
+
+        Returns
+        -------
+        np.ndarray or None
+            the labels of all samples; None if no scalar labels are available
+
+        """
+        if not self._labels or any(label is None for label in self._labels):
+            return None
+        return np.array(self._labels)
+
+    def _pooled(self, key):
+        """
+        Pools the moments of all channels of a given key
+
+        Parameters
+        ----------
+        key : str
+            the key
+
+        Returns
+        -------
+        dict
+            the pooled moments (each as one-element array)
+
+        """
+        moments = self._moments[key]
+        count = moments["count"].sum()
+        mean = (moments["count"] * moments["mean"]).sum() / max(count, 1)
+        m2 = moments["m2"].sum() + \
+            (moments["count"] * (moments["mean"] - mean) ** 2).sum()
+        return {"count": np.array([count]), "mean": np.array([mean]),
+                "m2": np.array([m2]),
+                "min": np.array([moments["min"].min()]),
+                "max": np.array([moments["max"].max()])}
+
+    def _moment(self, key, name, channel):
+        moments = self._moments[key] if channel is not None \
+            else self._pooled(key)
+        values = moments[name]
+        if name == "m2":
+            values = np.sqrt(values / np.maximum(moments["count"], 1))
+        if channel == "all":
+            return values
+        return float(values[0 if channel is None else channel])
+
+    def mean(self, key="data", channel="all"):
+        """
+        Returns the mean
+
+        Parameters
+        ----------
+        key : str
+            the key
+        channel : int, str or None
+            the channel to return the value for; 'all' returns the values of
+            all channels, None the value pooled over all channels
+
+        Returns
+        -------
+        float or np.ndarray
+            the mean
+
+        """
+        return self._moment(key, "mean", channel)
+
+    def std(self, key="data", channel="all"):
+        """
+        Returns the standard deviation
+
+        Parameters
+        ----------
+        key : str
+            the key
+        channel : int, str or None
+            the channel to return the value for; 'all' returns the values of
+            all channels, None the value pooled over all channels
+
+        Returns
+        -------
+        float or np.ndarray
+            the standard deviation
+
+        """
+        return self._moment(key, "m2", channel)
+
+    def min(self, key="data", channel="all"):
+        """
+        Returns the minimum
+
+        Parameters
+        ----------
+        key : str
+            the key
+        channel : int, str or None
+            the channel to return the value for; 'all' returns the values of
+            all channels, None the value pooled over all channels
+
+        Returns
+        -------
+        float or np.ndarray
+            the minimum
+
+        """
+        return self._moment(key, "min", channel)
+
+    def max(self, key="data", channel="all"):
+        """
+        Returns the maximum
+
+        Parameters
+        ----------
+        key : str
+            the key
+        channel : int, str or None
+            the channel to return the value for; 'all' returns the values of
+            all channels, None the value pooled over all channels
+
+        Returns
+        -------
+        float or np.ndarray
+            the maximum
+
+        """
+        return self._moment(key, "max", channel)
+
+    def percentile(self, q, key="data", channel="all"):
+        """
+        Estimates percentiles from the histograms
+
+        Parameters
+        ----------
+        q : float
+            the percentile to compute (in range [0, 100])
+        key : str
+            the key
+        channel : int, str or None
+            the channel to return the value for; 'all' returns the values of
+            all channels, None the value pooled over all channels
+
+        Returns
+        -------
+        float or np.ndarray
+            the estimated percentile
+
+        """
+        histograms = self._histograms[key]
+        if channel is None:
+            pooled = _StreamingHistogram(self.max_bins)
+            for hist in histograms:
+                pooled.merge(hist)
+            histograms = [pooled]
+        elif channel != "all":
+            histograms = [histograms[channel]]
+
+        values = np.clip([hist.percentile(q) for hist in histograms],
+                         self._moment(key, "min", channel),
+                         self._moment(key, "max", channel))
+
+        return values if channel == "all" else float(values[0])
+
+    def norm_fn(self, key="data", mode="zero_mean_unit_std",
+                percentiles=None):
+        """
+        Creates a normalization function using the dataset statistics
+        instead of per-sample statistics
+
+        Parameters
+        ----------
+        key : str
+            the key to use the statistics of
+        mode : str
+            the normalization mode; must be one of
+            ['zero_mean_unit_std', '-1,1', '0,1']
+        percentiles : tuple or None
+            the lower and upper percentile to use as range for the range
+            normalization (values outside this range will be clipped);
+            if None: the minimum and maximum are used
+
+        Returns
+        -------
+        callable
+            the normalization function, accepting the additional keyword
+            arguments ``dtype``, ``out`` and ``channel``
+
+        Raises
+        ------
+        ValueError
+            if mode is not supported
+
+        """
+        def _per_channel(fn):
+            return np.append(fn(key=key, channel="all"),
+                             fn(key=key, channel=None))
+
+        if mode == "zero_mean_unit_std":
+            return _StatisticsNormalization(mode, _per_channel(self.mean),
+                                            _per_channel(self.std))
+
+        if mode not in ("-1,1", "0,1"):
+            raise ValueError("%s not supported." % mode)
+
+        if percentiles is None:
+            return _StatisticsNormalization(mode, _per_channel(self.min),
+                                            _per_channel(self.max))
+
+        lower, upper = percentiles
+        return _StatisticsNormalization(
+            mode,
+            _per_channel(lambda **kw: self.percentile(lower, **kw)),
+            _per_channel(lambda **kw: self.percentile(upper, **kw)),
+            clip=True)
+
+    def to_dict(self):
+        """
+        Converts the statistics to a json-serializable dict
+
+        Returns
+        -------
+        dict
+            the statistics
+
+        """
+        return {
+            "version": STATISTICS_VERSION,
+            "keys": list(self.keys),
+            "label_key": self.label_key,
+            "spacing_key": self.spacing_key,
+            "max_bins": self.max_bins,
+            "n_samples": self.n_samples,
+            "moments": {key: {name: val.tolist()
+                              for name, val in moments.items()}
+                        for key, moments in self._moments.items()},
+            "histograms": {key: [hist.to_dict() for hist in histograms]
+                           for key, histograms in self._histograms.items()},
+            "label_counts": [[label, count] for label, count
+                             in self.label_counts.items()],
+            "labels": self._labels,
+            "shapes": {key: [list(shape) for shape in shapes]
+                       for key, shapes in self.shapes.items()},
+            "spacings": [list(spacing) for spacing in self.spacings]
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict):
+        """
+        Restores the statistics from a dict
+
+        Parameters
+        ----------
+        state : dict
+            the statistics as returned by :meth:`to_dict`
+
+        Returns
+        -------
+        :class:`DatasetStatistics`
+            the restored statistics
+
+        Raises
+        ------
+        ValueError
+            if the statistics were saved with another version
+
+        """
+        version = state.get("version", None)
+        if version != STATISTICS_VERSION:
+            raise ValueError("Statistics version %s is not supported "
+                             "(expected version %d)"
+                             % (version, STATISTICS_VERSION))
+
+        statistics = cls(state["keys"], state["label_key"],
+                         state["spacing_key"], state["max_bins"])
+        statistics.n_samples = state["n_samples"]
+        statistics._moments = {
+            key: {name: np.asarray(val, dtype=np.float64)
+                  for name, val in moments.items()}
+            for key, moments in state["moments"].items()}
+        statistics._histograms = {
+            key: [_StreamingHistogram.from_dict(hist, statistics.max_bins)
+                  for hist in histograms]
+            for key, histograms in state["histograms"].items()}
+        statistics.label_counts = {label: count for label, count
+                                   in state["label_counts"]}
+        statistics._labels = state["labels"]
+        statistics.shapes = {key: [tuple(shape) for shape in shapes]
+                             for key, shapes in state["shapes"].items()}
+        statistics.spacings = [tuple(spacing)
+                               for spacing in state["spacings"]]
+        return statistics
+
+    def save(self, file_name):
+        """
+        Saves the statistics to a json file
+
+        Parameters
+        ----------
+        file_name : str
+            the file to save the statistics to
+
+        """
+        tmp_file = file_name + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_file, file_name)
+
+    @classmethod
+    def load(cls, file_name):
+        """
+        Loads the statistics from a json file
+
+        Parameters
+        ----------
+        file_name : str
+            the file to load the statistics from
+
+        Returns
+        -------
+        :class:`DatasetStatistics`
+            the loaded statistics
+
+        """
+        with open(file_name) as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def load_or_compute(cls, file_name, dataset: AbstractDataset,
+                        n_workers=None, **kwargs):
+        """
+        Loads the statistics from a json sidecar file if it exists and has
+        a valid version. Computes and saves them otherwise
+
+        Parameters
+        ----------
+        file_name : str
+            the sidecar file
+        dataset : :class:`AbstractDataset`
+            the dataset to compute the statistics for
+        n_workers : int or None
+            number of processes to use for computation
+        **kwargs :
+            additional keyword arguments to create the
+            :class:`DatasetStatistics`
+
+        Returns
+        -------
+        :class:`DatasetStatistics`
+            the statistics
+
+        """
+        if os.path.isfile(file_name):
+            try:
+                statistics = cls.load(file_name)
+                if statistics.n_samples == len(dataset):
+                    return statistics
+                logger.warning("Number of samples in %s does not match the "
+                               "dataset. Recomputing statistics."
+                               % file_name)
+            except ValueError as e:
+                logger.warning("%s. Recomputing statistics." % str(e))
+
+        statistics = cls.from_dataset(dataset, n_workers=n_workers, **kwargs)
+        statistics.save(file_name)
+        return statistics
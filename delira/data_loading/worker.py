@@ -0,0 +1,130 @@
+import os
+import pickle
+import sys
+from contextlib import contextmanager
+from queue import Full
+
+# environment variables limiting the number of threads used by the common
+# numerical libraries
+THREAD_LIMIT_VARIABLES = ("OMP_NUM_THREADS", "MKL_NUM_THREADS",
+                          "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS",
+                          "VECLIB_MAXIMUM_THREADS")
+
+
+@contextmanager
+def thread_limited_environ(num_threads=1):
+    """
+    Contextmanager limiting the number of threads of the numerical libraries
+    via environment variables for all processes started inside this context.
+    Variables, which are already set, are not changed
+
+    Parameters
+    ----------
+    num_threads : int or None
+        the maximum number of threads per process; if None: the environment
+        is not changed
+
+    """
+    changed = []
+    for key in THREAD_LIMIT_VARIABLES:
+        if num_threads is not None and key not in os.environ:
+            os.environ[key] = str(num_threads)
+            changed.append(key)
+
+    try:
+        yield
+    finally:
+        for key in changed:
+            os.environ.pop(key, None)
+
+
+def limit_threads(num_threads=1):
+    """
+    Limits the number of threads used by the numerical libraries inside the
+    current process
+
+    Parameters
+    ----------
+    num_threads : int
+        the maximum number of threads
+
+    """
+    for key in THREAD_LIMIT_VARIABLES:
+        os.environ.setdefault(key, str(num_threads))
+
+    # libraries, which were already loaded, must be limited at runtime
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=num_threads)
+    except ImportError:
+        pass
+
+    # don't import torch just to limit it's threads
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(num_threads)
+
+
+def worker_loop(queue, data_loader, sampler_queues, transform, thread_id,
+                seed, abort_event, num_threads=1):
+    """
+    Entry point of the augmentation processes. Since this module only
+    depends on the standard library (and delira's packages are imported
+    lazily), processes started with ``spawn`` or ``forkserver`` only import
+    the modules necessary to unpickle the dataloader and the transforms.
+
+    Parameters
+    ----------
+    queue : :class:`multiprocessing.Queue`
+        the queue to put the augmented batches to
+    data_loader : bytes or :class:`BaseDataLoader`
+        the (pickled) dataloader; the dataloader is pickled only once in
+        the main process to avoid pickling it for each process
+    sampler_queues : list of :class:`multiprocessing.Queue` or None
+        the queues passing the sample indices to the dataloader (since
+        queues cannot be pickled outside of process creation, they are not
+        contained in the pickled dataloader)
+    transform : Callable or None
+        the transforms to apply
+    thread_id : int
+        the id of the current process
+    seed : int or None
+        the seed for the current process
+    abort_event : :class:`multiprocessing.Event`
+        the event signaling the process to stop
+    num_threads : int or None
+        the maximum number of threads of the numerical libraries inside this
+        process; if None: the threads are not limited
+
+    """
+    if num_threads is not None:
+        limit_threads(num_threads)
+
+    if isinstance(data_loader, bytes):
+        data_loader = pickle.loads(data_loader)
+    if sampler_queues is not None:
+        data_loader.sampler_queues = sampler_queues
+
+    import numpy as np
+    np.random.seed(seed)
+    data_loader.set_thread_id(thread_id)
+
+    # open resources (like file handles) once per process
+    if hasattr(data_loader, "worker_init"):
+        data_loader.worker_init()
+
+    item = None
+    while not abort_event.is_set():
+        if item is None:
+            try:
+                item = next(data_loader)
+                if transform is not None:
+                    item = transform(**item)
+            except StopIteration:
+                item = "end"
+
+        try:
+            queue.put(item, timeout=2)
+            item = None
+        except Full:
+            # items have not been consumed yet; try again
+            pass
@@ -1,9 +1,25 @@
 from delira import get_backends
+from delira._lazy import lazy_module_attributes
+
+from .manifest import CheckpointManifest
+
+# the backend-specific functions are imported on first access to avoid
+# importing the backends together with the package
+_LAZY_ATTRIBUTES = {}
 
 if "TORCH" in get_backends():
-    from .torch import save_checkpoint as torch_save_checkpoint
-    from .torch import load_checkpoint as torch_load_checkpoint
+    _LAZY_ATTRIBUTES.update({
+        "torch_save_checkpoint": (".torch", "save_checkpoint"),
+        "torch_load_checkpoint": (".torch", "load_checkpoint"),
+        "torch_export_torchscript": (".torch", "export_torchscript"),
+        "torch_load_torchscript": (".torch", "load_torchscript"),
+        "torch_export_onnx": (".torch", "export_onnx"),
+    })
 
 if "TF" in get_backends():
-    from .tf import save_checkpoint as tf_save_checkpoint
-    from .tf import load_checkpoint as tf_load_checkpoint
+    _LAZY_ATTRIBUTES.update({
+        "tf_save_checkpoint": (".tf", "save_checkpoint"),
+        "tf_load_checkpoint": (".tf", "load_checkpoint"),
+    })
+
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_ATTRIBUTES)
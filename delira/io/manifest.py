@@ -0,0 +1,309 @@
+import json
+import logging
+import os
+import zlib
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+class ChecksumWriter(object):
+    """
+    Wraps a binary file object and computes the checksum of all written
+    bytes, which avoids reading back a written file to obtain its checksum
+
+    """
+
+    def __init__(self, file_obj):
+        """
+
+        Parameters
+        ----------
+        file_obj : file-like
+            the binary file object to write to
+
+        """
+        self._file = file_obj
+        self._crc = 0
+
+    def write(self, data):
+        self._crc = zlib.crc32(data, self._crc)
+        return self._file.write(data)
+
+    def flush(self):
+        self._file.flush()
+
+    @property
+    def checksum(self):
+        """
+        The checksum of all bytes written so far
+
+        Returns
+        -------
+        str
+            the checksum
+
+        """
+        return "crc32:%08x" % (self._crc & 0xffffffff)
+
+
+def file_checksum(file_name, chunk_size=2 ** 22):
+    """
+    Computes the checksum of a file (the same checksum as computed by
+    :class:`ChecksumWriter` while writing it)
+
+    Parameters
+    ----------
+    file_name : str
+        the file to compute the checksum for
+    chunk_size : int
+        number of bytes to read at once
+
+    Returns
+    -------
+    str
+        the checksum
+
+    """
+    crc = 0
+    with open(file_name, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            crc = zlib.crc32(chunk, crc)
+
+    return "crc32:%08x" % (crc & 0xffffffff)
+
+
+class CheckpointManifest(object):
+    """
+    Small JSON index of all checkpoints inside a directory (containing
+    epoch, validation score and checksum of each checkpoint). It allows to
+    find the latest and the best checkpoint without listing the directory,
+    which can be slow for directories containing many checkpoints
+    (especially on network file systems).
+
+    The manifest is rewritten atomically on each update, so it is never left
+    in a partially written state.
+
+    """
+
+    FILE_NAME = "checkpoints.json"
+
+    def __init__(self, save_path, file_name=FILE_NAME):
+        """
+
+        Parameters
+        ----------
+        save_path : str
+            the directory containing the checkpoints
+        file_name : str
+            the manifest's file name inside ``save_path``
+
+        """
+        self.save_path = save_path
+        self.path = os.path.join(save_path, file_name)
+        self._entries = None
+        self._best = None
+
+    def load(self):
+        """
+        (Re-)Loads the manifest from disk
+
+        Returns
+        -------
+        bool
+            whether a valid manifest was found
+
+        """
+        self._entries, self._best = {}, None
+
+        try:
+            with open(self.path, "r") as f:
+                content = json.load(f)
+        except FileNotFoundError:
+            return False
+        except ValueError:
+            logger.warning("Checkpoint manifest %s is corrupt and will be "
+                           "ignored" % self.path)
+            return False
+
+        if content.get("version") != MANIFEST_VERSION:
+            logger.warning("Checkpoint manifest %s has an unsupported version "
+                           "and will be ignored" % self.path)
+            return False
+
+        self._entries = {entry["file"]: entry
+                         for entry in content["checkpoints"]}
+        self._best = content.get("best")
+        return True
+
+    @property
+    def entries(self):
+        """
+        All epoch checkpoints contained in the manifest (sorted by epoch)
+
+        Returns
+        -------
+        list of dict
+            the entries containing the keys 'file', 'epoch', 'val_score'
+            and 'checksum' (and 'size' and 'mtime_ns' if the file existed
+            while adding the entry)
+
+        """
+        if self._entries is None:
+            self.load()
+
+        return sorted(self._entries.values(), key=lambda x: x["epoch"])
+
+    def _write(self):
+        content = {"version": MANIFEST_VERSION,
+                   "checkpoints": self.entries,
+                   "best": self._best}
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(content, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def add(self, file_name, epoch, val_score=None, checksum=None,
+            is_best=False):
+        """
+        Adds (or replaces) the entry of a checkpoint and writes the manifest
+
+        Parameters
+        ----------
+        file_name : str
+            the checkpoint file (must be located inside ``save_path``)
+        epoch : int
+            the epoch of the checkpoint
+        val_score : float or None
+            the validation score of the checkpoint
+        checksum : str or None
+            the checksum of the checkpoint file (see
+            :class:`ChecksumWriter`)
+        is_best : bool
+            whether the checkpoint is the best checkpoint so far; in this
+            case it will be returned by :meth:`best` and not by
+            :meth:`latest`
+
+        """
+        if self._entries is None:
+            self.load()
+
+        entry = {"file": os.path.basename(file_name),
+                 "epoch": int(epoch),
+                 "val_score": None if val_score is None
+                 else float(val_score),
+                 "checksum": checksum}
+
+        # size and modification time allow to verify the checkpoint
+        # without reading it again
+        file_path = os.path.join(self.save_path, entry["file"])
+        if os.path.isfile(file_path):
+            stat = os.stat(file_path)
+            entry["size"] = stat.st_size
+            entry["mtime_ns"] = stat.st_mtime_ns
+
+        if is_best:
+            self._best = entry
+        else:
+            self._entries[entry["file"]] = entry
+
+        self._write()
+
+    def verify(self, entry):
+        """
+        Checks whether the checkpoint file of an entry exists and matches its
+        checksum.
+
+        If the entry contains the file's size and modification time, only
+        the file's metadata is checked, as long as both match. The file is
+        only read to compute its checksum, if the modification time changed
+        (or is not part of the entry) and the size still matches.
+
+        Parameters
+        ----------
+        entry : dict
+            the entry to verify
+
+        Returns
+        -------
+        bool
+            whether the checkpoint is valid
+
+        """
+        file_name = os.path.join(self.save_path, entry["file"])
+        if not os.path.isfile(file_name):
+            return False
+
+        stat = os.stat(file_name)
+        if entry.get("size") is not None and stat.st_size != entry["size"]:
+            return False
+
+        if entry.get("checksum") is None:
+            return True
+
+        if entry.get("mtime_ns") == stat.st_mtime_ns:
+            return True
+
+        return file_checksum(file_name) == entry["checksum"]
+
+    def latest(self, extensions=None, verify=False):
+        """
+        Returns the entry of the latest epoch checkpoint
+
+        Parameters
+        ----------
+        extensions : list or None
+            list of valid file extensions; if None: all files are valid
+        verify : bool
+            whether to skip checkpoints, which are missing or do not match
+            their checksum
+
+        Returns
+        -------
+        dict or None
+            the latest entry (None if no valid entry exists)
+
+        """
+        if extensions is not None:
+            extensions = tuple(ext if ext.startswith(".") else "." + ext
+                               for ext in extensions)
+
+        for entry in reversed(self.entries):
+            if extensions is not None and \
+                    not entry["file"].endswith(extensions):
+                continue
+
+            if verify and not self.verify(entry):
+                logger.warning("Skipping invalid checkpoint %s"
+                               % entry["file"])
+                continue
+
+            return entry
+
+        return None
+
+    def best(self, verify=False):
+        """
+        Returns the entry of the best checkpoint
+
+        Parameters
+        ----------
+        verify : bool
+            whether to return None if the best checkpoint is missing or
+            does not match its checksum
+
+        Returns
+        -------
+        dict or None
+            the best entry (None if no (valid) best checkpoint exists)
+
+        """
+        if self._entries is None:
+            self.load()
+
+        if self._best is None or (verify and not self.verify(self._best)):
+            return None
+
+        return self._best
@@ -1,4 +1,7 @@
+import inspect
+import json
 import logging
+import os
 from collections import OrderedDict
 
 from delira import get_backends
@@ -8,10 +11,11 @@ logger = logging.getLogger(__name__)
 if "TORCH" in get_backends():
 
     import torch
+    from .manifest import ChecksumWriter
     from ..models import AbstractPyTorchNetwork
 
     def save_checkpoint(file: str, model=None, optimizers=None,
-                        epoch=None, **kwargs):
+                        epoch=None, step_state=None, **kwargs):
         """
         Save model's parameters
 
@@ -26,11 +30,23 @@ if "TORCH" in get_backends():
             dictionary containing all optimizers
         epoch : int
             current epoch (will also be pickled)
+        step_state : dict or None
+            the state of an interrupted epoch (e.g. sampler and random number
+            generator states), which will be saved for resuming training
+            in the middle of the epoch
+        **kwargs :
+            additional keyword arguments (passed to torch.save)
+
+        Returns
+        -------
+        str
+            the checksum of the written file
 
         """
         if optimizers is None:
             optimizers = {}
-        if isinstance(model, torch.nn.DataParallel):
+        if isinstance(model, (torch.nn.DataParallel,
+                              torch.nn.parallel.DistributedDataParallel)):
             _model = model.module
         else:
             _model = model
@@ -56,7 +72,18 @@ if "TORCH" in get_backends():
                  "model": model_state,
                  "epoch": epoch}
 
-        torch.save(state, file, **kwargs)
+        if step_state is not None:
+            state["step_state"] = step_state
+
+        # write to a temporary file first to never leave a truncated
+        # checkpoint behind (e.g. if the process is killed while saving)
+        tmp_file = file + ".tmp"
+        with open(tmp_file, "wb") as f:
+            writer = ChecksumWriter(f)
+            torch.save(state, writer, **kwargs)
+        os.replace(tmp_file, file)
+
+        return writer.checksum
 
     def load_checkpoint(file, **kwargs):
         """
@@ -83,3 +110,218 @@ if "TORCH" in get_backends():
                     for _key in ["model", "optimizer", "epoch"]]):
             return checkpoint['state_dict']
         return checkpoint
+
+    # name of the metadata file stored inside exported TorchScript archives
+    EXPORT_METADATA_FILE = "delira_export.json"
+
+    def _export_inputs(model, example_inputs: dict):
+        """
+        Orders the example inputs by the signature of the model's ``forward``
+
+        Parameters
+        ----------
+        model : :class:`AbstractPyTorchNetwork`
+            the model to export
+        example_inputs : dict
+            the example inputs (keyword arguments of ``forward``)
+
+        Returns
+        -------
+        list of str
+            the input names
+        tuple of :class:`torch.Tensor`
+            the example inputs in the order of ``forward``'s arguments
+
+        """
+        input_names = [name for name in
+                       inspect.signature(model.forward).parameters
+                       if name in example_inputs]
+
+        missing = set(example_inputs) - set(input_names)
+        if missing:
+            raise KeyError("The inputs %s are no arguments of %s.forward"
+                           % (sorted(missing), type(model).__name__))
+
+        return input_names, tuple(example_inputs[name]
+                                  for name in input_names)
+
+    def export_torchscript(model, file: str, example_inputs: dict,
+                           key_mapping=None, freeze=True):
+        """
+        Exports a model to TorchScript by tracing its ``forward`` in eval
+        mode. The exported archive can be loaded without delira's training
+        stack and without the model's source code (e.g. by
+        :class:`TorchScriptPredictor`)
+
+        Parameters
+        ----------
+        model : :class:`AbstractPyTorchNetwork`
+            the model to export (e.g. a
+            :class:`ClassificationNetworkBasePyTorch`, :class:`UNet2dPyTorch`
+            or :class:`GenerativeAdversarialNetworkBasePyTorch`); its
+            ``forward`` must return a dict of tensors
+        file : str
+            filepath the archive should be saved to
+        example_inputs : dict
+            example inputs to trace the model with; keys must be the names
+            of ``forward``'s arguments
+        key_mapping : dict or None
+            the mapping from the ``data_dict`` to the model's inputs, which
+            is stored together with the archive to be used as default
+            mapping during inference
+        freeze : bool
+            whether to inline the parameters as constants into the graph,
+            which allows further optimizations at load time (see
+            :func:`load_torchscript`)
+
+        Returns
+        -------
+        dict
+            the metadata stored inside the archive
+
+        """
+        if isinstance(model, (torch.nn.DataParallel,
+                              torch.nn.parallel.DistributedDataParallel)):
+            model = model.module
+
+        input_names, inputs = _export_inputs(model, example_inputs)
+
+        was_training = model.training
+        model.eval()
+        try:
+            with torch.no_grad():
+                # strict=False allows dict outputs
+                traced = torch.jit.trace(model, inputs, strict=False)
+                outputs = traced(*inputs)
+        finally:
+            model.train(was_training)
+
+        if freeze:
+            traced = torch.jit.freeze(traced)
+
+        metadata = {
+            "network": type(model).__name__,
+            "input_names": input_names,
+            "input_dtypes": {name: str(inp.dtype).replace("torch.", "")
+                             for name, inp in zip(input_names, inputs)},
+            "output_names": sorted(outputs.keys())
+            if isinstance(outputs, dict) else None,
+            "key_mapping": key_mapping,
+        }
+
+        tmp_file = file + ".tmp"
+        torch.jit.save(traced, tmp_file, _extra_files={
+            EXPORT_METADATA_FILE: json.dumps(metadata)})
+        os.replace(tmp_file, file)
+
+        return metadata
+
+    def load_torchscript(file: str, map_location=None, optimize=True):
+        """
+        Loads a model exported by :func:`export_torchscript`
+
+        Parameters
+        ----------
+        file : str
+            filepath to the exported archive
+        map_location : str or :class:`torch.device` or None
+            the device to load the model to
+        optimize : bool
+            whether to optimize the (frozen) model for inference (e.g. by
+            fusing convolutions with batchnorms and activations)
+
+        Returns
+        -------
+        :class:`torch.jit.ScriptModule`
+            the loaded model
+        dict
+            the metadata stored inside the archive
+
+        """
+        extra_files = {EXPORT_METADATA_FILE: ""}
+        module = torch.jit.load(file, map_location=map_location,
+                                _extra_files=extra_files)
+        module.eval()
+
+        if extra_files[EXPORT_METADATA_FILE]:
+            metadata = json.loads(extra_files[EXPORT_METADATA_FILE])
+        else:
+            logger.warning("%s does not contain any metadata, since it was "
+                           "not exported by delira" % file)
+            metadata = {}
+
+        if optimize:
+            module = torch.jit.optimize_for_inference(module)
+
+        return module, metadata
+
+    def export_onnx(model, file: str, example_inputs: dict,
+                    dynamic_batch_size=True, **kwargs):
+        """
+        Exports a model to ONNX
+
+        Parameters
+        ----------
+        model : :class:`AbstractPyTorchNetwork`
+            the model to export; its ``forward`` must return a dict of
+            tensors
+        file : str
+            filepath the model should be saved to
+        example_inputs : dict
+            example inputs to trace the model with; keys must be the names
+            of ``forward``'s arguments
+        dynamic_batch_size : bool
+            whether to export the first dimension of all inputs and outputs
+            as dynamic dimension
+        **kwargs :
+            additional keyword arguments (passed to
+            :func:`torch.onnx.export`)
+
+        Returns
+        -------
+        list of str
+            the names of the graph's outputs (the keys of the model's
+            outputs)
+
+        """
+        if isinstance(model, (torch.nn.DataParallel,
+                              torch.nn.parallel.DistributedDataParallel)):
+            model = model.module
+
+        input_names, inputs = _export_inputs(model, example_inputs)
+
+        was_training = model.training
+        model.eval()
+        try:
+            with torch.no_grad():
+                output_names = sorted(model(*inputs).keys())
+
+            # ONNX graphs can't return dicts
+            wrapper = _TupleOutputs(model, output_names)
+
+            if dynamic_batch_size:
+                kwargs.setdefault("dynamic_axes", {
+                    name: {0: "batch"} for name in input_names + output_names})
+
+            torch.onnx.export(wrapper, inputs, file,
+                              input_names=input_names,
+                              output_names=output_names, **kwargs)
+        finally:
+            model.train(was_training)
+
+        return output_names
+
+    class _TupleOutputs(torch.nn.Module):
+        """
+        Wraps a model returning a dict to return a tuple of its values
+
+        """
+
+        def __init__(self, model, output_names):
+            super().__init__()
+            self.model = model
+            self.output_names = output_names
+
+        def forward(self, *args):
+            outputs = self.model(*args)
+            return tuple(outputs[name] for name in self.output_names)
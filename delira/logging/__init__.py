@@ -1,3 +1,11 @@
-from .multistream_handler import MultiStreamHandler
-from .trixi_handler import TrixiHandler, VisdomLoggingHandler, \
-    TensorboardXLoggingHandler
+from delira._lazy import lazy_module_attributes
+
+# the handlers are imported on first access to avoid importing trixi
+# together with the package
+__getattr__, __dir__ = lazy_module_attributes(__name__, {
+    "MultiStreamHandler": (".multistream_handler", "MultiStreamHandler"),
+    "TrixiHandler": (".trixi_handler", "TrixiHandler"),
+    "VisdomLoggingHandler": (".trixi_handler", "VisdomLoggingHandler"),
+    "TensorboardXLoggingHandler": (".trixi_handler",
+                                   "TensorboardXLoggingHandler"),
+})
@@ -1,18 +1,34 @@
+import queue
+import threading
 from logging import Handler, NOTSET
 
 from trixi.logger import AbstractLogger as AbstractTrixiLogger
 
 TRIXI_PREFIXES = ["show_", "plot_", "save_", "get_", ""]
 
+DROP_POLICIES = ["block", "drop_newest", "drop_oldest"]
+
+# logger methods writing scalars, whose writes may be coalesced
+SCALAR_KEYS = ["value"]
+
+_STOP = object()
+
 
 class TrixiHandler(Handler):
     """
     Handler to integrate the :mod:`trixi` loggers into the :mod:`logging`
     module
 
+    If ``queue_size`` is given, records are put to a bounded queue and
+    written by a background thread, so that logging (e.g. of images or large
+    metric dicts) does not block the training. Since the records are written
+    later, logged values must not be modified in-place afterwards
+
     """
 
-    def __init__(self, logging_cls, level=NOTSET, *args, **kwargs):
+    def __init__(self, logging_cls, level=NOTSET, *args, queue_size=None,
+                 drop_policy="block", coalesce_scalars=False,
+                 max_batch_size=64, **kwargs):
         """
 
         Parameters
@@ -24,9 +40,29 @@ class TrixiHandler(Handler):
         *args :
             positional arguments to instantiate the logger from the
             `logging_cls`
+        queue_size : int or None
+            the maximum number of queued records; if None: records are
+            written synchronously inside the logging thread
+        drop_policy : str
+            what to do if the queue is full; must be one of
+            'block' (wait for a free slot), 'drop_newest' (discard the new
+            record) and 'drop_oldest' (discard the oldest queued record)
+        coalesce_scalars : bool
+            if True: of multiple scalar writes with the same name (and tag),
+            which are queued at the same time, only the latest one is
+            written. This reduces the number of writes for frequently logged
+            scalars at the cost of skipping intermediate values
+        max_batch_size : int
+            the maximum number of records the background thread takes from
+            the queue at once
         **kwargs :
             keyword arguments to instantiate the logger from the `logging_cls`
 
+        Raises
+        ------
+        ValueError
+            invalid drop policy
+
         """
         super().__init__(level)
 
@@ -34,8 +70,263 @@ class TrixiHandler(Handler):
             logging_cls.__name__, AbstractTrixiLogger.__name__)
 
         assert issubclass(logging_cls, AbstractTrixiLogger), assertion_str
+
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError("Invalid drop policy %s. Must be one of %s"
+                             % (drop_policy, ", ".join(DROP_POLICIES)))
+
         self._logger = logging_cls(*args, **kwargs)
 
+        # maps each key to the logger methods it is dispatched to
+        self._dispatch_table = {}
+
+        self._drop_policy = drop_policy
+        self._coalesce_scalars = coalesce_scalars
+        self._max_batch_size = max_batch_size
+        self._num_dropped = 0
+        self._queue = None
+        self._thread = None
+
+        if queue_size is not None:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._thread = threading.Thread(target=self._process_queue,
+                                            daemon=True)
+            self._thread.start()
+
+    @property
+    def num_dropped(self):
+        """
+        Property returning the number of records, which have been dropped due
+        to a full queue
+
+        Returns
+        -------
+        int
+            the number of dropped records
+
+        """
+        return self._num_dropped
+
+    def _get_methods(self, key):
+        """
+        Returns all logger methods a key is dispatched to (the key combined
+        with each of the ``TRIXI_PREFIXES``). The methods are only searched
+        once per key
+
+        Parameters
+        ----------
+        key : str
+            the key to dispatch
+
+        Returns
+        -------
+        list
+            the logger methods
+
+        """
+        try:
+            return self._dispatch_table[key]
+        except KeyError:
+            pass
+
+        methods = []
+        for _prefix in TRIXI_PREFIXES:
+            method = getattr(self._logger, _prefix + key, None)
+            if callable(method):
+                methods.append(method)
+
+        self._dispatch_table[key] = methods
+        return methods
+
+    @staticmethod
+    def _get_arguments(val):
+        """
+        Converts a logged value to the arguments of the logger methods
+
+        Parameters
+        ----------
+        val : Any
+            the logged value
+
+        Returns
+        -------
+        list
+            positional arguments
+        dict
+            keyword arguments
+
+        """
+        if isinstance(val, dict):
+            val = dict(val)
+            # get args from val dict
+            args = val.pop("args", [])
+            # combine kwargs from val["kwargs"} and other
+            # key, val pairs in val
+            kwargs = {**val.pop("kwargs", {}),
+                      **val}
+
+        else:
+            # check if val is iterable
+            try:
+                iter(val)
+
+                # val is iterable -> use it as args
+                args = val
+
+            except TypeError:
+                # val is not iterable -> store it in list and use
+                # this list as args
+                args = [val]
+
+            # val specifies args -> no kwargs given
+            kwargs = {}
+
+        return args, kwargs
+
+    def _log_message(self, msg):
+        """
+        Writes a single message to the `trixi` logger
+
+        Parameters
+        ----------
+        msg : dict
+            the message to write
+
+        """
+        for key, val in msg.items():
+            methods = self._get_methods(key)
+            if not methods:
+                continue
+
+            args, kwargs = self._get_arguments(val)
+            for method in methods:
+                method(*args, **kwargs)
+
+    @staticmethod
+    def _scalar_identifier(key, val):
+        """
+        Returns the identifier of a scalar write, which is shared by all
+        writes superseding each other
+
+        Parameters
+        ----------
+        key : str
+            the logged key
+        val : Any
+            the logged value
+
+        Returns
+        -------
+        tuple or None
+            the identifier (None if the write is not a scalar write)
+
+        """
+        if key in SCALAR_KEYS and isinstance(val, dict):
+            return key, val.get("name"), val.get("tag")
+
+        return None
+
+    def _coalesce(self, records):
+        """
+        Removes all scalar writes from a batch of records, which are
+        superseded by a later write with the same name and tag
+
+        Parameters
+        ----------
+        records : list
+            the records to coalesce
+
+        Returns
+        -------
+        list
+            tuples of the record and the (coalesced) message to write
+
+        """
+        # index of the last record writing each scalar
+        latest = {}
+        for idx, record in enumerate(records):
+            for key, val in record.msg.items():
+                identifier = self._scalar_identifier(key, val)
+                if identifier is not None:
+                    latest[identifier] = idx
+
+        coalesced = []
+        for idx, record in enumerate(records):
+            msg = {}
+            for key, val in record.msg.items():
+                identifier = self._scalar_identifier(key, val)
+                if identifier is None or latest[identifier] == idx:
+                    msg[key] = val
+
+            if msg:
+                coalesced.append((record, msg))
+
+        return coalesced
+
+    def _process_queue(self):
+        """
+        Writes the queued records inside the background thread until the
+        handler is closed
+
+        """
+        stop = False
+        while not stop:
+            # take all queued records (up to the maximum batch size) at once
+            records = [self._queue.get()]
+            while len(records) < self._max_batch_size:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            num_items = len(records)
+            stop = any(record is _STOP for record in records)
+            records = [record for record in records if record is not _STOP]
+
+            if self._coalesce_scalars:
+                messages = self._coalesce(records)
+            else:
+                messages = [(record, record.msg) for record in records]
+
+            for record, msg in messages:
+                try:
+                    self._log_message(msg)
+                except Exception:
+                    self.handleError(record)
+
+            for _ in range(num_items):
+                self._queue.task_done()
+
+    def _enqueue(self, record):
+        """
+        Puts a record to the queue according to the drop policy
+
+        Parameters
+        ----------
+        record : LogRecord
+            the record to enqueue
+
+        """
+        if self._drop_policy == "block":
+            self._queue.put(record)
+            return
+
+        while True:
+            try:
+                self._queue.put_nowait(record)
+                return
+            except queue.Full:
+                if self._drop_policy == "drop_newest":
+                    self._num_dropped += 1
+                    return
+
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self._num_dropped += 1
+            except queue.Empty:
+                pass
+
     def emit(self, record):
         """
         logs the record entity to `trixi` loggers
@@ -49,37 +340,29 @@ class TrixiHandler(Handler):
         if not isinstance(record.msg, dict):
             return
 
-        for key, val in record.msg.items():
-
-            for _prefix in TRIXI_PREFIXES:
-                if hasattr(self._logger, _prefix + key) and callable(
-                        getattr(self._logger, _prefix + key)):
-
-                    if isinstance(val, dict):
-                        # get args from val dict
-                        args = val.pop("args", [])
-                        # combine kwargs from val["kwargs"} and other
-                        # key, val pairs in val
-                        kwargs = {**val.pop("kwargs", {}),
-                                  **val}
+        if self._queue is None:
+            self._log_message(record.msg)
+        else:
+            self._enqueue(record)
 
-                    else:
-                        # check if val is iterable
-                        try:
-                            iter(val)
+    def flush(self):
+        """
+        Waits until all queued records have been written
 
-                            # val is iterable -> use it as args
-                            args = val
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
 
-                        except TypeError:
-                            # val is not iterable -> store it in list and use
-                            # this list as args
-                            args = [val]
+    def close(self):
+        """
+        Writes all queued records and stops the background thread
 
-                        # val specifies args -> no kwargs given
-                        kwargs = {}
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
 
-                    getattr(self._logger, _prefix + key)(*args, **kwargs)
+        super().close()
 
 
 class TensorboardXLoggingHandler(TrixiHandler):
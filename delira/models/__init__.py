@@ -1,15 +1,31 @@
 from delira import get_backends
-from .abstract_network import AbstractNetwork
+from delira._lazy import lazy_module_attributes
 
-if "TORCH" in get_backends():
-    from .abstract_network import AbstractPyTorchNetwork
-    from .classification import VGG3DClassificationNetworkPyTorch, \
-        ClassificationNetworkBasePyTorch
-
-    from .segmentation import UNet2dPyTorch, UNet3dPyTorch
+# the networks are imported on first access to avoid importing the backends
+# together with the package
+_LAZY_ATTRIBUTES = {
+    "AbstractNetwork": (".abstract_network", "AbstractNetwork"),
+}
 
-    from .gan import GenerativeAdversarialNetworkBasePyTorch
+if "TORCH" in get_backends():
+    _LAZY_ATTRIBUTES.update({
+        "AbstractPyTorchNetwork": (".abstract_network_torch",
+                                   "AbstractPyTorchNetwork"),
+        "VGG3DClassificationNetworkPyTorch": (
+            ".classification", "VGG3DClassificationNetworkPyTorch"),
+        "ClassificationNetworkBasePyTorch": (
+            ".classification", "ClassificationNetworkBasePyTorch"),
+        "UNet2dPyTorch": (".segmentation", "UNet2dPyTorch"),
+        "UNet3dPyTorch": (".segmentation", "UNet3dPyTorch"),
+        "GenerativeAdversarialNetworkBasePyTorch": (
+            ".gan", "GenerativeAdversarialNetworkBasePyTorch"),
+    })
 
 if "TF" in get_backends():
-    from .abstract_network import AbstractTfNetwork
-    from .classification import ClassificationNetworkBaseTf
+    _LAZY_ATTRIBUTES.update({
+        "AbstractTfNetwork": (".abstract_network_tf", "AbstractTfNetwork"),
+        "ClassificationNetworkBaseTf": (".classification",
+                                        "ClassificationNetworkBaseTf"),
+    })
+
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_ATTRIBUTES)
@@ -2,6 +2,7 @@ import abc
 import logging
 
 from delira import get_backends
+from delira._lazy import lazy_module_attributes
 
 file_logger = logging.getLogger(__name__)
 
@@ -140,204 +141,17 @@ class AbstractNetwork(object):
         return self._init_kwargs
 
 
-if "TORCH" in get_backends():
-    import torch
-
-    class AbstractPyTorchNetwork(AbstractNetwork, torch.nn.Module):
-        """
-        Abstract Class for PyTorch Networks
-
-        See Also
-        --------
-        `torch.nn.Module`
-        :class:`AbstractNetwork`
-
-        """
-        @abc.abstractmethod
-        def __init__(self, **kwargs):
-            """
-
-            Parameters
-            ----------
-            **kwargs :
-                keyword arguments (are passed to :class:`AbstractNetwork`'s `
-                __init__ to register them as init kwargs
-
-            """
-            torch.nn.Module.__init__(self)
-            AbstractNetwork.__init__(self, **kwargs)
-
-        @abc.abstractmethod
-        def forward(self, *inputs):
-            """
-            Forward inputs through module (defines module behavior)
-            Parameters
-            ----------
-            inputs : list
-                inputs of arbitrary type and number
-
-            Returns
-            -------
-            Any
-                result: module results of arbitrary type and number
-
-            """
-            raise NotImplementedError()
+_LAZY_ATTRIBUTES = {}
 
-        def __call__(self, *args, **kwargs):
-            """
-            Calls Forward method
-
-            Parameters
-            ----------
-            *args :
-                positional arguments (passed to `forward`)
-            **kwargs :
-                keyword arguments (passed to `forward`)
-
-            Returns
-            -------
-            Any
-                result: module results of arbitrary type and number
-
-            """
-            return torch.nn.Module.__call__(self, *args, **kwargs)
-
-        @staticmethod
-        def prepare_batch(batch: dict, input_device, output_device):
-            """
-            Helper Function to prepare Network Inputs and Labels (convert them
-            to correct type and shape and push them to correct devices)
-
-            Parameters
-            ----------
-            batch : dict
-                dictionary containing all the data
-            input_device : torch.device
-                device for network inputs
-            output_device : torch.device
-                device for network outputs
-
-            Returns
-            -------
-            dict
-                dictionary containing data in correct type and shape and on
-                correct device
-
-            """
-            return_dict = {"data": torch.from_numpy(batch.pop("data")).to(
-                input_device).to(torch.float)}
-
-            for key, vals in batch.items():
-                return_dict[key] = torch.from_numpy(vals).to(output_device).to(
-                    torch.float)
-
-            return return_dict
+# the backend-specific networks are defined in separate modules, which are
+# imported on first access to avoid importing the backends together with
+# this module
+if "TORCH" in get_backends():
+    _LAZY_ATTRIBUTES["AbstractPyTorchNetwork"] = (".abstract_network_torch",
+                                                  "AbstractPyTorchNetwork")
 
 if "TF" in get_backends():
-    import tensorflow as tf
-
-    class AbstractTfNetwork(AbstractNetwork):
-        """
-        Abstract Class for Tf Networks
-
-        See Also
-        --------
-        :class:`AbstractNetwork`
-
-        """
-
-        @abc.abstractmethod
-        def __init__(self, sess=tf.Session, **kwargs):
-            """
-
-            Parameters
-            ----------
-            **kwargs :
-                keyword arguments (are passed to :class:`AbstractNetwork`'s `
-                __init__ to register them as init kwargs
-
-            """
-            AbstractNetwork.__init__(self, **kwargs)
-            self._sess = sess()
-            self.inputs = {}
-            self.outputs_train = {}
-            self.outputs_eval = {}
-            self._losses = None
-            self._optims = None
-            self.training = True
-
-        def __call__(self, *args, **kwargs):
-            """
-            Wrapper for calling self.run in eval setting
-
-            Parameters
-            ----------
-            *args :
-                positional arguments (passed to `self.run`)
-            **kwargs:
-                keyword arguments (passed to `self.run`)
-
-            Returns
-            -------
-            Any
-                result: module results of arbitrary type and number
-
-            """
-            self.training = False
-            return self.run(*args, **kwargs)
-
-        def _add_losses(self, losses: dict):
-            """
-            Add losses to the model graph
-
-            Parameters
-            ----------
-            losses : dict
-                dictionary containing losses.
-
-            """
-            raise NotImplementedError()
-
-        def _add_optims(self, optims: dict):
-            """
-            Add optimizers to the model graph
-
-            Parameters
-            ----------
-            optims : dict
-                dictionary containing losses.
-            """
-            raise NotImplementedError()
-
-        def run(self, *args, **kwargs):
-            """
-            Evaluates `self.outputs_train` or `self.outputs_eval` based on
-            `self.training`
-
-            Parameters
-            ----------
-            *args :
-                currently unused, exist for compatibility reasons
-            **kwargs :
-                kwargs used to feed as ``self.inputs``. Same keys as for
-                ``self.inputs`` must be used
-
-            Returns
-            -------
-            dict
-                sames keys as outputs_train or outputs_eval,
-                containing evaluated expressions as values
-
-            """
-            _feed_dict = {}
-
-            for feed_key, feed_value in kwargs.items():
-                assert feed_key in self.inputs.keys(), \
-                    "{} not found in self.inputs".format(feed_key)
-                _feed_dict[self.inputs[feed_key]] = feed_value
+    _LAZY_ATTRIBUTES["AbstractTfNetwork"] = (".abstract_network_tf",
+                                             "AbstractTfNetwork")
 
-            if self.training:
-                return self._sess.run(self.outputs_train, feed_dict=_feed_dict)
-            else:
-                return self._sess.run(self.outputs_eval, feed_dict=_feed_dict)
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_ATTRIBUTES)
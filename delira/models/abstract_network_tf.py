@@ -0,0 +1,198 @@
+import abc
+
+import tensorflow as tf
+
+from .abstract_network import AbstractNetwork
+
+
+class AbstractTfNetwork(AbstractNetwork):
+    """
+    Abstract Class for Tf Networks
+
+    See Also
+    --------
+    :class:`AbstractNetwork`
+
+    """
+    # key of the flag marking the last batch of the input pipeline
+    LAST_BATCH_KEY = "__last_batch__"
+
+    @abc.abstractmethod
+    def __init__(self, sess=tf.Session, **kwargs):
+        """
+
+        Parameters
+        ----------
+        **kwargs :
+            keyword arguments (are passed to :class:`AbstractNetwork`'s `
+            __init__ to register them as init kwargs
+
+        """
+        AbstractNetwork.__init__(self, **kwargs)
+        self._sess = sess()
+        self.inputs = {}
+        self.outputs_train = {}
+        self.outputs_eval = {}
+        self._losses = None
+        self._optims = None
+        self.training = True
+
+        # input pipeline (see ``_add_inputs``)
+        self._iterator = None
+        self._pipeline_inputs = {}
+        self._last_batch = None
+        self.input_structure = None
+        self.last_batch_fetched = False
+
+    def __call__(self, *args, **kwargs):
+        """
+        Wrapper for calling self.run in eval setting
+
+        Parameters
+        ----------
+        *args :
+            positional arguments (passed to `self.run`)
+        **kwargs:
+            keyword arguments (passed to `self.run`)
+
+        Returns
+        -------
+        Any
+            result: module results of arbitrary type and number
+
+        """
+        self.training = False
+        return self.run(*args, **kwargs)
+
+    def _add_inputs(self, input_specs: dict):
+        """
+        Creates the model's inputs. The inputs are wired to the outputs of a
+        :class:`tf.data.Iterator`, which is fed by the trainer's input
+        pipeline (see :meth:`init_input_pipeline`). Since the inputs are
+        created by ``tf.placeholder_with_default``, they can still be fed
+        by passing values to :meth:`run`. In this case all of these inputs
+        must be fed, since any input left out would silently take its value
+        from the input pipeline.
+
+        Parameters
+        ----------
+        input_specs : dict
+            dictionary containing the input names as keys and tuples of the
+            ``batch_dict`` key to take the input from, its dtype and its
+            shape as values
+
+        """
+        types = {self.LAST_BATCH_KEY: tf.bool}
+        shapes = {self.LAST_BATCH_KEY: tf.TensorShape([])}
+
+        for batch_key, dtype, shape in input_specs.values():
+            types[batch_key] = dtype
+            shapes[batch_key] = tf.TensorShape(shape)
+
+        self._iterator = tf.data.Iterator.from_structure(types, shapes)
+        next_batch = self._iterator.get_next()
+
+        for name, (batch_key, dtype, shape) in input_specs.items():
+            self.inputs[name] = tf.placeholder_with_default(
+                next_batch[batch_key], shape=shape)
+            self._pipeline_inputs[name] = self.inputs[name]
+
+        self._last_batch = next_batch[self.LAST_BATCH_KEY]
+        self.input_structure = (types, shapes)
+
+    def init_input_pipeline(self, dataset: tf.data.Dataset):
+        """
+        Creates the operation (re-)initializing the model's inputs with a
+        dataset; must only be called once per dataset to avoid growing the
+        graph
+
+        Parameters
+        ----------
+        dataset : :class:`tf.data.Dataset`
+            the dataset yielding dicts with the structure given by
+            ``self.input_structure``
+
+        Returns
+        -------
+        :class:`tf.Operation`
+            the initializing operation (must be run once per epoch)
+
+        """
+        assert self._iterator is not None, \
+            "The model's inputs were not created by _add_inputs"
+        return self._iterator.make_initializer(dataset)
+
+    def _add_losses(self, losses: dict):
+        """
+        Add losses to the model graph
+
+        Parameters
+        ----------
+        losses : dict
+            dictionary containing losses.
+
+        """
+        raise NotImplementedError()
+
+    def _add_optims(self, optims: dict):
+        """
+        Add optimizers to the model graph
+
+        Parameters
+        ----------
+        optims : dict
+            dictionary containing losses.
+        """
+        raise NotImplementedError()
+
+    def run(self, *args, **kwargs):
+        """
+        Evaluates `self.outputs_train` or `self.outputs_eval` based on
+        `self.training`
+
+        Parameters
+        ----------
+        *args :
+            currently unused, exist for compatibility reasons
+        **kwargs :
+            kwargs used to feed as ``self.inputs``. Same keys as for
+            ``self.inputs`` must be used. If no kwargs are given and the
+            inputs were created by :meth:`_add_inputs`, the next batch of
+            the input pipeline is used instead; otherwise all inputs created
+            by :meth:`_add_inputs` must be fed.
+
+        Returns
+        -------
+        dict
+            sames keys as outputs_train or outputs_eval,
+            containing evaluated expressions as values; if the batch was
+            taken from the input pipeline, the evaluated inputs are
+            contained as additional entry 'inputs'
+
+        """
+        if self.training:
+            outputs = self.outputs_train
+        else:
+            outputs = self.outputs_eval
+
+        if not kwargs and self._iterator is not None:
+            outputs, inputs, self.last_batch_fetched = self._sess.run(
+                [outputs, self._pipeline_inputs, self._last_batch])
+            outputs["inputs"] = inputs
+            return outputs
+
+        # a partial feed would take the remaining inputs from the pipeline
+        missing_keys = set(self._pipeline_inputs.keys()) - set(kwargs.keys())
+        if missing_keys:
+            raise ValueError("The inputs %s were not fed, but must be fed "
+                             "together with all other inputs of the input "
+                             "pipeline" % sorted(missing_keys))
+
+        _feed_dict = {}
+
+        for feed_key, feed_value in kwargs.items():
+            assert feed_key in self.inputs.keys(), \
+                "{} not found in self.inputs".format(feed_key)
+            _feed_dict[self.inputs[feed_key]] = feed_value
+
+        return self._sess.run(outputs, feed_dict=_feed_dict)
@@ -8,7 +8,8 @@ file_logger = logging.getLogger(__name__)
 if "TORCH" in get_backends():
     import torch
     from torchvision import models as t_models
-    from delira.models.abstract_network import AbstractPyTorchNetwork
+    from delira.models.abstract_network_torch import \
+        AbstractPyTorchNetwork
 
     class ClassificationNetworkBasePyTorch(AbstractPyTorchNetwork):
         """
@@ -3,7 +3,7 @@ import typing
 
 import tensorflow as tf
 
-from delira.models.abstract_network import AbstractTfNetwork
+from delira.models.abstract_network_tf import AbstractTfNetwork
 from delira.models.classification.ResNet18 import ResNet18
 
 from delira.utils.decorators import make_deprecated
@@ -44,15 +44,14 @@ class ClassificationNetworkBaseTf(AbstractTfNetwork):
         # with tf.device('/cpu:0'):
         self.model = self._build_model(n_outputs, **kwargs)
 
-        images = tf.placeholder(shape=[None, in_channels, None, None],
-                                dtype=tf.float32)
-        labels = tf.placeholder(shape=[None, n_outputs], dtype=tf.float32)
+        self._add_inputs({
+            "images": ("data", tf.float32, [None, in_channels, None, None]),
+            "labels": ("label", tf.float32, [None, n_outputs])})
+        images = self.inputs["images"]
 
         preds_train = self.model(images, training=True)
         preds_eval = self.model(images, training=False)
 
-        self.inputs["images"] = images
-        self.inputs["labels"] = labels
         self.outputs_train["pred"] = preds_train
         self.outputs_eval["pred"] = preds_eval
 
@@ -142,7 +141,8 @@ class ClassificationNetworkBaseTf(AbstractTfNetwork):
         model: AbstractTfNetwork
             AbstractTfNetwork or its child-clases
         data_dict : dict
-            dictionary containing the data
+            dictionary containing the data; if empty: the batch is taken
+            from the model's input pipeline
         metrics : dict
             dict holding the metrics to calculate
         fold : int
@@ -168,9 +168,13 @@ class ClassificationNetworkBaseTf(AbstractTfNetwork):
         loss_vals = {}
         metric_vals = {}
 
-        inputs = data_dict.pop('data')
-
-        outputs = model.run(images=inputs, labels=data_dict['label'])
+        if data_dict:
+            inputs = data_dict.pop('data')
+            outputs = model.run(images=inputs, labels=data_dict['label'])
+        else:
+            # the batch is taken from the model's input pipeline
+            outputs = model.run()
+            data_dict = {'label': outputs.pop('inputs')['labels']}
         preds = outputs['pred']
         losses = outputs['losses']
 
@@ -1,4 +1,5 @@
 import logging
+from contextlib import contextmanager
 
 from delira import get_backends
 from delira.utils.decorators import make_deprecated
@@ -9,7 +10,48 @@ logger = logging.getLogger(__name__)
 if "TORCH" in get_backends():
     import torch
 
-    from delira.models.abstract_network import AbstractPyTorchNetwork
+    from delira.models.abstract_network_torch import \
+        AbstractPyTorchNetwork
+
+    def _unwrap(model):
+        """
+        Removes a (distributed) data parallel wrapper
+
+        """
+        if isinstance(model, (torch.nn.DataParallel,
+                              torch.nn.parallel.DistributedDataParallel)):
+            return model.module
+        return model
+
+    @contextmanager
+    def _frozen(module, freeze=True):
+        """
+        Disables the gradients of a module's parameters inside the context
+
+        """
+        params = [param for param in module.parameters()
+                  if freeze and param.requires_grad]
+        for param in params:
+            param.requires_grad_(False)
+        try:
+            yield
+        finally:
+            for param in params:
+                param.requires_grad_(True)
+
+    def _to_floats(values: dict):
+        """
+        Converts all scalar tensors to floats with a single device
+        synchronization (instead of one synchronization per value)
+
+        """
+        keys = [key for key, val in values.items() if torch.is_tensor(val)]
+        converted = dict(values)
+        if keys:
+            stacked = torch.stack([values[key].detach().float().reshape(())
+                                   for key in keys])
+            converted.update(zip(keys, stacked.tolist()))
+        return converted
 
     class GenerativeAdversarialNetworkBasePyTorch(AbstractPyTorchNetwork):
         """Implementation of Vanilla DC-GAN to create 64x64 pixel images
@@ -30,7 +72,8 @@ if "TORCH" in get_backends():
         """
 
         @make_deprecated("Own repository to be announced")
-        def __init__(self, n_channels, noise_length, **kwargs):
+        def __init__(self, n_channels, noise_length, fused_step=False,
+                     n_critic=1, n_gen=1, **kwargs):
             """
 
             Parameters
@@ -39,17 +82,41 @@ if "TORCH" in get_backends():
                 number of image channels for generated images and input images
             noise_length : int
                 length of noise vector
+            fused_step : bool
+                whether to train with :meth:`fused_closure`, which generates
+                the fake images only once per step and computes only the
+                gradients required by the updated networks
+            n_critic : int
+                number of discriminator updates per cycle of training steps
+                (only used if ``fused_step`` is True)
+            n_gen : int
+                number of generator updates per cycle of training steps
+                (only used if ``fused_step`` is True)
             **kwargs :
                 additional keyword arguments
 
             """
+            assert n_critic > 0 and n_gen > 0, \
+                "n_critic and n_gen must be positive"
+
+            if not fused_step and (n_critic != 1 or n_gen != 1):
+                logger.warning("n_critic and n_gen are only used together "
+                               "with fused_step=True")
 
             # register params by passing them as kwargs to parent class
             # __init__
             super().__init__(n_channels=n_channels,
                              noise_length=noise_length,
+                             fused_step=fused_step,
+                             n_critic=n_critic,
+                             n_gen=n_gen,
                              **kwargs)
 
+            self.fused_step = fused_step
+            self.n_critic = n_critic
+            self.n_gen = n_gen
+            self._num_train_steps = 0
+
             gen, discr = self._build_models(n_channels, noise_length, **kwargs)
 
             self.nz = noise_length
@@ -138,6 +205,12 @@ if "TORCH" in get_backends():
                 losses = {}
             if metrics is None:
                 metrics = {}
+
+            if getattr(_unwrap(model), "fused_step", False):
+                return GenerativeAdversarialNetworkBasePyTorch.fused_closure(
+                    model, data_dict, optimizers, losses, metrics, fold,
+                    **kwargs)
+
             loss_vals = {}
             metric_vals = {}
             total_loss_discr_real = 0
@@ -185,7 +258,6 @@ if "TORCH" in get_backends():
                     with optimizers["discr"].scale_loss(
                             total_loss_discr) as scaled_loss:
                         scaled_loss.backward(retain_graph=True)
-                    optimizers["discr"].step()
 
                 # calculate adversarial loss for generator update
                 for key, crit_fn in losses.items():
@@ -218,13 +290,22 @@ if "TORCH" in get_backends():
                                 preds["discr_fake"])).item()
 
                 if optimizers:
-                    # actual backpropagation
+                    # actual backpropagation (only into the generator, to
+                    # keep the discriminator's gradients)
                     optimizers["gen"].zero_grad()
+                    gen_params = [param for param
+                                  in _unwrap(model).gen.parameters()
+                                  if param.requires_grad]
                     # perform loss scaling via apex if half precision is
                     # enabled
                     with optimizers["gen"].scale_loss(
                             total_loss_gen) as scaled_loss:
-                        scaled_loss.backward()
+                        scaled_loss.backward(inputs=gen_params)
+
+                    # the weights are updated after calculating all
+                    # gradients, since updating the discriminator
+                    # invalidates the graph of the generator's loss
+                    optimizers["discr"].step()
                     optimizers["gen"].step()
 
                 else:
@@ -242,6 +323,220 @@ if "TORCH" in get_backends():
             return metric_vals, loss_vals, {k: v.detach()
                                             for k, v in preds.items()}
 
+        def get_extra_state(self):
+            """
+            Returns the number of training steps, which is saved together
+            with the weights, to continue the update schedule (see
+            :meth:`_update_schedule`) after resuming the training
+
+            Returns
+            -------
+            dict
+                the extra state
+
+            """
+            return {"num_train_steps": self._num_train_steps}
+
+        def set_extra_state(self, state):
+            """
+            Restores the extra state returned by :meth:`get_extra_state`
+
+            Parameters
+            ----------
+            state : dict
+                the extra state
+
+            """
+            self._num_train_steps = state["num_train_steps"]
+
+        def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+            # states saved before the number of training steps was persisted
+            # don't contain an extra state
+            state_dict.setdefault(prefix + "_extra_state",
+                                  self.get_extra_state())
+            super()._load_from_state_dict(state_dict, prefix, *args,
+                                          **kwargs)
+
+        def _update_schedule(self, step):
+            """
+            Determines which networks are updated in a training step. The
+            steps are grouped into cycles of ``max(n_critic, n_gen)`` steps;
+            the discriminator is updated in the first ``n_critic`` steps and
+            the generator in the last ``n_gen`` steps of each cycle
+
+            Parameters
+            ----------
+            step : int
+                the number of the training step
+
+            Returns
+            -------
+            bool
+                whether to update the discriminator
+            bool
+                whether to update the generator
+
+            """
+            cycle = max(self.n_critic, self.n_gen)
+            position = step % cycle
+            return position < self.n_critic, position >= cycle - self.n_gen
+
+        @staticmethod
+        def fused_closure(model, data_dict: dict, optimizers: dict,
+                          losses=None, metrics=None, fold=0, **kwargs):
+            """
+            Optimized variant of :meth:`closure`: the fake images are
+            generated once and shared by both updates, only the gradients of
+            the updated network are computed (the discriminator's weight
+            gradients are skipped for the generator update and vice versa),
+            gradients are reset to ``None`` instead of zero and all loss and
+            metric values are converted with a single synchronization.
+            Depending on ``n_critic`` and ``n_gen`` (see
+            :meth:`_update_schedule`), only one of the networks is updated in
+            a step and the losses of the other one are not calculated.
+
+            Both gradients are calculated before any weights are updated, so
+            the generator is optimized against the discriminator of the
+            current step.
+
+            Parameters
+            ----------
+            model : :class:`GenerativeAdversarialNetworkBasePyTorch`
+                trainable model (a data parallel wrapper is removed)
+            data_dict : dict
+                dictionary containing data
+            optimizers : dict
+                dictionary of optimizers to optimize model's parameters
+            losses : dict
+                dict holding the losses to calculate errors
+                (gradients from different losses will be accumulated)
+            metrics : dict
+                dict holding the metrics to calculate
+            fold : int
+                Current Fold in Crossvalidation (default: 0)
+            kwargs : dict
+                additional keyword arguments
+
+            Returns
+            -------
+            dict
+                Metric values (with same keys as input dict metrics)
+            dict
+                Loss values (with same keys as input dict losses)
+            list
+                Arbitrary number of predictions as torch.Tensor
+
+            """
+            if losses is None:
+                losses = {}
+            if metrics is None:
+                metrics = {}
+
+            network = _unwrap(model)
+            batch = data_dict.pop("data")
+
+            if optimizers:
+                update_discr, update_gen = network._update_schedule(
+                    network._num_train_steps)
+                network._num_train_steps += 1
+            else:
+                update_discr = update_gen = False
+
+            noise = torch.randn(batch.size(0), network.nz, 1, 1,
+                                device=batch.device)
+
+            preds = {}
+            # the fake images are only attached to the generator's graph if
+            # the generator is updated
+            with torch.set_grad_enabled(update_gen):
+                preds["fake_images"] = network.gen(noise)
+
+            # the real images are only required for the discriminator update
+            # (and for validation)
+            if update_discr or not optimizers:
+                with torch.set_grad_enabled(update_discr):
+                    preds["discr_real"] = network.discr(batch)
+
+            with torch.set_grad_enabled(update_discr or update_gen), \
+                    _frozen(network.discr, not update_discr and update_gen):
+                preds["discr_fake"] = network.discr(preds["fake_images"])
+
+            loss_vals, metric_vals = {}, {}
+            total_loss_discr, total_loss_gen = 0, 0
+
+            for key, crit_fn in losses.items():
+                if "discr_real" in preds:
+                    _loss_val = crit_fn(preds["discr_real"],
+                                        torch.ones_like(preds["discr_real"]))
+                    loss_vals[key + "_discr_real"] = _loss_val
+                    total_loss_discr += _loss_val
+
+                _loss_val = crit_fn(preds["discr_fake"],
+                                    torch.zeros_like(preds["discr_fake"]))
+                loss_vals[key + "_discr_fake"] = _loss_val
+                total_loss_discr += _loss_val
+
+                _loss_val = crit_fn(preds["discr_fake"],
+                                    torch.ones_like(preds["discr_fake"]))
+                loss_vals[key + "_adversarial"] = _loss_val
+                total_loss_gen += _loss_val
+
+            if optimizers:
+                discr_params = [param for param in network.discr.parameters()
+                                if param.requires_grad]
+                gen_params = [param for param in network.gen.parameters()
+                              if param.requires_grad]
+
+                if update_discr:
+                    optimizers["discr"].zero_grad(set_to_none=True)
+                    # perform loss scaling via apex if half precision is
+                    # enabled
+                    with optimizers["discr"].scale_loss(
+                            total_loss_discr) as scaled_loss:
+                        scaled_loss.backward(inputs=discr_params,
+                                             retain_graph=update_gen)
+
+                if update_gen:
+                    optimizers["gen"].zero_grad(set_to_none=True)
+                    with optimizers["gen"].scale_loss(
+                            total_loss_gen) as scaled_loss:
+                        scaled_loss.backward(inputs=gen_params)
+
+                # the weights are updated after calculating all gradients,
+                # since the update invalidates the shared graph
+                if update_discr:
+                    optimizers["discr"].step()
+                if update_gen:
+                    optimizers["gen"].step()
+
+            with torch.no_grad():
+                for key, metric_fn in metrics.items():
+                    if "discr_real" in preds:
+                        metric_vals[key + "_discr_real"] = metric_fn(
+                            preds["discr_real"],
+                            torch.ones_like(preds["discr_real"]))
+
+                    metric_vals[key + "_discr_fake"] = metric_fn(
+                        preds["discr_fake"],
+                        torch.zeros_like(preds["discr_fake"]))
+
+                    metric_vals[key + "_adversarial"] = metric_fn(
+                        preds["discr_fake"],
+                        torch.ones_like(preds["discr_fake"]))
+
+            loss_vals = _to_floats(loss_vals)
+            metric_vals = _to_floats(metric_vals)
+
+            if not optimizers:
+                # add prefix "val" in validation mode
+                loss_vals = {"val_" + str(key): val
+                             for key, val in loss_vals.items()}
+                metric_vals = {"val_" + str(key): val
+                               for key, val in metric_vals.items()}
+
+            return metric_vals, loss_vals, {k: v.detach()
+                                            for k, v in preds.items()}
+
         @staticmethod
         def _build_models(in_channels, noise_length, **kwargs):
             """
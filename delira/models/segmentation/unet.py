@@ -7,7 +7,7 @@ if "TORCH" in get_backends():
     import torch
     import torch.nn.functional as F
     from torch.nn import init
-    from ..abstract_network import AbstractPyTorchNetwork
+    from ..abstract_network_torch import AbstractPyTorchNetwork
 
     class UNet2dPyTorch(AbstractPyTorchNetwork):
         """
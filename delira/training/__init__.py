@@ -1,15 +1,36 @@
 
-from .parameters import Parameters
-from .experiment import BaseExperiment
-from .base_trainer import BaseNetworkTrainer
-from .predictor import Predictor
-
 from delira import get_backends
+from delira._lazy import lazy_module_attributes
+
+# the trainers and experiments are imported on first access to avoid
+# importing the backends together with the package
+_LAZY_ATTRIBUTES = {
+    "Parameters": (".parameters", "Parameters"),
+    "BaseExperiment": (".experiment", "BaseExperiment"),
+    "BaseNetworkTrainer": (".base_trainer", "BaseNetworkTrainer"),
+    "Predictor": (".predictor", "Predictor"),
+    "EnsemblePredictor": (".ensemble_predictor", "EnsemblePredictor"),
+    "ParameterSweep": (".parameter_sweep", "ParameterSweep"),
+    "DynamicBatcher": (".inference_server", "DynamicBatcher"),
+    "InferenceServer": (".inference_server", "InferenceServer"),
+}
 
 if "TORCH" in get_backends():
-    from .experiment import PyTorchExperiment
-    from .pytorch_trainer import PyTorchNetworkTrainer
+    _LAZY_ATTRIBUTES.update({
+        "PyTorchExperiment": (".experiment", "PyTorchExperiment"),
+        "PyTorchNetworkTrainer": (".pytorch_trainer",
+                                  "PyTorchNetworkTrainer"),
+        "TorchScriptPredictor": (".torchscript_predictor",
+                                 "TorchScriptPredictor"),
+        "quantize_dynamic": (".quantization", "quantize_dynamic"),
+        "quantize_static": (".quantization", "quantize_static"),
+        "compare_quantized": (".quantization", "compare_quantized"),
+    })
 
 if "TF" in get_backends():
-    from .experiment import TfExperiment
-    from .tf_trainer import TfNetworkTrainer
+    _LAZY_ATTRIBUTES.update({
+        "TfExperiment": (".experiment", "TfExperiment"),
+        "TfNetworkTrainer": (".tf_trainer", "TfNetworkTrainer"),
+    })
+
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_ATTRIBUTES)
@@ -1,13 +1,14 @@
 import logging
 import os
 import pickle
+import random
 import typing
 
 import numpy as np
 from tqdm import tqdm
 
-from delira.logging import TrixiHandler
 from .callbacks import AbstractCallback
+from ..io.manifest import CheckpointManifest
 from .predictor import Predictor
 from ..data_loading.data_manager import Augmenter
 from ..models import AbstractNetwork
@@ -53,6 +54,7 @@ class BaseNetworkTrainer(Predictor):
                  metric_keys=None,
                  convert_batch_to_npy_fn=lambda x: x,
                  val_freq=1,
+                 step_save_freq=None,
                  **kwargs
                  ):
         """
@@ -117,6 +119,10 @@ class BaseNetworkTrainer(Predictor):
             model (a value of 1 denotes validating every epoch,
             a value of 2 denotes validating every second epoch etc.);
             defaults to 1
+        step_save_freq : int or None
+            integer specifying how often (in batches) to save a step-level
+            checkpoint, which allows to resume training in the middle of an
+            epoch; if None: no step-level checkpoints are saved
         **kwargs :
             Additional keyword arguments
 
@@ -158,6 +164,11 @@ class BaseNetworkTrainer(Predictor):
         self._reinitialize_logging(logging_type, logging_kwargs)
         self._tqdm_desc = "Validate"
         self.val_freq = val_freq
+        self.step_save_freq = step_save_freq
+
+        # state of an interrupted epoch (restored from a step-level
+        # checkpoint)
+        self._resume_step_state = None
 
     def _setup(self, network, lr_scheduler_cls, lr_scheduler_params, gpu_ids,
                key_mapping, convert_batch_to_npy_fn, prepare_batch_fn):
@@ -294,17 +305,30 @@ class BaseNetworkTrainer(Predictor):
         """
 
         metrics, losses = [], []
+        start_batch = 0
+
+        # continue an interrupted epoch at the batch following the last
+        # step-level checkpoint
+        step_state = self._resume_step_state
+        if step_state is not None and step_state["epoch"] == epoch:
+            metrics = step_state["metrics"]
+            losses = step_state["losses"]
+            start_batch = step_state["batch_nr"] + 1
+            batchgen.sampler.load_state_dict(step_state["sampler"])
+            self._set_rng_states(step_state["rng_states"])
+        self._resume_step_state = None
 
         n_batches = batchgen.num_batches
         if verbose:
             iterable = tqdm(
-                enumerate(batchgen),
+                enumerate(batchgen, start_batch),
                 unit=' batch',
+                initial=start_batch,
                 total=n_batches,
                 desc='Epoch %d' %
                      epoch)
         else:
-            iterable = enumerate(batchgen)
+            iterable = enumerate(batchgen, start_batch)
 
         for batch_nr, batch in iterable:
 
@@ -319,6 +343,16 @@ class BaseNetworkTrainer(Predictor):
             metrics.append(_metrics)
             losses.append(_losses)
 
+            if self.step_save_freq and \
+                    (batch_nr + 1) % self.step_save_freq == 0:
+                self._save_step_state(epoch, {
+                    "epoch": epoch,
+                    "batch_nr": batch_nr,
+                    "sampler": batchgen.sampler.state_dict(),
+                    "rng_states": self._get_rng_states(),
+                    "metrics": metrics,
+                    "losses": losses})
+
         batchgen._finish()
 
         total_losses, total_metrics = {}, {}
@@ -422,6 +456,11 @@ class BaseNetworkTrainer(Predictor):
             self._at_epoch_begin(metrics_val, val_score_key, epoch,
                                  num_epochs)
 
+            # samplers shared across processes must draw their indices
+            # depending on the current epoch
+            if hasattr(datamgr_train.sampler, "set_epoch"):
+                datamgr_train.sampler.set_epoch(epoch)
+
             batch_gen_train = datamgr_train.get_batchgen(seed=epoch)
 
             # train single network epoch
@@ -432,6 +471,12 @@ class BaseNetworkTrainer(Predictor):
                 **train_metrics,
                 **train_losses}
 
+            for k, v in total_metrics.items():
+                total_metrics[k] = reduce_fn(v)
+
+            total_metrics = self._reduce_metrics_across_processes(
+                total_metrics)
+
             # validate network
             if datamgr_valid is not None and (epoch % self.val_freq == 0):
                 # next must be called here because self.predict_data_mgr
@@ -443,10 +488,12 @@ class BaseNetworkTrainer(Predictor):
                         metrics=val_metric_fns, metric_keys=val_metric_keys,
                         verbose=verbose))
 
-                total_metrics.update(val_metrics)
+                for k, v in val_metrics.items():
+                    val_metrics[k] = reduce_fn(v)
 
-            for k, v in total_metrics.items():
-                total_metrics[k] = reduce_fn(v)
+                # the validation shards of the processes may differ in size
+                total_metrics.update(self._reduce_metrics_across_processes(
+                    val_metrics, weight=datamgr_valid.n_samples))
 
             # check if metric became better
             if val_score_key is not None:
@@ -472,14 +519,15 @@ class BaseNetworkTrainer(Predictor):
                 if is_best:
                     best_val_score = new_val_score
 
-                if is_best and verbose:
+                if is_best and verbose and self.is_main_process:
                     logging.info("New Best Value at Epoch %03d : %03.3f" %
                                  (epoch, best_val_score))
 
             # log metrics and loss values
-            for key, val in total_metrics.items():
-                logging.info({"value": {"value": val, "name": key
-                                        }})
+            if self.is_main_process:
+                for key, val in total_metrics.items():
+                    logging.info({"value": {"value": val, "name": key
+                                            }})
 
             self._at_epoch_end(total_metrics, val_score_key, epoch, is_best)
 
@@ -489,8 +537,100 @@ class BaseNetworkTrainer(Predictor):
             if self.stop_training:
                 break
 
+        # wait until all queued values are logged
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+
         return self._at_training_end()
 
+    def _get_rng_states(self):
+        """
+        Returns the states of all random number generators used in the main
+        process
+
+        Returns
+        -------
+        dict
+            the states of python's and numpy's random number generators
+
+        """
+        return {"random": random.getstate(),
+                "numpy": np.random.get_state()}
+
+    def _set_rng_states(self, states):
+        """
+        Restores the states of all random number generators used in the main
+        process
+
+        Parameters
+        ----------
+        states : dict
+            the states obtained by :meth:`_get_rng_states`
+
+        """
+        random.setstate(states["random"])
+        np.random.set_state(states["numpy"])
+
+    def _save_step_state(self, epoch, step_state):
+        """
+        Saves a step-level checkpoint (the current state together with the
+        state of the current epoch)
+
+        Parameters
+        ----------
+        epoch : int
+            current epoch
+        step_state : dict
+            the state of the current epoch (batch number, sampler state,
+            random number generator states and metric accumulators)
+
+        Raises
+        ------
+        NotImplementedError
+            If not overwritten by subclass
+
+        """
+        raise NotImplementedError(
+            "Step-level checkpoints are not supported by %s"
+            % self.__class__.__name__)
+
+    def _reduce_metrics_across_processes(self, metrics, weight=None):
+        """
+        Reduces the (already reduced) epoch metrics across all processes
+        participating in the training. Since the base trainer only uses a
+        single process, the metrics are returned unchanged
+
+        Parameters
+        ----------
+        metrics : dict
+            the metrics of the current process
+        weight : int or None
+            the weight of the current process' metrics (e.g. the number of
+            samples they were computed on); if None: all processes are
+            weighted equally
+
+        Returns
+        -------
+        dict
+            the reduced metrics
+
+        """
+        return metrics
+
+    @property
+    def is_main_process(self):
+        """
+        Whether the current process is the main process (the only process
+        allowed to save checkpoints and to log values)
+
+        Returns
+        -------
+        bool
+            True for the base trainer
+
+        """
+        return True
+
     @property
     def fold(self):
         """
@@ -676,7 +816,8 @@ class BaseNetworkTrainer(Predictor):
             return new_val_score < old_val_score
 
     def _reinitialize_logging(self, logging_type, logging_kwargs: dict):
-        from ..logging import TensorboardXLoggingHandler, VisdomLoggingHandler
+        from ..logging import TensorboardXLoggingHandler, \
+            VisdomLoggingHandler, TrixiHandler
 
         if isinstance(logging_type, str):
             if logging_type.lower() == "visdom":
@@ -691,12 +832,16 @@ class BaseNetworkTrainer(Predictor):
         else:
             logging_cls = logging_type
 
+        # values are written by a background thread to avoid blocking the
+        # training
         if logging_cls == VisdomLoggingHandler:
             _logging_kwargs = {"exp_name": "main",
-                               "level": 0}
+                               "level": 0,
+                               "queue_size": 1000}
         elif logging_cls == TensorboardXLoggingHandler:
             _logging_kwargs = {"log_dir": self.save_path,
-                               "level": 0}
+                               "level": 0,
+                               "queue_size": 1000}
 
         _logging_kwargs.update(logging_kwargs)
 
@@ -720,17 +865,21 @@ class BaseNetworkTrainer(Predictor):
 
         root_logger.handlers = []
 
-        new_handlers.append(
-            logging_cls(**_logging_kwargs)
-        )
+        # only the main process logs to avoid duplicate values
+        if self.is_main_process:
+            new_handlers.append(
+                logging_cls(**_logging_kwargs)
+            )
         logging.basicConfig(level=logging.INFO,
                             handlers=new_handlers)
 
     @staticmethod
-    def _search_for_prev_state(path, extensions=None):
+    def _search_for_prev_state(path, extensions=None, verify=False):
         """
         Helper function to search in a given path for previous epoch states
-        (indicated by extensions)
+        (indicated by extensions). If the path contains a
+        :class:`delira.io.CheckpointManifest`, the latest checkpoint is taken
+        from it, otherwise the path is scanned for checkpoint files
 
         Parameters
         ----------
@@ -739,6 +888,10 @@ class BaseNetworkTrainer(Predictor):
         extensions : list
             list of strings containing valid file extensions for checkpoint
             files
+        verify : bool
+            whether to skip checkpoints, which were modified after being
+            added to the manifest (only used if a manifest exists; see
+            :meth:`delira.io.CheckpointManifest.verify`)
 
         Returns
         -------
@@ -750,6 +903,14 @@ class BaseNetworkTrainer(Predictor):
             the latest epoch (1 if no checkpoint was found)
 
         """
+        manifest = CheckpointManifest(path)
+        if manifest.load():
+            entry = manifest.latest(extensions, verify=verify)
+            if entry is None:
+                return None, 1
+
+            return entry["file"], entry["epoch"]
+
         if extensions is None:
             extensions = []
         files = []
@@ -761,10 +922,7 @@ class BaseNetworkTrainer(Predictor):
                 if not file.endswith(ext):
                     continue
 
-                if not file.startswith("checkpoint"):
-                    continue
-
-                if file.endswith("_best" + ext):
+                if not file.startswith("checkpoint_epoch_"):
                     continue
 
                 files.append(file)
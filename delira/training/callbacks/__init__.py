@@ -1,17 +1,27 @@
 from delira import get_backends
+from delira._lazy import lazy_module_attributes
 from .abstract_callback import AbstractCallback
 from .early_stopping import EarlyStopping
 
+# the backend-specific callbacks are imported on first access to avoid
+# importing the backends together with the package
+_LAZY_ATTRIBUTES = {}
+
 if "TORCH" in get_backends():
-    from .pytorch_schedulers import DefaultPyTorchSchedulerCallback
-    from .pytorch_schedulers import CosineAnnealingLRCallback as \
-        CosineAnnealingLRCallbackPyTorch
-    from .pytorch_schedulers import ExponentialLRCallback as \
-        ExponentialLRCallbackPyTorch
+    _LAZY_ATTRIBUTES.update({
+        "DefaultPyTorchSchedulerCallback": (
+            ".pytorch_schedulers", "DefaultPyTorchSchedulerCallback"),
+        "CosineAnnealingLRCallbackPyTorch": (".pytorch_schedulers",
+                                             "CosineAnnealingLRCallback"),
+        "ExponentialLRCallbackPyTorch": (".pytorch_schedulers",
+                                         "ExponentialLRCallback"),
+        "LambdaLRCallbackPyTorch": (".pytorch_schedulers",
+                                    "LambdaLRCallback"),
+        "MultiStepLRCallbackPyTorch": (".pytorch_schedulers",
+                                       "MultiStepLRCallback"),
+        "ReduceLROnPlateauCallbackPyTorch": (".pytorch_schedulers",
+                                             "ReduceLROnPlateauCallback"),
+        "StepLRCallbackPyTorch": (".pytorch_schedulers", "StepLRCallback"),
+    })
 
-    from .pytorch_schedulers import LambdaLRCallback as LambdaLRCallbackPyTorch
-    from .pytorch_schedulers import MultiStepLRCallback as \
-        MultiStepLRCallbackPyTorch
-    from .pytorch_schedulers import ReduceLROnPlateauCallback as \
-        ReduceLROnPlateauCallbackPyTorch
-    from .pytorch_schedulers import StepLRCallback as StepLRCallbackPyTorch
+__getattr__, __dir__ = lazy_module_attributes(__name__, _LAZY_ATTRIBUTES)
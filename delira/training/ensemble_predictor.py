@@ -0,0 +1,255 @@
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from delira import get_backends
+
+from .predictor import Predictor
+from .train_utils import convert_batch_to_numpy_identity
+from .tta import TTA_REDUCTIONS
+
+logger = logging.getLogger(__name__)
+
+if "TORCH" in get_backends():
+    import torch
+
+
+class EnsemblePredictor(Predictor):
+    """
+    Predicts with an ensemble of networks (e.g. the networks trained on the
+    folds of :meth:`BaseExperiment.kfold`). Each batch is loaded and
+    prepared only once and then passed to all members, whose predictions
+    are reduced afterwards.
+
+    If the members don't fit into memory at once, they can be given as
+    arbitrary descriptors (e.g. checkpoint files) together with a
+    ``load_fn``. Only ``max_resident_members`` networks are kept in memory;
+    to reuse the resident networks, the members are iterated in alternating
+    order for consecutive batches.
+
+    See Also
+    --------
+    :class:`Predictor`
+
+    """
+
+    def __init__(self, members: list, key_mapping: dict,
+                 convert_batch_to_npy_fn=convert_batch_to_numpy_identity,
+                 prepare_batch_fn=lambda x: x, reduction="mean",
+                 load_fn=None, max_resident_members=None, num_threads=None,
+                 **kwargs):
+        """
+
+        Parameters
+        ----------
+        members : list
+            the member networks; if ``load_fn`` is given: the descriptors to
+            create the member networks from
+        key_mapping : dict
+            a dictionary containing the mapping from the ``data_dict`` to
+            the actual model's inputs (must be the same for all members)
+        convert_batch_to_npy_fn : type, optional
+            a callable function to convert tensors in positional and keyword
+            arguments to numpy; default: identity function
+        prepare_batch_fn : type, optional
+            function converting a batch-tensor to the framework specific
+            tensor-type and pushing it to correct device (applied once per
+            batch for all members), default: identity function
+        reduction : str or function or None
+            the reduction merging the predictions of all members (one of
+            'mean', 'median', 'max' and 'min' or a function reducing the
+            first axis of an array); if None: the predictions of all members
+            are stacked along a new second axis (after the batch dimension;
+            can't be combined with test-time augmentation)
+        load_fn : function or None
+            function creating a member network from its descriptor; if None:
+            the members are networks, which are all kept in memory
+        max_resident_members : int or None
+            the maximum number of member networks kept in memory at once
+            (only used together with ``load_fn``); if None: all networks are
+            kept in memory after loading them
+        num_threads : int or None
+            the number of threads running the (resident) members
+            concurrently; if None: the members are run sequentially
+        **kwargs :
+            additional keyword arguments (passed to :class:`Predictor`)
+
+        """
+        assert members, "An ensemble requires at least one member"
+        if max_resident_members is not None:
+            assert max_resident_members > 0, \
+                "max_resident_members must be positive"
+
+        super().__init__(list(members), key_mapping, convert_batch_to_npy_fn,
+                         prepare_batch_fn, **kwargs)
+
+        if reduction is None and self.tta_transforms:
+            raise ValueError("The predictions of the members must be reduced "
+                             "to merge the test-time augmentations")
+
+        if isinstance(reduction, str):
+            reduction = TTA_REDUCTIONS[reduction]
+
+        self.reduction = reduction
+        self._load_fn = load_fn
+        self.max_resident_members = max_resident_members
+        self.num_threads = num_threads
+
+        self._resident = OrderedDict()
+        self._reverse_order = False
+        self._executor = None
+        self.num_loads = 0
+
+    @property
+    def members(self):
+        return self.module
+
+    def _get_member(self, idx):
+        """
+        Returns a member network (loads it and evicts the least recently
+        used network if necessary)
+
+        Parameters
+        ----------
+        idx : int
+            the member's index
+
+        Returns
+        -------
+        Any
+            the member network
+
+        """
+        if self._load_fn is None:
+            return self.members[idx]
+
+        if idx in self._resident:
+            self._resident.move_to_end(idx)
+            return self._resident[idx]
+
+        if self.max_resident_members is not None:
+            while len(self._resident) >= self.max_resident_members:
+                evicted, _ = self._resident.popitem(last=False)
+                logger.debug("Evicted ensemble member %d" % evicted)
+
+        network = self._load_fn(self.members[idx])
+        self.num_loads += 1
+        self._resident[idx] = network
+        return network
+
+    def _member_chunks(self):
+        """
+        Splits the members into chunks, which can be resident at once. The
+        order is reversed for every batch to start with the networks, which
+        are still resident from the previous batch
+
+        Yields
+        ------
+        list of int
+            the indices of the members in the chunk
+
+        """
+        order = list(range(len(self.members)))
+        if self._reverse_order:
+            order = order[::-1]
+        self._reverse_order = not self._reverse_order
+
+        chunk_size = len(order)
+        if self._load_fn is not None and \
+                self.max_resident_members is not None:
+            chunk_size = self.max_resident_members
+
+        for start in range(0, len(order), chunk_size):
+            yield order[start:start + chunk_size]
+
+    def _predict_batch(self, data: dict, **kwargs):
+        """
+        Predicts a single batch with all members
+
+        Parameters
+        ----------
+        data : dict
+            batch dictionary
+        **kwargs :
+            keyword arguments(directly passed to ``prepare_batch``)
+
+        Returns
+        -------
+        dict
+            reduced predictions of all members
+
+        """
+        data = self._prepare_batch(data, **kwargs)
+        mapped_data = {k: data[v] for k, v in self.key_mapping.items()}
+
+        # the grad mode of torch is thread-local and must be passed on to
+        # the worker threads explicitly
+        grad_enabled = None
+        if "TORCH" in get_backends():
+            grad_enabled = torch.is_grad_enabled()
+
+        def _run(network):
+            if grad_enabled is None:
+                return self._convert_to_npy_fn(**network(**mapped_data))[1]
+
+            with torch.set_grad_enabled(grad_enabled):
+                return self._convert_to_npy_fn(**network(**mapped_data))[1]
+
+        if self.num_threads is not None and self._executor is None:
+            self._executor = ThreadPoolExecutor(self.num_threads)
+
+        preds = [None] * len(self.members)
+        for chunk in self._member_chunks():
+            networks = [self._get_member(idx) for idx in chunk]
+
+            if self._executor is not None:
+                chunk_preds = list(self._executor.map(_run, networks))
+            else:
+                chunk_preds = [_run(network) for network in networks]
+
+            for idx, _preds in zip(chunk, chunk_preds):
+                preds[idx] = _preds
+
+        return self._reduce(preds)
+
+    def _reduce(self, preds):
+        """
+        Reduces the predictions of all members
+
+        Parameters
+        ----------
+        preds : list of dict
+            the predictions of each member
+
+        Returns
+        -------
+        dict
+            the reduced predictions
+
+        """
+        reduced = {}
+        for key, val in preds[0].items():
+            if isinstance(val, dict):
+                reduced[key] = self._reduce([_preds[key] for _preds in preds])
+            elif isinstance(val, np.ndarray):
+                stacked = np.stack([_preds[key] for _preds in preds])
+                if self.reduction is None:
+                    reduced[key] = np.moveaxis(stacked, 0, 1)
+                else:
+                    reduced[key] = self.reduction(stacked)
+            else:
+                reduced[key] = val
+
+        return reduced
+
+    def close(self):
+        """
+        Stops the thread pool and releases all resident members
+
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._resident.clear()
@@ -8,8 +8,6 @@ from functools import partial
 import copy
 
 import numpy as np
-from sklearn.model_selection import KFold, StratifiedKFold, \
-    StratifiedShuffleSplit, ShuffleSplit
 
 from delira import get_backends
 
@@ -516,6 +514,9 @@ class BaseExperiment(object):
         if test_kwargs is None:
             test_kwargs = {}
 
+        from sklearn.model_selection import KFold, StratifiedKFold, \
+            StratifiedShuffleSplit, ShuffleSplit
+
         # switch between differnt kfold types
         if split_type == "random":
             split_cls = KFold
@@ -719,8 +720,43 @@ if "TORCH" in get_backends():
         convert_torch_tensor_to_npy
     from .pytorch_trainer import PyTorchNetworkTrainer as PTNetworkTrainer
     from ..models import AbstractPyTorchNetwork
+    from ..io.torch import load_checkpoint
     import torch
 
+    def _run_distributed_worker(rank, experiment, train_data, val_data,
+                                params, world_size, init_method, kwargs):
+        """
+        Runs the training of a single process for distributed training
+
+        Parameters
+        ----------
+        rank : int
+            the rank of the current process
+        experiment : :class:`PyTorchExperiment`
+            the experiment to run
+        train_data : :class:`BaseDataManager`
+            the data to use for training
+        val_data : :class:`BaseDataManager` or None
+            the data to use for validation
+        params : :class:`Parameters` or None
+            the parameters to use for training and model instantiation
+        world_size : int
+            the total number of processes
+        init_method : str
+            URL specifying how to initialize the process group
+        kwargs : dict
+            additional keyword arguments passed to :meth:`BaseExperiment.run`
+
+        """
+        try:
+            BaseExperiment.run(experiment, train_data, val_data, params,
+                               distributed=True, world_size=world_size,
+                               rank=rank, dist_init_method=init_method,
+                               **kwargs)
+        finally:
+            if torch.distributed.is_initialized():
+                torch.distributed.destroy_process_group()
+
     class PyTorchExperiment(BaseExperiment):
         def __init__(self,
                      params: typing.Union[str, Parameters],
@@ -786,6 +822,101 @@ if "TORCH" in get_backends():
                              trainer_cls=trainer_cls,
                              **kwargs)
 
+        def run(self, train_data: BaseDataManager,
+                val_data: BaseDataManager = None,
+                params: Parameters = None, distributed=False,
+                world_size=None, **kwargs):
+            """
+            Setup and run training
+
+            Parameters
+            ----------
+            train_data : :class:`BaseDataManager`
+                the data to use for training
+            val_data : :class:`BaseDataManager` or None
+                the data to use for validation (no validation is done
+                if passing None); default: None
+            params : :class:`Parameters` or None
+                the parameters to use for training and model instantiation
+                (will be merged with ``self.params``)
+            distributed : bool
+                whether to train with
+                :class:`torch.nn.parallel.DistributedDataParallel`. If True,
+                ``world_size`` processes are spawned on the current node,
+                each of them training on its own shard of the data (and on its
+                own GPU if ``gpu_ids`` are given); default: False
+            world_size : int or None
+                the number of processes to spawn for distributed training;
+                if None: the number of given ``gpu_ids`` (or 1 for CPU-only
+                training) will be used
+            **kwargs :
+                additional keyword arguments
+
+            Returns
+            -------
+            :class:`AbstractNetwork`
+                The trained network returned by the trainer (usually best
+                network); for distributed training this is the network
+                restored from the checkpoint written by the main process
+
+            See Also
+            --------
+            :class:`PyTorchNetworkTrainer` for training itself
+
+            """
+            if not distributed:
+                return super().run(train_data, val_data, params, **kwargs)
+
+            import socket
+
+            if world_size is None:
+                gpu_ids = kwargs.get("gpu_ids", self.kwargs.get("gpu_ids"))
+                if gpu_ids and torch.cuda.is_available():
+                    world_size = len(gpu_ids)
+                else:
+                    world_size = 1
+
+            # all processes must share the same save path
+            save_path = kwargs.pop("save_path", os.path.join(
+                self.save_path, "checkpoints", "run_%02d" % self._run))
+
+            # find a free port for the process group's rendezvous
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+
+            torch.multiprocessing.spawn(
+                _run_distributed_worker,
+                args=(self, train_data, val_data, params, world_size,
+                      "tcp://127.0.0.1:%d" % port,
+                      {**kwargs, "save_path": save_path}),
+                nprocs=world_size, join=True)
+
+            self._run += 1
+
+            # restore the network from the main process' checkpoints
+            model_params = self._resolve_params(
+                params).permute_training_on_top().model
+            model = self.model_cls(**{**model_params.fixed,
+                                      **model_params.variable})
+
+            checkpoint_file = os.path.join(save_path, "checkpoint_best.pt")
+            if not os.path.isfile(checkpoint_file):
+                latest_state_path, _ = \
+                    self.trainer_cls._search_for_prev_state(
+                        save_path, [".pt", ".pth"])
+                checkpoint_file = None
+                if latest_state_path is not None:
+                    checkpoint_file = os.path.join(save_path,
+                                                   latest_state_path)
+
+            if checkpoint_file is not None:
+                model.load_state_dict(
+                    load_checkpoint(checkpoint_file,
+                                    map_location="cpu")["model"])
+
+            return model
+
         def kfold(self, data: BaseDataManager, metrics: dict, num_epochs=None,
                   num_splits=None, shuffle=False, random_seed=None,
                   split_type="random", val_split=0.2, label_key="label",
@@ -0,0 +1,500 @@
+import json
+import logging
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from queue import Empty, Full, Queue
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# sentinel stopping the batching thread
+_STOP = object()
+
+
+class _Request(object):
+    """
+    A single request waiting to be batched. Only requests with the same
+    signature (keys, dtypes and shapes except for the first dimension) can
+    be concatenated to a batch
+
+    """
+    __slots__ = ("sample", "size", "signature", "future", "enqueued")
+
+    def __init__(self, sample, size):
+        self.sample = sample
+        self.size = size
+        self.signature = tuple(sorted(
+            (key, val.shape[1:], val.dtype.str)
+            for key, val in sample.items()))
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class DynamicBatcher(object):
+    """
+    Coalesces concurrently submitted samples into batches and predicts them
+    by a :class:`Predictor` on a single worker thread. A batch is predicted
+    as soon as it contains ``max_batch_size`` samples or the oldest sample
+    waited ``max_wait_time`` seconds. Requests are batched in the order of
+    their arrival; a request, which doesn't fit into the current batch or
+    whose entries can't be concatenated with the batch's entries, starts
+    the next batch. A single request containing more than
+    ``max_batch_size`` samples is predicted as batch of its own
+
+    """
+
+    def __init__(self, predictor, max_batch_size=32, max_wait_time=0.005,
+                 max_queue_size=1024, window_size=1000):
+        """
+
+        Parameters
+        ----------
+        predictor : :class:`Predictor`
+            the predictor to run (its ``predict`` method is only called from
+            the batching thread)
+        max_batch_size : int
+            the maximum number of samples per batch
+        max_wait_time : float
+            the maximum time (in seconds) a sample waits for further samples
+            to fill its batch
+        max_queue_size : int
+            the maximum number of requests waiting to be batched; further
+            requests are rejected to apply backpressure to the clients
+        window_size : int
+            the number of most recent requests and batches to compute the
+            latency and batch size statistics from
+
+        """
+        assert max_batch_size > 0, "max_batch_size must be positive"
+
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+
+        self._queue = Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self._latencies = deque(maxlen=window_size)
+        self._batch_sizes = deque(maxlen=window_size)
+        self._start_time = None
+        self._num_samples = 0
+        self._num_batches = 0
+        self._num_rejected = 0
+        self._num_errors = 0
+
+    def start(self):
+        """
+        Starts the batching thread
+
+        Returns
+        -------
+        :class:`DynamicBatcher`
+            self
+
+        """
+        if self._thread is None:
+            self._start_time = time.perf_counter()
+            self._thread = threading.Thread(target=self._process_queue,
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops the batching thread after all queued requests were predicted
+
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def submit(self, sample: dict, timeout=None):
+        """
+        Queues a sample for prediction
+
+        Parameters
+        ----------
+        sample : dict
+            the sample (a batch dict, whose entries contain one or more
+            samples along their first dimension)
+        timeout : float or None
+            the time to wait for a free slot in the queue; if None: the
+            sample is rejected immediately if the queue is full
+
+        Returns
+        -------
+        :class:`concurrent.futures.Future`
+            future resolving to the sample's predictions
+
+        Raises
+        ------
+        queue.Full
+            if the queue is full (the server is overloaded)
+        ValueError
+            if the sample's entries are no arrays of the same (non-zero)
+            length along the first dimension
+
+        """
+        assert self._thread is not None, "The batcher was not started"
+
+        if not sample or not all(isinstance(val, np.ndarray) and val.ndim
+                                 for val in sample.values()):
+            raise ValueError("All entries of a sample must be arrays with "
+                             "at least one dimension")
+
+        sizes = {len(val) for val in sample.values()}
+        if len(sizes) != 1 or 0 in sizes:
+            raise ValueError("All arrays of a sample must have the same "
+                             "(non-zero) length along the first dimension")
+
+        request = _Request(sample, sizes.pop())
+        try:
+            self._queue.put(request, block=timeout is not None,
+                            timeout=timeout)
+        except Full:
+            with self._lock:
+                self._num_rejected += 1
+            raise
+
+        return request.future
+
+    def predict(self, sample: dict, timeout=None):
+        """
+        Predicts a sample (blocks until the sample's batch was predicted)
+
+        Parameters
+        ----------
+        sample : dict
+            the sample
+        timeout : float or None
+            the time to wait for a free slot in the queue (see
+            :meth:`submit`)
+
+        Returns
+        -------
+        dict
+            the predictions
+
+        """
+        return self.submit(sample, timeout).result()
+
+    def _collect_batch(self, first):
+        """
+        Collects further requests until the batch is full or the first
+        request waited ``max_wait_time``
+
+        Parameters
+        ----------
+        first : :class:`_Request`
+            the oldest request
+
+        Returns
+        -------
+        list of :class:`_Request`
+            the requests of the batch
+        bool
+            whether the thread should stop after this batch
+        :class:`_Request` or None
+            the request, which didn't fit into the batch and starts the
+            next batch
+
+        """
+        requests = [first]
+        size = first.size
+        deadline = first.enqueued + self.max_wait_time
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    request = self._queue.get(timeout=remaining)
+                else:
+                    # don't wait, but take requests which already arrived
+                    request = self._queue.get_nowait()
+            except Empty:
+                break
+
+            if request is _STOP:
+                return requests, True, None
+
+            if request.signature != first.signature or \
+                    size + request.size > self.max_batch_size:
+                return requests, False, request
+
+            requests.append(request)
+            size += request.size
+
+        return requests, False, None
+
+    def _process_queue(self):
+        """
+        Batches and predicts the queued requests (runs in a separate
+        thread)
+
+        """
+        stop = False
+        first = None
+        while not stop:
+            if first is None:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+
+            requests, stop, first = self._collect_batch(first)
+            self._predict_batch(requests)
+
+    def _predict_batch(self, requests):
+        """
+        Predicts the samples of multiple requests as single batch and
+        scatters the predictions back to the requests
+
+        Parameters
+        ----------
+        requests : list of :class:`_Request`
+            the requests
+
+        """
+        try:
+            batch = {key: np.concatenate([request.sample[key]
+                                          for request in requests])
+                     for key in requests[0].sample}
+
+            preds = self.predictor.predict(batch)
+
+            total = sum(request.size for request in requests)
+            offset = 0
+            results = []
+            for request in requests:
+                results.append(self._slice_preds(
+                    preds, offset, offset + request.size, total))
+                offset += request.size
+
+        except Exception as e:
+            logger.exception("Prediction of batch failed")
+            with self._lock:
+                self._num_errors += len(requests)
+            for request in requests:
+                request.future.set_exception(e)
+            return
+
+        now = time.perf_counter()
+        with self._lock:
+            self._num_batches += 1
+            self._num_samples += total
+            self._batch_sizes.append(total)
+            for request in requests:
+                self._latencies.append(now - request.enqueued)
+
+        for request, result in zip(requests, results):
+            request.future.set_result(result)
+
+    @staticmethod
+    def _slice_preds(preds, start, stop, total):
+        """
+        Extracts the predictions of a single request from the batch's
+        predictions (entries, which don't contain a value per sample, are
+        passed to each request)
+
+        """
+        result = {}
+        for key, val in preds.items():
+            if isinstance(val, dict):
+                result[key] = DynamicBatcher._slice_preds(val, start, stop,
+                                                          total)
+            elif isinstance(val, np.ndarray) and val.ndim \
+                    and len(val) == total:
+                result[key] = val[start:stop]
+            else:
+                result[key] = val
+
+        return result
+
+    @property
+    def stats(self):
+        """
+        Statistics of the most recent requests
+
+        Returns
+        -------
+        dict
+            the number of predicted samples and batches, the number of
+            rejected and failed requests, the current queue size, the mean
+            batch size, the throughput (samples per second since the start)
+            and the request latency percentiles (in milliseconds)
+
+        """
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            batch_sizes = np.array(self._batch_sizes)
+            stats = {"num_samples": self._num_samples,
+                     "num_batches": self._num_batches,
+                     "num_rejected": self._num_rejected,
+                     "num_errors": self._num_errors}
+
+        stats["queue_size"] = self._queue.qsize()
+        stats["mean_batch_size"] = float(batch_sizes.mean()) \
+            if batch_sizes.size else None
+
+        if self._start_time is not None:
+            stats["samples_per_sec"] = stats["num_samples"] / (
+                time.perf_counter() - self._start_time)
+
+        if latencies.size:
+            for percentile in (50, 90, 99):
+                stats["latency_p%d_ms" % percentile] = float(
+                    np.percentile(latencies, percentile))
+
+        return stats
+
+
+class _InferenceRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles the HTTP requests of an :class:`InferenceServer`
+
+    """
+
+    def _send_json(self, status, content):
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send_json(200, self.server.batcher.stats)
+        else:
+            self._send_json(404, {"error": "Unknown path %s" % self.path})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "Unknown path %s" % self.path})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            if not isinstance(payload, dict):
+                raise TypeError("Expected a JSON object mapping the input "
+                                "names to arrays, but got %s"
+                                % type(payload).__name__)
+
+            sample = {key: np.asarray(val, dtype=self.server.dtype)
+                      for key, val in payload.items()}
+            future = self.server.batcher.submit(
+                sample, timeout=self.server.queue_timeout)
+        except Full:
+            self._send_json(503, {"error": "Server overloaded"})
+            return
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            preds = future.result()
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        self._send_json(200, _to_json(preds))
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def _to_json(preds):
+    """
+    Converts the predictions to JSON serializable types
+
+    """
+    if isinstance(preds, dict):
+        return {key: _to_json(val) for key, val in preds.items()}
+    if isinstance(preds, (np.ndarray, np.generic)):
+        return preds.tolist()
+    return preds
+
+
+class InferenceServer(socketserver.ThreadingMixIn, HTTPServer):
+    """
+    Local HTTP server predicting samples by a :class:`DynamicBatcher`.
+
+    ``POST /predict`` expects a JSON object mapping the batch keys to
+    (nested) lists, which contain one or more samples along their first
+    dimension, and returns the predictions as JSON object.
+    ``GET /metrics`` returns the batcher's statistics. If too many requests
+    are queued, requests are rejected with status 503.
+
+    """
+    daemon_threads = True
+
+    def __init__(self, batcher: DynamicBatcher, host="127.0.0.1", port=8080,
+                 dtype=np.float32, queue_timeout=0.1):
+        """
+
+        Parameters
+        ----------
+        batcher : :class:`DynamicBatcher`
+            the batcher predicting the samples (is started if necessary)
+        host : str
+            the host to bind to
+        port : int
+            the port to bind to (0 selects a free port)
+        dtype : numpy dtype
+            the dtype to convert the received arrays to
+        queue_timeout : float or None
+            the time to wait for a free slot in the batcher's queue before
+            rejecting a request
+
+        """
+        super().__init__((host, port), _InferenceRequestHandler)
+        self.batcher = batcher.start()
+        self.dtype = dtype
+        self.queue_timeout = queue_timeout
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    def start(self):
+        """
+        Serves requests in a background thread
+
+        Returns
+        -------
+        :class:`InferenceServer`
+            self
+
+        """
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving and the batcher
+
+        """
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+
+        self.server_close()
+        self.batcher.stop()
@@ -0,0 +1,544 @@
+import copy
+import csv
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .callbacks import AbstractCallback
+from .parameters import Parameters
+from ..data_loading.worker import limit_threads
+
+logger = logging.getLogger(__name__)
+
+
+def _flatten_variable_params(params: Parameters):
+    """
+    Flattens the variable parameters to a list of key paths and values
+
+    Parameters
+    ----------
+    params : :class:`Parameters`
+        the parameters containing the variable parameters
+
+    Returns
+    -------
+    list
+        tuples of the key path (tuple of str) and the value
+
+    """
+    flat = []
+
+    def _flatten(prefix, val):
+        if isinstance(val, dict) and val:
+            for key, sub_val in val.items():
+                _flatten(prefix + (key,), sub_val)
+        elif not isinstance(val, dict):
+            flat.append((prefix, val))
+
+    variable = copy.deepcopy(params).permute_variability_on_top().variable
+    _flatten((), variable)
+    return flat
+
+
+def _make_trial_params(params: Parameters, values: dict):
+    """
+    Creates the parameters of a single trial by replacing the variable
+    parameters with the given values
+
+    Parameters
+    ----------
+    params : :class:`Parameters`
+        the parameters defining the search space
+    values : dict
+        mapping from the key path to the value of each variable parameter
+
+    Returns
+    -------
+    :class:`Parameters`
+        the trial's parameters
+
+    """
+    trial_params = copy.deepcopy(params).permute_variability_on_top()
+
+    for path, val in values.items():
+        target = trial_params.variable
+        for key in path[:-1]:
+            target = target[key]
+        target[path[-1]] = val
+
+    return trial_params.permute_training_on_top()
+
+
+def grid_search_space(params: Parameters):
+    """
+    Expands the variable parameters to a grid of parameter combinations.
+    Each variable parameter must be given as a list of candidate values
+    (values, which are no list or tuple, are treated as single candidate; to
+    search over list-valued parameters, wrap the candidates in another list)
+
+    Parameters
+    ----------
+    params : :class:`Parameters`
+        the parameters defining the search space
+
+    Returns
+    -------
+    list of :class:`Parameters`
+        the parameters of all combinations
+
+    """
+    flat = _flatten_variable_params(params)
+    paths = [path for path, _ in flat]
+    candidates = [val if isinstance(val, (list, tuple)) else [val]
+                  for _, val in flat]
+
+    return [_make_trial_params(params, dict(zip(paths, combination)))
+            for combination in itertools.product(*candidates)]
+
+
+def random_search_space(params: Parameters, num_trials, seed=None):
+    """
+    Samples parameter combinations from the variable parameters. Each
+    variable parameter may be given as a list of candidate values (sampled
+    uniformly), as a distribution providing a ``rvs(random_state=...)``
+    method (like ``scipy.stats`` distributions) or as a function accepting a
+    :class:`numpy.random.RandomState` and returning a single value
+
+    Parameters
+    ----------
+    params : :class:`Parameters`
+        the parameters defining the search space
+    num_trials : int
+        the number of combinations to sample
+    seed : int or None
+        the seed for sampling
+
+    Returns
+    -------
+    list of :class:`Parameters`
+        the parameters of all sampled combinations
+
+    """
+    rng = np.random.RandomState(seed)
+    flat = _flatten_variable_params(params)
+
+    def _sample(val):
+        if hasattr(val, "rvs"):
+            return val.rvs(random_state=rng)
+        if callable(val):
+            return val(rng)
+        if isinstance(val, (list, tuple)):
+            return val[rng.randint(len(val))]
+        return val
+
+    return [_make_trial_params(params, {path: _sample(val)
+                                        for path, val in flat})
+            for _ in range(num_trials)]
+
+
+class _ValScoreRecorder(AbstractCallback):
+    """
+    Callback recording the validation score of each epoch
+
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.scores = []
+
+    def at_epoch_end(self, trainer, **kwargs):
+        val_score_key = kwargs.get("val_score_key")
+        val_score = None
+        if val_score_key is not None:
+            val_score = kwargs.get("val_metrics", {}).get(val_score_key)
+
+        if val_score is not None:
+            val_score = float(val_score)
+
+        self.scores.append((kwargs.get("curr_epoch"), val_score))
+        return {}
+
+
+def _run_trial(experiment, train_data, val_data, params, save_path,
+               num_epochs, resume, num_threads, kwargs):
+    """
+    Trains a single trial up to the given number of epochs
+
+    Parameters
+    ----------
+    experiment : :class:`BaseExperiment`
+        the experiment to run
+    train_data : :class:`BaseDataManager`
+        the data to use for training
+    val_data : :class:`BaseDataManager` or None
+        the data to use for validation
+    params : :class:`Parameters`
+        the trial's parameters
+    save_path : str
+        the trial's save path
+    num_epochs : int
+        the total number of epochs to train the trial for
+    resume : bool
+        whether to resume the trial from its last checkpoint
+    num_threads : int or None
+        the maximum number of threads of the current process; if None: the
+        threads are not limited
+    kwargs : dict
+        additional keyword arguments passed to the experiment
+
+    Returns
+    -------
+    dict
+        the validation scores of all trained epochs ('scores') and the error
+        message if the training failed ('error')
+
+    """
+    # the backend may have been imported while unpickling the arguments
+    if num_threads is not None:
+        limit_threads(num_threads)
+
+    # don't share the parameters and keyword arguments across trials
+    experiment = copy.copy(experiment)
+    experiment.params = params
+    experiment.kwargs = dict(experiment.kwargs)
+
+    # promoted trials are resumed from their last checkpoint, which must
+    # therefore be written after the last epoch of each round
+    experiment.checkpoint_freq = 1
+
+    recorder = _ValScoreRecorder()
+    kwargs = {**kwargs, "num_epochs": num_epochs,
+              "callbacks": [*kwargs.get("callbacks", []), recorder]}
+
+    try:
+        if resume:
+            experiment.resume(save_path, train_data, val_data, **kwargs)
+        else:
+            experiment.run(train_data, val_data, save_path=save_path,
+                           **kwargs)
+    except Exception as e:
+        logger.exception("Trial at %s failed" % save_path)
+        return {"scores": recorder.scores, "error": repr(e)}
+
+    return {"scores": recorder.scores, "error": None}
+
+
+class ParameterSweep(object):
+    """
+    Runs a hyperparameter search over the variable parameters of
+    :class:`Parameters` by training each parameter combination (trial) with
+    a given experiment.
+
+    Trials are run in parallel on a pool of local processes, each of them
+    with a limited number of threads. If a ``reduction_factor`` is given,
+    trials are trained with successive halving: all trials are trained for
+    ``min_epochs`` epochs, then only the best ``1 / reduction_factor`` of the
+    trials (according to their validation score) are resumed and trained for
+    ``reduction_factor`` times more epochs and so on, until ``num_epochs``
+    epochs are reached.
+
+    The results of all trials are written to a CSV file after each round.
+
+    """
+
+    FILE_NAME = "trials.csv"
+
+    def __init__(self, experiment, search="grid", num_trials=None, seed=None,
+                 num_workers=1, threads_per_trial=1, reduction_factor=None,
+                 min_epochs=1, val_score_mode="lowest", save_path=None):
+        """
+
+        Parameters
+        ----------
+        experiment : :class:`BaseExperiment`
+            the experiment used to train each trial; its parameters define
+            the search space
+        search : str
+            the type of search; must be one of 'grid' and 'random' (see
+            :func:`grid_search_space` and :func:`random_search_space`)
+        num_trials : int or None
+            the number of trials for random search
+        seed : int or None
+            the seed for random search
+        num_workers : int
+            the number of processes to run trials in parallel; if 0: the
+            trials are run inside the current process
+        threads_per_trial : int or None
+            the maximum number of threads of each trial's process; if None:
+            the threads are not limited
+        reduction_factor : int or None
+            the reduction factor for successive halving; if None: all trials
+            are trained for the full number of epochs
+        min_epochs : int
+            the number of epochs of the first round of successive halving
+        val_score_mode : str
+            whether a higher or lower validation score is better; must be
+            one of 'highest' and 'lowest'
+        save_path : str or None
+            the path to save the trials and the results table to; if None:
+            the experiment's save path will be used
+
+        Raises
+        ------
+        ValueError
+            invalid search type, validation score mode or reduction factor
+
+        """
+        if search not in ("grid", "random"):
+            raise ValueError("Invalid search %s. Must be one of 'grid' and "
+                             "'random'" % search)
+        if search == "random" and num_trials is None:
+            raise ValueError("num_trials must be given for random search")
+        if val_score_mode not in ("highest", "lowest"):
+            raise ValueError("Invalid val_score_mode %s. Must be one of "
+                             "'highest' and 'lowest'" % val_score_mode)
+        if reduction_factor is not None and reduction_factor < 2:
+            raise ValueError("reduction_factor must be at least 2")
+
+        if threads_per_trial is not None and num_workers > 0 \
+                and num_workers * threads_per_trial > os.cpu_count():
+            logger.warning("%d workers with %d threads each exceed the %d "
+                           "available CPUs" % (num_workers, threads_per_trial,
+                                               os.cpu_count()))
+
+        if save_path is None:
+            save_path = os.path.join(experiment.save_path, "sweep")
+
+        self.experiment = experiment
+        self.search = search
+        self.num_trials = num_trials
+        self.seed = seed
+        self.num_workers = num_workers
+        self.threads_per_trial = threads_per_trial
+        self.reduction_factor = reduction_factor
+        self.min_epochs = min_epochs
+        self.val_score_mode = val_score_mode
+        self.save_path = save_path
+        self.results = []
+
+    def search_space(self, params=None):
+        """
+        Expands the search space
+
+        Parameters
+        ----------
+        params : :class:`Parameters` or None
+            the parameters defining the search space; if None: the
+            experiment's parameters will be used
+
+        Returns
+        -------
+        list of :class:`Parameters`
+            the parameters of all trials
+
+        """
+        if params is None:
+            params = self.experiment.params
+
+        if self.search == "grid":
+            return grid_search_space(params)
+
+        return random_search_space(params, self.num_trials, self.seed)
+
+    def _budgets(self, num_epochs):
+        """
+        Computes the number of epochs of each round
+
+        Parameters
+        ----------
+        num_epochs : int
+            the maximum number of epochs
+
+        Returns
+        -------
+        list of int
+            the total number of epochs after each round
+
+        """
+        if self.reduction_factor is None:
+            return [num_epochs]
+
+        budgets = []
+        budget = self.min_epochs
+        while budget < num_epochs:
+            budgets.append(budget)
+            budget *= self.reduction_factor
+
+        return budgets + [num_epochs]
+
+    def _best_score(self, scores):
+        """
+        Returns the best validation score of a trial
+
+        Parameters
+        ----------
+        scores : list
+            tuples of epoch and validation score
+
+        Returns
+        -------
+        float or None
+            the best score (None if no score was recorded)
+
+        """
+        scores = [score for _, score in scores if score is not None]
+        if not scores:
+            return None
+
+        if self.val_score_mode == "highest":
+            return max(scores)
+        return min(scores)
+
+    def _rank(self, results):
+        """
+        Sorts trials by their best validation score (best first; trials
+        without score last)
+
+        """
+        sign = -1 if self.val_score_mode == "highest" else 1
+
+        def _key(result):
+            score = result["best_val_score"]
+            if score is None or math.isnan(score):
+                return 1, 0.
+            return 0, sign * score
+
+        return sorted(results, key=_key)
+
+    def _write_results(self):
+        """
+        Writes the results table (atomically) to ``save_path``
+
+        """
+        param_columns = sorted({key for result in self.results
+                                for key in result["params"]})
+        columns = ["trial", "status", "epochs", "val_score",
+                   "best_val_score", "save_path", "error"]
+
+        file_name = os.path.join(self.save_path, self.FILE_NAME)
+        with open(file_name + ".tmp", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns + param_columns)
+            for result in self.results:
+                row = [result[key] for key in columns]
+                row += [result["params"].get(key) for key in param_columns]
+                writer.writerow(row)
+
+        os.replace(file_name + ".tmp", file_name)
+
+    def run(self, train_data, val_data=None, params=None, num_epochs=None,
+            **kwargs):
+        """
+        Runs all trials
+
+        Parameters
+        ----------
+        train_data : :class:`BaseDataManager`
+            the data to use for training
+        val_data : :class:`BaseDataManager` or None
+            the data to use for validation (necessary for successive halving
+            and to rank the trials)
+        params : :class:`Parameters` or None
+            the parameters defining the search space; if None: the
+            experiment's parameters will be used
+        num_epochs : int or None
+            the (maximum) number of epochs per trial; if None: the
+            experiment's number of epochs will be used
+        **kwargs :
+            additional keyword arguments passed to the experiment's ``run``
+
+        Returns
+        -------
+        list of dict
+            the results of all trials, sorted by their best validation score
+
+        """
+        if num_epochs is None:
+            num_epochs = self.experiment.n_epochs
+
+        # the trainers must agree with the sweep about the best score
+        kwargs.setdefault("val_score_mode", self.val_score_mode)
+
+        os.makedirs(self.save_path, exist_ok=True)
+
+        trial_params = self.search_space(params)
+        flat_params = [{".".join(path): val for path, val in
+                        _flatten_variable_params(_params)}
+                       for _params in trial_params]
+
+        self.results = [{"trial": idx, "status": "pending", "epochs": 0,
+                         "val_score": None, "best_val_score": None,
+                         "save_path": os.path.join(self.save_path,
+                                                   "trial_%03d" % idx),
+                         "error": None, "params": flat_params[idx]}
+                        for idx in range(len(trial_params))]
+
+        # trials running inside the current process are not limited
+        num_threads = None
+        executor = None
+        if self.num_workers > 0:
+            num_threads = self.threads_per_trial
+            executor = ProcessPoolExecutor(
+                self.num_workers,
+                mp_context=multiprocessing.get_context("spawn"))
+
+        active = list(self.results)
+        budgets = self._budgets(num_epochs)
+
+        try:
+            for round_idx, budget in enumerate(budgets):
+                args = [(self.experiment, train_data, val_data,
+                         trial_params[result["trial"]], result["save_path"],
+                         budget, round_idx > 0, num_threads, kwargs)
+                        for result in active]
+
+                if executor is None:
+                    outputs = [_run_trial(*_args) for _args in args]
+                else:
+                    outputs = list(executor.map(_run_trial, *zip(*args)))
+
+                for result, output in zip(active, outputs):
+                    scores = output["scores"]
+                    if scores:
+                        result["epochs"] = scores[-1][0]
+                        result["val_score"] = scores[-1][1]
+
+                    result["best_val_score"] = self._best_score(
+                        [(None, result["best_val_score"])] + scores)
+
+                    if output["error"] is not None:
+                        result["status"] = "failed"
+                        result["error"] = output["error"]
+                    else:
+                        result["status"] = "running"
+
+                active = [result for result in active
+                          if result["status"] != "failed"]
+
+                # successive halving: keep only the best trials
+                if round_idx < len(budgets) - 1:
+                    num_keep = int(math.ceil(
+                        len(active) / self.reduction_factor))
+                    ranked = self._rank(active)
+                    for result in ranked[num_keep:]:
+                        result["status"] = "stopped"
+                    active = ranked[:num_keep]
+
+                self._write_results()
+                logger.info("Sweep round %d: trained %d trials for %d "
+                            "epochs" % (round_idx, len(args), budget))
+
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        for result in active:
+            result["status"] = "completed"
+        self._write_results()
+
+        return self._rank(self.results)
@@ -6,6 +6,7 @@ from tqdm import tqdm
 
 from ..data_loading import BaseDataManager
 from .train_utils import convert_batch_to_numpy_identity
+from .tta import TTA_REDUCTIONS
 from ..utils.config import LookupConfig
 
 logger = logging.getLogger(__name__)
@@ -48,7 +49,10 @@ class Predictor(object):
             tensor-type and pushing it to correct device, default: identity
             function
         **kwargs :
-            additional keyword arguments
+            additional keyword arguments; test-time augmentation is
+            configured by ``tta_transforms``, ``tta_reduction``,
+            ``tta_spatial_keys`` and ``tta_max_batch_size`` (see
+            :meth:`Predictor._setup`)
 
         """
 
@@ -58,7 +62,8 @@ class Predictor(object):
         self._tqdm_desc = "Test"
 
     def _setup(self, network, key_mapping, convert_batch_args_kwargs_to_npy_fn,
-               prepare_batch_fn, **kwargs):
+               prepare_batch_fn, tta_transforms=None, tta_reduction="mean",
+               tta_spatial_keys=None, tta_max_batch_size=None, **kwargs):
         """
 
         Parameters
@@ -78,6 +83,25 @@ class Predictor(object):
             function converting a batch-tensor to the framework specific
             tensor-type and pushing it to correct device, default: identity
             function
+        tta_transforms : list or None
+            the test-time augmentations (e.g. from
+            :mod:`delira.training.tta`) applied to the model's inputs; the
+            augmented views of each batch are predicted by a single forward
+            pass and merged afterwards. If None: no test-time augmentation
+            is applied
+        tta_reduction : str or function
+            the reduction merging the predictions of all views (one of
+            'mean', 'median', 'max' and 'min' or a function reducing the
+            first axis of an array)
+        tta_spatial_keys : list or None
+            the keys of spatial predictions (e.g. segmentations), which the
+            inverse transforms are applied to before merging; if None:
+            all predictions with the spatial shape of the augmented inputs
+            are treated as spatial
+        tta_max_batch_size : int or None
+            the maximum number of samples per forward pass (limits the
+            memory consumption by splitting the views into multiple
+            forward passes); if None: all views are predicted at once
 
         """
         self.module = network
@@ -85,6 +109,14 @@ class Predictor(object):
         self._convert_to_npy_fn = convert_batch_args_kwargs_to_npy_fn
         self._prepare_batch = prepare_batch_fn
 
+        if isinstance(tta_reduction, str):
+            tta_reduction = TTA_REDUCTIONS[tta_reduction]
+
+        self.tta_transforms = tta_transforms
+        self.tta_reduction = tta_reduction
+        self.tta_spatial_keys = tta_spatial_keys
+        self.tta_max_batch_size = tta_max_batch_size
+
     def __call__(self, data: dict, **kwargs):
         """
         Method to call the class.
@@ -109,6 +141,28 @@ class Predictor(object):
         Returns the predictions corresponding to the given data
         obtained by the model
 
+        Parameters
+        ----------
+        data : dict
+            batch dictionary
+        **kwargs :
+            keyword arguments(directly passed to ``prepare_batch``)
+
+        Returns
+        -------
+        dict
+            predicted data
+
+        """
+        if self.tta_transforms:
+            return self._predict_tta(data, **kwargs)
+
+        return self._predict_batch(data, **kwargs)
+
+    def _predict_batch(self, data: dict, **kwargs):
+        """
+        Predicts a single batch without test-time augmentation
+
         Parameters
         ----------
         data : dict
@@ -138,6 +192,166 @@ class Predictor(object):
             **pred
         )[1]
 
+    def _predict_tta(self, data: dict, **kwargs):
+        """
+        Predicts a single batch with test-time augmentation. All augmented
+        views of the same shape are stacked along the batch dimension and
+        predicted by as few forward passes as ``tta_max_batch_size`` allows
+        (views of different shapes, e.g. rotations of non-square inputs, are
+        predicted separately). Afterwards, the spatial transforms are
+        inverted on the spatial predictions and the predictions of all views
+        are merged
+
+        Parameters
+        ----------
+        data : dict
+            batch dictionary
+        **kwargs :
+            keyword arguments(directly passed to ``prepare_batch``)
+
+        Returns
+        -------
+        dict
+            merged predictions
+
+        """
+        transforms = self.tta_transforms
+        input_keys = set(self.key_mapping.values())
+        batch_size = len(data[next(iter(input_keys))])
+
+        views = [{key: trafo(data[key]) for key in input_keys}
+                 for trafo in transforms]
+
+        # group the views by the shapes of their inputs (keeping the order)
+        groups = {}
+        for idx, view in enumerate(views):
+            shapes = tuple(view[key].shape for key in sorted(input_keys))
+            groups.setdefault(shapes, []).append(idx)
+
+        views_per_pass = len(transforms)
+        if self.tta_max_batch_size is not None:
+            views_per_pass = min(views_per_pass, max(
+                1, self.tta_max_batch_size // batch_size))
+
+        view_preds = [None] * len(transforms)
+        for indices in groups.values():
+            for start in range(0, len(indices), views_per_pass):
+                _indices = indices[start:start + views_per_pass]
+
+                view_batch = {}
+                for key, val in data.items():
+                    if key in input_keys:
+                        view_batch[key] = np.concatenate(
+                            [views[idx][key] for idx in _indices])
+                    elif isinstance(val, np.ndarray) and val.ndim \
+                            and len(val) == batch_size:
+                        # repeat all other per-sample entries (e.g. labels)
+                        view_batch[key] = np.concatenate(
+                            [val] * len(_indices))
+                    else:
+                        view_batch[key] = val
+
+                preds = self._split_views(
+                    self._predict_batch(view_batch, **kwargs),
+                    len(_indices), batch_size)
+                for idx, _preds in zip(_indices, preds):
+                    view_preds[idx] = _preds
+
+        view_shapes = [views[idx][next(iter(input_keys))].shape
+                       for idx in range(len(transforms))]
+        return self._merge_views(view_preds, transforms, batch_size,
+                                 view_shapes)
+
+    @staticmethod
+    def _split_views(preds, n_views, batch_size):
+        """
+        Splits the predictions of a single forward pass into the
+        predictions of the single views
+
+        Parameters
+        ----------
+        preds : dict
+            the predictions of the forward pass
+        n_views : int
+            the number of views stacked in this forward pass
+        batch_size : int
+            the number of samples of the original batch
+
+        Returns
+        -------
+        list of dict
+            the predictions of each view; values which are not per-sample
+            are shared between all views
+
+        """
+        split = [{} for _ in range(n_views)]
+        for key, val in preds.items():
+            if isinstance(val, dict):
+                vals = Predictor._split_views(val, n_views, batch_size)
+            elif isinstance(val, np.ndarray) and val.ndim \
+                    and len(val) == n_views * batch_size:
+                vals = np.split(val, n_views)
+            else:
+                vals = [val] * n_views
+
+            for _split, _val in zip(split, vals):
+                _split[key] = _val
+
+        return split
+
+    def _merge_views(self, preds, transforms, batch_size, view_shapes):
+        """
+        Inverts the spatial transforms and reduces the predictions of all
+        views
+
+        Parameters
+        ----------
+        preds : list of dict
+            the predictions of each view
+        transforms : list
+            the test-time augmentations
+        batch_size : int
+            the number of samples of the original batch
+        view_shapes : list of tuple
+            the shapes of the augmented inputs of each view
+
+        Returns
+        -------
+        dict
+            merged predictions
+
+        """
+        merged = {}
+        for key, val in preds[0].items():
+            if isinstance(val, dict):
+                merged[key] = self._merge_views(
+                    [_preds[key] for _preds in preds], transforms,
+                    batch_size, view_shapes)
+                continue
+
+            if not isinstance(val, np.ndarray) or not val.ndim \
+                    or len(val) != batch_size:
+                merged[key] = val
+                continue
+
+            views = [_preds[key] for _preds in preds]
+
+            if self.tta_spatial_keys is None:
+                is_spatial = all(
+                    view.ndim == len(shape) and view.shape[2:] == shape[2:]
+                    for view, shape in zip(views, view_shapes))
+            else:
+                is_spatial = key in self.tta_spatial_keys
+
+            if is_spatial:
+                views = [trafo.invert(view)
+                         for trafo, view in zip(transforms, views)]
+
+            # (n_views, batch_size, ...)
+            merged[key] = self.tta_reduction(np.stack(views))
+
+        return merged
+
     def predict_data_mgr(self, datamgr, batchsize=None, metrics=None,
                          metric_keys=None, verbose=False, **kwargs):
         """
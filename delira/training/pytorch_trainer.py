@@ -1,3 +1,4 @@
+import inspect
 import logging
 import os
 import warnings
@@ -16,6 +17,7 @@ if "TORCH" in get_backends():
     from .train_utils import create_optims_default_pytorch as \
         create_optims_default
 
+    from ..io.manifest import CheckpointManifest
     from ..io.torch import load_checkpoint, save_checkpoint
     from ..models import AbstractPyTorchNetwork
 
@@ -54,6 +56,12 @@ if "TORCH" in get_backends():
                      mixed_precision_kwargs=None,
                      criterions=None,
                      val_freq=1,
+                     step_save_freq=None,
+                     distributed=False,
+                     world_size=1,
+                     rank=0,
+                     dist_backend=None,
+                     dist_init_method="env://",
                      ** kwargs):
             """
 
@@ -122,11 +130,46 @@ if "TORCH" in get_backends():
                 trained model (a value of 1 denotes validating every epoch,
                 a value of 2 denotes validating every second epoch etc.);
                 defaults to 1
+            step_save_freq : int or None
+                integer specifying how often (in batches) to save a
+                step-level checkpoint (containing the model, the optimizers,
+                the sampler's position, the random number generator states and
+                the metrics of the current epoch), which allows to resume
+                training in the middle of an epoch; if None: no step-level
+                checkpoints are saved
+            distributed : bool
+                whether to train with
+                :class:`torch.nn.parallel.DistributedDataParallel` (one
+                process per device); if True, the process group is
+                initialized (if not done yet), the data managers are sharded
+                across all processes, the metrics are averaged across all
+                processes and only the process with rank 0 saves checkpoints
+                and logs values; default: False
+            world_size : int
+                the total number of processes (only used if ``distributed``)
+            rank : int
+                the rank of the current process (only used if
+                ``distributed``)
+            dist_backend : str or None
+                the backend of the process group; if None: 'nccl' is used for
+                GPU training and 'gloo' for CPU-only training
+            dist_init_method : str
+                URL specifying how to initialize the process group
+                (see :func:`torch.distributed.init_process_group`)
             **kwargs :
                 additional keyword arguments
 
             """
 
+            if distributed and not 0 <= rank < world_size:
+                raise ValueError("Invalid rank %d. Rank must be in range "
+                                 "[0, %d)" % (rank, world_size))
+
+            # must be set before initializing the logging
+            self.distributed = distributed
+            self.world_size = world_size if distributed else 1
+            self.rank = rank if distributed else 0
+
             if optimizer_params is None:
                 optimizer_params = {}
             if train_metrics is None:
@@ -167,12 +210,14 @@ if "TORCH" in get_backends():
                 train_metrics, val_metrics, lr_scheduler_cls,
                 lr_scheduler_params, gpu_ids, save_freq, optim_fn, key_mapping,
                 logging_type, logging_kwargs, fold, callbacks, start_epoch,
-                metric_keys, convert_batch_to_npy_fn, val_freq)
+                metric_keys, convert_batch_to_npy_fn, val_freq,
+                step_save_freq=step_save_freq)
 
             self._setup(network, optim_fn, optimizer_cls, optimizer_params,
                         lr_scheduler_cls, lr_scheduler_params, gpu_ids,
                         key_mapping, convert_batch_to_npy_fn,
-                        mixed_precision, mixed_precision_kwargs)
+                        mixed_precision, mixed_precision_kwargs,
+                        dist_backend, dist_init_method)
 
             for key, val in kwargs.items():
                 setattr(self, key, val)
@@ -180,7 +225,8 @@ if "TORCH" in get_backends():
         def _setup(self, network, optim_fn, optimizer_cls, optimizer_params,
                    lr_scheduler_cls, lr_scheduler_params, gpu_ids,
                    key_mapping, convert_batch_to_npy_fn, mixed_precision,
-                   mixed_precision_kwargs):
+                   mixed_precision_kwargs, dist_backend=None,
+                   dist_init_method="env://"):
             """
             Defines the Trainers Setup
 
@@ -206,6 +252,13 @@ if "TORCH" in get_backends():
                 whether to use mixed precision or not (False per default)
             mixed_precision_kwargs : dict
                 additional keyword arguments for mixed precision
+            dist_backend : str or None
+                the backend of the process group (only used for distributed
+                training); if None: 'nccl' is used for GPU training and
+                'gloo' for CPU-only training
+            dist_init_method : str
+                URL specifying how to initialize the process group (only used
+                for distributed training)
 
             """
 
@@ -235,16 +288,25 @@ if "TORCH" in get_backends():
                 v, num_loss=len(self.losses)) for k, v
                 in self.optimizers.items()}
 
+            self._manifest = CheckpointManifest(self.save_path)
+
             # Load latest epoch file if available
             if os.path.isdir(self.save_path):
                 latest_state_path, latest_epoch = self._search_for_prev_state(
-                    self.save_path, [".pt", ".pth"])
+                    self.save_path, [".pt", ".pth"], verify=True)
 
                 if latest_state_path is not None:
+                    latest_state_path = os.path.join(self.save_path,
+                                                     latest_state_path)
 
-                    # if pth file does not exist, load pt file instead
-                    if not os.path.isfile(latest_state_path):
-                        latest_state_path = latest_state_path[:-1]
+                # a step-level checkpoint only exists, if it is more recent
+                # than all epoch checkpoints
+                step_state_path = os.path.join(self.save_path,
+                                               "checkpoint_step.pt")
+                if os.path.isfile(step_state_path):
+                    latest_state_path = step_state_path
+
+                if latest_state_path is not None:
 
                     logger.info("Attempting to load state from previous \
                                 training from %s" % latest_state_path)
@@ -255,7 +317,11 @@ if "TORCH" in get_backends():
                                     although it exists.Training will be \
                                     restarted")
 
-            if gpu_ids and torch.cuda.is_available():
+            if self.distributed:
+                self._setup_distributed(gpu_ids, dist_backend,
+                                        dist_init_method)
+
+            elif gpu_ids and torch.cuda.is_available():
                 self.use_gpu = True
                 if (len(gpu_ids) > 1) and (torch.cuda.device_count() > 1):
                     # use GPU 0 as default input GPU
@@ -265,10 +331,11 @@ if "TORCH" in get_backends():
                     self.module = torch.nn.DataParallel(self.module.to(
                         self.input_device),
                         device_ids=gpu_ids,
-                        output_device=gpu_ids[1])
+                        output_device=gpu_ids[0])
 
-                    # use GPU 1 as default output GPU for balanced GPU usage
-                    self.output_device = torch.device("cuda:%d" % gpu_ids[1])
+                    # outputs are gathered on GPU 0, so the labels must be
+                    # pushed there as well
+                    self.output_device = torch.device("cuda:%d" % gpu_ids[0])
                 else:
                     # use the only available GPU as input device
                     self.input_device = torch.device("cuda:%d" % gpu_ids[0])
@@ -286,6 +353,146 @@ if "TORCH" in get_backends():
                 self._prepare_batch, input_device=self.input_device,
                 output_device=self.output_device)
 
+        def _setup_distributed(self, gpu_ids, dist_backend, dist_init_method):
+            """
+            Initializes the process group (if necessary) and wraps the
+            network into :class:`torch.nn.parallel.DistributedDataParallel`
+            using a single device per process
+
+            Parameters
+            ----------
+            gpu_ids : list
+                list containing ids of GPUs to use; the process with rank
+                ``r`` uses the GPU ``gpu_ids[r % len(gpu_ids)]``; if empty:
+                use cpu instead
+            dist_backend : str or None
+                the backend of the process group; if None: 'nccl' is used for
+                GPU training and 'gloo' for CPU-only training
+            dist_init_method : str
+                URL specifying how to initialize the process group
+
+            """
+            self.use_gpu = bool(gpu_ids) and torch.cuda.is_available()
+
+            if dist_backend is None:
+                dist_backend = "nccl" if self.use_gpu else "gloo"
+
+            if not torch.distributed.is_initialized():
+                torch.distributed.init_process_group(
+                    dist_backend, init_method=dist_init_method,
+                    world_size=self.world_size, rank=self.rank)
+
+            if self.use_gpu:
+                device_id = gpu_ids[self.rank % len(gpu_ids)]
+                torch.cuda.set_device(device_id)
+                self.input_device = torch.device("cuda:%d" % device_id)
+                self.module = torch.nn.parallel.DistributedDataParallel(
+                    self.module.to(self.input_device), device_ids=[device_id],
+                    output_device=device_id)
+            else:
+                self.input_device = torch.device("cpu")
+                self.module = torch.nn.parallel.DistributedDataParallel(
+                    self.module.to(self.input_device))
+
+            self.output_device = self.input_device
+
+        @property
+        def is_main_process(self):
+            """
+            Whether the current process is the main process (the only process
+            allowed to save checkpoints and to log values)
+
+            Returns
+            -------
+            bool
+                True if not training distributed or if the rank of the
+                current process is 0
+
+            """
+            return not self.distributed or self.rank == 0
+
+        def _reduce_metrics_across_processes(self, metrics, weight=None):
+            """
+            Averages the (already reduced) epoch metrics across all processes
+            with a single all-reduce operation
+
+            Parameters
+            ----------
+            metrics : dict
+                the metrics of the current process
+            weight : int or None
+                the weight of the current process' metrics (e.g. the number
+                of samples they were computed on); if None: all processes
+                are weighted equally
+
+            Returns
+            -------
+            dict
+                the averaged metrics (same on all processes)
+
+            """
+            if not self.distributed or not metrics:
+                return metrics
+
+            if weight is None:
+                weight = 1
+
+            # the total weight is reduced together with the weighted metrics
+            keys = sorted(metrics.keys())
+            values = [float(metrics[k]) * weight for k in keys]
+            values.append(float(weight))
+            values = torch.tensor(values, dtype=torch.float64,
+                                  device=self.input_device)
+            torch.distributed.all_reduce(values)
+            values = (values[:-1] / values[-1]).tolist()
+
+            return dict(zip(keys, values))
+
+        def train(self, num_epochs, datamgr_train, datamgr_valid=None,
+                  val_score_key=None, val_score_mode='highest',
+                  reduce_mode='mean', verbose=True):
+            """
+            Defines a routine to train a specified number of epochs. For
+            distributed training, the data managers are sharded across all
+            processes before
+
+            Parameters
+            ----------
+            num_epochs : int
+                number of epochs to train
+            datamgr_train : DataManager
+                the datamanager holding the train data
+            datamgr_valid : DataManager
+                the datamanager holding the validation data (default: None)
+            val_score_key : str
+                the key specifying which metric to use for validation
+                (default: None)
+            val_score_mode : str
+                key specifying what kind of validation score is best
+            reduce_mode : str
+                'mean','sum','first_only'
+            verbose : bool
+                whether to show progress bars or not (only done by the main
+                process)
+
+            Returns
+            -------
+            :class:`AbstractPyTorchNetwork`
+                the trained network
+
+            """
+            if self.distributed:
+                datamgr_train = datamgr_train.shard(self.world_size,
+                                                    self.rank)
+                # validation samples must be evaluated exactly once
+                if datamgr_valid is not None:
+                    datamgr_valid = datamgr_valid.shard(self.world_size,
+                                                        self.rank, pad=False)
+
+            return super().train(num_epochs, datamgr_train, datamgr_valid,
+                                 val_score_key, val_score_mode, reduce_mode,
+                                 verbose and self.is_main_process)
+
         def _at_training_begin(self, *args, **kwargs):
             """
             Defines behaviour at beginning of training
@@ -298,8 +505,86 @@ if "TORCH" in get_backends():
                 keyword arguments
 
             """
-            self.save_state(os.path.join(
-                self.save_path, "checkpoint_epoch_0"), 0)
+            self._save_indexed_state(os.path.join(
+                self.save_path, "checkpoint_epoch_0.pt"), 0)
+
+        def _save_indexed_state(self, file_name, epoch, val_score=None,
+                                is_best=False):
+            """
+            Saves the current state and adds it to the checkpoint manifest
+
+            Parameters
+            ----------
+            file_name : str
+                filename to save the state to
+            epoch : int
+                current epoch
+            val_score : float or None
+                the current validation score
+            is_best : bool
+                whether the state is the best state so far
+
+            """
+            checksum = self.save_state(file_name, epoch)
+
+            if self.is_main_process:
+                self._manifest.add(file_name, epoch, val_score=val_score,
+                                   checksum=checksum, is_best=is_best)
+
+        def _get_rng_states(self):
+            """
+            Returns the states of all random number generators used in the
+            main process
+
+            Returns
+            -------
+            dict
+                the states of python's, numpy's and torch's random number
+                generators
+
+            """
+            states = super()._get_rng_states()
+            states["torch"] = torch.get_rng_state()
+            if torch.cuda.is_available():
+                states["cuda"] = torch.cuda.get_rng_state_all()
+
+            return states
+
+        def _set_rng_states(self, states):
+            """
+            Restores the states of all random number generators used in the
+            main process
+
+            Parameters
+            ----------
+            states : dict
+                the states obtained by :meth:`_get_rng_states`
+
+            """
+            super()._set_rng_states(states)
+            torch.set_rng_state(states["torch"])
+            if "cuda" in states and torch.cuda.is_available():
+                torch.cuda.set_rng_state_all(states["cuda"])
+
+        def _save_step_state(self, epoch, step_state):
+            """
+            Saves a step-level checkpoint, which will be overwritten by the
+            next step-level checkpoint and removed after saving the next
+            epoch checkpoint
+
+            Parameters
+            ----------
+            epoch : int
+                current epoch
+            step_state : dict
+                the state of the current epoch (batch number, sampler state,
+                random number generator states and metric accumulators)
+
+            """
+            # the checkpoint's epoch denotes the last completed epoch
+            self.save_state(os.path.join(self.save_path,
+                                         "checkpoint_step.pt"),
+                            epoch - 1, step_state=step_state)
 
         def _at_training_end(self):
             """
@@ -312,12 +597,25 @@ if "TORCH" in get_backends():
                 best network
 
             """
-            if os.path.isfile(os.path.join(self.save_path,
-                                           'checkpoint_best.pt')):
+            # wait for the main process to finish writing its checkpoints
+            if self.distributed:
+                torch.distributed.barrier()
+
+            if self._manifest.load():
+                best_entry = self._manifest.best()
+                best_state_path = None
+                if best_entry is not None:
+                    best_state_path = os.path.join(self.save_path,
+                                                   best_entry["file"])
+            else:
+                best_state_path = os.path.join(self.save_path,
+                                               'checkpoint_best.pt')
+                if not os.path.isfile(best_state_path):
+                    best_state_path = None
 
+            if best_state_path is not None:
                 # load best model and return it
-                self.update_state(os.path.join(self.save_path,
-                                               'checkpoint_best.pt'))
+                self.update_state(best_state_path)
 
             return self.module
 
@@ -353,15 +651,26 @@ if "TORCH" in get_backends():
                         val_score_key=val_score_key,
                         curr_epoch=epoch))
 
+            val_score = None
+            if val_score_key is not None:
+                val_score = metrics_val.get(val_score_key)
+
             if epoch % self.save_freq == 0:
-                self.save_state(os.path.join(self.save_path,
-                                             "checkpoint_epoch_%d.pt" % epoch),
-                                epoch)
+                self._save_indexed_state(
+                    os.path.join(self.save_path,
+                                 "checkpoint_epoch_%d.pt" % epoch),
+                    epoch, val_score)
+
+                # the epoch checkpoint supersedes the step-level checkpoint
+                step_state_path = os.path.join(self.save_path,
+                                               "checkpoint_step.pt")
+                if self.is_main_process and os.path.isfile(step_state_path):
+                    os.remove(step_state_path)
 
             if is_best:
-                self.save_state(os.path.join(self.save_path,
-                                             "checkpoint_best.pt"),
-                                epoch)
+                self._save_indexed_state(
+                    os.path.join(self.save_path, "checkpoint_best.pt"),
+                    epoch, val_score, is_best=True)
 
         def _train_single_epoch(self, batchgen: MultiThreadedAugmenter, epoch,
                                 verbose=False):
@@ -433,11 +742,20 @@ if "TORCH" in get_backends():
             **kwargs :
                 keyword arguments
 
+            Returns
+            -------
+            str or None
+                the checksum of the saved file (None if not saved by the
+                current process)
+
             """
+            if not self.is_main_process:
+                return None
+
             if not (file_name.endswith(".pth") or file_name.endswith(".pt")):
                 file_name = file_name + ".pt"
-            save_checkpoint(file_name, self.module, self.optimizers,
-                            **kwargs)
+            return save_checkpoint(file_name, self.module, self.optimizers,
+                                   epoch, **kwargs)
 
         @staticmethod
         def load_state(file_name, **kwargs):
@@ -461,6 +779,10 @@ if "TORCH" in get_backends():
             if not (file_name.endswith(".pth") or file_name.endswith(".pt")):
                 file_name = file_name + ".pt"
 
+            # checkpoints may contain the (non-tensor) training state
+            if "weights_only" in inspect.signature(torch.load).parameters:
+                kwargs.setdefault("weights_only", False)
+
             return load_checkpoint(file_name, **kwargs)
 
         def update_state(self, file_name, *args, **kwargs):
@@ -501,7 +823,14 @@ if "TORCH" in get_backends():
             """
 
             if "model" in new_state:
-                self.module.load_state_dict(new_state.pop("model"))
+                # checkpoints always contain the state of the unwrapped
+                # network
+                module = self.module
+                if isinstance(module, (
+                        torch.nn.DataParallel,
+                        torch.nn.parallel.DistributedDataParallel)):
+                    module = module.module
+                module.load_state_dict(new_state.pop("model"))
 
             if "optimizer" in new_state and new_state["optimizer"]:
                 optim_state = new_state.pop("optimizer")
@@ -510,6 +839,10 @@ if "TORCH" in get_backends():
                         optim_state[key])
 
             if "epoch" in new_state:
-                self.start_epoch = new_state.pop("epoch")
+                # continue after the last completed epoch
+                self.start_epoch = new_state.pop("epoch") + 1
+
+            if new_state.get("step_state") is not None:
+                self._resume_step_state = new_state.pop("step_state")
 
             return super()._update_state(new_state)
@@ -0,0 +1,226 @@
+import copy
+import logging
+from functools import partial
+
+import numpy as np
+
+from delira import get_backends
+from .predictor import Predictor
+
+logger = logging.getLogger(__name__)
+
+if "TORCH" in get_backends():
+    import torch
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    from .train_utils import convert_torch_tensor_to_npy
+
+    def _unwrap(model):
+        """
+        Removes a (distributed) data parallel wrapper and moves a copy of
+        the model to the CPU in eval mode
+
+        """
+        if isinstance(model, (torch.nn.DataParallel,
+                              torch.nn.parallel.DistributedDataParallel)):
+            model = model.module
+
+        return copy.deepcopy(model).cpu().eval()
+
+    def _model_inputs(batch, key_mapping, prepare_batch_fn):
+        """
+        Converts a batch to the model's keyword arguments
+
+        """
+        batch = prepare_batch_fn(batch)
+        return {key: batch[val] for key, val in key_mapping.items()}
+
+    def quantize_dynamic(model, module_types=None, dtype=None):
+        """
+        Creates a copy of the model with dynamically quantized weights. The
+        activations are quantized on the fly, which does not require any
+        calibration, but only speeds up linear and recurrent layers.
+
+        Parameters
+        ----------
+        model : :class:`AbstractPyTorchNetwork`
+            the model to quantize (is not modified)
+        module_types : set or None
+            the module types to quantize; if None: linear, LSTM and GRU
+            layers will be quantized
+        dtype : :class:`torch.dtype` or None
+            the dtype of the quantized weights; if None: int8 will be used
+
+        Returns
+        -------
+        :class:`AbstractPyTorchNetwork`
+            the quantized model
+
+        """
+        if module_types is None:
+            module_types = {torch.nn.Linear, torch.nn.LSTM, torch.nn.GRU}
+        if dtype is None:
+            dtype = torch.qint8
+
+        return torch.ao.quantization.quantize_dynamic(
+            _unwrap(model), module_types, dtype=dtype)
+
+    def quantize_static(model, datamgr, key_mapping, prepare_batch_fn=None,
+                        num_batches=None, backend="x86"):
+        """
+        Creates a copy of the model with int8 weights and activations. The
+        quantization ranges of the activations are calibrated on
+        representative samples.
+
+        Parameters
+        ----------
+        model : :class:`AbstractPyTorchNetwork`
+            the model to quantize (is not modified); the model is traced by
+            ``torch.fx``, so its ``forward`` must not contain data dependent
+            control flow
+        datamgr : :class:`BaseDataManager`
+            manager producing the representative batches to calibrate on
+        key_mapping : dict
+            a dictionary containing the mapping from the ``data_dict`` to
+            the actual model's inputs (e.g. ``{'x': 'data'}``)
+        prepare_batch_fn : function or None
+            function converting a batch to tensors; if None: the model's
+            ``prepare_batch`` will be used (on the CPU)
+        num_batches : int or None
+            the maximum number of batches to calibrate on; if None: all
+            batches will be used
+        backend : str
+            the quantized engine to target (e.g. 'x86' or 'qnnpack'); it is
+            only set during calibration, so a different engine has to be
+            set (via ``torch.backends.quantized.engine``) before running the
+            quantized model as well
+
+        Returns
+        -------
+        :class:`torch.fx.GraphModule`
+            the quantized model; it accepts the same inputs and returns the
+            same outputs as the original model and can be passed to a
+            :class:`Predictor` or exported by
+            :func:`delira.io.torch.export_torchscript`
+
+        """
+        if prepare_batch_fn is None:
+            prepare_batch_fn = partial(model.prepare_batch,
+                                       input_device=torch.device("cpu"),
+                                       output_device=torch.device("cpu"))
+
+        model = _unwrap(model)
+
+        # the quantized engine is a global setting, which is only changed
+        # during calibration
+        prev_engine = torch.backends.quantized.engine
+        torch.backends.quantized.engine = backend
+
+        # calibrating on a part of the data must not change the position of
+        # the (shared) sampler
+        sampler_state = datamgr.sampler.state_dict()
+
+        batchgen = datamgr.get_batchgen()
+        try:
+            prepared = None
+            with torch.no_grad():
+                for batch_nr, batch in enumerate(batchgen):
+                    if num_batches is not None and batch_nr >= num_batches:
+                        break
+
+                    inputs = _model_inputs(batch, key_mapping,
+                                           prepare_batch_fn)
+
+                    # the observers are inserted while tracing the first
+                    # batch
+                    if prepared is None:
+                        prepared = prepare_fx(
+                            model, get_default_qconfig_mapping(backend),
+                            tuple(inputs.values()))
+
+                    prepared(**inputs)
+        finally:
+            batchgen._finish()
+            datamgr.sampler.load_state_dict(sampler_state)
+            torch.backends.quantized.engine = prev_engine
+
+        if prepared is None:
+            raise ValueError("The data manager did not yield any batches "
+                             "to calibrate on")
+
+        return convert_fx(prepared)
+
+    def compare_quantized(model, quantized_model, datamgr, key_mapping,
+                          metrics, metric_keys=None, prepare_batch_fn=None):
+        """
+        Evaluates the original and the quantized model on the same data and
+        reports the metrics of both
+
+        Parameters
+        ----------
+        model : :class:`AbstractPyTorchNetwork`
+            the original model
+        quantized_model : :class:`torch.nn.Module`
+            the quantized model
+        datamgr : :class:`BaseDataManager`
+            manager producing the batches to evaluate on
+        key_mapping : dict
+            a dictionary containing the mapping from the ``data_dict`` to
+            the actual model's inputs (e.g. ``{'x': 'data'}``)
+        metrics : dict
+            the metrics to calculate (e.g. from
+            :mod:`delira.training.metrics`)
+        metric_keys : dict
+            the ``batch_dict`` items to use for metric calculation
+        prepare_batch_fn : function or None
+            function converting a batch to tensors; if None: the model's
+            ``prepare_batch`` will be used (on the CPU)
+
+        Returns
+        -------
+        dict
+            for each metric: the mean value of the original model
+            ('float'), of the quantized model ('quantized') and their
+            difference ('delta'); additionally the maximum absolute
+            difference of each prediction is contained in
+            'max_abs_difference'
+
+        """
+        if prepare_batch_fn is None:
+            prepare_batch_fn = partial(model.prepare_batch,
+                                       input_device=torch.device("cpu"),
+                                       output_device=torch.device("cpu"))
+
+        results = []
+        for _model in (_unwrap(model), quantized_model):
+            predictor = Predictor(_model, key_mapping,
+                                  convert_torch_tensor_to_npy,
+                                  prepare_batch_fn)
+
+            with torch.no_grad():
+                preds, metric_vals = next(
+                    predictor.predict_data_mgr_cache_all(
+                        datamgr, metrics=metrics, metric_keys=metric_keys))
+
+            mean_metrics = {key: float(np.mean(val))
+                            for key, val in metric_vals.items()}
+            results.append((mean_metrics, preds))
+
+        (float_metrics, float_preds), (quant_metrics, quant_preds) = results
+
+        report = {key: {"float": float_metrics[key],
+                        "quantized": quant_metrics[key],
+                        "delta": quant_metrics[key] - float_metrics[key]}
+                  for key in float_metrics}
+
+        report["max_abs_difference"] = {
+            key: float(np.abs(quant_preds[key] - float_preds[key]).max())
+            for key in float_preds if key in quant_preds}
+
+        for key, val in report.items():
+            if key != "max_abs_difference":
+                logger.info("%s: %f (float) vs. %f (quantized)"
+                            % (key, val["float"], val["quantized"]))
+
+        return report
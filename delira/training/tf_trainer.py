@@ -1,6 +1,7 @@
 import logging
 import os
 
+import tensorflow as tf
 from batchgenerators.dataloading import MultiThreadedAugmenter
 
 from .base_trainer import BaseNetworkTrainer
@@ -44,6 +45,8 @@ class TfNetworkTrainer(BaseNetworkTrainer):
                  metric_keys=None,
                  convert_batch_to_npy_fn=convert_tf_tensor_to_npy,
                  val_freq=1,
+                 use_input_pipeline=True,
+                 prefetch_batches=2,
                  **kwargs
                  ):
         """
@@ -107,6 +110,14 @@ class TfNetworkTrainer(BaseNetworkTrainer):
             model (a value of 1 denotes validating every epoch,
             a value of 2 denotes validating every second epoch etc.);
             defaults to 1
+        use_input_pipeline : bool
+            whether to pass the training batches to the network by a
+            prefetching :class:`tf.data.Dataset` instead of feeding them at
+            each step. Only used if the network's inputs were created by
+            :meth:`AbstractTfNetwork._add_inputs`, otherwise the batches are
+            always fed.
+        prefetch_batches : int
+            the number of batches to prefetch by the input pipeline
         **kwargs :
             Additional keyword arguments
 
@@ -134,6 +145,11 @@ class TfNetworkTrainer(BaseNetworkTrainer):
             logging_kwargs, fold, callbacks, start_epoch, metric_keys,
             convert_batch_to_npy_fn, val_freq)
 
+        self.use_input_pipeline = use_input_pipeline
+        self.prefetch_batches = prefetch_batches
+        self._pipeline_batchgen = None
+        self._pipeline_init_op = None
+
         self._setup(network, optim_fn, optimizer_cls, optimizer_params,
                     lr_scheduler_cls, lr_scheduler_params,
                     key_mapping, convert_batch_to_npy_fn, gpu_ids)
@@ -260,7 +276,55 @@ class TfNetworkTrainer(BaseNetworkTrainer):
         """
         self.module.training = True
 
-        return super()._train_single_epoch(batchgen, epoch, verbose=verbose)
+        if not self.use_input_pipeline or self.module.input_structure is None:
+            return super()._train_single_epoch(batchgen, epoch,
+                                               verbose=verbose)
+
+        # the dataset is created only once and re-initialized with the
+        # current batchgen in each epoch
+        if self._pipeline_init_op is None:
+            types, shapes = self.module.input_structure
+            dataset = tf.data.Dataset.from_generator(
+                self._generate_pipeline_batches, types, shapes)
+            self._pipeline_init_op = self.module.init_input_pipeline(
+                dataset.prefetch(self.prefetch_batches))
+
+        self._pipeline_batchgen = batchgen
+        try:
+            self.module._sess.run(self._pipeline_init_op)
+            return super()._train_single_epoch(
+                _InputPipelineSteps(batchgen, self.module), epoch,
+                verbose=verbose)
+        finally:
+            self._pipeline_batchgen = None
+
+    def _generate_pipeline_batches(self):
+        """
+        Generator passing the batches of the current epoch to the input
+        pipeline. Each batch is marked whether it is the last one, to stop
+        the training loop without exhausting the pipeline
+
+        Yields
+        ------
+        dict
+            the batch's entries needed by the network
+
+        """
+        last_key = self.module.LAST_BATCH_KEY
+        keys = [key for key in self.module.input_structure[0]
+                if key != last_key]
+
+        batches = iter(self._pipeline_batchgen)
+        try:
+            batch = next(batches)
+        except StopIteration:
+            return
+
+        for next_batch in batches:
+            yield {last_key: False, **{key: batch[key] for key in keys}}
+            batch = next_batch
+
+        yield {last_key: True, **{key: batch[key] for key in keys}}
 
     def predict_data_mgr(self, datamgr, batch_size=None, metrics=None,
                          metric_keys=None, verbose=False, **kwargs):
@@ -317,3 +381,43 @@ class TfNetworkTrainer(BaseNetworkTrainer):
 
         """
         return tf_load_checkpoint(file_name, self.module)
+
+
+class _InputPipelineSteps(object):
+    """
+    Replaces the batchgen inside the training loop, if the batches are
+    passed to the network by its input pipeline: yields an empty batch (to
+    make the closure take the batch from the pipeline) until the network
+    fetched the last batch
+
+    """
+
+    def __init__(self, batchgen, network):
+        """
+
+        Parameters
+        ----------
+        batchgen : :class:`Augmenter`
+            the batchgen feeding the input pipeline
+        network : :class:`AbstractTfNetwork`
+            the network to train
+
+        """
+        self._batchgen = batchgen
+        self._network = network
+
+    def __iter__(self):
+        self._network.last_batch_fetched = False
+        while not self._network.last_batch_fetched:
+            yield {}
+
+    @property
+    def num_batches(self):
+        return self._batchgen.num_batches
+
+    @property
+    def sampler(self):
+        return self._batchgen.sampler
+
+    def _finish(self):
+        self._batchgen._finish()
@@ -0,0 +1,134 @@
+import logging
+
+import numpy as np
+
+from delira import get_backends
+from .predictor import Predictor
+
+logger = logging.getLogger(__name__)
+
+if "TORCH" in get_backends():
+    import torch
+    from .train_utils import convert_torch_tensor_to_npy
+    from ..io.torch import load_torchscript
+
+    class TorchScriptPredictor(Predictor):
+        """
+        Predictor running a model exported by
+        :func:`delira.io.torch.export_torchscript`. The model is optimized
+        for inference (e.g. by fusing operators) and runs in inference mode,
+        which neither requires the model's source code nor the training
+        stack.
+
+        See Also
+        --------
+        :class:`Predictor`
+
+        """
+
+        def __init__(self, file, key_mapping=None, device="cpu",
+                     optimize=True, num_threads=None,
+                     convert_batch_to_npy_fn=convert_torch_tensor_to_npy,
+                     **kwargs):
+            """
+
+            Parameters
+            ----------
+            file : str
+                filepath to the exported model
+            key_mapping : dict or None
+                a dictionary containing the mapping from the ``data_dict`` to
+                the actual model's inputs; if None: the mapping stored
+                during export will be used (or each input is taken from the
+                ``data_dict`` entry with the same name)
+            device : str or :class:`torch.device`
+                the device to run the model on
+            optimize : bool
+                whether to optimize the model for inference
+            num_threads : int or None
+                the number of threads used for intra-op parallelism on the
+                CPU; if None: torch's default will be used
+            convert_batch_to_npy_fn : type, optional
+                a callable function to convert the predictions to numpy
+            **kwargs :
+                additional keyword arguments
+
+            """
+            self.device = torch.device(device)
+
+            if num_threads is not None:
+                torch.set_num_threads(num_threads)
+
+            module, self.metadata = load_torchscript(
+                file, map_location=self.device, optimize=optimize)
+
+            self.input_names = self.metadata.get("input_names")
+            if self.input_names is None:
+                raise ValueError("The input names of %s are unknown, since "
+                                 "it was not exported by delira" % file)
+
+            if key_mapping is None:
+                key_mapping = self.metadata.get("key_mapping") or {
+                    name: name for name in self.input_names}
+
+            self._input_dtypes = {
+                name: getattr(torch, dtype) for name, dtype
+                in self.metadata.get("input_dtypes", {}).items()}
+
+            super().__init__(module, key_mapping, convert_batch_to_npy_fn,
+                             self._to_tensors, **kwargs)
+
+        def _to_tensors(self, batch: dict):
+            """
+            Converts the batch entries needed by the model to tensors of
+            the exported dtypes on the predictor's device. All other
+            entries are left untouched
+
+            Parameters
+            ----------
+            batch : dict
+                the batch
+
+            Returns
+            -------
+            dict
+                the converted batch
+
+            """
+            batch = dict(batch)
+            for name in self.input_names:
+                key = self.key_mapping[name]
+                value = batch[key]
+                if isinstance(value, np.ndarray):
+                    value = torch.from_numpy(value)
+                batch[key] = value.to(self.device,
+                                      self._input_dtypes.get(name))
+
+            return batch
+
+        def _predict_batch(self, data: dict, **kwargs):
+            """
+            Predicts a single batch without test-time augmentation
+
+            Parameters
+            ----------
+            data : dict
+                batch dictionary
+            **kwargs :
+                currently unused, exist for compatibility reasons
+
+            Returns
+            -------
+            dict
+                predicted data
+
+            """
+            with torch.inference_mode():
+                data = self._prepare_batch(data)
+                pred = self.module(*[data[self.key_mapping[name]]
+                                     for name in self.input_names])
+
+            if not isinstance(pred, dict):
+                pred = {"pred": pred}
+
+            return self._convert_to_npy_fn(**pred)[1]
@@ -0,0 +1,145 @@
+import itertools
+
+import numpy as np
+
+
+class Flip(object):
+    """
+    Test-time augmentation flipping the spatial axes of a batch (the first
+    two dimensions are treated as batch and channel dimension)
+
+    """
+
+    def __init__(self, axes=()):
+        """
+
+        Parameters
+        ----------
+        axes : tuple of int
+            the spatial axes to flip (0 denotes the first spatial axis); an
+            empty tuple results in the identity
+
+        """
+        self.axes = tuple(axes)
+
+    def __call__(self, batch: np.ndarray):
+        if not self.axes:
+            return batch
+        return np.flip(batch, [axis + 2 for axis in self.axes])
+
+    def invert(self, batch: np.ndarray):
+        """
+        Applies the inverse transform (e.g. to spatial predictions)
+
+        Parameters
+        ----------
+        batch : :class:`numpy.ndarray`
+            the transformed batch
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            the batch in the original orientation
+
+        """
+        return self(batch)
+
+    def __repr__(self):
+        return "Flip(axes=%s)" % (self.axes,)
+
+
+class Rot90(object):
+    """
+    Test-time augmentation rotating a batch by multiples of 90 degrees
+    inside a plane of two spatial axes (the first two dimensions are treated
+    as batch and channel dimension)
+
+    """
+
+    def __init__(self, k=1, axes=(0, 1)):
+        """
+
+        Parameters
+        ----------
+        k : int
+            the number of rotations by 90 degrees
+        axes : tuple of int
+            the two spatial axes spanning the plane of rotation (0 denotes
+            the first spatial axis)
+
+        """
+        assert len(axes) == 2, "Rotations require exactly two axes"
+        self.k = k
+        self.axes = tuple(axes)
+
+    def __call__(self, batch: np.ndarray):
+        return np.rot90(batch, self.k, [axis + 2 for axis in self.axes])
+
+    def invert(self, batch: np.ndarray):
+        """
+        Applies the inverse transform (e.g. to spatial predictions)
+
+        Parameters
+        ----------
+        batch : :class:`numpy.ndarray`
+            the transformed batch
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            the batch in the original orientation
+
+        """
+        return np.rot90(batch, -self.k, [axis + 2 for axis in self.axes])
+
+    def __repr__(self):
+        return "Rot90(k=%d, axes=%s)" % (self.k, self.axes)
+
+
+def flip_transforms(n_spatial_dims=2):
+    """
+    Creates all combinations of flips of the spatial axes (including the
+    identity)
+
+    Parameters
+    ----------
+    n_spatial_dims : int
+        the number of spatial dimensions
+
+    Returns
+    -------
+    list of :class:`Flip`
+        the transforms
+
+    """
+    return [Flip(axes) for n_axes in range(n_spatial_dims + 1)
+            for axes in itertools.combinations(range(n_spatial_dims),
+                                               n_axes)]
+
+
+def rot90_transforms(axes=(0, 1)):
+    """
+    Creates all rotations by multiples of 90 degrees inside a plane
+    (including the identity)
+
+    Parameters
+    ----------
+    axes : tuple of int
+        the two spatial axes spanning the plane of rotation
+
+    Returns
+    -------
+    list of :class:`Rot90`
+        the transforms
+
+    """
+    return [Rot90(k, axes) for k in range(4)]
+
+
+# reductions merging the predictions of all views (along the first axis)
+TTA_REDUCTIONS = {
+    "mean": lambda preds: np.mean(preds, axis=0),
+    "median": lambda preds: np.median(preds, axis=0),
+    "max": lambda preds: np.max(preds, axis=0),
+    "min": lambda preds: np.min(preds, axis=0),
+}
@@ -1,6 +1,20 @@
-from .config import LookupConfig
-from .imageops import bounding_box, calculate_origin_offset, \
-    max_energy_slice, sitk_new_blank_image, sitk_resample_to_image, \
-    sitk_resample_to_shape, sitk_resample_to_spacing
-from .path import subdirs
-from .time import now
+from delira._lazy import lazy_module_attributes
+
+# the utilities are imported on first access to avoid importing their
+# (heavy) dependencies together with the package
+__getattr__, __dir__ = lazy_module_attributes(__name__, {
+    "LookupConfig": (".config", "LookupConfig"),
+    "bounding_box": (".imageops", "bounding_box"),
+    "calculate_origin_offset": (".imageops", "calculate_origin_offset"),
+    "max_energy_slice": (".imageops", "max_energy_slice"),
+    "sitk_new_blank_image": (".imageops", "sitk_new_blank_image"),
+    "sitk_resample_to_image": (".imageops", "sitk_resample_to_image"),
+    "sitk_resample_to_shape": (".imageops", "sitk_resample_to_shape"),
+    "sitk_resample_to_spacing": (".imageops", "sitk_resample_to_spacing"),
+    "Resampler": (".resampling", "Resampler"),
+    "resampled_grid": (".resampling", "resampled_grid"),
+    "resample_files": (".resampling", "resample_files"),
+    "preprocess_to_spacing": (".resampling", "preprocess_to_spacing"),
+    "subdirs": (".path", "subdirs"),
+    "now": (".time", "now"),
+})
@@ -79,8 +79,11 @@ if "TORCH" in get_backends():
         def load_state_dict(self, state_dict):
             return self._optimizer.load_state_dict(state_dict)
 
-        def zero_grad(self):
-            return self._optimizer.zero_grad()
+        def zero_grad(self, set_to_none=None):
+            # keep the wrapped optimizer's default unless explicitly requested
+            if set_to_none is None:
+                return self._optimizer.zero_grad()
+            return self._optimizer.zero_grad(set_to_none=set_to_none)
 
         def add_param_group(self, param_group):
             return self._optimizer.add_param_group(param_group)
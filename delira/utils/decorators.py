@@ -114,7 +114,17 @@ def make_deprecated(new_func):
 numpy_array_func = dtype_func(np.ndarray)
 
 
-if "TORCH" in get_backends():
-    import torch
-    torch_tensor_func = dtype_func(torch.Tensor)
-    torch_module_func = dtype_func(torch.nn.Module)
+def __getattr__(name):
+    """
+    Creates the torch-specific decorators on first access to avoid importing
+    torch together with this module (see PEP 562)
+
+    """
+    if "TORCH" in get_backends() and name in ("torch_tensor_func",
+                                              "torch_module_func"):
+        import torch
+        globals().update(torch_tensor_func=dtype_func(torch.Tensor),
+                         torch_module_func=dtype_func(torch.nn.Module))
+        return globals()[name]
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -3,6 +3,7 @@ import numpy as np
 from scipy.ndimage import zoom
 
 from .decorators import dtype_func
+from .resampling import Resampler
 
 sitk_img_func = dtype_func(sitk.Image)
 
@@ -50,18 +51,9 @@ def sitk_resample_to_spacing(image, new_spacing=(1.0, 1.0, 1.0),
         resampled Image with target spacing
 
     """
-    zoom_factor = np.divide(image.GetSpacing(), new_spacing)
-    new_size = np.asarray(np.ceil(np.round(np.multiply(
-        zoom_factor, image.GetSize()), decimals=5)), dtype=np.int16)
-    offset = calculate_origin_offset(new_spacing, image.GetSpacing())
-    reference_image = sitk_new_blank_image(size=new_size,
-                                           spacing=new_spacing,
-                                           direction=image.GetDirection(),
-                                           origin=image.GetOrigin() + offset,
-                                           default_value=default_value)
-    return sitk_resample_to_image(image, reference_image,
-                                  interpolator=interpolator,
-                                  default_value=default_value)
+    # the output grid is calculated from the image's metadata, which avoids
+    # allocating a blank reference image
+    return Resampler(new_spacing, interpolator, default_value)(image)
 
 
 @sitk_img_func
@@ -129,8 +121,9 @@ def sitk_new_blank_image(size, spacing, direction, origin, default_value=0.):
         Blank image with given properties
 
     """
-    image = sitk.GetImageFromArray(
-        np.ones(size, dtype=np.float).T * default_value)
+    image = sitk.Image([int(_size) for _size in size], sitk.sitkFloat64)
+    if default_value:
+        image += default_value
     image.SetSpacing(spacing)
     image.SetDirection(direction)
     image.SetOrigin(origin)
@@ -184,7 +177,9 @@ def max_energy_slice(img):
         slice index
     """
     assert img.GetDimension() == 3
-    return int(np.argmax(np.sum(sitk.GetArrayFromImage(img), axis=(1, 2))))
+    # a view avoids copying the image data
+    energy = sitk.GetArrayViewFromImage(img).sum(axis=(1, 2), dtype=np.float64)
+    return int(np.argmax(energy))
 
 
 def sitk_copy_metadata(img_source, img_target):
@@ -207,6 +202,137 @@ def sitk_copy_metadata(img_source, img_target):
     return img_target
 
 
+def _foreground_projections(mask):
+    """
+    Calculates the projection of a mask onto each of its axes. Only the
+    slices between the first and the last foreground slice of an axis are
+    reduced to calculate the projections of the following axes
+
+    Parameters
+    ----------
+    mask : np.ndarray
+        boolean mask
+
+    Returns
+    -------
+    list of np.ndarray
+        the one-dimensional projection onto each axis (empty if the mask
+        does not contain any foreground)
+
+    """
+    first = mask.reshape(mask.shape[0], -1).any(axis=1)
+    if mask.ndim == 1:
+        return [first]
+
+    nz = np.flatnonzero(first)
+    if not nz.size:
+        return []
+
+    return [first] + _foreground_projections(
+        mask[nz[0]:nz[-1] + 1].any(axis=0))
+
+
+def bounding_box_array(mask, margin=None):
+    """
+    Calculates the bounding box of the nonzero entries of an array by
+    projecting it onto each axis (without materializing the coordinates of
+    all nonzero entries)
+
+    Parameters
+    ----------
+    mask : np.ndarray
+        the mask (all nonzero entries are considered as foreground)
+    margin : int or tuple of int, default: None
+        margin to be added to min/max on each dimension (or per dimension);
+        the bounding box is clipped to the array's shape
+
+    Returns
+    -------
+    list of tuple or None
+        the (inclusive) lower and upper bound for each axis; None if the mask
+        does not contain any foreground
+
+    """
+    mask = np.asarray(mask)
+    if mask.dtype != bool:
+        mask = mask != 0
+
+    projections = _foreground_projections(mask)
+    if not projections:
+        return None
+
+    if margin is None:
+        margin = 0
+    margins = np.broadcast_to(margin, (mask.ndim,))
+
+    bbox = []
+    for projection, _margin, size in zip(projections, margins, mask.shape):
+        nz = np.flatnonzero(projection)
+        bbox.append((max(int(nz[0]) - int(_margin), 0),
+                     min(int(nz[-1]) + int(_margin), size - 1)))
+    return bbox
+
+
+def bounding_box_slices(mask, margin=None):
+    """
+    Calculates the slices cropping an array to the bounding box of the
+    nonzero entries of a mask
+
+    Parameters
+    ----------
+    mask : np.ndarray
+        the mask (all nonzero entries are considered as foreground)
+    margin : int or tuple of int, default: None
+        margin to be added to min/max on each dimension (or per dimension)
+
+    Returns
+    -------
+    tuple of slice or None
+        the slices for each axis of the mask; None if the mask does not
+        contain any foreground
+
+    """
+    bbox = bounding_box_array(mask, margin)
+    if bbox is None:
+        return None
+    return tuple(slice(lower, upper + 1) for lower, upper in bbox)
+
+
+def crop_to_foreground(data, mask=None, margin=None, threshold=0):
+    """
+    Crops an array to the bounding box of its foreground
+
+    Parameters
+    ----------
+    data : np.ndarray
+        the array to crop (all axes are cropped)
+    mask : np.ndarray or None
+        the mask defining the foreground (must have the same shape as
+        ``data``); if None: all entries of ``data`` greater than
+        ``threshold`` are considered as foreground
+    margin : int or tuple of int, default: None
+        margin to be added to min/max on each dimension (or per dimension)
+    threshold : float
+        the threshold defining the foreground if no mask is given
+
+    Returns
+    -------
+    np.ndarray
+        the cropped array (a view of ``data``; ``data`` itself if there is
+        no foreground)
+    tuple of slice
+        the slices used for cropping
+
+    """
+    if mask is None:
+        mask = data > threshold
+
+    slices = bounding_box_slices(mask, margin)
+    if slices is None:
+        slices = tuple(slice(0, size) for size in np.shape(data))
+    return data[slices], slices
+
+
 @sitk_img_func
 def bounding_box(mask, margin=None):
     """Calculate bounding box coordinates of binary mask
@@ -223,23 +349,16 @@ def bounding_box(mask, margin=None):
     tuple
         bounding box coordinates of the form (xmin, xmax, ymin, ymax,
         zmin, zmax)
+
+    Raises
+    ------
+    ValueError
+        if the mask does not contain any foreground
+
     """
     # mask_arr is in z, y, x order
-    mask_arr = sitk.GetArrayFromImage(mask)
-    nz = np.where(mask_arr != 0)
-    lower = [np.min(nz[0]), np.min(nz[1]), np.min(nz[2])]
-    upper = [np.max(nz[0]), np.max(nz[1]), np.max(nz[2])]
-    if margin is not None:
-        for axis in range(3):
-            # make sure lower bound with margin is valid
-            if lower[axis] - margin >= 0:
-                lower[axis] -= margin
-            else:
-                lower[axis] = 0
-            # make sure upper bound with margin is valid
-            if upper[axis] + margin <= mask_arr.shape[axis] - 1:
-                upper[axis] += margin
-            else:
-                upper[axis] = mask_arr.shape[axis] - 1
-    bbox = lower[0], upper[0], lower[1], upper[1], lower[2], upper[2]
-    return bbox
+    bbox = bounding_box_array(sitk.GetArrayViewFromImage(mask), margin)
+    if bbox is None:
+        raise ValueError("The mask does not contain any foreground")
+
+    return tuple(bound for axis_bounds in bbox for bound in axis_bounds)
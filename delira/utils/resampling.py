@@ -0,0 +1,429 @@
+import fnmatch
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import SimpleITK as sitk
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# version of the settings sidecar written by :func:`preprocess_to_spacing`
+PREPROCESSING_VERSION = 1
+PREPROCESSING_FILE = "preprocessing.json"
+
+
+def resampled_grid(size, spacing, origin, direction, new_spacing):
+    """
+    Calculates the output grid of resampling an image to a new spacing from
+    the image's metadata alone (the image's extent is kept and the new
+    voxel centers are shifted by half of the spacing difference)
+
+    Parameters
+    ----------
+    size : list or np.ndarray or tuple
+        the image's size (in ITK order)
+    spacing : list or np.ndarray or tuple
+        the image's spacing (in ITK order)
+    origin : list or np.ndarray or tuple
+        the image's origin
+    direction : list or np.ndarray or tuple
+        the image's (flattened) direction matrix
+    new_spacing : list or np.ndarray or tuple
+        target spacing (in ITK order)
+
+    Returns
+    -------
+    dict
+        the ``size``, ``spacing``, ``origin`` and ``direction`` of the
+        resampled image
+
+    """
+    zoom_factor = np.divide(spacing, new_spacing)
+    new_size = np.ceil(np.round(np.multiply(zoom_factor, size), decimals=5))
+
+    # the offset is given in image coordinates and has to be rotated into
+    # physical space
+    offset = np.subtract(new_spacing, spacing) / 2
+    ndim = len(spacing)
+    offset = np.reshape(direction, (ndim, ndim)).dot(offset)
+
+    return {"size": [int(_size) for _size in new_size],
+            "spacing": tuple(float(_spacing) for _spacing in new_spacing),
+            "origin": tuple(float(_origin)
+                            for _origin in np.add(origin, offset)),
+            "direction": tuple(direction)}
+
+
+class Resampler(object):
+    """
+    Resamples images to a target spacing. The output grid is calculated from
+    the image's metadata (no reference image is allocated) and each thread
+    reuses a single ``ResampleImageFilter``, so a resampler can be shared by
+    multiple threads
+
+    """
+
+    def __init__(self, spacing=(1., 1., 1.), interpolator=sitk.sitkLinear,
+                 default_value=0., output_pixel_type=None, n_threads=None):
+        """
+
+        Parameters
+        ----------
+        spacing : list or np.ndarray or tuple
+            target spacing (in ITK order)
+        interpolator : int
+            the SimpleITK interpolator (e.g. ``sitk.sitkLinear``)
+        default_value : float
+            the value of voxels outside the original image
+        output_pixel_type : int or None
+            the SimpleITK pixel type of the resampled images; if None: the
+            pixel type of each input image will be kept
+        n_threads : int or None
+            the number of threads SimpleITK uses to resample a single image;
+            if None: SimpleITK's global default will be used
+
+        """
+        self.spacing = tuple(spacing)
+        self.interpolator = interpolator
+        self.default_value = default_value
+        self.output_pixel_type = output_pixel_type
+        self.n_threads = n_threads
+        self._local = threading.local()
+
+    def _get_filter(self):
+        """
+        Returns the calling thread's filter (creates it on first use)
+
+        Returns
+        -------
+        SimpleITK.ResampleImageFilter
+            the filter
+
+        """
+        resample_filter = getattr(self._local, "filter", None)
+        if resample_filter is None:
+            resample_filter = sitk.ResampleImageFilter()
+            resample_filter.SetDefaultPixelValue(self.default_value)
+            if self.n_threads is not None:
+                resample_filter.SetNumberOfThreads(self.n_threads)
+            self._local.filter = resample_filter
+        return resample_filter
+
+    def output_grid(self, image):
+        """
+        Calculates the output grid for a given image
+
+        Parameters
+        ----------
+        image : SimpleITK.Image or SimpleITK.ImageFileReader
+            the image (or a reader, whose image information has been read)
+
+        Returns
+        -------
+        dict
+            the ``size``, ``spacing``, ``origin`` and ``direction`` of the
+            resampled image
+
+        """
+        return resampled_grid(image.GetSize(), image.GetSpacing(),
+                              image.GetOrigin(), image.GetDirection(),
+                              self.spacing)
+
+    def __call__(self, image, interpolator=None):
+        """
+        Resamples a single image
+
+        Parameters
+        ----------
+        image : SimpleITK.Image
+            the image to resample
+        interpolator : int or None
+            the interpolator to use for this image (e.g.
+            ``sitk.sitkNearestNeighbor`` for segmentations); if None: the
+            resampler's interpolator will be used
+
+        Returns
+        -------
+        SimpleITK.Image
+            the resampled image
+
+        """
+        if interpolator is None:
+            interpolator = self.interpolator
+        output_pixel_type = self.output_pixel_type
+        if output_pixel_type is None:
+            output_pixel_type = image.GetPixelID()
+
+        grid = self.output_grid(image)
+
+        resample_filter = self._get_filter()
+        resample_filter.SetInterpolator(interpolator)
+        resample_filter.SetOutputPixelType(output_pixel_type)
+        resample_filter.SetSize(grid["size"])
+        resample_filter.SetOutputSpacing(grid["spacing"])
+        resample_filter.SetOutputOrigin(grid["origin"])
+        resample_filter.SetOutputDirection(grid["direction"])
+        return resample_filter.Execute(image)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+
+def _thread_counts(n_jobs, n_workers=None, n_threads=None):
+    """
+    Splits the available cores between concurrently resampled images and
+    SimpleITK's threads per image (to avoid oversubscription)
+
+    Parameters
+    ----------
+    n_jobs : int
+        the number of images to resample
+    n_workers : int or None
+        the number of images to resample concurrently; if None: one per
+        image (at most ``os.cpu_count()``)
+    n_threads : int or None
+        the number of SimpleITK threads per image; if None: the cores are
+        split evenly between the workers
+
+    Returns
+    -------
+    int
+        the number of workers
+    int
+        the number of threads per worker
+
+    """
+    n_cpus = os.cpu_count() or 1
+    if n_workers is None:
+        n_workers = min(max(n_jobs, 1), n_cpus)
+    if n_threads is None:
+        n_threads = max(n_cpus // n_workers, 1)
+    return n_workers, n_threads
+
+
+def _select_interpolator(path, interpolator, nearest_patterns):
+    """
+    Returns nearest neighbor interpolation for files matching one of the
+    patterns (e.g. segmentations) and the given interpolator otherwise
+
+    """
+    name = os.path.basename(path)
+    if any(fnmatch.fnmatch(name, pattern) for pattern in nearest_patterns):
+        return sitk.sitkNearestNeighbor
+    return interpolator
+
+
+def resample_files(paths, spacing, out_paths=None,
+                   interpolator=sitk.sitkLinear, nearest_patterns=(),
+                   default_value=0., n_workers=None, n_threads=None):
+    """
+    Resamples multiple image files to a target spacing in parallel. Images
+    are resampled on a thread pool (SimpleITK releases the GIL) and each
+    resampling uses a limited number of SimpleITK threads, so the total
+    number of threads does not exceed the number of cores
+
+    Parameters
+    ----------
+    paths : iterable of str
+        the image files to resample
+    spacing : list or np.ndarray or tuple
+        target spacing (in ITK order)
+    out_paths : iterable of str or None
+        the files to write the resampled images to; if None: the resampled
+        images will be returned
+    interpolator : int
+        the SimpleITK interpolator (e.g. ``sitk.sitkLinear``)
+    nearest_patterns : iterable of str
+        shell-style patterns of file names to resample with nearest
+        neighbor interpolation (e.g. ``('*seg*',)`` for segmentations)
+    default_value : float
+        the value of voxels outside the original images
+    n_workers : int or None
+        the number of images to resample concurrently; if None: one per
+        image (at most ``os.cpu_count()``)
+    n_threads : int or None
+        the number of SimpleITK threads per image; if None: the cores are
+        split evenly between the workers
+
+    Returns
+    -------
+    list
+        the resampled images or the written paths (in the same order as
+        ``paths``)
+
+    """
+    paths = list(paths)
+    if out_paths is not None:
+        out_paths = list(out_paths)
+        assert len(out_paths) == len(paths), \
+            "paths and out_paths must have the same length"
+
+    n_workers, n_threads = _thread_counts(len(paths), n_workers, n_threads)
+    resampler = Resampler(spacing, interpolator, default_value,
+                          n_threads=n_threads)
+
+    def _resample(idx):
+        path = paths[idx]
+        img = resampler(sitk.ReadImage(path), _select_interpolator(
+            path, interpolator, nearest_patterns))
+
+        if out_paths is None:
+            return img
+
+        sitk.WriteImage(img, out_paths[idx])
+        return out_paths[idx]
+
+    if n_workers <= 1 or len(paths) <= 1:
+        return [_resample(idx) for idx in range(len(paths))]
+
+    with ThreadPoolExecutor(n_workers) as executor:
+        return list(executor.map(_resample, range(len(paths))))
+
+
+def preprocess_to_spacing(src_dir, dst_dir, spacing, fmt="npy",
+                          extensions=(".nii.gz", ".nii"),
+                          interpolator=sitk.sitkLinear, nearest_patterns=(),
+                          default_value=0., n_workers=None, n_threads=None,
+                          overwrite=False):
+    """
+    Resamples all images inside a directory (recursively) to a target
+    spacing once and caches the results. The directory structure is
+    mirrored to ``dst_dir``. Files, which have already been resampled (and
+    are newer than their source), are skipped as long as the settings
+    (stored in a versioned ``preprocessing.json`` inside ``dst_dir``) did
+    not change.
+
+    Parameters
+    ----------
+    src_dir : str
+        the directory containing the images
+    dst_dir : str
+        the directory to write the resampled images to
+    spacing : list or np.ndarray or tuple
+        target spacing (in ITK order)
+    fmt : str
+        the output format; must be one of
+
+            * ``nii``: an uncompressed nii file
+            * ``npy`` or ``zarr``: see
+              :func:`delira.data_loading.nii.convert_nii` (can be loaded by
+              :func:`delira.data_loading.nii.load_converted_nii`)
+
+    extensions : tuple of str
+        the extensions of the images to resample
+    interpolator : int
+        the SimpleITK interpolator (e.g. ``sitk.sitkLinear``)
+    nearest_patterns : iterable of str
+        shell-style patterns of file names to resample with nearest
+        neighbor interpolation (e.g. ``('*seg*',)`` for segmentations)
+    default_value : float
+        the value of voxels outside the original images
+    n_workers : int or None
+        the number of images to resample concurrently; if None: one per
+        image (at most ``os.cpu_count()``)
+    n_threads : int or None
+        the number of SimpleITK threads per image; if None: the cores are
+        split evenly between the workers
+    overwrite : bool
+        whether to resample already resampled files again
+
+    Returns
+    -------
+    list of str
+        the paths of all resampled files (including the cached ones)
+
+    Raises
+    ------
+    ValueError
+        if ``fmt`` is invalid
+
+    """
+    from delira.data_loading.nii import save_converted_nii
+
+    if fmt not in ("nii", "npy", "zarr"):
+        raise ValueError("Invalid format: %s. Must be one of "
+                         "['nii', 'npy', 'zarr']" % str(fmt))
+
+    nearest_patterns = tuple(nearest_patterns)
+    settings = {"version": PREPROCESSING_VERSION,
+                "spacing": [float(_spacing) for _spacing in spacing],
+                "fmt": fmt,
+                "interpolator": int(interpolator),
+                "nearest_patterns": list(nearest_patterns),
+                "default_value": float(default_value)}
+
+    # without matching settings (e.g. after changing them or an interrupted
+    # run) the cached files can't be trusted
+    settings_file = os.path.join(dst_dir, PREPROCESSING_FILE)
+    if os.path.isfile(settings_file):
+        with open(settings_file) as f:
+            cached_settings = json.load(f)
+        if cached_settings != settings or overwrite:
+            logger.info("Preprocessing settings changed, resampling all "
+                        "files again")
+            os.remove(settings_file)
+            overwrite = True
+    else:
+        overwrite = True
+
+    out_paths, jobs = [], []
+    for root, _, files in os.walk(src_dir):
+        for file in sorted(files):
+            if not file.endswith(tuple(extensions)):
+                continue
+
+            src = os.path.join(root, file)
+            dst = os.path.join(dst_dir, os.path.relpath(src, src_dir))
+            for ext in extensions:
+                if dst.endswith(ext):
+                    dst = dst[:-len(ext)]
+                    break
+            out_path = "%s.%s" % (dst, fmt)
+            out_paths.append(out_path)
+
+            up_to_date = os.path.exists(out_path) and \
+                os.path.getmtime(out_path) >= os.path.getmtime(src)
+            if up_to_date and not overwrite:
+                continue
+
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            jobs.append((src, dst))
+
+    n_workers, n_threads = _thread_counts(len(jobs), n_workers, n_threads)
+    resampler = Resampler(spacing, interpolator, default_value,
+                          n_threads=n_threads)
+
+    def _preprocess(job):
+        src, dst = job
+        img = resampler(sitk.ReadImage(src), _select_interpolator(
+            src, interpolator, nearest_patterns))
+
+        if fmt == "nii":
+            sitk.WriteImage(img, dst + ".nii")
+        else:
+            save_converted_nii(img, dst, fmt=fmt, source=src)
+
+    logger.info("Resampling %d of %d files" % (len(jobs), len(out_paths)))
+    if n_workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            _preprocess(job)
+    else:
+        with ThreadPoolExecutor(n_workers) as executor:
+            list(executor.map(_preprocess, jobs))
+
+    os.makedirs(dst_dir, exist_ok=True)
+    tmp_file = settings_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(settings, f, indent=4)
+    os.replace(tmp_file, settings_file)
+
+    return out_paths
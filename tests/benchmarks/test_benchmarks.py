@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from functools import partial
+
+import numpy as np
+
+from delira import get_backends
+from delira.benchmarks import benchmark_data_manager, benchmark_sampler, \
+    compare_results, create_synthetic_data, default_configurations, \
+    load_synthetic_sample, run_benchmarks
+from delira.benchmarks.__main__ import main
+from delira.benchmarks.suite import _MemoryMonitor
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+
+    def test_synthetic_data(self):
+        paths = create_synthetic_data(self.data_dir, 4, (8, 8, 8))
+        self.assertEqual(len(paths), 4)
+
+        sample = load_synthetic_sample(paths[0])
+        self.assertEqual(sample["data"].shape, (1, 8, 8, 8))
+        self.assertEqual(sample["label"].shape, (1,))
+
+        # existing samples are reused
+        mtime = os.path.getmtime(paths[0])
+        create_synthetic_data(self.data_dir, 4, (8, 8, 8))
+        self.assertEqual(os.path.getmtime(paths[0]), mtime)
+
+    def test_benchmarks(self):
+        stats = benchmark_sampler("prevalence_random", num_samples=100,
+                                  batch_size=8, num_batches=10)
+        self.assertEqual(stats["num_batches"], 10)
+        self.assertGreater(stats["samples_per_sec"], 0)
+
+        for dataset in ("cache", "lazy"):
+            stats = benchmark_data_manager(self.data_dir, dataset=dataset,
+                                           num_samples=16, batch_size=4,
+                                           num_batches=4)
+            self.assertEqual(stats["num_batches"], 4)
+            self.assertGreater(stats["peak_rss_mb"], 0)
+            for key in ("mean_ms", "p50_ms", "p90_ms", "p99_ms"):
+                self.assertIn(key, stats["latency"])
+
+    def test_run_benchmarks(self):
+        names = ("sampler/random", "data_manager/2d/lazy/1proc/random")
+        configurations = [config for config in default_configurations(True)
+                          if config[0] in names]
+        self.assertEqual(len(configurations), 2)
+
+        results = run_benchmarks(self.data_dir, configurations)
+        self.assertIn("git_revision", results["metadata"])
+        self.assertEqual([result["error"] for result in results["results"]],
+                         [None, None])
+
+        # partially applied benchmark functions are supported
+        results_partial = run_benchmarks(self.data_dir, [(
+            "sampler/partial", partial(benchmark_sampler, "random"),
+            {"num_samples": 100, "batch_size": 8, "num_batches": 2})])
+        self.assertIsNone(results_partial["results"][0]["error"])
+
+        # results are serializable
+        results = json.loads(json.dumps(results))
+        comparison = compare_results(results, results)
+        self.assertEqual(len(comparison), 2)
+        self.assertTrue(all(change == 0 for *_, change in comparison))
+
+    def test_memory_monitor(self):
+        memory = _MemoryMonitor()
+        baseline = memory._process.memory_info().rss
+
+        # allocations inside the context are sampled without calling update
+        with memory.sampling(interval=0.01):
+            data = np.ones(2 ** 24)
+            time.sleep(0.2)
+            del data
+
+        self.assertGreater(memory.peak - baseline, 2 ** 26)
+
+    @unittest.skipIf("TORCH" not in get_backends(),
+                     reason="No TORCH Backend installed")
+    def test_main_torch(self):
+        output = os.path.join(self.data_dir, "results.json")
+        main(["--output", output, "--data-dir", self.data_dir, "--quick",
+              "--filter", "*/torch/2d"])
+
+        with open(output) as f:
+            results = json.load(f)
+
+        self.assertEqual(sorted(result["name"]
+                                for result in results["results"]),
+                         ["predictor/torch/2d", "trainer/torch/2d"])
+        self.assertTrue(all(result["error"] is None
+                            for result in results["results"]))
+        main(["--output", output, "--data-dir", self.data_dir, "--quick",
+              "--filter", "predictor/torch/2d", "--compare", output])
+
+
+if __name__ == '__main__':
+    unittest.main()
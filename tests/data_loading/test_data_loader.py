@@ -36,6 +36,37 @@ class DataLoaderTest(unittest.TestCase):
                      for _tmp in loader.generate_train_batch()["label"]])),
             1)
 
+    def test_data_loader_batched_access(self):
+        class BatchedDataset(DummyDataset):
+            supports_batched_access = True
+
+            def get_batch(self, indices):
+                batch = super().get_batch(indices)
+                batch["batched"] = np.ones(len(indices), dtype=bool)
+                return batch
+
+        class SampleLoader(BaseDataLoader):
+            def _get_sample(self, index):
+                return {**super()._get_sample(index), "custom": index}
+
+        dset = BatchedDataset(600, [0.5, 0.3, 0.2])
+        sampler = SequentialSampler.from_dataset(dset)
+
+        # get_batch is only used by datasets opting in
+        for dataset, loader_cls, batched in [
+                (dset, BaseDataLoader, True),
+                (DummyDataset(600, [0.5, 0.3, 0.2]), BaseDataLoader, False),
+                (dset, SampleLoader, False)]:
+            sampler_queue = Queue()
+            loader = loader_cls(dataset, batch_size=16,
+                                sampler_queues=[sampler_queue])
+            sampler_queue.put(sampler(16))
+
+            batch = loader.generate_train_batch()
+            self.assertEqual(len(batch["data"]), 16)
+            self.assertEqual("batched" in batch, batched)
+            self.assertEqual("custom" in batch, loader_cls is SampleLoader)
+
 
 if __name__ == '__main__':
     unittest.main()
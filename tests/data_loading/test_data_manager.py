@@ -1,13 +1,30 @@
+import os
 import unittest
 
 import numpy as np
 from batchgenerators.dataloading import MultiThreadedAugmenter
 
-from delira.data_loading import BaseDataManager
+from delira.data_loading import BaseCacheDataset, BaseDataManager, \
+    RandomSampler, ShardedSampler
 from delira.data_loading.data_manager import Augmenter
 from . import DummyDataset
 
 
+class OpenTrackingDataset(DummyDataset):
+    def __init__(self, length=600, class_weights=None):
+        super().__init__(length, class_weights)
+        self._opened_by = None
+
+    def open(self):
+        self._opened_by = os.getpid()
+
+    def __getitem__(self, index):
+        sample = super().__getitem__(index)
+        sample["opened_by"] = self._opened_by
+        sample["pid"] = os.getpid()
+        return sample
+
+
 class DataManagerTest(unittest.TestCase):
 
     def test_base_datamanager(self):
@@ -36,6 +53,59 @@ class DataManagerTest(unittest.TestCase):
         for key, val in next(manager.get_batchgen()).items():
             self.assertEqual(len(val), batch_size)
 
+        # sharded managers sample disjoint, contiguous blocks of indices
+        sharded = manager.shard(num_replicas=2, rank=1)
+        self.assertEqual(sharded.n_samples, 300)
+        batch = next(sharded.get_batchgen())
+        np.testing.assert_array_equal(
+            batch["data"], np.asarray([dset[i]["data"]
+                                       for i in range(300, 300 + batch_size)]))
+
+        # subsets keep the sharding and the wrapped sampler
+        cache_dset = BaseCacheDataset([dset[i] for i in range(200)],
+                                      lambda sample: sample)
+        random_manager = BaseDataManager(cache_dset, batch_size, 1, None,
+                                         sampler_cls=RandomSampler)
+        subset = random_manager.shard(4, 1, seed=3).get_subset(range(100))
+        self.assertIsInstance(subset.sampler, ShardedSampler)
+        self.assertIsInstance(subset.sampler.sampler, RandomSampler)
+        self.assertEqual(subset.sampler.shard_kwargs,
+                         {"num_replicas": 4, "rank": 1, "seed": 3,
+                          "drop_last": False, "pad": True})
+        self.assertEqual(subset.n_samples, 25)
+
+    def test_datamanager_start_method(self):
+
+        batch_size = 8
+
+        np.random.seed(1)
+        dset = OpenTrackingDataset(64, [0.5, 0.5])
+
+        with self.assertRaises(ValueError):
+            BaseDataManager(dset, batch_size, n_process_augmentation=1,
+                            transforms=None, start_method="invalid")
+
+        manager = BaseDataManager(dset, batch_size, n_process_augmentation=2,
+                                  transforms=None, start_method="spawn")
+        self.assertEqual(manager.start_method, "spawn")
+
+        batchgen = manager.get_batchgen()
+        self.assertIsInstance(batchgen._augmenter, MultiThreadedAugmenter)
+        self.assertEqual(batchgen.num_processes, 2)
+
+        for batch_idx in range(2):
+            batch = next(batchgen)
+            np.testing.assert_array_equal(
+                batch["data"],
+                np.asarray([dset[i]["data"] for i in range(
+                    batch_idx * batch_size, (batch_idx + 1) * batch_size)]))
+
+            # the dataset has been opened inside each worker process
+            self.assertTrue((batch["opened_by"] == batch["pid"]).all())
+            self.assertTrue((batch["pid"] != os.getpid()).all())
+
+        batchgen._finish()
+
 
 if __name__ == '__main__':
     unittest.main()
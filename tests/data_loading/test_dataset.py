@@ -1,10 +1,17 @@
+import os
+import pickle
+import struct
 import unittest
 
 import numpy as np
+import pytest
 
+from delira import get_backends
 from delira.data_loading import ConcatDataset, BaseCacheDataset, \
-    BaseExtendCacheDataset, BaseLazyDataset, LoadSample, LoadSampleLabel
-from delira.data_loading.load_utils import norm_zero_mean_unit_std
+    BaseExtendCacheDataset, BaseLazyDataset, LoadSample, LoadSampleLabel, \
+    BasePatchDataset, PatchSampler, ForegroundCropDataset
+from delira.data_loading.load_utils import norm_zero_mean_unit_std, \
+    norm_range
 
 
 class DataSubsetConcatTest(unittest.TestCase):
@@ -202,6 +209,207 @@ def test_load_sample():
     assert np.isclose(sample['data2'].min(), -1)
     assert sample['label'] == 42
 
+    # check concurrent loading
+    def load_channel_data(path):
+        return np.arange(256, dtype=np.int16).reshape(16, 16) * \
+            int(path[-1])
+
+    sample_fn = LoadSample({'data': ['ch1', 'ch2', 'ch3'], 'seg': ['ch4']},
+                           load_channel_data, dtype={'data': 'float32'},
+                           normalize=['ch3'], n_threads=4)
+    sample = sample_fn('load')
+    assert sample['data'].shape == (3, 16, 16)
+    assert sample['data'].dtype == 'float32'
+    np.testing.assert_array_equal(sample['data'][:2, 0, 1], [1, 2])
+    assert np.isclose(sample['data'][2].min(), -1)
+    assert np.isclose(sample['data'][2].max(), 1)
+    assert sample['seg'].dtype == 'int16'
+    assert sample['seg'].max() == 255 * 4
+
+    # the loading threads are stopped and restarted on demand
+    sample_fn.close()
+    assert sample_fn._executor is None
+    np.testing.assert_array_equal(sample_fn('load')['data'], sample['data'])
+    sample_fn.close()
+
+    # single files are copied instead of returning a view of the loaded data
+    loaded = np.arange(256, dtype=np.float32).reshape(16, 16)
+    sample = LoadSample({'data': ['ch1']}, lambda path: loaded,
+                        dtype={'data': 'float32'})('load')
+    assert sample['data'].shape == (1, 16, 16)
+    assert not np.may_share_memory(sample['data'], loaded)
+
+
+def test_norm_fns():
+    data = np.random.randint(0, 1000, (3, 32, 32)).astype(np.int16)
+    data_float = data.astype(np.float64)
+
+    # fused cast
+    normed = norm_range('-1,1')(data, dtype='float32')
+    assert normed.dtype == np.float32
+    assert np.isclose(normed.min(), -1) and np.isclose(normed.max(), 1)
+
+    # precomputed statistics and preallocated output
+    out = np.empty(data.shape, dtype=np.float32)
+    normed = norm_range('0,1', data_min=0, data_max=2000)(data, out=out)
+    assert normed is out
+    np.testing.assert_allclose(normed, data_float / 2000, rtol=1e-6)
+
+    normed = norm_zero_mean_unit_std(data)
+    assert normed.dtype == np.float64
+    np.testing.assert_allclose(
+        normed, (data_float - data_float.mean()) / data_float.std())
+
+    # in-place normalization
+    normed = norm_zero_mean_unit_std(data_float, mean=500., std=100.,
+                                     out=data_float)
+    assert normed is data_float
+    np.testing.assert_allclose(normed, (data - 500.) / 100.)
+
+
+def test_patch_dataset(tmpdir):
+    shapes = [(20, 30, 40), (8, 30, 40)]
+    for idx, shape in enumerate(shapes):
+        vol_dir = tmpdir.mkdir("volume_%d" % idx)
+        np.save(str(vol_dir.join("data.npy")),
+                np.random.rand(*shape).astype(np.float32))
+        seg = np.zeros(shape, dtype=np.uint8)
+        seg[2:4, 5:7, 30:33] = 1
+        np.save(str(vol_dir.join("seg.npy")), seg)
+
+    dataset = BasePatchDataset(str(tmpdir), (16, 16, 16),
+                               {'data': ['data.npy'], 'seg': ['seg.npy']},
+                               foreground_key='seg', return_coords=True)
+    assert len(dataset) == 2
+    np.testing.assert_array_equal(dataset.shapes, shapes)
+    assert all(len(coords) == 12 for coords in dataset.foreground_coords)
+
+    # patch inside the volume
+    sample = dataset[(0, (1, 2, 3))]
+    assert sample['data'].shape == (1, 16, 16, 16)
+    data = np.load(str(tmpdir.join("volume_0", "data.npy")))
+    np.testing.assert_array_equal(sample['data'][0], data[1:17, 2:18, 3:19])
+
+    # patch exceeding the volume is padded
+    sample = dataset[(1, (-4, 0, 0))]
+    assert sample['seg'].shape == (1, 16, 16, 16)
+    assert (sample['data'][0, :4] == 0).all()
+    assert (sample['data'][0, 12:] == 0).all()
+
+    sampler = PatchSampler.from_dataset(dataset, samples_per_volume=3,
+                                        foreground_prob=1.)
+    assert len(sampler) == 6
+    indices = sampler(6)
+    assert sorted(idx[0] for idx in indices) == [0, 0, 0, 1, 1, 1]
+    for idx in indices:
+        # each patch is centered around foreground
+        assert dataset[idx]['seg'].any()
+
+    subset = dataset.get_subset([1])
+    assert len(subset) == 1
+    np.testing.assert_array_equal(subset.shapes, shapes[1:])
+
+
+def test_foreground_crop_dataset(tmpdir):
+    samples = []
+    for idx in range(3):
+        seg = np.zeros((1, 20, 30), dtype=np.uint8)
+        if idx < 2:
+            seg[0, 5 + idx:8, 10:20] = 1
+        samples.append({'data': np.random.rand(2, 20, 30),
+                        'seg': seg, 'label': np.array([idx]),
+                        'name': "sample_%d" % idx})
+
+    source = BaseCacheDataset(samples, lambda sample: sample)
+    cache_dir = str(tmpdir.join("cache"))
+    dataset = ForegroundCropDataset(source, cache_dir, margin=(1, 2))
+    assert len(dataset) == 3
+
+    sample = dataset[0]
+    assert sample['data'].shape == (2, 5, 14)
+    assert isinstance(sample['data'], np.memmap)
+    np.testing.assert_array_equal(sample['data'],
+                                  samples[0]['data'][:, 4:9, 8:22])
+    np.testing.assert_array_equal(sample['bbox'], [[4, 9], [8, 22]])
+    np.testing.assert_array_equal(sample['label'], [0])
+    assert sample['name'] == "sample_0"
+
+    # samples without foreground are kept
+    assert dataset[2]['seg'].shape == (1, 20, 30)
+
+    # the cache is reused as long as the settings don't change
+    mtime = os.path.getmtime(os.path.join(cache_dir, "000000",
+                                          "data.npy"))
+    dataset = ForegroundCropDataset(source, cache_dir, margin=(1, 2))
+    assert os.path.getmtime(os.path.join(cache_dir, "000000",
+                                         "data.npy")) == mtime
+
+    dataset = ForegroundCropDataset(source, cache_dir, margin=0,
+                                    n_workers=2)
+    assert dataset[1]['seg'].shape == (1, 2, 10)
+
+
+def _write_dummy_mnist(root, num_samples=20):
+    raw_dir = os.path.join(root, "MNIST", "raw")
+    os.makedirs(raw_dir)
+    images = np.random.randint(0, 256, (num_samples, 28, 28),
+                               dtype=np.uint8)
+    labels = np.random.randint(0, 10, num_samples).astype(np.uint8)
+    for prefix in ("train", "t10k"):
+        with open(os.path.join(raw_dir, "%s-images-idx3-ubyte" % prefix),
+                  "wb") as f:
+            f.write(struct.pack(">IIII", 2051, num_samples, 28, 28))
+            f.write(images.tobytes())
+        with open(os.path.join(raw_dir, "%s-labels-idx1-ubyte" % prefix),
+                  "wb") as f:
+            f.write(struct.pack(">II", 2049, num_samples))
+            f.write(labels.tobytes())
+    return images, labels
+
+
+@pytest.mark.skipif("TORCH" not in get_backends(),
+                    reason="No TORCH Backend installed")
+def test_torchvision_dataset(tmpdir):
+    from skimage.transform import resize
+    from delira.data_loading import TorchvisionClassificationDataset
+
+    images, labels = _write_dummy_mnist(str(tmpdir))
+    expected = resize(images[3], (14, 20), mode='reflect',
+                      anti_aliasing=True).astype(np.float32)[None]
+
+    for cache in (None, "memory", "memmap"):
+        dataset = TorchvisionClassificationDataset(
+            "mnist", root=str(tmpdir), download=False, img_shape=(14, 20),
+            one_hot=True, cache=cache)
+        assert len(dataset) == 20
+
+        sample = dataset[3]
+        assert sample["data"].dtype == np.float32
+        np.testing.assert_allclose(sample["data"], expected, atol=1e-6)
+        np.testing.assert_array_equal(sample["label"],
+                                      np.eye(10)[labels[3]])
+
+        batch = dataset[[1, 3, 3]]
+        assert batch["data"].shape == (3, 1, 14, 20)
+        assert batch["label"].shape == (3, 10)
+        np.testing.assert_allclose(batch["data"][2], expected, atol=1e-6)
+
+    # the memory-mapped cache is shared (e.g. with other processes)
+    dataset = pickle.loads(pickle.dumps(dataset))
+    assert dataset[3]["data"].shape == (1, 14, 20)
+
+    dataset = TorchvisionClassificationDataset(
+        "mnist", root=str(tmpdir), download=False, img_shape=(14, 20),
+        cache="memory", cache_dtype=np.uint8)
+    np.testing.assert_allclose(dataset[3]["data"], expected, atol=1 / 510)
+    np.testing.assert_array_equal(dataset[3]["label"], [labels[3]])
+
+    # the cache file can't identify the transformed images
+    with pytest.raises(ValueError):
+        TorchvisionClassificationDataset(
+            "mnist", root=str(tmpdir), download=False, cache="memmap",
+            transform=lambda img: img)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,61 @@
+import os
+
+import SimpleITK as sitk
+import numpy as np
+import pytest
+
+from delira.data_loading.nii import load_nii, load_nii_files, \
+    read_nii_header, convert_nii_dir, load_converted_nii, \
+    read_converted_nii_header
+
+
+def _write_dummy_nii(path, shape=(12, 14, 16), spacing=(1., 2., 3.)):
+    data = np.random.randint(0, 100, shape).astype(np.int16)
+    img = sitk.GetImageFromArray(data)
+    img.SetSpacing(spacing)
+    sitk.WriteImage(img, path)
+    return data
+
+
+def test_nii_io(tmpdir):
+    src_dir = tmpdir.mkdir("src")
+    sub_dir = src_dir.mkdir("case_0")
+    paths = [str(sub_dir.join("t1.nii.gz")), str(sub_dir.join("t2.nii"))]
+    arrays = [_write_dummy_nii(_path) for _path in paths]
+
+    header = read_nii_header(paths[0])
+    assert header["shape"] == (12, 14, 16)
+    assert header["spacing"] == (3., 2., 1.)
+    assert header["dtype"] == "int16"
+
+    for loaded, data in zip(load_nii_files(paths, n_threads=2), arrays):
+        np.testing.assert_array_equal(loaded, data)
+
+    dst_dir = str(tmpdir.join("dst"))
+    converted = convert_nii_dir(str(src_dir), dst_dir, n_workers=2)
+    assert len(converted) == 2
+    assert os.path.isfile(os.path.join(dst_dir, "case_0", "t1.npy"))
+
+    # already converted files are skipped
+    assert convert_nii_dir(str(src_dir), dst_dir) == []
+
+    for path, data in zip(paths, arrays):
+        dst_path = os.path.join(dst_dir, "case_0", os.path.basename(path))
+        loaded = load_converted_nii(dst_path)
+        assert isinstance(loaded, np.memmap)
+        np.testing.assert_array_equal(loaded, load_nii(path))
+        np.testing.assert_array_equal(loaded[2:4], data[2:4])
+
+        converted_header = read_converted_nii_header(dst_path)
+        assert converted_header["shape"] == header["shape"]
+        assert converted_header["spacing"] == header["spacing"]
+
+    # files with a missing header are converted again
+    os.remove(os.path.join(dst_dir, "case_0", "t2.json"))
+    assert convert_nii_dir(str(src_dir), dst_dir) == [
+        os.path.join(dst_dir, "case_0", "t2.npy")]
+
+    # files converted to the same path are detected
+    _write_dummy_nii(str(sub_dir.join("t1.nii")))
+    with pytest.raises(ValueError):
+        convert_nii_dir(str(src_dir), dst_dir, overwrite=True)
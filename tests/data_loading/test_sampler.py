@@ -7,8 +7,11 @@ from delira.data_loading.sampler import LambdaSampler, \
     PrevalenceSequentialSampler, \
     RandomSampler, \
     SequentialSampler, \
+    ShardedSampler, \
     StoppingPrevalenceRandomSampler, \
-    WeightedRandomSampler
+    StoppingPrevalenceSequentialSampler, \
+    WeightedRandomSampler, \
+    WeightedPrevalenceRandomSampler
 from . import DummyDataset
 
 
@@ -59,6 +62,11 @@ class SamplerTest(unittest.TestCase):
         # ToDo add test considering actual sampling strategy
         self.assertEqual(len(sampler(5)), 5)
 
+        # each batch should contain the same number of samples per class
+        labels = [dset[_idx]["label"] for _idx in sampler(30)]
+        self.assertEqual([labels.count(label) for label in range(3)],
+                         [10, 10, 10])
+
     def test_random_sampler(self):
         np.random.seed(1)
         dset = DummyDataset(600, [0.5, 0.3, 0.2])
@@ -113,6 +121,15 @@ class SamplerTest(unittest.TestCase):
                 self.assertEqual(
                     len(set([dset[_idx]["label"] for _idx in sample])), 3)
 
+        sampler = StoppingPrevalenceSequentialSampler.from_dataset(dset)
+        self.assertEqual(len(sampler), 360)
+
+        with self.assertRaises(StopIteration):
+            for i in range(121):
+                sample = sampler(3)
+                self.assertEqual(
+                    len(set([dset[_idx]["label"] for _idx in sample])), 3)
+
 
 def test_weighted_sampler():
     np.random.seed(1)
@@ -143,5 +160,97 @@ def test_weighted_prevalence_sampler():
     assert abs(label_list.count(2) / n_draw - (1 / 3)) < 0.1
 
 
+def test_sharded_sampler():
+    np.random.seed(1)
+    dset = DummyDataset(600, [0.5, 0.3, 0.2])
+
+    samplers = [ShardedSampler.from_dataset(dset, RandomSampler,
+                                            num_replicas=7, rank=rank,
+                                            replacement=False)
+                for rank in range(7)]
+
+    # all ranks have the same length (padded)
+    assert all(len(sampler) == 86 for sampler in samplers)
+
+    shards = [sampler(86) for sampler in samplers]
+    # the shards are contiguous blocks of the stream, only the last rank
+    # contains the padding
+    assert len(set(np.concatenate(shards)[:600])) == 600
+    assert set(np.concatenate(shards)) == set(range(600))
+
+    # without padding, each index is sampled exactly once
+    samplers = [ShardedSampler.from_dataset(dset, RandomSampler,
+                                            num_replicas=7, rank=rank,
+                                            pad=False, replacement=False)
+                for rank in range(7)]
+    assert [len(sampler) for sampler in samplers] == [86] * 5 + [85] * 2
+    shards = [sampler(86) for sampler in samplers]
+    assert sorted(np.concatenate(shards)) == list(range(600))
+
+    # the interleaved classes of the prevalence samplers are kept per rank
+    labels = [dset[_idx]["label"] for _idx in range(600)]
+    for rank in range(3):
+        sampler = ShardedSampler.from_dataset(
+            dset, PrevalenceSequentialSampler, num_replicas=3, rank=rank,
+            shuffle_batch=False)
+        batch = sampler(6)
+        assert sorted(labels[_idx] for _idx in batch) == [0, 0, 1, 1, 2, 2]
+
+    # random state of the process is not affected
+    state = np.random.get_state()[1].copy()
+    sampler = ShardedSampler(RandomSampler(dset), num_replicas=2, rank=0,
+                             drop_last=True)
+    first_epoch = sampler(300)
+    np.testing.assert_array_equal(np.random.get_state()[1], state)
+
+    # new shuffling in next epoch
+    try:
+        sampler(1)
+    except StopIteration:
+        pass
+    assert not np.array_equal(first_epoch, sampler(300))
+
+    # explicitly setting the epoch reproduces the stream
+    try:
+        sampler(1)
+    except StopIteration:
+        pass
+    sampler.set_epoch(0)
+    np.testing.assert_array_equal(first_epoch, sampler(300))
+
+
+def test_sampler_state():
+    np.random.seed(1)
+    dset = DummyDataset(600, [0.5, 0.3, 0.2])
+
+    for sampler_cls in [RandomSampler, PrevalenceSequentialSampler]:
+        sampler = sampler_cls.from_dataset(dset)
+        sampler(100)
+        state = sampler.state_dict()
+        expected = sampler(100)
+
+        # a new sampler continues at the saved position
+        restored = sampler_cls.from_dataset(dset)
+        restored.load_state_dict(state)
+        np.random.seed(2)
+        np.testing.assert_array_equal(np.sort(restored(100)),
+                                      np.sort(expected))
+
+    # the state of one rank restores the shards of all ranks
+    shards = [ShardedSampler(RandomSampler(dset), num_replicas=2, rank=rank)
+              for rank in range(2)]
+    shards[0](50)
+    state = shards[0].state_dict()
+    expected = shards[0](50)
+    shards[1](50)
+    expected_other = shards[1](50)
+
+    for rank, _expected in enumerate([expected, expected_other]):
+        restored = ShardedSampler(RandomSampler(dset), num_replicas=2,
+                                  rank=rank)
+        restored.load_state_dict(state)
+        np.testing.assert_array_equal(restored(50), _expected)
+
+
 if __name__ == '__main__':
     unittest.main()
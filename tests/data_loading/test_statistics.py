@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from delira.data_loading import DatasetStatistics, LoadSample, \
+    WeightedRandomSampler
+from delira.data_loading.sampler import WeightedPrevalenceRandomSampler
+
+from . import DummyDataset
+
+
+def test_dataset_statistics(tmpdir):
+    dataset = DummyDataset(300, [0.5, 0.3, 0.2])
+    data = np.stack([dataset[idx]["data"] for idx in range(len(dataset))])
+
+    serial = DatasetStatistics.from_dataset(dataset, n_workers=1)
+    parallel = DatasetStatistics.from_dataset(dataset, n_workers=3)
+
+    for statistics in (serial, parallel):
+        assert statistics.n_samples == 300
+        assert np.isclose(statistics.mean(channel=0), data.mean())
+        assert np.isclose(statistics.std(channel=0), data.std())
+        assert np.isclose(statistics.min(channel=None), data.min())
+        assert np.isclose(statistics.percentile(50, channel=0),
+                          np.percentile(data, 50), atol=1e-3)
+        assert statistics.label_counts == {0: 150, 1: 90, 2: 60}
+        assert statistics.shapes["data"][0] == (28, 28)
+
+    np.testing.assert_array_equal(parallel.labels, serial.labels)
+
+    # save and reload sidecar
+    file_name = str(tmpdir.join("statistics.json"))
+    parallel.save(file_name)
+    loaded = DatasetStatistics.load(file_name)
+    assert np.isclose(loaded.std(channel=0), parallel.std(channel=0))
+    assert np.isclose(loaded.percentile(90, channel=0),
+                      parallel.percentile(90, channel=0))
+
+    # normalization with dataset statistics
+    sample_fn = LoadSample({"data": ["a", "b"]},
+                           lambda path: dataset[0]["data"][0],
+                           normalize=["data"],
+                           norm_fn=loaded.norm_fn(mode="zero_mean_unit_std"))
+    sample = sample_fn("")
+    np.testing.assert_allclose(
+        sample["data"][0], (dataset[0]["data"][0] - data.mean()) / data.std())
+
+    # initialize samplers
+    sampler = WeightedPrevalenceRandomSampler.from_statistics(loaded)
+    assert len(sampler) == 300
+    assert len(WeightedRandomSampler.from_statistics(loaded)) == 300
+
+    # samplers can't be initialized without labels
+    with pytest.raises(ValueError):
+        WeightedRandomSampler.from_statistics(
+            DatasetStatistics.from_dataset(dataset, n_workers=1,
+                                           label_key=None))
+
+
+class _SubclassedStatistics(DatasetStatistics):
+    pass
+
+
+def test_dataset_statistics_subclass():
+    dataset = DummyDataset(30, [0.5, 0.3, 0.2])
+
+    # serial and parallel computation return instances of the subclass
+    for n_workers in (1, 3):
+        statistics = _SubclassedStatistics.from_dataset(dataset,
+                                                        n_workers=n_workers)
+        assert isinstance(statistics, _SubclassedStatistics)
+        assert statistics.n_samples == 30
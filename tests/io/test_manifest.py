@@ -0,0 +1,84 @@
+import os
+
+from delira.io import CheckpointManifest
+from delira.io import manifest as manifest_module
+from delira.io.manifest import ChecksumWriter, file_checksum
+from delira.training import BaseNetworkTrainer
+
+
+def test_checkpoint_manifest(tmpdir, monkeypatch):
+    save_path = str(tmpdir)
+
+    def write_checkpoint(file_name, content):
+        with open(os.path.join(save_path, file_name), "wb") as f:
+            writer = ChecksumWriter(f)
+            writer.write(content)
+        return writer.checksum
+
+    # no manifest: fall back to scanning the directory
+    for epoch in range(3):
+        write_checkpoint("checkpoint_epoch_%d.pt" % epoch, b"x" * epoch)
+    write_checkpoint("checkpoint_best.pt", b"best")
+    write_checkpoint("checkpoint_step.pt", b"step")
+
+    assert BaseNetworkTrainer._search_for_prev_state(
+        save_path, [".pt"]) == ("checkpoint_epoch_2.pt", 2)
+
+    manifest = CheckpointManifest(save_path)
+    assert not manifest.load()
+    assert manifest.latest() is None
+
+    for epoch in range(3):
+        file_name = "checkpoint_epoch_%d.pt" % epoch
+        checksum = write_checkpoint(file_name, b"y" * (epoch + 1))
+        assert checksum == file_checksum(os.path.join(save_path, file_name))
+        manifest.add(os.path.join(save_path, file_name), epoch,
+                     val_score=epoch / 10, checksum=checksum)
+
+    manifest.add(os.path.join(save_path, "checkpoint_best.pt"), 1,
+                 val_score=0.1, checksum=file_checksum(
+                     os.path.join(save_path, "checkpoint_best.pt")),
+                 is_best=True)
+
+    # a new manifest reads all entries from disk
+    manifest = CheckpointManifest(save_path)
+    assert manifest.load()
+    assert [entry["epoch"] for entry in manifest.entries] == [0, 1, 2]
+    assert manifest.best()["file"] == "checkpoint_best.pt"
+    assert manifest.best(verify=True)["val_score"] == 0.1
+    assert manifest.latest([".pth"]) is None
+
+    # the manifest is used instead of scanning the directory
+    write_checkpoint("checkpoint_epoch_5.pt", b"unindexed")
+    assert BaseNetworkTrainer._search_for_prev_state(
+        save_path, [".pt"]) == ("checkpoint_epoch_2.pt", 2)
+
+    # unmodified checkpoints are verified without reading them
+    def fail_checksum(file_name, chunk_size=2 ** 22):
+        raise AssertionError("checkpoint %s was read" % file_name)
+
+    with monkeypatch.context() as m:
+        m.setattr(manifest_module, "file_checksum", fail_checksum)
+        assert BaseNetworkTrainer._search_for_prev_state(
+            save_path, [".pt"], verify=True) == ("checkpoint_epoch_2.pt", 2)
+
+    # a modified checkpoint of the same size is verified by its checksum
+    file_name = os.path.join(save_path, "checkpoint_epoch_2.pt")
+    write_checkpoint("checkpoint_epoch_2.pt", b"yyy")
+    os.utime(file_name, ns=(0, 0))
+    assert manifest.verify(manifest.latest())
+    write_checkpoint("checkpoint_epoch_2.pt", b"zzz")
+    os.utime(file_name, ns=(0, 0))
+    assert not manifest.verify(manifest.latest())
+
+    # corrupt checkpoints are skipped during verification
+    write_checkpoint("checkpoint_epoch_2.pt", b"corrupt")
+    assert BaseNetworkTrainer._search_for_prev_state(
+        save_path, [".pt"], verify=True) == ("checkpoint_epoch_1.pt", 1)
+
+    # a corrupt manifest is ignored
+    with open(manifest.path, "w") as f:
+        f.write("{")
+    assert not CheckpointManifest(save_path).load()
+    assert BaseNetworkTrainer._search_for_prev_state(
+        save_path, [".pt"]) == ("checkpoint_epoch_5.pt", 5)
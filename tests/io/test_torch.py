@@ -1,3 +1,4 @@
+import importlib.util
 import unittest
 
 from delira import get_backends
@@ -33,6 +34,92 @@ class IoTorchTest(unittest.TestCase):
         torch_save_checkpoint("./model.pt", model=net)
         self.assertTrue(torch_load_checkpoint("./model.pt"))
 
+    @unittest.skipIf("TORCH" not in get_backends(),
+                     reason="No TORCH Backend Installed")
+    def test_export_torchscript(self):
+        import os
+        import tempfile
+
+        import numpy as np
+        import torch
+        from delira.io import torch_export_torchscript, \
+            torch_load_torchscript
+        from delira.models import GenerativeAdversarialNetworkBasePyTorch, \
+            UNet2dPyTorch
+        from delira.training import TorchScriptPredictor
+
+        tmp_dir = tempfile.mkdtemp()
+
+        net = UNet2dPyTorch(3, in_channels=1, depth=2, start_filts=4)
+        data = np.random.rand(2, 1, 32, 32).astype(np.float32)
+
+        file = os.path.join(tmp_dir, "unet.pt")
+        metadata = torch_export_torchscript(
+            net, file, {"x": torch.from_numpy(data)},
+            key_mapping={"x": "data"})
+        self.assertEqual(metadata["input_names"], ["x"])
+        self.assertEqual(metadata["output_names"], ["pred"])
+        # the model's mode is restored
+        self.assertTrue(net.training)
+
+        with self.assertRaises(KeyError):
+            torch_export_torchscript(net, file, {"y": torch.rand(1)})
+
+        module, loaded_metadata = torch_load_torchscript(file)
+        self.assertEqual(loaded_metadata, metadata)
+
+        net.eval()
+        with torch.no_grad():
+            expected = net(torch.from_numpy(data))["pred"].numpy()
+
+        # labels are passed through without being converted
+        predictor = TorchScriptPredictor(file)
+        preds = predictor.predict({"data": data,
+                                   "label": np.zeros(2, dtype=np.int64)})
+        self.assertIsInstance(preds["pred"], np.ndarray)
+        np.testing.assert_allclose(preds["pred"], expected, rtol=1e-4,
+                                   atol=1e-5)
+
+        # a different batch size than during export
+        preds = predictor.predict({"data": data[:1].astype(np.float64)})
+        self.assertEqual(preds["pred"].shape, (1, 3, 32, 32))
+
+        gan = GenerativeAdversarialNetworkBasePyTorch(1, 16)
+        file = os.path.join(tmp_dir, "gan.pt")
+        metadata = torch_export_torchscript(
+            gan, file, {"real_image_batch": torch.rand(2, 1, 64, 64)},
+            freeze=False)
+        self.assertEqual(metadata["output_names"],
+                         ["discr_fake", "discr_real", "fake_images"])
+
+        preds = TorchScriptPredictor(file, key_mapping={
+            "real_image_batch": "data"}).predict(
+            {"data": np.random.rand(3, 1, 64, 64)})
+        self.assertEqual(preds["fake_images"].shape, (3, 1, 64, 64))
+
+    @unittest.skipIf("TORCH" not in get_backends(),
+                     reason="No TORCH Backend Installed")
+    @unittest.skipIf(importlib.util.find_spec("onnx") is None,
+                     reason="No ONNX Installed")
+    def test_export_onnx(self):
+        import os
+        import tempfile
+
+        import onnx
+        import torch
+        from delira.io import torch_export_onnx
+        from delira.models import UNet2dPyTorch
+
+        file = os.path.join(tempfile.mkdtemp(), "unet.onnx")
+        output_names = torch_export_onnx(
+            UNet2dPyTorch(3, in_channels=1, depth=2, start_filts=4), file,
+            {"x": torch.rand(2, 1, 32, 32)})
+        self.assertEqual(output_names, ["pred"])
+
+        graph = onnx.load(file).graph
+        self.assertEqual([inp.name for inp in graph.input], ["x"])
+        self.assertEqual([out.name for out in graph.output], ["pred"])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,12 +1,44 @@
 import logging
+import threading
 import unittest
 
 import numpy as np
-from trixi.logger import NumpyPlotFileLogger
+from trixi.logger import AbstractLogger, NumpyPlotFileLogger
 
 from delira.logging import TrixiHandler
 
 
+class RecordingLogger(AbstractLogger):
+    def __init__(self, release=None, **kwargs):
+        super().__init__(**kwargs)
+        self.values = []
+        self.texts = []
+        self._release = release
+
+    def show_value(self, value, name="Value", counter=None, tag=None):
+        if self._release is not None:
+            self._release.wait()
+        self.values.append((name, value))
+
+    def show_text(self, text, **kwargs):
+        self.texts.append(text)
+
+    def show_image(self, *args, **kwargs):
+        pass
+
+    def show_barplot(self, *args, **kwargs):
+        pass
+
+    def show_lineplot(self, *args, **kwargs):
+        pass
+
+    def show_scatterplot(self, *args, **kwargs):
+        pass
+
+    def show_piechart(self, *args, **kwargs):
+        pass
+
+
 class TrixiHandlerTest(unittest.TestCase):
 
     def test_trixi_logger(self):
@@ -23,6 +55,52 @@ class TrixiHandlerTest(unittest.TestCase):
                 {'image': {"image": np.random.rand(28, 28),
                            "name": "test_img"}})
 
+    def test_queued_trixi_handler(self):
+        record_kwargs = {"name": __name__, "level": logging.INFO,
+                         "pathname": __file__, "lineno": 0, "args": None,
+                         "exc_info": None}
+
+        def make_record(msg):
+            return logging.LogRecord(msg=msg, **record_kwargs)
+
+        with self.assertRaises(ValueError):
+            TrixiHandler(RecordingLogger, drop_policy="invalid")
+
+        # all records are written in order by the background thread
+        handler = TrixiHandler(RecordingLogger, queue_size=10)
+        for idx in range(5):
+            handler.handle(make_record(
+                {"value": {"value": idx, "name": "loss"}}))
+        handler.handle(make_record({"text": {"text": "done"}}))
+        handler.handle(make_record("ignored"))
+        handler.flush()
+
+        self.assertEqual(handler._logger.values,
+                         [("loss", idx) for idx in range(5)])
+        self.assertEqual(handler._logger.texts, ["done"])
+        handler.close()
+
+        # block the background thread to fill the queue
+        release = threading.Event()
+        handler = TrixiHandler(RecordingLogger, queue_size=2,
+                               drop_policy="drop_oldest",
+                               coalesce_scalars=True, release=release)
+        handler.handle(make_record({"value": {"value": -1, "name": "acc"}}))
+        while not handler._queue.empty():
+            pass
+
+        for idx in range(4):
+            handler.handle(make_record(
+                {"value": {"value": idx, "name": "loss"}}))
+        self.assertEqual(handler.num_dropped, 2)
+
+        release.set()
+        handler.close()
+
+        # the queued writes to "loss" are coalesced to the latest value
+        self.assertEqual(handler._logger.values,
+                         [("acc", -1), ("loss", 3)])
+
 
 if __name__ == '__main__':
     unittest.main()
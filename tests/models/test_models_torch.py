@@ -151,6 +151,91 @@ class TorchModelTest(unittest.TestCase):
                     pass
                 gc.collect()
 
+    @unittest.skipIf("TORCH" not in get_backends(),
+                     reason="torch backend not installed")
+    def test_gan_fused_step(self):
+        from delira.models import GenerativeAdversarialNetworkBasePyTorch
+        from delira.training.train_utils import \
+            create_optims_gan_default_pytorch
+        from delira.utils.context_managers import DefaultOptimWrapperTorch
+        import torch
+
+        model = GenerativeAdversarialNetworkBasePyTorch(
+            1, 16, fused_step=True, n_critic=2, n_gen=1)
+        optim = {k: DefaultOptimWrapperTorch(v)
+                 for k, v in create_optims_gan_default_pytorch(
+                     model, torch.optim.Adam).items()}
+        losses = {"bce": torch.nn.BCELoss()}
+
+        # the generator is updated in every second step only
+        for step, update_gen in enumerate((False, True, False)):
+            gen_params = [param.clone() for param in model.gen.parameters()]
+            discr_params = [param.clone()
+                            for param in model.discr.parameters()]
+
+            _, loss_vals, _ = model.closure(
+                model, {"data": torch.rand(4, 1, 64, 64)}, optim, losses)
+
+            self.assertEqual(sorted(loss_vals), ["bce_adversarial",
+                                                 "bce_discr_fake",
+                                                 "bce_discr_real"])
+            self.assertIsInstance(loss_vals["bce_adversarial"], float)
+            self.assertEqual(
+                any(not torch.equal(old, new) for old, new in zip(
+                    gen_params, model.gen.parameters())), update_gen)
+            self.assertTrue(any(not torch.equal(old, new) for old, new in
+                                zip(discr_params, model.discr.parameters())))
+
+            # only the discriminator's gradients are computed for its update
+            if step == 0:
+                self.assertTrue(all(param.grad is None
+                                    for param in model.gen.parameters()))
+
+        _, loss_vals, preds = model.closure(
+            model, {"data": torch.rand(4, 1, 64, 64)}, {}, losses)
+        self.assertEqual(sorted(loss_vals), ["val_bce_adversarial",
+                                             "val_bce_discr_fake",
+                                             "val_bce_discr_real"])
+        self.assertEqual(tuple(preds["fake_images"].shape), (4, 1, 64, 64))
+
+        # the update schedule is continued after loading the weights
+        state = model.state_dict()
+        restored = GenerativeAdversarialNetworkBasePyTorch(
+            1, 16, fused_step=True, n_critic=2, n_gen=1)
+        restored.load_state_dict(state)
+        self.assertEqual(restored._num_train_steps, 3)
+
+        # weights saved without the number of steps can still be loaded
+        state.pop("_extra_state")
+        restored = GenerativeAdversarialNetworkBasePyTorch(1, 16)
+        restored.load_state_dict(state)
+        self.assertEqual(restored._num_train_steps, 0)
+
+    @unittest.skipIf("TORCH" not in get_backends(),
+                     reason="torch backend not installed")
+    def test_gan_default_step(self):
+        from delira.models import GenerativeAdversarialNetworkBasePyTorch
+        from delira.training.train_utils import \
+            create_optims_gan_default_pytorch
+        from delira.utils.context_managers import DefaultOptimWrapperTorch
+        import torch
+
+        model = GenerativeAdversarialNetworkBasePyTorch(1, 16)
+        optim = {k: DefaultOptimWrapperTorch(v)
+                 for k, v in create_optims_gan_default_pytorch(
+                     model, torch.optim.Adam).items()}
+
+        gen_params = [param.clone() for param in model.gen.parameters()]
+        discr_params = [param.clone() for param in model.discr.parameters()]
+
+        # both networks are updated in each step
+        model.closure(model, {"data": torch.rand(4, 1, 64, 64)}, optim,
+                      {"bce": torch.nn.BCELoss()})
+        self.assertTrue(any(not torch.equal(old, new) for old, new in
+                            zip(gen_params, model.gen.parameters())))
+        self.assertTrue(any(not torch.equal(old, new) for old, new in
+                            zip(discr_params, model.discr.parameters())))
+
 
 if __name__ == '__main__':
     # checks if networks are valid (not if they learn something)
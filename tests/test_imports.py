@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from delira import get_backends
+
+HEAVY_MODULES = ["torch", "tensorflow", "sklearn", "skimage", "SimpleITK",
+                 "trixi"]
+
+
+def _run_import(statement):
+    """
+    Runs an import statement in a fresh interpreter and returns the import
+    time and all heavy modules imported by it
+
+    """
+    code = "\n".join([
+        "import json, sys, time",
+        "start = time.perf_counter()",
+        statement,
+        "duration = time.perf_counter() - start",
+        "print(json.dumps([duration, [name for name in %r "
+        "if name in sys.modules]]))" % HEAVY_MODULES,
+    ])
+
+    output = subprocess.check_output([sys.executable, "-c", code])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def test_import_delira_lazy():
+    duration, imported = _run_import(
+        "import delira, delira.data_loading, delira.io, delira.logging, "
+        "delira.models, delira.training, delira.utils")
+
+    assert imported == []
+    # loose bound to catch regressions (importing torch alone takes longer)
+    assert duration < 5.
+
+
+def test_import_light_classes_lazy():
+    _, imported = _run_import(
+        "from delira.data_loading import AbstractDataset, BaseCacheDataset, "
+        "RandomSampler, SequentialSampler\n"
+        "from delira.io import CheckpointManifest\n"
+        "from delira.training.callbacks import EarlyStopping")
+
+    assert imported == []
+
+
+@pytest.mark.skipif("TORCH" not in get_backends(),
+                    reason="No TORCH Backend installed")
+def test_import_backend_on_access():
+    _, imported = _run_import(
+        "import delira.models\n"
+        "delira.models.AbstractPyTorchNetwork")
+
+    assert "torch" in imported
+
+
+def test_import_delira_eager():
+    # simulates Python < 3.7, where all attributes are imported immediately
+    _, imported = _run_import(
+        "import functools, importlib.util\n"
+        "spec = importlib.util.spec_from_file_location("
+        "'delira._lazy', %r)\n"
+        "lazy = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(lazy)\n"
+        "lazy.lazy_module_attributes = functools.partial("
+        "lazy.lazy_module_attributes, eager=True)\n"
+        "sys.modules['delira._lazy'] = lazy\n"
+        "import delira, delira.data_loading, delira.io, delira.logging, "
+        "delira.models, delira.training, delira.utils\n"
+        "assert 'BaseDataManager' in vars(delira.data_loading)"
+        % os.path.join(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))), "delira", "_lazy.py"))
+
+    if "TORCH" in get_backends():
+        assert "torch" in imported
@@ -4,7 +4,10 @@ from delira.training import Parameters
 from delira import get_backends
 import unittest
 
+import os
+
 import numpy as np
+from copy import deepcopy
 from functools import partial
 import logging
 logger = logging.getLogger(__name__)
@@ -26,6 +29,59 @@ class DummyDataset(AbstractDataset):
         return self.__getitem__(index)
 
 
+if "TORCH" in get_backends():
+    import torch
+    from delira.models.classification import \
+        ClassificationNetworkBasePyTorch
+
+    # defined at module level to be picklable by spawned processes
+    class DistributedDummyNetworkTorch(ClassificationNetworkBasePyTorch):
+
+        def __init__(self):
+            super().__init__(32, 1)
+
+        def forward(self, x):
+            return {"pred": self.module(x)}
+
+        @staticmethod
+        def _build_model(in_channels, n_outputs):
+            return torch.nn.Sequential(
+                torch.nn.Linear(in_channels, 64),
+                torch.nn.ReLU(),
+                torch.nn.Linear(64, n_outputs)
+            )
+
+        @staticmethod
+        def prepare_batch(batch_dict, input_device, output_device):
+            return {"data": torch.from_numpy(batch_dict["data"]
+                                             ).to(input_device, torch.float),
+                    "label": torch.from_numpy(batch_dict["label"]
+                                              ).to(output_device,
+                                                   torch.float)}
+
+    def _reduce_metrics_worker(rank, init_method, save_path):
+        from delira.training import PyTorchNetworkTrainer
+
+        trainer = PyTorchNetworkTrainer(
+            DistributedDummyNetworkTorch(), os.path.join(save_path,
+                                                         str(rank)),
+            key_mapping={"x": "data"},
+            losses={"CE": torch.nn.BCEWithLogitsLoss()},
+            optimizer_cls=torch.optim.Adam,
+            distributed=True, world_size=2, rank=rank,
+            dist_init_method=init_method)
+
+        try:
+            # the metrics are averaged across processes weighted by the
+            # number of samples
+            reduced = trainer._reduce_metrics_across_processes(
+                {"a": float(rank), "b": 2.}, weight=rank + 1)
+            np.testing.assert_allclose(reduced["a"], 2. / 3.)
+            np.testing.assert_allclose(reduced["b"], 2.)
+        finally:
+            torch.distributed.destroy_process_group()
+
+
 class ExperimentTest(unittest.TestCase):
 
     def setUp(self) -> None:
@@ -125,6 +181,22 @@ class ExperimentTest(unittest.TestCase):
                                 bias_initializer='glorot_uniform')]
                     )
 
+            class DummyNetworkTfPipeline(DummyNetworkTf):
+                def __init__(self):
+                    AbstractTfNetwork.__init__(self)
+                    self.model = self._build_model(1)
+
+                    # inputs are taken from the trainer's input pipeline
+                    self._add_inputs({
+                        "images": ("data", tf.float32, [None, 32]),
+                        "labels": ("label", tf.float32, [None, 1])})
+
+                    images = self.inputs["images"]
+                    self.outputs_train["pred"] = self.model(images,
+                                                            training=True)
+                    self.outputs_eval["pred"] = self.model(images,
+                                                           training=False)
+
             test_cases_tf.append(
                 (
                     Parameters(fixed_params={
@@ -142,9 +214,16 @@ class ExperimentTest(unittest.TestCase):
                     ),
                     500,
                     50,
-                    DummyNetworkTf)
+                    DummyNetworkTf,
+                    {"images": "data"})
             )
 
+            # all pipeline inputs must be fed for predictions
+            test_cases_tf.append(
+                (deepcopy(test_cases_tf[0][0]), 500, 50,
+                 DummyNetworkTfPipeline,
+                 {"images": "data", "labels": "label"}))
+
         self._test_cases_tf = test_cases_tf
         logger.info(self._testMethodName)
 
@@ -271,6 +350,198 @@ class ExperimentTest(unittest.TestCase):
                                     val_split=val_split,
                                     num_splits=2)
 
+    @unittest.skipIf("TORCH" not in get_backends(),
+                     reason="No TORCH Backend installed")
+    def test_trainer_distributed_torch(self):
+        import os
+        import socket
+        import tempfile
+        import torch
+        from delira.training import PyTorchNetworkTrainer
+        from delira.data_loading import BaseDataManager
+
+        for case in self._test_cases_torch:
+            with self.subTest(case=case):
+                (params, dataset_length_train, dataset_length_test,
+                 val_score_key, val_score_mode, network_cls) = case
+
+                with socket.socket() as sock:
+                    sock.bind(("127.0.0.1", 0))
+                    port = sock.getsockname()[1]
+
+                save_path = tempfile.mkdtemp()
+                trainer = PyTorchNetworkTrainer(
+                    network_cls(), save_path, key_mapping={"x": "data"},
+                    losses=params.nested_get("losses"),
+                    optimizer_cls=params.nested_get("optimizer_cls"),
+                    optimizer_params=params.nested_get("optimizer_params"),
+                    val_metrics=params.nested_get("val_metrics"),
+                    distributed=True, world_size=1, rank=0,
+                    dist_init_method="tcp://127.0.0.1:%d" % port)
+
+                try:
+                    self.assertIsInstance(
+                        trainer.module,
+                        torch.nn.parallel.DistributedDataParallel)
+                    self.assertTrue(trainer.is_main_process)
+
+                    dmgr_train = BaseDataManager(
+                        DummyDataset(dataset_length_train), 16, 1, None)
+                    dmgr_test = BaseDataManager(
+                        DummyDataset(dataset_length_test), 16, 1, None)
+
+                    trainer.train(1, dmgr_train, dmgr_test, val_score_key,
+                                  val_score_mode, verbose=False)
+
+                    # checkpoints contain the unwrapped network
+                    state = trainer.load_state(
+                        os.path.join(save_path, "checkpoint_epoch_1.pt"))
+                    self.assertFalse(any(k.startswith("module.module")
+                                         for k in state["model"]))
+                    trainer.update_state(
+                        os.path.join(save_path, "checkpoint_epoch_1.pt"))
+
+                    reduced = trainer._reduce_metrics_across_processes(
+                        {"a": 1., "b": np.float32(3.)})
+                    self.assertDictEqual(reduced, {"a": 1., "b": 3.})
+                    reduced = trainer._reduce_metrics_across_processes(
+                        {"a": 1., "b": np.float32(3.)}, weight=5)
+                    self.assertDictEqual(reduced, {"a": 1., "b": 3.})
+                finally:
+                    torch.distributed.destroy_process_group()
+
+    @unittest.skipIf("TORCH" not in get_backends(),
+                     reason="No TORCH Backend installed")
+    def test_experiment_run_distributed_torch(self):
+        import socket
+        import tempfile
+        from sklearn.metrics import mean_absolute_error
+        from delira.training import PyTorchExperiment
+        from delira.data_loading import BaseDataManager
+
+        # cross-process reduction of metrics in two CPU processes (gloo)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        torch.multiprocessing.spawn(
+            _reduce_metrics_worker,
+            args=("tcp://127.0.0.1:%d" % port, tempfile.mkdtemp()),
+            nprocs=2, join=True)
+
+        params = Parameters(fixed_params={
+            "model": {},
+            "training": {
+                "losses": {"CE": torch.nn.BCEWithLogitsLoss()},
+                "optimizer_cls": torch.optim.Adam,
+                "optimizer_params": {"lr": 1e-3},
+                "num_epochs": 1,
+                "val_metrics": {"val_mae": mean_absolute_error},
+                "lr_sched_cls": None,
+                "lr_sched_params": {}
+            }
+        })
+
+        save_path = tempfile.mkdtemp()
+        exp = PyTorchExperiment(params, DistributedDummyNetworkTorch,
+                                key_mapping={"x": "data"},
+                                val_score_key="val_mae",
+                                val_score_mode="lowest",
+                                save_path=save_path)
+
+        dmgr_train = BaseDataManager(DummyDataset(64), 16, 1, None)
+        dmgr_test = BaseDataManager(DummyDataset(32), 16, 1, None)
+
+        model = exp.run(dmgr_train, dmgr_test, distributed=True,
+                        world_size=2)
+
+        # the network is restored from the main process' checkpoint
+        self.assertIsInstance(model, DistributedDummyNetworkTorch)
+        run_path = os.path.join(exp.save_path, "checkpoints", "run_00")
+        self.assertTrue(any(_file.endswith(".pt")
+                            for _file in os.listdir(run_path)))
+
+    @unittest.skipIf("TORCH" not in get_backends(),
+                     reason="No TORCH Backend installed")
+    def test_trainer_resume_mid_epoch_torch(self):
+        import os
+        import tempfile
+        from delira.training import PyTorchNetworkTrainer
+        from delira.data_loading import BaseDataManager, RandomSampler
+        from delira.io import CheckpointManifest
+
+        class IndexDataset(DummyDataset):
+            def __getitem__(self, index):
+                return {"data": np.full(32, index, dtype=np.float32),
+                        "label": np.zeros(1)}
+
+        class Interrupt(Exception):
+            pass
+
+        def record(closure, seen, stop_at=None):
+            def _closure(model, data_dict, **kwargs):
+                if kwargs["batch_nr"] == stop_at:
+                    raise Interrupt()
+                seen.append(data_dict["data"][:, 0].numpy().astype(int))
+                return closure(model, data_dict, **kwargs)
+            return _closure
+
+        for case in self._test_cases_torch:
+            with self.subTest(case=case):
+                (params, dataset_length_train, dataset_length_test,
+                 val_score_key, val_score_mode, network_cls) = case
+
+                dmgr = BaseDataManager(IndexDataset(100), 16, 1, None,
+                                       sampler_cls=RandomSampler,
+                                       sampler_kwargs={"replacement": False})
+
+                def create_trainer(save_path):
+                    return PyTorchNetworkTrainer(
+                        network_cls(), save_path,
+                        key_mapping={"x": "data"},
+                        losses=params.nested_get("losses"),
+                        optimizer_cls=params.nested_get("optimizer_cls"),
+                        optimizer_params=params.nested_get(
+                            "optimizer_params"),
+                        step_save_freq=2)
+
+                # uninterrupted reference run
+                np.random.seed(0)
+                seen_ref = []
+                trainer = create_trainer(tempfile.mkdtemp())
+                trainer.closure_fn = record(trainer.closure_fn, seen_ref)
+                trainer.train(1, dmgr, verbose=False)
+
+                # interrupted run, which will be resumed after batch 3
+                np.random.seed(0)
+                seen = []
+                save_path = tempfile.mkdtemp()
+                trainer = create_trainer(save_path)
+                trainer.closure_fn = record(trainer.closure_fn, seen,
+                                            stop_at=5)
+                with self.assertRaises(Interrupt):
+                    trainer.train(1, dmgr, verbose=False)
+                self.assertTrue(os.path.isfile(
+                    os.path.join(save_path, "checkpoint_step.pt")))
+
+                np.random.seed(1)
+                trainer = create_trainer(save_path)
+                self.assertEqual(trainer.start_epoch, 1)
+                trainer.closure_fn = record(trainer.closure_fn, seen)
+                trainer.train(1, dmgr, verbose=False)
+
+                # batches 4 and 5 are computed twice, all others once
+                self.assertEqual(len(seen), len(seen_ref) + 1)
+                for batch, batch_ref in zip(seen[:4] + seen[5:], seen_ref):
+                    np.testing.assert_array_equal(batch, batch_ref)
+
+                # the step checkpoint is superseded by the epoch checkpoint
+                self.assertFalse(os.path.isfile(
+                    os.path.join(save_path, "checkpoint_step.pt")))
+                self.assertEqual(create_trainer(save_path).start_epoch, 2)
+                self.assertEqual(
+                    CheckpointManifest(save_path).latest()["epoch"], 1)
+
     @unittest.skipIf("TF" not in get_backends(),
                      reason="No TF Backend installed")
     def test_experiment_run_tf(self):
@@ -281,10 +552,10 @@ class ExperimentTest(unittest.TestCase):
         for case in self._test_cases_tf:
             with self.subTest(case=case):
                 (params, dataset_length_train, dataset_length_test,
-                 network_cls) = case
+                 network_cls, key_mapping) = case
 
                 exp = TfExperiment(params, network_cls,
-                                   key_mapping={"images": "data"})
+                                   key_mapping=key_mapping)
 
                 dset_train = DummyDataset(dataset_length_train)
                 dset_test = DummyDataset(dataset_length_test)
@@ -303,10 +574,10 @@ class ExperimentTest(unittest.TestCase):
         for case in self._test_cases_tf:
             with self.subTest(case=case):
                 (params, dataset_length_train, dataset_length_test,
-                 network_cls) = case
+                 network_cls, key_mapping) = case
 
                 exp = TfExperiment(params, network_cls,
-                                   key_mapping={"images": "data"},
+                                   key_mapping=key_mapping,
                                    )
 
                 model = network_cls()
@@ -333,11 +604,12 @@ class ExperimentTest(unittest.TestCase):
                             # must raise ValueError
                             with self.assertRaises(ValueError):
                                 (params, dataset_length_train,
-                                 dataset_length_test, network_cls) = case
+                                 dataset_length_test, network_cls,
+                                 key_mapping) = case
 
                                 exp = TfExperiment(
                                     params, network_cls,
-                                    key_mapping={"images": "data"})
+                                    key_mapping=key_mapping)
 
                                 dset = DummyDataset(
                                     dataset_length_test + dataset_length_train)
@@ -356,11 +628,12 @@ class ExperimentTest(unittest.TestCase):
                         for val_split in [0.2, None]:
                             with self.subTest(val_split=val_split):
                                 (params, dataset_length_train,
-                                 dataset_length_test, network_cls) = case
+                                 dataset_length_test, network_cls,
+                                 key_mapping) = case
 
                                 exp = TfExperiment(
                                     params, network_cls,
-                                    key_mapping={"images": "data"})
+                                    key_mapping=key_mapping)
 
                                 dset = DummyDataset(
                                     dataset_length_test + dataset_length_train)
@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from queue import Full
+
+import numpy as np
+
+from delira.training import DynamicBatcher, InferenceServer, Predictor
+
+
+class RecordingModel(object):
+    def __init__(self, delay=0.):
+        self.delay = delay
+        self.batch_sizes = []
+        self.event = threading.Event()
+        self.event.set()
+
+    def __call__(self, x):
+        self.event.wait()
+        time.sleep(self.delay)
+        self.batch_sizes.append(len(x))
+        return {"pred": x * 2, "batch_size": len(x)}
+
+
+class InferenceServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = RecordingModel(delay=0.01)
+        self.predictor = Predictor(self.model, key_mapping={"x": "data"})
+
+    def test_dynamic_batching(self):
+        samples = [np.full((1, 3), idx, dtype=np.float32)
+                   for idx in range(32)]
+
+        with DynamicBatcher(self.predictor, max_batch_size=8,
+                            max_wait_time=0.05) as batcher:
+            futures = [batcher.submit({"data": sample})
+                       for sample in samples]
+            results = [future.result() for future in futures]
+
+            # samples with multiple entries
+            result = batcher.predict({"data": np.ones((3, 3))})
+            self.assertEqual(result["pred"].shape, (3, 3))
+
+            with self.assertRaises(ValueError):
+                batcher.submit({"data": np.ones(())})
+
+            stats = batcher.stats
+
+        for sample, result in zip(samples, results):
+            np.testing.assert_array_equal(result["pred"], sample * 2)
+
+        # concurrent requests were coalesced
+        self.assertLessEqual(max(self.model.batch_sizes), 8)
+        self.assertLess(len(self.model.batch_sizes), 32)
+        self.assertEqual(stats["num_samples"], 35)
+        self.assertEqual(stats["num_batches"], len(self.model.batch_sizes))
+        self.assertIn("latency_p99_ms", stats)
+
+    def test_incompatible_requests(self):
+        samples = [np.ones((3, 3), dtype=np.float32),
+                   np.ones((6, 3), dtype=np.float32),
+                   np.ones((2, 4), dtype=np.float32),
+                   np.ones((2, 4), dtype=np.float64),
+                   np.ones((12, 4), dtype=np.float64),
+                   np.ones((1, 4), dtype=np.float64)]
+
+        with DynamicBatcher(self.predictor, max_batch_size=8,
+                            max_wait_time=0.1) as batcher:
+            # queue all requests before the first batch is collected
+            self.model.event.clear()
+            batcher.submit({"data": np.ones((1, 3))})
+            time.sleep(0.05)
+            futures = [batcher.submit({"data": sample})
+                       for sample in samples]
+            self.model.event.set()
+            results = [future.result() for future in futures]
+
+            with self.assertRaises(ValueError):
+                batcher.submit({"data": np.ones((2, 3)), "idx": 1})
+
+        for sample, result in zip(samples, results):
+            np.testing.assert_array_equal(result["pred"], sample * 2)
+
+        # batches only exceed the maximum size for single large requests
+        self.assertEqual(self.model.batch_sizes, [1, 3, 6, 2, 2, 12, 1])
+
+    def test_backpressure(self):
+        batcher = DynamicBatcher(self.predictor, max_batch_size=1,
+                                 max_queue_size=2).start()
+
+        # block the worker thread
+        self.model.event.clear()
+        futures = [batcher.submit({"data": np.ones((1, 3))})]
+        time.sleep(0.1)
+        futures += [batcher.submit({"data": np.ones((1, 3))})
+                    for _ in range(2)]
+
+        with self.assertRaises(Full):
+            batcher.submit({"data": np.ones((1, 3))})
+        self.assertEqual(batcher.stats["num_rejected"], 1)
+
+        self.model.event.set()
+        for future in futures:
+            future.result()
+        batcher.stop()
+
+    def test_http_server(self):
+        server = InferenceServer(DynamicBatcher(self.predictor), port=0)
+        server.start()
+
+        try:
+            def post(content):
+                request = urllib.request.Request(
+                    server.url + "/predict", json.dumps(content).encode(),
+                    {"Content-Type": "application/json"})
+                with urllib.request.urlopen(request) as response:
+                    return json.loads(response.read())
+
+            self.assertEqual(post({"data": [[1, 2], [3, 4]]})["pred"],
+                             [[2, 4], [6, 8]])
+
+            with self.assertRaises(urllib.error.HTTPError) as e:
+                post({"data": 1})
+            self.assertEqual(e.exception.code, 400)
+
+            # the request body must be a JSON object
+            with self.assertRaises(urllib.error.HTTPError) as e:
+                post([[1, 2], [3, 4]])
+            self.assertEqual(e.exception.code, 400)
+
+            with urllib.request.urlopen(server.url + "/metrics") as response:
+                self.assertEqual(json.loads(response.read())["num_samples"],
+                                 2)
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from delira import get_backends
+from delira.data_loading import AbstractDataset, BaseDataManager
+from delira.training import Parameters
+from delira.training.parameter_sweep import ParameterSweep, \
+    grid_search_space, random_search_space
+
+
+class DummyDataset(AbstractDataset):
+    def __init__(self, length):
+        super().__init__(None, None)
+        self.length = length
+
+    def __getitem__(self, index):
+        return {"data": np.random.rand(32).astype(np.float32),
+                "label": np.random.randint(0, 2, 1).astype(np.float32)}
+
+    def __len__(self):
+        return self.length
+
+
+if "TORCH" in get_backends():
+    import torch
+    from delira.models.classification import \
+        ClassificationNetworkBasePyTorch
+
+    class DummyNetworkTorch(ClassificationNetworkBasePyTorch):
+        def __init__(self, n_hidden=8):
+            super().__init__(32, 1, n_hidden=n_hidden)
+
+        def forward(self, x):
+            return {"pred": self.module(x)}
+
+        @staticmethod
+        def _build_model(in_channels, n_outputs, n_hidden):
+            return torch.nn.Sequential(
+                torch.nn.Linear(in_channels, n_hidden), torch.nn.ReLU(),
+                torch.nn.Linear(n_hidden, n_outputs))
+
+        @staticmethod
+        def prepare_batch(batch_dict, input_device, output_device):
+            data = torch.from_numpy(batch_dict["data"])
+            label = torch.from_numpy(batch_dict["label"])
+            return {"data": data.to(input_device, torch.float),
+                    "label": label.to(output_device, torch.float)}
+
+
+def mean_absolute_error(y_true, y_pred):
+    return np.abs(y_true - y_pred).mean()
+
+
+class ParameterSweepTest(unittest.TestCase):
+
+    def test_search_space(self):
+        params = Parameters(
+            fixed_params={"model": {"a": 1}, "training": {"b": 2}},
+            variable_params={"model": {"n_hidden": [4, 8, 16]},
+                             "training": {"lr": [0.1, 0.01],
+                                          "sizes": [[1, 2]]}})
+
+        grid = grid_search_space(params)
+        self.assertEqual(len(grid), 6)
+        combinations = {(p.model.variable.n_hidden, p.training.variable.lr)
+                        for p in grid}
+        self.assertEqual(len(combinations), 6)
+        for p in grid:
+            self.assertEqual(p.model.fixed.a, 1)
+            self.assertEqual(p.training.variable.sizes, [1, 2])
+
+        # the search space itself is not modified
+        self.assertEqual(params.nested_get("n_hidden"), [4, 8, 16])
+
+        random_params = Parameters(
+            fixed_params={"model": {}, "training": {}},
+            variable_params={
+                "model": {"n_hidden": [4, 8]},
+                "training": {"lr": lambda rng: 10 ** rng.uniform(-4, -1)}})
+
+        samples = random_search_space(random_params, 5, seed=0)
+        self.assertEqual(len(samples), 5)
+        for p in samples:
+            self.assertIn(p.model.variable.n_hidden, [4, 8])
+            self.assertTrue(1e-4 <= p.training.variable.lr <= 1e-1)
+
+        self.assertEqual(
+            [p.training.variable.lr for p in samples],
+            [p.training.variable.lr
+             for p in random_search_space(random_params, 5, seed=0)])
+
+    @unittest.skipIf("TORCH" not in get_backends(),
+                     reason="No TORCH Backend installed")
+    def test_parameter_sweep_torch(self):
+        from delira.training import PyTorchExperiment
+
+        params = Parameters(
+            fixed_params={
+                "model": {},
+                "training": {
+                    "losses": {"CE": torch.nn.BCEWithLogitsLoss()},
+                    "optimizer_cls": torch.optim.Adam,
+                    "optimizer_params": {"lr": 1e-3},
+                    "val_metrics": {"val_mae": mean_absolute_error}}},
+            variable_params={"model": {"n_hidden": [2, 4, 8, 16]},
+                             "training": {}})
+
+        save_path = tempfile.mkdtemp()
+        # checkpoints are written after each epoch of a trial nevertheless
+        experiment = PyTorchExperiment(params, DummyNetworkTorch,
+                                       n_epochs=2, save_path=save_path,
+                                       val_score_key="mae",
+                                       checkpoint_freq=2)
+
+        dmgr_train = BaseDataManager(DummyDataset(64), 16, 1, None)
+        dmgr_val = BaseDataManager(DummyDataset(32), 16, 1, None)
+
+        with self.assertRaises(ValueError):
+            ParameterSweep(experiment, search="random")
+
+        # successive halving inside the current process
+        sweep = ParameterSweep(experiment, num_workers=0,
+                               reduction_factor=2, min_epochs=1)
+        results = sweep.run(dmgr_train, dmgr_val)
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual([result["status"] for result in results],
+                         ["completed"] * 2 + ["stopped"] * 2)
+        self.assertEqual([result["epochs"] for result in results],
+                         [2, 2, 1, 1])
+
+        # the best trials of the first round were continued
+        scores = [result["best_val_score"] for result in results]
+        self.assertLessEqual(max(scores[:2]), min(scores[2:]))
+        for result in results[:2]:
+            self.assertTrue(os.path.isfile(os.path.join(
+                result["save_path"], "checkpoint_epoch_1.pt")))
+        self.assertEqual(experiment.checkpoint_freq, 2)
+
+        with open(os.path.join(sweep.save_path, "trials.csv")) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(sorted(int(row["model.n_hidden"])
+                                for row in rows), [2, 4, 8, 16])
+
+        # trials on a process pool
+        params.permute_variability_on_top().variable.model.n_hidden = [2, 4]
+        sweep = ParameterSweep(experiment, num_workers=2,
+                               threads_per_trial=1,
+                               save_path=os.path.join(save_path, "pool"))
+        results = sweep.run(dmgr_train, dmgr_val, params=params,
+                            num_epochs=1)
+
+        self.assertEqual([result["status"] for result in results],
+                         ["completed"] * 2)
+        self.assertTrue(all(result["epochs"] == 1 for result in results))
+        self.assertTrue(all(os.path.isdir(result["save_path"])
+                            for result in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
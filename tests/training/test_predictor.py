@@ -144,6 +144,140 @@ class TestPredictor(unittest.TestCase):
         pred_dmgr = predictor.predict_data_mgr(self.dmgr)
         # print(pred_dmgr)
 
+    def test_predictor_tta(self):
+        from delira.training import Predictor
+        from delira.training.tta import Flip, Rot90, flip_transforms, \
+            rot90_transforms
+
+        batch_sizes = []
+
+        def model(x):
+            batch_sizes.append(len(x))
+            # spatial (identity) and non-spatial outputs
+            return {"seg": x, "score": x[:, :, 0, :2].reshape(len(x), -1)}
+
+        batch = {"data": np.random.rand(3, 1, 4, 6),
+                 "label": np.arange(3)}
+
+        predictor = Predictor(model, {"x": "data"},
+                              tta_transforms=flip_transforms(2))
+        self.assertEqual(len(predictor.tta_transforms), 4)
+
+        preds = predictor.predict(batch)
+        self.assertEqual(batch_sizes, [12])
+        # the transforms were inverted on the spatial predictions
+        np.testing.assert_allclose(preds["seg"], batch["data"])
+        self.assertEqual(preds["score"].shape, (3, 2))
+
+        # the views are split into multiple forward passes
+        batch_sizes.clear()
+        predictor = Predictor(
+            model, {"x": "data"},
+            tta_transforms=rot90_transforms() + [Flip((1,))],
+            tta_reduction="max", tta_max_batch_size=7)
+        preds = predictor.predict(
+            {"data": np.random.rand(3, 1, 5, 5), "label": np.arange(3)})
+        self.assertEqual(batch_sizes, [6, 6, 3])
+        self.assertEqual(preds["seg"].shape, (3, 1, 5, 5))
+
+        # rotations of non-square inputs change their spatial shape
+        data = np.random.rand(2, 1, 4, 6)
+        predictor = Predictor(model, {"x": "data"},
+                              tta_transforms=[Rot90(1), Rot90(3)],
+                              tta_spatial_keys=["seg"])
+        np.testing.assert_allclose(predictor.predict({"data": data})["seg"],
+                                   data)
+
+        # views of different shapes are predicted by separate forward passes
+        batch_sizes.clear()
+        predictor = Predictor(model, {"x": "data"},
+                              tta_transforms=rot90_transforms())
+        preds = predictor.predict({"data": data})
+        self.assertEqual(batch_sizes, [4, 4])
+        np.testing.assert_allclose(preds["seg"], data)
+        self.assertEqual(preds["score"].shape, (2, 2))
+
+    def test_ensemble_predictor(self):
+        from delira.training import EnsemblePredictor
+        from delira.training.tta import flip_transforms
+
+        prepared = []
+
+        def prepare_batch(batch):
+            prepared.append(batch)
+            return batch
+
+        def create_member(factor):
+            return lambda x: {"pred": x * factor, "meta": {"f": x * 0}}
+
+        batch = {"data": np.random.rand(4, 1, 3, 3)}
+
+        predictor = EnsemblePredictor(
+            [create_member(factor) for factor in (1, 2, 3)], {"x": "data"},
+            prepare_batch_fn=prepare_batch, num_threads=2)
+        preds = predictor.predict(batch)
+        predictor.close()
+
+        # the batch is prepared once for all members
+        self.assertEqual(len(prepared), 1)
+        np.testing.assert_allclose(preds["pred"], batch["data"] * 2)
+        self.assertEqual(preds["meta"]["f"].shape, (4, 1, 3, 3))
+
+        # stacked predictions
+        members = [create_member(factor) for factor in (1, 2, 3)]
+        preds = EnsemblePredictor(members, {"x": "data"},
+                                  reduction=None).predict(batch)
+        self.assertEqual(preds["pred"].shape, (4, 3, 1, 3, 3))
+        np.testing.assert_allclose(preds["pred"][:, 2], batch["data"] * 3)
+
+        # test-time augmentation
+        preds = EnsemblePredictor(
+            members, {"x": "data"}, reduction="min",
+            tta_transforms=flip_transforms(2)).predict(batch)
+        np.testing.assert_allclose(preds["pred"], batch["data"])
+
+        with self.assertRaises(ValueError):
+            EnsemblePredictor(members, {"x": "data"}, reduction=None,
+                              tta_transforms=flip_transforms(2))
+
+        # paging of the members
+        class Member(object):
+            def __init__(self, factor):
+                self.factor = factor
+
+            def __call__(self, x):
+                return {"pred": x * self.factor}
+
+        predictor = EnsemblePredictor([1, 2, 3], {"x": "data"},
+                                      reduction="max", load_fn=Member,
+                                      max_resident_members=2)
+        for _ in range(3):
+            preds = predictor.predict(batch)
+            np.testing.assert_allclose(preds["pred"], batch["data"] * 3)
+            self.assertLessEqual(len(predictor._resident), 2)
+
+        # alternating the order reuses the resident members
+        self.assertEqual(predictor.num_loads, 5)
+
+    @unittest.skipIf("TORCH" not in get_backends(),
+                     reason="No TORCH Backend installed")
+    def test_ensemble_predictor_grad_mode_torch(self):
+        import torch
+        from delira.training import EnsemblePredictor
+
+        def member(x):
+            return {"grad_enabled": np.array([torch.is_grad_enabled()])}
+
+        predictor = EnsemblePredictor([member, member], {"x": "data"},
+                                      reduction="min", num_threads=2)
+        batch = {"data": np.random.rand(4, 1)}
+
+        # the caller's grad mode is used inside the worker threads
+        with torch.no_grad():
+            self.assertFalse(predictor.predict(batch)["grad_enabled"].any())
+        self.assertTrue(predictor.predict(batch)["grad_enabled"].all())
+        predictor.close()
+
 
 if __name__ == '__main__':
     from multiprocessing import freeze_support
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+from functools import partial
+
+import numpy as np
+
+from delira import get_backends
+from delira.data_loading import AbstractDataset, BaseDataManager
+
+
+class DummyDataset(AbstractDataset):
+    def __init__(self, length):
+        super().__init__(None, None)
+        self.length = length
+        self.data = np.random.RandomState(0).rand(length, 1, 16, 16)
+
+    def __getitem__(self, index):
+        return {"data": self.data[index].astype(np.float32),
+                "label": np.array([index % 2])}
+
+    def __len__(self):
+        return self.length
+
+
+def accuracy(y_pred, y_true):
+    return (np.argmax(y_pred, axis=-1) == y_true.reshape(-1)).mean()
+
+
+if "TORCH" in get_backends():
+    import torch
+    from delira.models.classification import \
+        ClassificationNetworkBasePyTorch
+
+    class DummyNetworkTorch(ClassificationNetworkBasePyTorch):
+        def __init__(self):
+            super().__init__(1, 2)
+
+        def forward(self, x):
+            return {"pred": self.module(x)}
+
+        @staticmethod
+        def _build_model(in_channels, n_outputs):
+            return torch.nn.Sequential(
+                torch.nn.Conv2d(in_channels, 8, 3, padding=1),
+                torch.nn.BatchNorm2d(8), torch.nn.ReLU(),
+                torch.nn.AdaptiveAvgPool2d(1), torch.nn.Flatten(),
+                torch.nn.Linear(8, n_outputs))
+
+        @staticmethod
+        def prepare_batch(batch_dict, input_device, output_device):
+            return {"data": torch.from_numpy(batch_dict["data"]).to(
+                input_device, torch.float),
+                "label": torch.from_numpy(batch_dict["label"]).to(
+                output_device)}
+
+
+class QuantizationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dmgr = BaseDataManager(DummyDataset(32), 8, 1, transforms=None)
+
+    @unittest.skipIf("TORCH" not in get_backends(),
+                     reason="No TORCH Backend installed")
+    def test_quantize_static(self):
+        from delira.io import torch_export_torchscript
+        from delira.training import Predictor, TorchScriptPredictor, \
+            compare_quantized, quantize_static
+        from delira.training.train_utils import convert_torch_tensor_to_npy
+
+        network = DummyNetworkTorch()
+        engine = torch.backends.quantized.engine
+        quantized = quantize_static(network, self.dmgr, {"x": "data"},
+                                    num_batches=2)
+
+        # neither the original model nor the global engine are modified
+        self.assertTrue(network.training)
+        self.assertEqual(torch.backends.quantized.engine, engine)
+        self.assertTrue(any(
+            ".quantized." in type(module).__module__
+            for module in quantized.modules()))
+
+        report = compare_quantized(network, quantized, self.dmgr,
+                                   {"x": "data"}, {"acc": accuracy})
+        self.assertEqual(set(report["acc"].keys()),
+                         {"float", "quantized", "delta"})
+        self.assertLess(report["max_abs_difference"]["pred"], 0.1)
+
+        # the quantized model can be passed to a predictor directly
+        device = torch.device("cpu")
+        predictor = Predictor(
+            quantized, {"x": "data"}, convert_torch_tensor_to_npy,
+            partial(network.prepare_batch, input_device=device,
+                    output_device=device))
+        batch = {"data": np.random.rand(4, 1, 16, 16).astype(np.float32),
+                 "label": np.zeros((4, 1), dtype=np.int64)}
+        self.assertEqual(predictor.predict(batch)["pred"].shape, (4, 2))
+
+        # ... or exported and loaded by a TorchScriptPredictor
+        file = os.path.join(tempfile.mkdtemp(), "quantized.pt")
+        torch_export_torchscript(quantized, file,
+                                 {"x": torch.from_numpy(batch["data"])},
+                                 key_mapping={"x": "data"})
+        preds = TorchScriptPredictor(file).predict(batch)
+        np.testing.assert_allclose(preds["pred"],
+                                   predictor.predict(batch)["pred"],
+                                   rtol=1e-4, atol=1e-4)
+
+    @unittest.skipIf("TORCH" not in get_backends(),
+                     reason="No TORCH Backend installed")
+    def test_quantize_dynamic(self):
+        from delira.training import quantize_dynamic
+
+        network = DummyNetworkTorch()
+        quantized = quantize_dynamic(network)
+
+        self.assertIsInstance(quantized, DummyNetworkTorch)
+        self.assertIsInstance(quantized.module[-1],
+                              torch.ao.nn.quantized.dynamic.Linear)
+        self.assertIsInstance(network.module[-1], torch.nn.Linear)
+
+        x = torch.rand(2, 1, 16, 16)
+        network.eval()
+        np.testing.assert_allclose(quantized(x)["pred"].detach().numpy(),
+                                   network(x)["pred"].detach().numpy(),
+                                   atol=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import SimpleITK as sitk
+import numpy as np
+import pytest
+
+from delira.utils.imageops import bounding_box, bounding_box_array, \
+    bounding_box_slices, crop_to_foreground, max_energy_slice
+
+
+def test_bounding_box():
+    mask = np.zeros((10, 20, 30), dtype=np.uint8)
+    mask[2:4, 5, 7:20] = 1
+    mask[6, 8, 25] = 3
+
+    assert bounding_box_array(mask) == [(2, 6), (5, 8), (7, 25)]
+    assert bounding_box_array(mask, margin=(1, 10, 5)) == \
+        [(1, 7), (0, 18), (2, 29)]
+    assert bounding_box(sitk.GetImageFromArray(mask), margin=1) == \
+        (1, 7, 4, 9, 6, 26)
+
+    # same result as the coordinates of all nonzero entries
+    nz = np.nonzero(mask)
+    assert bounding_box_slices(mask) == tuple(
+        slice(coords.min(), coords.max() + 1) for coords in nz)
+
+    assert bounding_box_array(np.zeros((4, 4))) is None
+    with pytest.raises(ValueError):
+        bounding_box(sitk.GetImageFromArray(np.zeros((4, 4, 4))))
+
+    data = np.random.rand(10, 20, 30)
+    cropped, slices = crop_to_foreground(data, mask, margin=2)
+    np.testing.assert_array_equal(cropped, data[0:9, 3:11, 5:28])
+
+    cropped, _ = crop_to_foreground(np.pad(data, 3))
+    assert cropped.shape == data.shape
+
+    energy = np.zeros((5, 4, 4))
+    energy[3] = 1
+    assert max_energy_slice(sitk.GetImageFromArray(energy)) == 3
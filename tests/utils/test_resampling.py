@@ -0,0 +1,83 @@
+import json
+import os
+
+import SimpleITK as sitk
+import numpy as np
+
+from delira.data_loading.nii import load_converted_nii, \
+    read_converted_nii_header
+from delira.utils.imageops import sitk_new_blank_image, \
+    sitk_resample_to_image, sitk_resample_to_spacing
+from delira.utils.resampling import Resampler, preprocess_to_spacing, \
+    resample_files
+
+
+def _write_dummy_nii(path, shape=(10, 12, 14), spacing=(1., 2., 3.)):
+    img = sitk.GetImageFromArray(
+        np.random.rand(*shape).astype(np.float32))
+    img.SetSpacing(spacing)
+    img.SetOrigin((4., -2., 7.))
+    sitk.WriteImage(img, path)
+    return img
+
+
+def test_resampler(tmpdir):
+    img = _write_dummy_nii(str(tmpdir.join("img.nii")))
+
+    resampled = Resampler((2., 1., 1.5))(img)
+    assert resampled.GetSize() == (7, 24, 20)
+    assert resampled.GetSpacing() == (2., 1., 1.5)
+    assert resampled.GetPixelID() == img.GetPixelID()
+
+    # same result as resampling to a blank reference image
+    reference = sitk_new_blank_image(
+        resampled.GetSize(), resampled.GetSpacing(), img.GetDirection(),
+        resampled.GetOrigin())
+    np.testing.assert_allclose(
+        sitk.GetArrayFromImage(resampled),
+        sitk.GetArrayFromImage(sitk_resample_to_image(img, reference)))
+    np.testing.assert_allclose(
+        sitk.GetArrayFromImage(resampled),
+        sitk.GetArrayFromImage(sitk_resample_to_spacing(img, (2., 1., 1.5))))
+
+    paths = [str(tmpdir.join("img.nii"))] * 3
+    for _resampled in resample_files(paths, (2., 1., 1.5), n_workers=2):
+        np.testing.assert_allclose(sitk.GetArrayFromImage(_resampled),
+                                   sitk.GetArrayFromImage(resampled))
+
+
+def test_preprocess_to_spacing(tmpdir):
+    src_dir = tmpdir.mkdir("src")
+    case_dir = src_dir.mkdir("case_0")
+    _write_dummy_nii(str(case_dir.join("img.nii.gz")))
+    seg = sitk.GetImageFromArray(
+        np.random.randint(0, 3, (10, 12, 14)).astype(np.uint8))
+    seg.SetSpacing((1., 2., 3.))
+    sitk.WriteImage(seg, str(case_dir.join("seg.nii.gz")))
+
+    dst_dir = str(tmpdir.join("dst"))
+    out_paths = preprocess_to_spacing(str(src_dir), dst_dir, (1., 1., 1.),
+                                      nearest_patterns=("seg*",),
+                                      n_workers=2)
+    assert sorted(os.path.basename(path) for path in out_paths) == \
+        ["img.npy", "seg.npy"]
+
+    header = read_converted_nii_header(out_paths[0])
+    assert header["spacing"] == (1., 1., 1.)
+    assert header["shape"] == (30, 24, 14)
+
+    # segmentations are not interpolated
+    seg_path = [path for path in out_paths if "seg" in path][0]
+    assert set(np.unique(load_converted_nii(seg_path))) <= {0, 1, 2}
+
+    # cached files are reused as long as the settings don't change
+    mtime = os.path.getmtime(out_paths[0])
+    preprocess_to_spacing(str(src_dir), dst_dir, (1., 1., 1.),
+                          nearest_patterns=("seg*",))
+    assert os.path.getmtime(out_paths[0]) == mtime
+
+    preprocess_to_spacing(str(src_dir), dst_dir, (2., 2., 2.),
+                          nearest_patterns=("seg*",))
+    assert read_converted_nii_header(out_paths[0])["shape"] == (15, 12, 7)
+    with open(os.path.join(dst_dir, "preprocessing.json")) as f:
+        assert json.load(f)["spacing"] == [2., 2., 2.]